@@ -5,8 +5,15 @@ export PYTHONPATH=$PYTHONPATH:$(pwd)
 # Create logs directory if it doesn't exist
 mkdir -p logs
 
+# Emoji glyphs for /tynm posters - built once, then kept in src/resources/emoji
+if [ -z "$(ls -A src/resources/emoji 2>/dev/null)" ]; then
+    make emoji-store || echo "Couldn't build the emoji store, posters will draw emojis with the text font"
+fi
+
 cd src
 
+uv run python -m src.db.migrations up
+
 # Pipe output to both stdout and log file
 # 2>&1 redirects stderr to stdout, tee writes to both file and terminal
 uv run python chaddi.py 2>&1 | tee ../logs/chaddi.log
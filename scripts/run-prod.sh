@@ -20,5 +20,8 @@ uv sync
 
 cd src
 
+echo ">>> applying db migrations..."
+uv run python -m src.db.migrations up
+
 echo ">>> running chaddi-tg..."
 uv run python chaddi.py >../logs/chaddi.log 2>&1 &
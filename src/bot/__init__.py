@@ -8,10 +8,28 @@ from telegram.ext import (
     filters,
 )
 
-from src.domain import config, tg_logger, version
-from src.domain.scheduler import reschedule_saved_jobs, schedule_daily_posts
+from src.db import aio, bakchod_cache, group_cache, message_queue
+from src.domain import (
+    analytics,
+    config,
+    downloads,
+    emoji_glyphs,
+    http_client,
+    rendering,
+    textures,
+    tg_logger,
+    version,
+)
+from src.domain.scheduler import (
+    reschedule_saved_jobs,
+    schedule_daily_posts,
+    schedule_lookup_cache_prune,
+    schedule_message_archive,
+    schedule_partition_maintenance,
+)
 
 from . import handlers
+from .handlers import tynm
 
 app_config = config.get_config()
 
@@ -46,8 +64,23 @@ async def post_init(application: Application) -> None:
         )
     )
 
+    message_queue.start()
+    bakchod_cache.start()
+    analytics.start()
+    downloads.start()
+    await group_cache.start()
+
+    textures.start(tynm.POSTER_WIDTH, tynm.POSTER_HEIGHT)
+
+    # Without holding up startup, start the render workers, each loading the
+    # /tynm render assets once
+    application.create_task(start_rendering())
+
     reschedule_saved_jobs(application.job_queue)
     schedule_daily_posts(application.job_queue)
+    schedule_partition_maintenance(application.job_queue)
+    schedule_message_archive(application.job_queue)
+    schedule_lookup_cache_prune(application.job_queue)
 
 
 async def run_telegram_bot():
@@ -144,9 +177,22 @@ async def run_telegram_bot():
         await application.updater.stop()
         await application.stop()
         await application.shutdown()
+        await bakchod_cache.stop()
+        await message_queue.stop()
+        await analytics.stop()
+        await downloads.stop()
+        await textures.stop()
+        rendering.stop()
+        await http_client.close()
+        aio.shutdown()
         raise
 
 
+async def start_rendering():
+    emoji_glyphs.warn_if_empty()
+    await asyncio.to_thread(rendering.start, tynm.preload_render_assets)
+
+
 def get_bot_instance():
     global bot_instance
     return bot_instance
@@ -56,8 +56,6 @@ def is_wordle_result(message_text: str) -> bool:
 
     # check remaining lines
     for line in messages_text_lines[2:]:
-        logger.debug("[antiwordle] checking line={}", line)
-
         if line is None:
             return False
 
@@ -0,0 +1,60 @@
+"""
+Tags a message for the passive handlers in defaults.all.
+
+classify() looks at the text once - one lowercase copy, one precompiled regex
+for every link detector - and returns the tags that matched, so defaults.all
+only awaits the handlers that have something to do. New link detectors are
+added to URL_DETECTORS rather than as another scan of every message.
+"""
+
+import re
+
+from telegram import Message
+
+from . import antiwordle, instagram, musiclinks, x_links
+
+HI = "hi"
+BESTIE = "bestie"
+WORDLE = "wordle"
+MENTION = "mention"
+MUSIC_URL = "music_url"
+X_URL = "x_url"
+INSTAGRAM_URL = "instagram_url"
+
+# tag -> pattern. Each pattern has to match a URL starting with http(s)://
+URL_DETECTORS = {
+    MUSIC_URL: musiclinks.MUSIC_URL_REGEX,
+    X_URL: f"(?i:{x_links.X_URL_REGEX.pattern})",
+    INSTAGRAM_URL: instagram.INSTAGRAM_URL_REGEX,
+}
+
+_URL_REGEX = re.compile("|".join(f"(?P<{tag}>{pattern})" for tag, pattern in URL_DETECTORS.items()))
+
+
+def classify(message: Message) -> frozenset[str]:
+    tags = set()
+    text = message.text
+
+    if text:
+        lowered = text.lower()
+
+        if lowered == "hi":
+            tags.add(HI)
+
+        if "bestie" in lowered:
+            tags.add(BESTIE)
+
+        if text.startswith("Wordle") and antiwordle.is_wordle_result(text):
+            tags.add(WORDLE)
+
+        # Most messages have no links at all
+        if "http" in lowered:
+            for match in _URL_REGEX.finditer(text):
+                tags.update(tag for tag in URL_DETECTORS if match.group(tag) is not None)
+
+    for entity in message.entities or message.caption_entities or ():
+        if entity.type in ("mention", "text_mention"):
+            tags.add(MENTION)
+            break
+
+    return frozenset(tags)
@@ -6,7 +6,7 @@ from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import bakchod_dao
+from src.db import aio, bakchod_dao, rokda_dao
 from src.domain import config, dc, util
 
 app_config = config.get_config()
@@ -34,15 +34,18 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         # Extract Sender
-        sender = bakchod_dao.get_or_create_bakchod_from_tg_user(update.message.from_user)
+        sender = await aio.run(
+            bakchod_dao.get_or_create_bakchod_from_tg_user, update.message.from_user
+        )
 
         # Extract Receiver
         receiver = None
 
         if update.message.reply_to_message:
             # Request is a reply to message... Extract receiver from ID
-            receiver = bakchod_dao.get_or_create_bakchod_from_tg_user(
-                update.message.reply_to_message.from_user
+            receiver = await aio.run(
+                bakchod_dao.get_or_create_bakchod_from_tg_user,
+                update.message.reply_to_message.from_user,
             )
 
             # Donation can be the rest of the message
@@ -53,8 +56,8 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message.entities:
                 for entity in update.message.entities:
                     if entity.type == "text_mention" and entity.user is not None:
-                        receiver = bakchod_dao.get_or_create_bakchod_from_tg_user(
-                            update.entity.user.id
+                        receiver = await aio.run(
+                            bakchod_dao.get_or_create_bakchod_from_tg_user, update.entity.user.id
                         )
 
             # Last attempt... try to lookup username in DB
@@ -65,7 +68,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 if receiver_username.startswith("@"):
                     receiver_username = receiver_username[1:]
 
-                receiver = bakchod_dao.get_bakchod_by_username(receiver_username)
+                receiver = await aio.run(bakchod_dao.get_bakchod_by_username, receiver_username)
 
             # Donation can be the rest of the message
             donation = query[2:]
@@ -92,8 +95,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(
                 f"Yeh dekho chutiyapa chal ra hai. Setting {util.extract_pretty_name_from_bakchod(sender)}'s rokda to 0!"
             )
-            sender.rokda = 0
-            sender.save()
+            await aio.run(rokda_dao.set_balance, sender, 0, "daan_penalty")
             return
 
         logger.info(
@@ -103,12 +105,6 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             daan,
         )
 
-        # Checking if sender has enough rokda
-        sender_rokda = sender.rokda
-        if (sender_rokda - daan) < 0:
-            await update.message.reply_text("Gareeb saale! You don't have enough ₹okda!")
-            return
-
         # Sender is trying to daan to themselves... :thinking_face:
         if sender.tg_id == receiver.tg_id:
             logger.info("[daan] Sender is trying to daan to themselves... :thinking_face:")
@@ -117,21 +113,15 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_sticker(sticker=sticker_to_send)
             return
 
-        # Commit Daan transaction to DB
-        sender_rokda_pre_tx = sender.rokda
-        sender.rokda = sender.rokda - daan
-        sender.save()
-
-        receiver_rokda_pre_tx = receiver.rokda
-        receiver.rokda = receiver.rokda + daan
-        receiver.save()
+        # Commit Daan transaction to DB - fails if the sender doesn't have enough rokda
+        balances = await aio.run(rokda_dao.transfer, sender, receiver, daan, "daan")
+        if balances is None:
+            await update.message.reply_text("Gareeb saale! You don't have enough ₹okda!")
+            return
 
         logger.info(
-            "[daan] commit daan tx - sender_rokda_pre_tx={} sender.rokda={} receiver_rokda_pre_tx={} receiver.rokda={}",
-            sender_rokda_pre_tx,
-            sender.rokda,
-            receiver_rokda_pre_tx,
-            receiver.rokda,
+            "[daan] commit daan tx - sender.rokda={} receiver.rokda={}",
+            *balances,
         )
 
         response = f"{util.extract_pretty_name_from_bakchod(sender)} gave {util.extract_pretty_name_from_bakchod(receiver)} 🤲 a daan of {daan} ₹okda! 🎉 "
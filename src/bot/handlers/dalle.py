@@ -73,7 +73,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
                 logger.info("[dalle] generated image_url={} prompt='{}'", image_url, prompt)
 
-                resource_path = util.acquire_external_resource(image_url, f"dalle_{uuid.uuid4()}")
+                resource_path = await util.acquire_external_resource(
+                    image_url, f"dalle_{uuid.uuid4()}"
+                )
 
                 with open(resource_path, "rb") as photo_to_upload:
                     logger.info("[dalle] uploading completed photo")
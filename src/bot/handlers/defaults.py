@@ -1,20 +1,34 @@
+import asyncio
 import random
+import time
 import traceback
 from datetime import datetime
 
 from loguru import logger
-from peewee import DoesNotExist
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.bot.handlers import mom_spacy, roll
-from src.db import EMPTY_JSON, Bakchod, GroupMember, bakchod_dao, group_dao
-from src.domain import config, dc, rokda, util
+from src.db import EMPTY_JSON, Bakchod, bakchod_dao, group_dao, rokda_dao
+from src.domain import config, dc, metrics, rokda, util
 
-from . import ai, antiwordle, bestie, hi, instagram, musiclinks, x_links
+from . import ai, antiwordle, bestie, classifier, hi, instagram, musiclinks, x_links
 
 app_config = config.get_config()
 
+# Seconds each passive handler in all() gets before it's cancelled
+DEFAULT_PASSIVE_HANDLER_TIMEOUT = 15
+PASSIVE_HANDLER_TIMEOUTS = {
+    "message_matching": 10,
+    # An LLM round trip
+    "bot_mention": 120,
+    "antiwordle": 10,
+    "musiclinks": 20,
+    "x_links": 10,
+    # Page fetch plus downloading and re-uploading the media
+    "instagram": 90,
+}
+
 # Config values are sometimes quoted - normalize to a bare lowercase username
 BOT_USERNAME = app_config.get("TELEGRAM", "BOT_USERNAME").strip().strip("\"'").lstrip("@").lower()
 
@@ -31,25 +45,65 @@ async def all(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     # Reward rokda to Bakchod
     b = bakchod_dao.get_or_create_bakchod_from_tg_user(from_user)
-    b.rokda = rokda.reward_rokda(b.rokda)
+    rokda_dao.reward(b, rokda.reward_amount(b.rokda))
     b.updated = datetime.now()
-    b.save()
+    bakchod_dao.save_deferred(b)
+
+    # Scan the text once and only run the handlers that matched
+    tags = classifier.classify(update.message)
 
+    # These can act on the message itself (censoring deletes it), so they run
+    # in order and finish before anything else looks at it
     await handle_bakchod_metadata_effects(update, context, b)
 
     await handle_dice_rolls(update, context)
 
-    await handle_message_matching(update, context)
+    passive = []
+
+    if classifier.HI in tags or classifier.BESTIE in tags:
+        passive.append(("message_matching", handle_message_matching(update, context, tags)))
+
+    if classifier.MENTION in tags:
+        passive.append(("bot_mention", handle_bot_mention(update, context)))
+
+    if classifier.WORDLE in tags:
+        passive.append(("antiwordle", antiwordle.handle(update, context)))
+
+    if classifier.MUSIC_URL in tags:
+        passive.append(("musiclinks", musiclinks.handle(update, context)))
 
-    await handle_bot_mention(update, context)
+    if classifier.X_URL in tags:
+        passive.append(("x_links", x_links.handle(update, context)))
 
-    await antiwordle.handle(update, context)
+    if classifier.INSTAGRAM_URL in tags:
+        passive.append(("instagram", instagram.handle(update, context)))
 
-    await musiclinks.handle(update, context)
+    # Independent of each other, so a slow lookup doesn't hold up the rest
+    if passive:
+        await asyncio.gather(*(run_passive_handler(name, coro) for name, coro in passive))
 
-    await x_links.handle(update, context)
 
-    await instagram.handle(update, context)
+async def run_passive_handler(name: str, coro):
+    """Await a passive handler within its PASSIVE_HANDLER_TIMEOUTS budget, recording how it went."""
+    timeout = PASSIVE_HANDLER_TIMEOUTS.get(name, DEFAULT_PASSIVE_HANDLER_TIMEOUT)
+    start = time.perf_counter()
+    status = "ok"
+
+    try:
+        async with asyncio.timeout(timeout):
+            await coro
+    except TimeoutError:
+        status = "timeout"
+        logger.warning(
+            "[defaults] passive handler timed out - handler={} timeout={}", name, timeout
+        )
+    except Exception as e:
+        status = "error"
+        logger.error(
+            "Caught Error in passive handler {} - {} \n {}", name, e, traceback.format_exc()
+        )
+    finally:
+        metrics.observe_passive_handler(name, time.perf_counter() - start, status)
 
 
 async def handle_bakchod_metadata_effects(
@@ -143,17 +197,19 @@ async def handle_bakchod_metadata_effects(
     return
 
 
-async def handle_message_matching(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    message_text = update.message.text
+async def handle_message_matching(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, tags: frozenset[str] | None = None
+):
+    if tags is None:
+        tags = classifier.classify(update.message)
 
-    if message_text is not None:
-        # Handle 'hi' messages
-        if message_text.lower() == "hi":
-            await hi.handle(update, context, log_to_dc=False)
+    # Handle 'hi' messages
+    if classifier.HI in tags:
+        await hi.handle(update, context, log_to_dc=False)
 
-        # Handle bestie messages
-        if "bestie" in message_text.lower():
-            await bestie.handle(update, context, log_to_dc=False)
+    # Handle bestie messages
+    if classifier.BESTIE in tags:
+        await bestie.handle(update, context, log_to_dc=False)
 
     return
 
@@ -266,19 +322,13 @@ async def status_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         for new_member in new_chat_members:
             b = bakchod_dao.get_or_create_bakchod_from_tg_user(new_member)
 
-            try:
-                GroupMember.get(
-                    (GroupMember.group_id == g.group_id) & (GroupMember.bakchod_id == b.tg_id)
-                )
-            except DoesNotExist:
+            if group_dao.add_bakchod_to_group(b, g.group_id):
                 logger.info(
                     "[status_update] bakchod={} has joined group={}",
                     b.tg_id,
                     g.group_id,
                 )
 
-                GroupMember.create(group=g, bakchod=b)
-
     # Handle left_chat_member
     left_chat_member = message.left_chat_member
 
@@ -287,6 +337,4 @@ async def status_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
         logger.info("[status_update] bakchod={} has left group={}", b.tg_id, g.group_id)
 
-        GroupMember.delete().where(
-            (GroupMember.group_id == g.group_id) & (GroupMember.bakchod_id == b.tg_id)
-        ).execute()
+        group_dao.remove_bakchod_from_group(b, g.group_id)
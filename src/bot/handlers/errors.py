@@ -1,13 +1,19 @@
 import traceback
 
 from loguru import logger
+from peewee import InterfaceError, OperationalError
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from src.db import reset_connection
 from src.domain import tg_logger
 
 
 async def log_error(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if isinstance(context.error, (InterfaceError, OperationalError)):
+        # Don't keep handing a dead connection to every later update
+        reset_connection()
+
     if not update:
         return
 
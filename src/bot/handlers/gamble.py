@@ -7,7 +7,7 @@ from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod, bakchod_dao
+from src.db import Bakchod, aio, bakchod_dao, rokda_dao
 from src.domain import dc, util
 
 
@@ -15,14 +15,14 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         dc.log_command_usage("gamble", update)
 
-        b = bakchod_dao.get_or_create_bakchod_from_tg_user(update.message.from_user)
+        b = await aio.run(bakchod_dao.get_or_create_bakchod_from_tg_user, update.message.from_user)
 
         can_gamble, response = can_bakchod_gamble(b)
         if not can_gamble:
             await update.message.reply_text(response)
             return
 
-        response = gamble(b, update)
+        response = await aio.run(gamble, b, update)
         await update.message.reply_text(response)
 
     except Exception as e:
@@ -47,64 +47,71 @@ def gamble(bakchod: Bakchod, update: Update):
 
     roll = random.random()
 
+    # Change to the gambler's rokda, and what random_bakchod gets out of it
+    won = 0
+    gift = 0
+    lose_fortune = False
+
     if roll > 0.98:
         response = "HOLY CRAP! You won! +500 ₹okda"
-        bakchod.rokda = bakchod.rokda + 500
+        won = 500
     elif roll > 0.95:
         response = "OMG! You won! +400 ₹okda"
-        bakchod.rokda = bakchod.rokda + 400
+        won = 400
     elif roll > 0.90:
         response = "You ballin now fam. just won 300 ₹okda"
-        bakchod.rokda = bakchod.rokda + 300
+        won = 300
     elif roll > 0.85:
         response = f"You won 200 ₹okda and gifted 15 to {random_bakchod_pretty_name}"
-        bakchod.rokda = bakchod.rokda + 200
-        if random_bakchod is not None:
-            random_bakchod.rokda += 15
+        won = 200
+        gift = 15
     elif roll > 0.75:
         response = "You won +100 ₹okda... this is pretty good tbh!"
-        bakchod.rokda = bakchod.rokda + 100
+        won = 100
     elif roll > 0.65:
         response = "Boond boond se sagar banta... You won! +50 ₹okda"
-        bakchod.rokda = bakchod.rokda + 50
+        won = 50
     elif roll > 0.55:
         response = "Your wallet got stolen in the local train, good thing ₹okda are digital. Take +1 ₹okda in pity"
-        bakchod.rokda = bakchod.rokda + 1
+        won = 1
     elif roll > 0.45:
         response = f"{random_bakchod_pretty_name} brought you chai and you tipped him 100 ₹okda"
-        bakchod.rokda = bakchod.rokda - 100
-        if random_bakchod is not None:
-            random_bakchod.rokda += 100
+        won = -100
+        gift = 100
     elif roll > 0.35:
         response = "No win / no loss... but you still paid entry fee of 250 ₹okda!"
-        bakchod.rokda = bakchod.rokda - 250
+        won = -250
     elif roll > 0.25:
         response = (
             "You got drunk at the bar and drove back home... and also got a chalan of 375 ₹okda"
         )
-        bakchod.rokda = bakchod.rokda - 375
+        won = -375
     elif roll > 0.15:
         response = f"You actually won... but while leaving the casino you got mugged by {random_bakchod_pretty_name} and lost 500 ₹okda!"
-        bakchod.rokda = bakchod.rokda - 500
-        if random_bakchod is not None:
-            random_bakchod.rokda += 500
+        won = -500
+        gift = 500
     elif roll > 0.01:
         response = "CBI Raided ChaddiInc... That 1000 you just won was derokdatized!"
-        bakchod.rokda = bakchod.rokda - 1000
+        won = -1000
     elif roll > 0.001:
         response = f"You lost your entire fortune (and Paul's Kwid) to {random_bakchod_pretty_name}. Gambling can suck!"
-        if random_bakchod is not None:
-            random_bakchod.rokda += bakchod.rokda
-        bakchod.rokda = 1
-
-    # Close their accounts at 0 if they're in negatives
-    if bakchod.rokda < 0:
-        bakchod.rokda = 0
+        lose_fortune = True
+
+    # What the gambler loses to random_bakchod moves in one transaction, so
+    # they only get what was actually taken
+    counterparty = random_bakchod if gift or lose_fortune else None
+
+    if lose_fortune:
+        # Everything but 1 ₹okda, going by the db rather than this instance
+        rokda_dao.debit_all_but(bakchod, 1, "gamble", counterparty=counterparty)
+    elif won > 0:
+        rokda_dao.credit(bakchod, won, "gamble")
+        if counterparty is not None:
+            rokda_dao.credit(counterparty, gift, "gamble", counterparty=bakchod)
+    # Close their accounts at 0 if they'd go into negatives
+    elif won < 0 and rokda_dao.debit_upto(bakchod, -won, "gamble", counterparty=counterparty) == 0:
         response = response + " You're bankrupt with 0 ₹okda, enroll into ChaddiInc Narega!"
 
-    if random_bakchod is not None:
-        random_bakchod.save()
-
     # Update metadata
     bakchod.metadata["last_time_gambled"] = datetime.datetime.now().isoformat()
     bakchod.save()
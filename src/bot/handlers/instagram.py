@@ -1,33 +1,95 @@
+"""
+Replies to Instagram links with the post's media.
+
+A post's media URL is resolved by one of STRATEGIES. resolve_media keeps a
+moving average of each strategy's success rate and latency and tries the
+cheapest expected one first. A strategy whose success rate falls below
+STRATEGY_MIN_SUCCESS_RATE is skipped, apart from one probe every
+STRATEGY_PROBE_INTERVAL_SECONDS to notice when it works again. Resolved media is
+cached per shortcode for MEDIA_CACHE_TTL_MINUTES, and shortcodes nothing could
+resolve for FAILURE_CACHE_TTL_SECONDS.
+"""
+
+import asyncio
+import datetime
 import json
 import re
 import tempfile
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
-import httpx
 import instaloader
 from instaloader import Post
 from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from src.db.lookup_cache import LookupCache
+from src.domain import config, http_client, metrics, transcode
+
+from . import media_cache
+
+app_config = config.get_config()
+
 INSTAGRAM_URL_REGEX = r"https?://(?:www\.)?instagram\.com/(?:reel|p)/([a-zA-Z0-9_-]+)/?"
 
+STRATEGY_MIN_SUCCESS_RATE = float(
+    app_config.get("INSTAGRAM", "STRATEGY_MIN_SUCCESS_RATE", fallback="0.2")
+)
+STRATEGY_PROBE_INTERVAL_SECONDS = int(
+    app_config.get("INSTAGRAM", "STRATEGY_PROBE_INTERVAL_SECONDS", fallback="900")
+)
+# Weight of the latest attempt in the moving averages
+STRATEGY_EWMA_ALPHA = 0.2
+
+resolved_cache = LookupCache(
+    "instagram",
+    ttl=datetime.timedelta(
+        minutes=int(app_config.get("INSTAGRAM", "MEDIA_CACHE_TTL_MINUTES", fallback="60"))
+    ),
+    negative_ttl=datetime.timedelta(
+        seconds=int(app_config.get("INSTAGRAM", "FAILURE_CACHE_TTL_SECONDS", fallback="120"))
+    ),
+)
+
+
+@dataclass
+class StrategyStats:
+    success_rate: float = 1.0
+    latency: float = 0.0
+    last_attempt: float = 0.0
+
+    def record(self, ok: bool, seconds: float):
+        self.success_rate += STRATEGY_EWMA_ALPHA * ((1.0 if ok else 0.0) - self.success_rate)
+        self.latency += STRATEGY_EWMA_ALPHA * (seconds - self.latency)
+        self.last_attempt = time.monotonic()
+
+    def expected_cost(self) -> float:
+        """Seconds spent per successful resolve."""
+        return max(self.latency, 0.01) / max(self.success_rate, 0.01)
 
-async def download_media_via_instaloader(shortcode: str) -> tuple[str | None, str | None]:
-    try:
-        loader = instaloader.Instaloader()
-        post = Post.from_shortcode(loader.context, shortcode)
 
-        caption = post.caption
-        if caption:
-            caption = caption[:500]
+def _instaloader_lookup(shortcode: str) -> tuple[str | None, str | None]:
+    loader = instaloader.Instaloader()
+    post = Post.from_shortcode(loader.context, shortcode)
 
-        media_url = post.video_url if post.is_video else post.url
-        return media_url, caption
+    caption = post.caption
+    if caption:
+        caption = caption[:500]
+
+    media_url = post.video_url if post.is_video else post.url
+    return media_url, caption
+
+
+async def download_media_via_instaloader(shortcode: str) -> tuple[str | None, str | None]:
+    try:
+        # instaloader is blocking
+        return await asyncio.to_thread(_instaloader_lookup, shortcode)
     except Exception as e:
         # Instagram's anonymous GraphQL access is rate-limited almost
         # unconditionally in production, so this fails routinely and is
-        # expected to be handled by the download_media_via_api fallback.
+        # expected to be handled by the download_media_via_api strategy.
         logger.warning(f"[instagram] instaloader error: {e}")
         return None, None
 
@@ -39,53 +101,109 @@ async def download_media_via_api(shortcode: str) -> tuple[str | None, str | None
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, follow_redirects=True, timeout=30.0)
+        response = await http_client.get(url, headers=headers, timeout=30.0)
 
-            if response.status_code != 200:
-                logger.warning(f"[instagram] page fetch returned status {response.status_code}")
-                return None, None
+        if response.status_code != 200:
+            logger.warning(f"[instagram] page fetch returned status {response.status_code}")
+            return None, None
 
-            html = response.text
+        html = response.text
 
-            share_data_match = re.search(r'"share_data":\s*({.*?})\s*[,}]', html)
-            if share_data_match:
-                share_data = json.loads(share_data_match.group(1))
-                media_url = share_data.get("video_url") or share_data.get("image_url")
-                caption = share_data.get("caption", "")
+        share_data_match = re.search(r'"share_data":\s*({.*?})\s*[,}]', html)
+        if share_data_match:
+            share_data = json.loads(share_data_match.group(1))
+            media_url = share_data.get("video_url") or share_data.get("image_url")
+            caption = share_data.get("caption", "")
 
-                if media_url:
-                    return media_url, caption if caption else None
+            if media_url:
+                return media_url, caption if caption else None
 
-            ld_json_match = re.search(
-                r'<script type="application/ld\+json"[^>]*>(.*?)</script>', html, re.DOTALL
-            )
-            if ld_json_match:
-                try:
-                    ld_json = json.loads(ld_json_match.group(1))
-                    if isinstance(ld_json, dict):
-                        if ld_json.get("@type") == "VideoObject":
-                            return ld_json.get("contentUrl"), ld_json.get("description")
-                        elif ld_json.get("@type") == "ImageObject":
-                            return ld_json.get("contentUrl"), ld_json.get("caption")
-                except json.JSONDecodeError:
-                    pass
-
-            video_match = re.search(r'"video_url":"([^"]+)"', html)
-            if video_match:
-                return video_match.group(1).replace("\\/", "/"), None
-
-            image_match = re.search(r'"display_url":"([^"]+)"', html)
-            if image_match:
-                return image_match.group(1).replace("\\/", "/"), None
+        ld_json_match = re.search(
+            r'<script type="application/ld\+json"[^>]*>(.*?)</script>', html, re.DOTALL
+        )
+        if ld_json_match:
+            try:
+                ld_json = json.loads(ld_json_match.group(1))
+                if isinstance(ld_json, dict):
+                    if ld_json.get("@type") == "VideoObject":
+                        return ld_json.get("contentUrl"), ld_json.get("description")
+                    elif ld_json.get("@type") == "ImageObject":
+                        return ld_json.get("contentUrl"), ld_json.get("caption")
+            except json.JSONDecodeError:
+                pass
 
-            return None, None
+        video_match = re.search(r'"video_url":"([^"]+)"', html)
+        if video_match:
+            return video_match.group(1).replace("\\/", "/"), None
+
+        image_match = re.search(r'"display_url":"([^"]+)"', html)
+        if image_match:
+            return image_match.group(1).replace("\\/", "/"), None
+
+        return None, None
 
     except Exception as e:
         logger.error(f"[instagram] api fallback error: {e}")
         return None, None
 
 
+STRATEGIES = {
+    "instaloader": download_media_via_instaloader,
+    "page": download_media_via_api,
+}
+
+_stats: dict[str, StrategyStats] = {name: StrategyStats() for name in STRATEGIES}
+
+
+def choose_strategies() -> list[str]:
+    """The strategies worth trying now, cheapest expected first."""
+    now = time.monotonic()
+    usable = [
+        name
+        for name, stats in _stats.items()
+        if stats.success_rate >= STRATEGY_MIN_SUCCESS_RATE
+        or now - stats.last_attempt >= STRATEGY_PROBE_INTERVAL_SECONDS
+    ]
+
+    # If everything is failing, failing slowly beats not trying
+    if not usable:
+        usable = list(_stats)
+
+    return sorted(usable, key=lambda name: _stats[name].expected_cost())
+
+
+async def _resolve_uncached(shortcode: str) -> dict | None:
+    for name in choose_strategies():
+        started = time.perf_counter()
+        media_url, caption = await STRATEGIES[name](shortcode)
+        seconds = time.perf_counter() - started
+
+        _stats[name].record(media_url is not None, seconds)
+        metrics.observe_instagram_strategy(name, seconds, "ok" if media_url else "failed")
+
+        if media_url:
+            logger.info(
+                "[instagram] resolved - shortcode={} strategy={} seconds={:.2f}",
+                shortcode,
+                name,
+                seconds,
+            )
+            return {"media_url": media_url, "caption": caption}
+
+        logger.info("[instagram] strategy failed - shortcode={} strategy={}", shortcode, name)
+
+    return None
+
+
+async def resolve_media(shortcode: str) -> tuple[str | None, str | None]:
+    """The post's (media_url, caption), or (None, None) if no strategy could resolve it."""
+    resolved = await resolved_cache.get_or_fetch(shortcode, lambda: _resolve_uncached(shortcode))
+    if resolved is None:
+        return None, None
+
+    return resolved["media_url"], resolved["caption"]
+
+
 async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_text = update.message.text
 
@@ -100,35 +218,38 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     shortcode = match.group(1)
     logger.info(f"[instagram] detected instagram link: {url} (shortcode: {shortcode})")
 
-    media_url = None
-    caption = None
+    cache_key = f"instagram:{shortcode}"
+    if await media_cache.reply_cached(cache_key, update.message):
+        return
 
-    media_url, caption = await download_media_via_instaloader(shortcode)
-
-    if not media_url:
-        logger.info("[instagram] trying fallback method via direct API")
-        media_url, caption = await download_media_via_api(shortcode)
+    media_url, caption = await resolve_media(shortcode)
 
     if not media_url:
         logger.warning("[instagram] could not extract media URL")
         return
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(media_url, follow_redirects=True, timeout=60.0)
-            response.raise_for_status()
+        response = await http_client.get(media_url, timeout=60.0)
+        response.raise_for_status()
 
-            suffix = ".mp4" if media_url.endswith(".mp4") else ".jpg"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
-                f.write(response.content)
-                temp_path = f.name
+        suffix = ".mp4" if media_url.endswith(".mp4") else ".jpg"
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
+            f.write(response.content)
+            temp_path = f.name
 
         try:
+            if media_url.endswith(".mp4") and transcode.needs_transcode(temp_path):
+                # Too big to upload as it is
+                converted_path = await transcode.to_mp4(temp_path)
+                Path(temp_path).unlink(missing_ok=True)
+                temp_path = converted_path
+
             with open(temp_path, "rb") as f:
                 if media_url.endswith(".mp4"):
-                    await update.message.reply_video(video=f, caption=caption)
+                    sent = await update.message.reply_video(video=f, caption=caption)
                 else:
-                    await update.message.reply_photo(photo=f, caption=caption)
+                    sent = await update.message.reply_photo(photo=f, caption=caption)
+            await media_cache.remember(cache_key, sent)
             logger.info("[instagram] replied with downloaded media")
         finally:
             Path(temp_path).unlink(missing_ok=True)
@@ -0,0 +1,89 @@
+"""
+Telegram file_ids of media the bot has already uploaded.
+
+Telegram lets a bot send anything it uploaded before by its file_id, without
+the bytes. Handlers key what they upload by what it was made from - a video id,
+an Instagram shortcode, the file_unique_id of the file they converted - and
+answer a repeat request with reply_cached instead of downloading, converting
+and uploading the same media again.
+"""
+
+import datetime
+
+from loguru import logger
+from telegram import Message
+from telegram.error import BadRequest
+
+from src.db.lookup_cache import LookupCache
+from src.domain import config
+
+app_config = config.get_config()
+
+# key -> {"kind": ..., "file_id": ..., "caption": ...}
+file_ids = LookupCache(
+    "tg_media",
+    ttl=datetime.timedelta(
+        days=int(app_config.get("TELEGRAM", "MEDIA_CACHE_TTL_DAYS", fallback="180"))
+    ),
+    max_entries=int(app_config.get("TELEGRAM", "MEDIA_CACHE_MAX_ENTRIES", fallback="1000")),
+)
+
+# In the order they're looked for - a sent animation also has a document
+KINDS = ("video", "animation", "photo", "document")
+
+
+def media_of(message: Message) -> tuple[str, str] | None:
+    """The (kind, file_id) of the media in a message the bot sent."""
+    for kind in KINDS:
+        media = getattr(message, kind, None)
+        if not media:
+            continue
+
+        # Photos come as a list of sizes, largest last
+        file_id = media[-1].file_id if kind == "photo" else media.file_id
+        if isinstance(file_id, str):
+            return kind, file_id
+
+    return None
+
+
+async def remember(key: str, message: Message):
+    media = media_of(message)
+    if media is None:
+        return
+
+    kind, file_id = media
+    await file_ids.put(key, {"kind": kind, "file_id": file_id, "caption": message.caption})
+
+
+async def get_file_id(key: str) -> str | None:
+    cached = await file_ids.lookup(key)
+    return cached["file_id"] if cached is not None else None
+
+
+async def forget(key: str):
+    await file_ids.forget(key)
+
+
+async def reply_cached(key: str, message: Message, **kwargs) -> bool:
+    """
+    Reply to message with the media cached for key. Returns whether it was
+    sent. kwargs go to the reply - the caption defaults to the one the media
+    was first sent with. A file_id Telegram no longer accepts is forgotten.
+    """
+    cached = await file_ids.lookup(key)
+    if cached is None:
+        return False
+
+    kwargs.setdefault("caption", cached["caption"])
+    reply = getattr(message, f"reply_{cached['kind']}")
+
+    try:
+        await reply(cached["file_id"], **kwargs)
+    except BadRequest as e:
+        logger.warning("[media_cache] cached file_id rejected - key={} e={}", key, e)
+        await file_ids.forget(key)
+        return False
+
+    logger.info("[media_cache] sent cached media - key={} kind={}", key, cached["kind"])
+    return True
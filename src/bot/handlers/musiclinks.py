@@ -1,15 +1,64 @@
+import datetime
 import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import httpx
 from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from src.db.lookup_cache import LookupCache
+from src.domain import config, http_client
+
+app_config = config.get_config()
+
 # Regex to match common music streaming URLs
 # This is a basic regex and can be expanded.
 # Matches: spotify, apple music, youtube, youtube music, deezer, tidal, soundcloud, etc.
 MUSIC_URL_REGEX = r"(https?://(?:open\.spotify\.com|music\.apple\.com|www\.youtube\.com|youtu\.be|music\.youtube\.com|www\.deezer\.com|www\.soundcloud\.com|listen\.tidal\.com|tidal\.com|play\.anghami\.com)[^\s]+)"
 
+SONGLINK_API_URL = "https://api.song.link/v1-alpha.1/links"
+
+# Query params that only say who shared the link, not what it points to
+TRACKING_PARAMS = {"si", "feature", "pp", "igsh", "context", "ls", "nd", "ref"}
+
+# Resolved linksByPlatform, keyed by normalize_url
+songlink_cache = LookupCache(
+    "songlink",
+    ttl=datetime.timedelta(
+        hours=int(app_config.get("MUSICLINKS", "CACHE_TTL_HOURS", fallback="168"))
+    ),
+    max_entries=int(app_config.get("MUSICLINKS", "CACHE_MAX_ENTRIES", fallback="1000")),
+)
+
+
+def normalize_url(url: str) -> str:
+    """The same track shared twice normalizes to the same URL, whatever the tracking params."""
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/") or "/",
+            urlencode(query),
+            "",
+        )
+    )
+
+
+async def fetch_links_by_platform(url: str) -> dict | None:
+    response = await http_client.get(SONGLINK_API_URL, params={"url": url})
+
+    if response.status_code != 200:
+        logger.error(f"[music] song.link api error: {response.status_code} - {response.text}")
+        return None
+
+    return response.json().get("linksByPlatform") or None
+
 
 async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_text = update.message.text
@@ -22,53 +71,44 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not match:
         return
 
-    url = match.group(0)
+    url = normalize_url(match.group(0))
     logger.info(f"[music] detected music link: {url}")
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(f"https://api.song.link/v1-alpha.1/links?url={url}")
-
-            if response.status_code != 200:
-                logger.error(
-                    f"[music] song.link api error: {response.status_code} - {response.text}"
-                )
-                return
-
-            data = response.json()
-
-            links_by_platform = data.get("linksByPlatform")
-            if not links_by_platform:
-                logger.warning("[music] no links found in song.link response")
-                return
-
-            reply_lines = []
-
-            # Helper to add link if exists
-            def add_link(platform_key, label):
-                if platform_key in links_by_platform:
-                    link_url = links_by_platform[platform_key].get("url")
-                    if link_url:
-                        reply_lines.append(f"[{label}]({link_url})")
-
-            # Add preferred platforms
-            add_link("appleMusic", "Apple Music")
-            add_link("spotify", "Spotify")
-            add_link("youtubeMusic", "YouTube Music")
-            add_link("youtube", "YouTube")
-            # add_link("amazonMusic", "Amazon Music")
-            # add_link("deezer", "Deezer")
-            # add_link("tidal", "Tidal")
-            # add_link("soundcloud", "SoundCloud")
-
-            if reply_lines:
-                reply_text = " | ".join(reply_lines)
-                await update.message.reply_text(
-                    reply_text, disable_web_page_preview=True, parse_mode="Markdown"
-                )
-                logger.info("[music] replied with converted links")
-            else:
-                logger.info("[music] no relevant links found to reply with")
+        links_by_platform = await songlink_cache.get_or_fetch(
+            url, lambda: fetch_links_by_platform(url)
+        )
+        if not links_by_platform:
+            logger.warning("[music] no links found in song.link response")
+            return
+
+        reply_lines = []
+
+        # Helper to add link if exists
+        def add_link(platform_key, label):
+            if platform_key in links_by_platform:
+                link_url = links_by_platform[platform_key].get("url")
+                if link_url:
+                    reply_lines.append(f"[{label}]({link_url})")
+
+        # Add preferred platforms
+        add_link("appleMusic", "Apple Music")
+        add_link("spotify", "Spotify")
+        add_link("youtubeMusic", "YouTube Music")
+        add_link("youtube", "YouTube")
+        # add_link("amazonMusic", "Amazon Music")
+        # add_link("deezer", "Deezer")
+        # add_link("tidal", "Tidal")
+        # add_link("soundcloud", "SoundCloud")
+
+        if reply_lines:
+            reply_text = " | ".join(reply_lines)
+            await update.message.reply_text(
+                reply_text, disable_web_page_preview=True, parse_mode="Markdown"
+            )
+            logger.info("[music] replied with converted links")
+        else:
+            logger.info("[music] no relevant links found to reply with")
 
     except Exception as e:
         logger.error(f"[music] error handling music link: {e}")
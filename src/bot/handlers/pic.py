@@ -5,14 +5,15 @@ import shutil
 import tempfile
 import traceback
 
-import requests
 from ddgs import DDGS
 from loguru import logger
 from telegram import InputMediaPhoto, Update
-from telegram.error import TimedOut
+from telegram.error import BadRequest, TimedOut
 from telegram.ext import ContextTypes
 
-from src.domain import config, dc
+from src.domain import config, dc, http_client
+
+from . import media_cache
 
 app_config = config.get_config()
 
@@ -63,22 +64,35 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Search for images using DuckDuckGo
             ddgs = DDGS()
             # Search for images
-            results = list(ddgs.images(query=search_query, max_results=5, safesearch="on"))
+            results = await asyncio.to_thread(
+                lambda: list(ddgs.images(query=search_query, max_results=5, safesearch="on"))
+            )
 
             if len(results) == 0:
                 await sent_message.edit_text("No images found for your search query.")
                 return
 
-            # Download images
+            # Download images, unless they've been uploaded before
             downloaded_files = []
+            # downloaded path or file_id -> image_url
+            sources = {}
+            # images that were uploaded before, sent by file_id
+            cached_file_ids = set()
             for idx, result in enumerate(results[:5]):
                 try:
                     image_url = result.get("image")
                     if not image_url:
                         continue
 
+                    file_id = await media_cache.get_file_id(f"pic:{image_url}")
+                    if file_id is not None:
+                        downloaded_files.append(file_id)
+                        sources[file_id] = image_url
+                        cached_file_ids.add(file_id)
+                        continue
+
                     # Download image
-                    response = requests.get(image_url, timeout=10, allow_redirects=True)
+                    response = await http_client.get(image_url, timeout=10)
                     response.raise_for_status()
 
                     # Determine file extension from content type or URL
@@ -103,6 +117,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         f.write(response.content)
 
                     downloaded_files.append(image_path)
+                    sources[image_path] = image_url
                     logger.info(f"[pic] Downloaded image {idx + 1}/5: {image_url[:50]}...")
 
                 except Exception as e:
@@ -116,7 +131,15 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Limit to 5 images
             downloaded_files = downloaded_files[:5]
 
-            logger.info(f"[pic] downloaded {len(downloaded_files)} images")
+            logger.info(
+                f"[pic] downloaded {len(downloaded_files) - len(cached_file_ids)} images, "
+                f"{len(cached_file_ids)} already uploaded"
+            )
+
+            def open_image(stack, img_path):
+                if img_path in cached_file_ids:
+                    return img_path
+                return stack.enter_context(open(img_path, "rb"))
 
             # Upload individual images as a media group
             await sent_message.edit_text("Uploading images...")
@@ -127,10 +150,12 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 try:
                     with contextlib.ExitStack() as stack:
                         for img_path in downloaded_files:
-                            file_handle = stack.enter_context(open(img_path, "rb"))
-                            media_list.append(InputMediaPhoto(media=file_handle))
+                            media_list.append(InputMediaPhoto(media=open_image(stack, img_path)))
+
+                        sent_photos = await update.message.reply_media_group(media=media_list)
 
-                        await update.message.reply_media_group(media=media_list)
+                    for img_path, photo in zip(downloaded_files, sent_photos or (), strict=False):
+                        await media_cache.remember(f"pic:{sources[img_path]}", photo)
                 except TimedOut:
                     logger.warning(
                         "[pic] Timed out sending media group, falling back to individual uploads"
@@ -138,13 +163,18 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     # Fallback: send images one by one
                     for img_path in downloaded_files:
                         try:
-                            with open(img_path, "rb") as f:
-                                await update.message.reply_photo(photo=f)
+                            with contextlib.ExitStack() as stack:
+                                await update.message.reply_photo(photo=open_image(stack, img_path))
                                 # Small delay to avoid rate limiting
                                 await asyncio.sleep(0.5)
                         except Exception as e:
                             logger.warning(f"[pic] Error sending individual image: {e}")
                             continue
+                except BadRequest as e:
+                    # Probably a stale file_id - upload those images again next time
+                    logger.warning(f"[pic] Media group rejected: {e}")
+                    for file_id in cached_file_ids:
+                        await media_cache.forget(f"pic:{sources[file_id]}")
                 except Exception as e:
                     logger.warning(
                         f"[pic] Error uploading media group: {e}\n{traceback.format_exc()}"
@@ -9,7 +9,7 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from src.bot.handlers import utils as handler_utils
-from src.db import Quote
+from src.db import Quote, aio
 from src.db import quote as quote_dao
 from src.domain import config, dc, util
 
@@ -34,7 +34,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if getattr(update.message, "reply_to_message", None) and getattr(
                 update.message.reply_to_message, "text", None
             ):
-                q = quote_dao.add_quote_from_update(update)
+                q = await aio.run(quote_dao.add_quote_from_update, update)
                 response = MESSAGE_ADDED_QUOTE.format(q.quote_id)
                 await update.message.reply_text(text=response, parse_mode=ParseMode.HTML)
 
@@ -52,7 +52,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
 
             id_to_remove = query_params[2]
-            response = Quote.delete_by_id(id_to_remove)
+            response = await aio.run(Quote.delete_by_id, id_to_remove)
 
             if response == 1:
                 response = f"Removed Quote - ID=<code>{id_to_remove}</code>"
@@ -76,7 +76,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             quote_id = query_params[2]
 
             try:
-                quote = Quote.get_by_id(quote_id)
+                quote = await aio.run(_get_quote_with_author, quote_id)
 
             except DoesNotExist:
                 group_id = util.get_group_id_from_update(update)
@@ -84,7 +84,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     await update.message.reply_text(text="Can't run this command here!")
                     return
 
-                quote = get_random_quote_from_group(group_id)
+                quote = await aio.run(get_random_quote_from_group, group_id)
 
                 if quote is None:
                     logger.info("[quotes] No quotes found! - group_id={}", group_id)
@@ -106,7 +106,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.message.reply_text(text="Can't run this command here!")
                 return
 
-            quote = get_random_quote_from_group(group_id)
+            quote = await aio.run(get_random_quote_from_group, group_id)
 
             pretty_quote = generate_pretty_quote(quote)
 
@@ -138,6 +138,13 @@ def generate_pretty_quote(quote: Quote):
     return pretty_quote
 
 
+def _get_quote_with_author(quote_id) -> Quote:
+    quote = Quote.get_by_id(quote_id)
+    # Loaded here so generate_pretty_quote doesn't query it on the event loop
+    _ = quote.author_bakchod
+    return quote
+
+
 def get_random_quote_from_group(group_id: str) -> Quote:
     count = Quote.select().where(Quote.quoted_in_group == group_id).count()
 
@@ -145,4 +152,8 @@ def get_random_quote_from_group(group_id: str) -> Quote:
         return None
 
     offset = random.randint(0, count - 1)
-    return Quote.select().where(Quote.quoted_in_group == group_id).offset(offset).limit(1).first()
+    quote = Quote.select().where(Quote.quoted_in_group == group_id).offset(offset).limit(1).first()
+    if quote is not None:
+        _ = quote.author_bakchod
+
+    return quote
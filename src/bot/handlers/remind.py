@@ -8,7 +8,7 @@ from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod, ScheduledJob, scheduledjob_dao
+from src.db import Bakchod, ScheduledJob, aio, scheduledjob_dao
 from src.domain import dc, util
 
 
@@ -27,7 +27,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # check if user can create reminder
-        reminders_created = scheduledjob_dao.get_scheduledjobs_by_bakchod(from_bakchod_id)
+        reminders_created = await aio.run(
+            scheduledjob_dao.get_scheduledjobs_by_bakchod, from_bakchod_id
+        )
         if len(reminders_created) > 10:
             await update.message.reply_text(
                 text="You have created too many reminders! Please cancel your previous ones, or wait for them to complete.",
@@ -65,24 +67,8 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "reminder_time": reminder_time,
         }
 
-        from_bakchod = Bakchod.get_by_id(from_bakchod_id)
-
-        sj = ScheduledJob.create(
-            created=datetime.now(),
-            updated=datetime.now(),
-            from_bakchod=from_bakchod,
-            group=chat_id,
-            job_context=job_context,
-        )
-
-        # build the job_name
-        job_name = build_job_name(str(chat_id), str(from_bakchod_id), sj.job_id)
-
-        # update job_context with new params
-        job_context["job_id"] = sj.job_id
-        job_context["job_name"] = job_name
-        sj.job_context = job_context
-        sj.save()
+        sj = await aio.run(create_scheduled_job, chat_id, from_bakchod_id, job_context)
+        job_name = job_context["job_name"]
 
         # add to the job_queue
         context.job_queue.run_once(
@@ -116,6 +102,30 @@ I will reply to you in {util.pretty_time_delta(due_seconds)} as a reminder.
         )
 
 
+def create_scheduled_job(chat_id, from_bakchod_id, job_context: dict) -> ScheduledJob:
+    """Save the reminder, adding its job_id and job_name to job_context."""
+    from_bakchod = Bakchod.get_by_id(from_bakchod_id)
+
+    sj = ScheduledJob.create(
+        created=datetime.now(),
+        updated=datetime.now(),
+        from_bakchod=from_bakchod,
+        group=chat_id,
+        job_context=job_context,
+    )
+
+    # build the job_name
+    job_name = build_job_name(str(chat_id), str(from_bakchod_id), sj.job_id)
+
+    # update job_context with new params
+    job_context["job_id"] = sj.job_id
+    job_context["job_name"] = job_name
+    sj.job_context = job_context
+    sj.save()
+
+    return sj
+
+
 def build_job_name(chat_id, from_bakchod_id, job_id):
     return f"reminder/{chat_id!s}/{from_bakchod_id!s}/{job_id!s}"
 
@@ -168,7 +178,7 @@ async def reminder_handler(context: ContextTypes.DEFAULT_TYPE) -> None:
         )
 
         # delete from db
-        ScheduledJob.delete_by_id(job_context["job_id"])
+        await aio.run(ScheduledJob.delete_by_id, job_context["job_id"])
 
     except Exception as e:
         logger.error("Caught exception in reminder_handler e={}", e)
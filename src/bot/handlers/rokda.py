@@ -2,7 +2,7 @@ from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod, bakchod_dao
+from src.db import Bakchod, aio, bakchod_dao
 from src.domain import dc, util
 
 
@@ -11,11 +11,14 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
         dc.log_command_usage("rokda", update)
 
         if update.message.reply_to_message:
-            b = bakchod_dao.get_or_create_bakchod_from_tg_user(
-                update.message.reply_to_message.from_user
+            b = await aio.run(
+                bakchod_dao.get_or_create_bakchod_from_tg_user,
+                update.message.reply_to_message.from_user,
             )
         else:
-            b = bakchod_dao.get_or_create_bakchod_from_tg_user(update.message.from_user)
+            b = await aio.run(
+                bakchod_dao.get_or_create_bakchod_from_tg_user, update.message.from_user
+            )
 
         await update.message.reply_text(text=generate_rokda_response(b))
 
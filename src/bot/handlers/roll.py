@@ -10,7 +10,7 @@ from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod, Group, Roll, bakchod_dao, group_dao, roll_dao
+from src.db import Bakchod, Group, Roll, aio, bakchod_dao, group_dao, rokda_dao, roll_dao
 from src.domain import config, dc, util
 
 ROLL_TYPES = [
@@ -58,7 +58,7 @@ async def handle_command_default(update: Update):
         await update.message.reply_text(text="Roll can only be used in a group!")
         return
 
-    current_roll = roll_dao.get_roll_by_group_id(group_id)
+    current_roll = await aio.run(_get_roll_with_bakchods, group_id)
 
     if current_roll is None:
         await update.message.reply_text(
@@ -90,7 +90,7 @@ async def handle_command_start(update: Update):
         await update.message.reply_text(text="Roll only be used in a group!")
         return
 
-    current_roll = roll_dao.get_roll_by_group_id(group_id)
+    current_roll = await aio.run(_get_roll_with_bakchods, group_id)
 
     if current_roll is None:
         create_new_roll = True
@@ -104,7 +104,7 @@ async def handle_command_start(update: Update):
         create_new_roll = True
 
     if create_new_roll:
-        roll = generate_new_roll(update, group_id)
+        roll = await aio.run(generate_new_roll, update, group_id)
         if roll is None:
             await update.message.reply_text(text="Couldn't start a new roll :(")
             return
@@ -152,7 +152,7 @@ async def handle_dice_rolls(dice_value, update, context):
             return
 
         # Get current roll based on group_id
-        current_roll = roll_dao.get_roll_by_group_id(group_id)
+        current_roll = await aio.run(_get_roll_with_bakchods, group_id)
         if current_roll is None:
             logger.info("[roll] current_roll was a None... skipping")
             return
@@ -168,7 +168,7 @@ async def handle_dice_rolls(dice_value, update, context):
             return
 
         # Check and update roll history
-        roller = bakchod_dao.get_bakchod_from_update(update)
+        roller = await aio.run(bakchod_dao.get_bakchod_from_update, update)
 
         if "last_time_rolled" in (roller.metadata or {}):
             try:
@@ -192,7 +192,7 @@ async def handle_dice_rolls(dice_value, update, context):
             roller.metadata = {}
 
         roller.metadata["last_time_rolled"] = datetime.datetime.now().isoformat()
-        roller.save()
+        await aio.run(roller.save)
 
         # Check roll outcome
         roll_number = int(current_roll.goal)
@@ -210,11 +210,10 @@ async def handle_dice_rolls(dice_value, update, context):
             current_roll.expiry = datetime.datetime.now() + datetime.timedelta(hours=1)
 
             # Update roll in DB
-            current_roll.save()
+            await aio.run(current_roll.save)
 
             # Award roller with prize
-            roller.rokda = roller.rokda + current_roll.prize
-            roller.save()
+            await aio.run(rokda_dao.credit, roller, float(current_roll.prize), "roll")
 
             # Add roll effect to victims metadata
             victim = current_roll.victim
@@ -228,7 +227,7 @@ async def handle_dice_rolls(dice_value, update, context):
                 censored_modifier["group_ids"] = group_ids
                 victim_metadata["censored"] = censored_modifier
                 victim.metadata = victim_metadata
-                victim.save()
+                await aio.run(victim.save)
 
             elif current_roll.rule == "auto_mom":
                 auto_mom_modifier = util.get_metadata_value(victim_metadata, "auto_mom") or {}
@@ -238,7 +237,7 @@ async def handle_dice_rolls(dice_value, update, context):
                 auto_mom_modifier["group_ids"] = group_ids
                 victim_metadata["auto_mom"] = auto_mom_modifier
                 victim.metadata = victim_metadata
-                victim.save()
+                await aio.run(victim.save)
 
             elif current_roll.rule == "kick_user":
                 try:
@@ -259,7 +258,7 @@ async def handle_dice_rolls(dice_value, update, context):
                     )
 
                     # remove the victim from group members list
-                    group_dao.remove_bakchod_from_group(victim, group_id)
+                    await aio.run(group_dao.remove_bakchod_from_group, victim, group_id)
 
                 except Exception as e:
                     logger.error(
@@ -363,6 +362,15 @@ def generate_new_roll(update, group_id):
     return r
 
 
+def _get_roll_with_bakchods(group_id) -> Roll | None:
+    """The group's Roll with its victim and winrar loaded, so reading them doesn't query the db."""
+    roll = roll_dao.get_roll_by_group_id(group_id)
+    if roll is not None:
+        _ = roll.victim, roll.winrar
+
+    return roll
+
+
 def _extract_command_from_update(update):
     command = None
 
@@ -478,7 +486,7 @@ def _pretty_roll_rule(roll_rule: str) -> str:
 async def reset_roll_effects(context: ContextTypes.DEFAULT_TYPE):
     group_id = context.job.data
 
-    roll = roll_dao.get_roll_by_group_id(group_id)
+    roll = await aio.run(_get_roll_with_bakchods, group_id)
 
     victim = roll.victim
 
@@ -504,7 +512,7 @@ async def reset_roll_effects(context: ContextTypes.DEFAULT_TYPE):
 
             logger.debug("[roll] updated auto_mom_metadata for victim={}", victim)
 
-    victim.save()
+    await aio.run(victim.save)
 
     response = (
         f"Roll Modifiers for {util.extract_pretty_name_from_bakchod(victim)} are now removed!"
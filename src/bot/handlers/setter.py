@@ -6,7 +6,7 @@ from telegram import Update, User
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod, group_dao
+from src.db import aio, bakchod_dao, group_dao, rokda_dao
 from src.domain import dc, util
 
 
@@ -23,7 +23,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     og_bakchod = update.message.from_user
 
-    response = parse_request(message, for_bakchod, og_bakchod, update)
+    response = await aio.run(parse_request, message, for_bakchod, og_bakchod, update)
 
     logger.info("[set] returning response='{}'", response)
 
@@ -176,10 +176,9 @@ def parse_request(
 
 
 def set_bakchod_rokda(rokda_to_set: float, bakchod_user: User):
-    b = Bakchod.get_by_id(bakchod_user.id)
+    b = bakchod_dao.get_bakchod_by_id(bakchod_user.id)
 
-    b.rokda = rokda_to_set
-    b.save()
+    rokda_dao.set_balance(b, rokda_to_set, "admin")
 
     reponse = f"✅ Set {util.extract_pretty_name_from_bakchod(b)}'s ₹okda to {b.rokda}!"
 
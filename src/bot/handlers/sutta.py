@@ -3,7 +3,7 @@ from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import Bakchod
+from src.db import aio, bakchod_dao
 from src.domain import dc, util
 
 COMMAND_COST = 200
@@ -16,7 +16,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE, log_to_dc=T
             logger.error("[sutta] initiator_user was None!")
             return
 
-        if not util.paywall_user(initiator_user.id, COMMAND_COST):
+        if not await aio.run(util.paywall_user, initiator_user.id, COMMAND_COST):
             await update.message.reply_text(
                 f"Sorry! You don't have enough ₹okda! Each /sutta costs {COMMAND_COST} ₹okda."
             )
@@ -39,7 +39,7 @@ async def update_sutta(context: ContextTypes.DEFAULT_TYPE):
         message_id = job.data["message_id"]
         bakchod_id = job.data["bakchod_id"]
 
-        b = Bakchod.get_by_id(bakchod_id)
+        b = await aio.run(bakchod_dao.get_bakchod_by_id, bakchod_id)
         if b is None:
             logger.error("Bakchod not found")
             return
@@ -49,7 +49,7 @@ async def update_sutta(context: ContextTypes.DEFAULT_TYPE):
             b.metadata = util.set_metadata_value(b.metadata, "sutta_ittr", 0)
         else:
             b.metadata["sutta_ittr"] = sutta_ittr + 1
-        b.save()
+        await aio.run(b.save)
 
         ittr = util.get_metadata_value(b.metadata, "sutta_ittr")
 
@@ -72,14 +72,14 @@ async def update_sutta(context: ContextTypes.DEFAULT_TYPE):
             await context.bot.edit_message_text("~~~", chat_id, message_id)
 
             b.metadata["sutta_ittr"] = None
-            b.save()
+            await aio.run(b.save)
 
     except Exception as e:
         logger.error("Caught Exception in update_sutta - e={}", e)
 
 
 async def start_sutta(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    b = Bakchod.get_by_id(update.message.from_user.id)
+    b = await aio.run(bakchod_dao.get_bakchod_by_id, update.message.from_user.id)
     if b is None:
         logger.error("Bakchod not found")
         return
@@ -1,22 +1,28 @@
+import io
 import math
 import os
 import random
 import textwrap
+import time
 import traceback
 from dataclasses import dataclass
 from datetime import datetime
 from os import path
 
+import numpy as np
 from loguru import logger
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 from pilmoji import Pilmoji
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.domain import dc, util
+from src.domain import dc, rendering, textures, util
+from src.domain.emoji_glyphs import LocalEmojiSource
+
+from . import tynm_portraits
+from .tynm_assets import assets
 
 MLAI_RESOURCES_DIR = path.join(util.RESOURCES_DIR, "mlai")
-EXTERNAL_DIR = path.join(util.RESOURCES_DIR, "external")
 FONTS_DIR = path.join(util.RESOURCES_DIR, "fonts")
 TYNM_IMAGES_DIR = path.join(util.RESOURCES_DIR, "tynm")
 PNG_EXTENSION = ".png"
@@ -134,6 +140,41 @@ MESSAGE_BOX_BOTTOM_FOR_BOTTOM_MODI = 860
 POSTER_CAPTION_MIN_FONT_SIZE = 30
 POSTER_CAPTION_MAX_FONT_SIZE = 92
 PRAYER_HANDS_REACTION = "🙏"
+TYNM_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# Pre-drawn variations of each decoration sprite, so posters don't all look the same
+SPRITE_VARIANTS = 6
+# (kind, size) of the sprites add_poster_decorations uses
+POSTER_SPRITES = (("firework", 70), ("flower", 55), ("firework", 50), ("flower", 45))
+# Background lotus pattern: grid spacing, where the grid starts, and how far
+# a lotus reaches from its centre
+LOTUS_SPACING_X = 110
+LOTUS_SPACING_Y = 95
+LOTUS_GRID_START = -20
+LOTUS_RADIUS = 32
+RENDER_BUSY_REPLY = "Too many posters being made right now, try again in a bit (-_-;)"
+
+
+@dataclass(frozen=True)
+class PosterJob:
+    """
+    Everything a render worker needs to draw a poster. Only plain values, so it
+    can be pickled across to the worker process. Photo posters decorate the
+    photo at photo_path, text posters are drawn around text.
+    """
+
+    # File names in TYNM_IMAGES_DIR
+    foreground_modi: str
+    watermark_modi: str
+    # PosterLayout.name
+    layout: str
+    photo_path: str | None = None
+    text: str | None = None
+    texture_path: str | None = None
+    # Encoded profile photo of whoever sent the message
+    portrait: bytes | None = None
+    timestamp: datetime | None = None
+    username: str = ""
+    chat_title: str | None = None
 
 
 def extract_reply_text(reply_message) -> str | None:
@@ -158,32 +199,27 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         # Load NM_IMG from local resources folder
-        nm_img = None
-        nm_img_alt = None
         try:
             if not os.path.exists(TYNM_IMAGES_DIR):
                 logger.error("TYNM images directory does not exist: {}", TYNM_IMAGES_DIR)
                 await update.message.reply_text("TYNM images not found. Please contact admin.")
                 return
 
-            image_files = [
-                f
-                for f in os.listdir(TYNM_IMAGES_DIR)
-                if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif", ".webp"))
-            ]
+            image_files = list_tynm_images()
 
             if not image_files:
                 logger.error("No image files found in TYNM directory: {}", TYNM_IMAGES_DIR)
                 await update.message.reply_text("No TYNM images available. Please contact admin.")
                 return
 
-            selected_files = pick_distinct_tynm_images(image_files, 2)
-            nm_img = Image.open(path.join(TYNM_IMAGES_DIR, selected_files[0]))
-            nm_img_alt = Image.open(path.join(TYNM_IMAGES_DIR, selected_files[1]))
+            # Loaded here so a broken image gets a reply, rather than failing in a render worker
+            foreground_modi, watermark_modi = pick_distinct_tynm_images(image_files, 2)
+            load_tynm_image(foreground_modi)
+            load_tynm_image(watermark_modi)
             logger.info(
                 "Successfully loaded NM_IMG from {} and {}",
-                selected_files[0],
-                selected_files[1],
+                foreground_modi,
+                watermark_modi,
             )
 
         except Exception as e:
@@ -200,40 +236,21 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Handle photo message
         if getattr(reply_message, "photo", None):
+            file = None
+
             try:
                 file = await acquire_file(update, context)
 
-                src_img = Image.open(build_file_path(file))
-                src_img_width, src_img_height = src_img.size
-                logger.debug("src_img_width={} src_img_height={}", src_img_width, src_img_height)
-
-                # Add fancy border and text
-                src_img = add_fancy_border(src_img)
-                src_img = add_thank_you_text(src_img)
-
-                # Place NM_IMG on the left like the poster layout
-                layout = choose_poster_layout()
-                img = apply_modi_layout(
-                    src_img.convert("RGBA"),
-                    nm_img,
-                    nm_img_alt,
-                    layout,
+                job = PosterJob(
+                    foreground_modi=foreground_modi,
+                    watermark_modi=watermark_modi,
+                    layout=choose_poster_layout().name,
+                    photo_path=build_file_path(file),
                 )
+                await reply_with_poster(update, job)
 
-                # Add decorative elements in corners only
-                img = add_poster_decorations(img)
-
-                img.save(build_file_path(file, "_tynm"))
-
-                with open(build_file_path(file, "_tynm"), "rb") as photo_to_upload:
-                    logger.info("[tynm] uploading completed photo")
-                    await update.message.reply_photo(
-                        photo=photo_to_upload,
-                    )
-
-                util.delete_file(build_file_path(file))
-                util.delete_file(build_file_path(file, "_tynm"))
-
+            except rendering.QueueFullError:
+                await update.message.reply_text(RENDER_BUSY_REPLY)
             except Exception as e:
                 logger.error(
                     "Caught error in photo message handling. e={} traceback={}",
@@ -241,19 +258,26 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     traceback.format_exc(),
                 )
                 await update.message.reply_text("Failed to process photo. Please try again.")
+            finally:
+                if file is not None:
+                    util.delete_file(build_file_path(file))
 
         # Handle text or captioned reply (e.g. reply to a URL or message with /tynm)
         elif reply_text:
-            unsplash_photo_path = None
+            job = None
 
             try:
-                img, unsplash_photo_path = await compose_text_reply_poster(
+                job = await build_text_poster_job(
                     reply_message,
                     context,
                     reply_text,
-                    nm_img,
-                    nm_img_alt,
+                    foreground_modi,
+                    watermark_modi,
                 )
+                await reply_with_poster(update, job)
+
+            except rendering.QueueFullError:
+                await update.message.reply_text(RENDER_BUSY_REPLY)
             except Exception as e:
                 logger.error(
                     "Caught error in text reply poster composition. e={} traceback={}",
@@ -261,23 +285,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     traceback.format_exc(),
                 )
                 await update.message.reply_text("Failed to generate image. Please try again.")
-                if unsplash_photo_path:
-                    util.delete_file(unsplash_photo_path)
-                return
-
-            filename = f"{update.message.chat.id}-{update.message.message_id}"
-            img_path = path.join(EXTERNAL_DIR, filename + PNG_EXTENSION)
-            img.save(img_path)
-
-            with open(img_path, "rb") as photo_to_upload:
-                logger.info("[tynm] uploading completed photo")
-                await update.message.reply_photo(
-                    photo=photo_to_upload,
-                )
-
-            util.delete_file(img_path)
-            if unsplash_photo_path:
-                util.delete_file(unsplash_photo_path)
+            finally:
+                if job is not None and job.texture_path:
+                    util.delete_file(job.texture_path)
 
         else:
             await update.message.reply_text(
@@ -540,6 +550,10 @@ def paste_framed_portrait(
 
 
 def load_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
+    return assets.get(("font", font_name, size), lambda: open_font(font_name, size))
+
+
+def open_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
     for base_dir in (FONTS_DIR, path.join("src", FONTS_DIR)):
         font_path = path.join(base_dir, font_name)
         if os.path.exists(font_path):
@@ -548,58 +562,166 @@ def load_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
     raise FileNotFoundError(f"Font not found: {font_name}")
 
 
-def create_saffron_gradient(width: int, height: int) -> Image.Image:
-    gradient = Image.new("RGB", (width, height))
-    draw = ImageDraw.Draw(gradient)
-    top_color = (255, 153, 51)
-    mid_color = (120, 145, 35)
-    bottom_color = BJP_GREEN
-
-    for y in range(height):
-        ratio = y / max(height - 1, 1)
-        if ratio < 0.5:
-            blend = ratio / 0.5
-            color = tuple(int(top_color[i] * (1 - blend) + mid_color[i] * blend) for i in range(3))
-        else:
-            blend = (ratio - 0.5) / 0.5
-            color = tuple(
-                int(mid_color[i] * (1 - blend) + bottom_color[i] * blend) for i in range(3)
-            )
-        draw.line([(0, y), (width, y)], fill=color)
+def list_tynm_images() -> list[str]:
+    key = ("tynm_images",)
+    if key in assets:
+        return assets.get(key, list)
 
-    return gradient.convert("RGBA")
+    image_files = [
+        f for f in os.listdir(TYNM_IMAGES_DIR) if f.lower().endswith(TYNM_IMAGE_EXTENSIONS)
+    ]
+    # An empty directory is looked at again next time
+    if image_files:
+        assets.put(key, image_files)
+    return image_files
 
 
-def add_lotus_watermark(img: Image.Image) -> Image.Image:
-    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-    spacing_x = 110
-    spacing_y = 95
-
-    for x in range(-20, img.width + spacing_x, spacing_x):
-        for y in range(-20, img.height + spacing_y, spacing_y):
-            cx = x + ((y // spacing_y) % 2) * (spacing_x // 2)
-            cy = y
-            draw.ellipse([cx - 18, cy - 18, cx + 18, cy + 18], fill=(255, 255, 255, 18))
-            for angle in range(0, 360, 60):
-                rad = math.radians(angle)
-                px = cx + int(24 * math.cos(rad))
-                py = cy + int(24 * math.sin(rad))
-                draw.ellipse([px - 8, py - 8, px + 8, py + 8], fill=(255, 255, 255, 12))
+def load_tynm_image(file_name: str) -> Image.Image:
+    """The decoded RGBA modi image. Shared between posters, so don't draw on it."""
+    return assets.get(
+        ("tynm_image", file_name),
+        lambda: as_rgba(Image.open(path.join(TYNM_IMAGES_DIR, file_name))),
+    )
 
+
+def poster_background(width: int, height: int) -> Image.Image:
+    """A copy of the gradient and lotus pattern every text poster starts from."""
+    background = assets.get(
+        ("background", width, height),
+        lambda: add_lotus_watermark(create_saffron_gradient(width, height)),
+    )
+    return background.copy()
+
+
+def decoration_sprite(kind: str, size: int) -> Image.Image:
+    """One of the pre-drawn variants of a firework or flower sprite."""
+    draw = draw_firework if kind == "firework" else draw_flower
+    variants = assets.get(
+        ("sprite", kind, size), lambda: [draw(size) for _ in range(SPRITE_VARIANTS)]
+    )
+    return random.choice(variants)
+
+
+def preload_render_assets():
+    """Build everything posters reuse up front, rather than during the first /tynm."""
+    start = time.perf_counter()
+
+    if os.path.exists(TYNM_IMAGES_DIR):
+        for file_name in list_tynm_images():
+            load_tynm_image(file_name)
+
+    font_sizes = [
+        (FONT_POOL_GREETING, 58),
+        (FONT_POOL_SUBGREETING, 44),
+        (FONT_POOL_BANNER, 54),
+        (FONT_POOL_DATE, 28),
+        ([FONT_META], 22),
+        ([FONT_META], 14),
+    ]
+    font_sizes.extend(
+        (FONT_POOL_CAPTION, size)
+        for size in range(POSTER_CAPTION_MAX_FONT_SIZE, POSTER_CAPTION_MIN_FONT_SIZE - 1, -2)
+    )
+    for pool, size in font_sizes:
+        for font_name in pool:
+            load_font(font_name, size)
+
+    poster_background(POSTER_WIDTH, POSTER_HEIGHT)
+
+    for kind, size in POSTER_SPRITES:
+        decoration_sprite(kind, size)
+
+    logger.info(
+        "[tynm] preloaded render assets - assets={} bytes={} seconds={:.2f}",
+        len(assets),
+        assets.size_bytes,
+        time.perf_counter() - start,
+    )
+
+
+def create_saffron_gradient(width: int, height: int) -> Image.Image:
+    top_color = np.array((255, 153, 51), dtype=float)
+    mid_color = np.array((120, 145, 35), dtype=float)
+    bottom_color = np.array(BJP_GREEN, dtype=float)
+
+    # Saffron to olive down the top half, olive to green down the bottom half
+    ratio = np.arange(height) / max(height - 1, 1)
+    lower_half = (ratio >= 0.5)[:, None]
+    blend = np.where(lower_half, (ratio[:, None] - 0.5) / 0.5, ratio[:, None] / 0.5)
+    start = np.where(lower_half, mid_color, top_color)
+    end = np.where(lower_half, bottom_color, mid_color)
+    rows = np.full((height, 4), 255, dtype=np.uint8)
+    # Truncated like int() would
+    rows[:, :3] = start * (1 - blend) + end * blend
+
+    # Every row is one colour, so repeat each row's RGBA pixel across as a whole uint32
+    pixels = np.repeat(rows.view(np.uint32), width, axis=1)
+    return Image.fromarray(pixels.view(np.uint8).reshape(height, width, 4))
+
+
+def draw_lotus_stamp() -> np.ndarray:
+    """Alpha of a single lotus, centred in a square LOTUS_RADIUS either side of the middle."""
+    size = 2 * LOTUS_RADIUS + 1
+    stamp = Image.new("L", (size, size), 0)
+    draw = ImageDraw.Draw(stamp)
+    c = LOTUS_RADIUS
+
+    draw.ellipse([c - 18, c - 18, c + 18, c + 18], fill=18)
+    for angle in range(0, 360, 60):
+        rad = math.radians(angle)
+        px = c + int(24 * math.cos(rad))
+        py = c + int(24 * math.sin(rad))
+        draw.ellipse([px - 8, py - 8, px + 8, py + 8], fill=12)
+
+    return np.asarray(stamp)
+
+
+def lotus_pattern_alpha(width: int, height: int) -> np.ndarray:
+    """
+    Alpha of the lotus pattern. Lotuses sit on a grid with every other row
+    shifted half a column, so the pattern repeats every two rows and one
+    column - it's drawn into one such tile and the tile is repeated.
+    """
+    tile_height, tile_width = 2 * LOTUS_SPACING_Y, LOTUS_SPACING_X
+    tile = np.zeros((tile_height, tile_width), dtype=np.uint8)
+    stamp = draw_lotus_stamp()
+    offsets = np.arange(stamp.shape[0]) - LOTUS_RADIUS
+
+    # A lotus at the tile origin, and one from the shifted row below it.
+    # Lotuses don't overlap, so their stamps can simply be added.
+    for cx, cy in ((0, 0), (LOTUS_SPACING_X // 2, LOTUS_SPACING_Y)):
+        rows = ((cy + offsets) % tile_height)[:, None]
+        columns = ((cx + offsets) % tile_width)[None, :]
+        tile[rows, columns] += stamp
+
+    # The first unshifted row of lotuses
+    origin_x = origin_y = LOTUS_GRID_START
+    if (origin_y // LOTUS_SPACING_Y) % 2:
+        origin_y += LOTUS_SPACING_Y
+
+    # Line the tile up with the canvas origin, then repeat it across
+    tile = np.roll(tile, (origin_y, origin_x), axis=(0, 1))
+    repeats = (-(-height // tile_height), -(-width // tile_width))
+    return np.ascontiguousarray(np.tile(tile, repeats)[:height, :width])
+
+
+def add_lotus_watermark(img: Image.Image) -> Image.Image:
+    overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
+    overlay.putalpha(Image.fromarray(lotus_pattern_alpha(img.width, img.height)))
     return Image.alpha_composite(img, overlay)
 
 
 def blend_unsplash_texture(
     base: Image.Image, unsplash_photo_path: str, width: int, height: int
 ) -> Image.Image:
-    unsplash_photo = Image.open(unsplash_photo_path).convert("RGBA").resize((width, height))
-    texture = Image.blend(
-        Image.new("RGBA", (width, height), (*SAFFRON, 255)),
-        unsplash_photo,
-        0.35,
-    )
-    return Image.blend(base, texture, 0.22)
+    with Image.open(unsplash_photo_path) as unsplash_photo:
+        # JPEGs bigger than the poster are decoded at a reduced scale, which
+        # skips most of the decoding work
+        unsplash_photo.draft("RGB", (width, height))
+        unsplash_photo = unsplash_photo.convert("RGB").resize((width, height))
+
+    texture = Image.blend(Image.new("RGB", (width, height), SAFFRON), unsplash_photo, 0.35)
+    return Image.blend(base, texture.convert("RGBA"), 0.22)
 
 
 def paste_with_opacity(
@@ -735,13 +857,7 @@ def draw_centered_multiline_in_box(
 def make_circular_portrait(
     profile_img: Image.Image, size: int, outer_border: int = 6, inner_border: int = 4
 ) -> Image.Image:
-    portrait = profile_img.convert("RGBA")
-    portrait = ImageOps.fit(portrait, (size, size), Image.LANCZOS)
-
-    mask = Image.new("L", (size, size), 0)
-    ImageDraw.Draw(mask).ellipse([0, 0, size, size], fill=255)
-    circular = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    circular.paste(portrait, (0, 0), mask)
+    circular = tynm_portraits.crop_to_circle(profile_img, size)
 
     framed_size = size + (outer_border + inner_border) * 2
     framed = Image.new("RGBA", (framed_size, framed_size), (0, 0, 0, 0))
@@ -967,25 +1083,21 @@ def add_poster_decorations(img: Image.Image) -> Image.Image:
     img_width, img_height = img.size
     content_height = img_height - BANNER_HEIGHT
 
-    corner_placements = [
-        (img_width - 90, 20, 70),
-        (img_width - 170, 70, 55),
-        (20, content_height - 120, 50),
-        (90, content_height - 70, 45),
+    corner_positions = [
+        (img_width - 90, 20),
+        (img_width - 170, 70),
+        (20, content_height - 120),
+        (90, content_height - 70),
     ]
 
-    for index, (x, y, size) in enumerate(corner_placements):
-        element = draw_firework(size) if index % 2 == 0 else draw_flower(size)
+    for (x, y), (kind, size) in zip(corner_positions, POSTER_SPRITES, strict=True):
+        element = decoration_sprite(kind, size)
         img.paste(element, (x, y), element)
 
     return img
 
 
-async def fetch_user_profile_portrait(
-    context: ContextTypes.DEFAULT_TYPE, user
-) -> Image.Image | None:
-    user_profile_photo_path = path.join(EXTERNAL_DIR, f"{user.id}.webp")
-
+async def fetch_user_profile_portrait(context: ContextTypes.DEFAULT_TYPE, user) -> bytes | None:
     try:
         user_profile_photos = await user.get_profile_photos(limit=1)
         if not user_profile_photos or not getattr(user_profile_photos, "photos", None):
@@ -995,46 +1107,120 @@ async def fetch_user_profile_portrait(
         if not user_profile_photo:
             return None
 
-        user_profile_photo_file = await context.bot.get_file(user_profile_photo[-1].file_id)
-        await user_profile_photo_file.download_to_drive(user_profile_photo_path)
-        portrait = Image.open(user_profile_photo_path).convert("RGBA")
-        util.delete_file(user_profile_photo_path)
-        return portrait
+        largest = user_profile_photo[-1]
+
+        async def download() -> bytes:
+            user_profile_photo_file = await context.bot.get_file(largest.file_id)
+            return bytes(await user_profile_photo_file.download_as_bytearray())
+
+        # A changed profile photo gets a new file_unique_id, so this stays a cheap freshness check
+        return await tynm_portraits.get(largest.file_unique_id, download)
     except Exception as e:
         logger.warning("[tynm] unable to fetch user profile portrait e={}", e)
-        util.delete_file(user_profile_photo_path)
         return None
 
 
-async def compose_text_reply_poster(
+async def build_text_poster_job(
     reply_message,
     context: ContextTypes.DEFAULT_TYPE,
     text: str,
-    foreground_modi: Image.Image,
-    watermark_modi: Image.Image,
-) -> tuple[Image.Image, str | None]:
-    unsplash_photo_path = None
-    width, height = POSTER_WIDTH, POSTER_HEIGHT
-    content_height = height - BANNER_HEIGHT
-    layout = choose_text_poster_layout()
+    foreground_modi: str,
+    watermark_modi: str,
+) -> PosterJob:
+    """Fetch what a text poster needs from Telegram, ready to render."""
+    portrait = await fetch_user_profile_portrait(context, reply_message.from_user)
+
+    return PosterJob(
+        foreground_modi=foreground_modi,
+        watermark_modi=watermark_modi,
+        layout=choose_text_poster_layout().name,
+        text=text,
+        # A prefetched texture, or the plain background if none are ready
+        texture_path=textures.take(),
+        portrait=portrait,
+        timestamp=util.normalize_datetime(reply_message.date),
+        username=util.extract_pretty_name_from_tg_user(reply_message.from_user),
+        chat_title=reply_message.chat.title if reply_message.chat else None,
+    )
+
 
-    img = create_saffron_gradient(width, height)
-    img = add_lotus_watermark(img)
+async def reply_with_poster(update: Update, job: PosterJob) -> None:
+    poster = await rendering.run(render_poster, job)
+
+    logger.info("[tynm] uploading completed photo bytes={}", len(poster))
+    await update.message.reply_photo(photo=poster)
+
+
+def get_poster_layout(name: str) -> PosterLayout:
+    return next(layout for layout in POSTER_LAYOUTS if layout.name == name)
+
+
+def open_portrait(data: bytes | None) -> Image.Image | None:
+    if data is None:
+        return None
 
     try:
-        unsplash_photo_path = util.fetch_random_unsplash_photo_path(width, height)
-        if unsplash_photo_path:
-            img = blend_unsplash_texture(img, unsplash_photo_path, width, height)
+        return Image.open(io.BytesIO(data)).convert("RGBA")
     except Exception as e:
-        logger.warning(
-            "Caught error in unsplash background composition. e={} traceback={}",
-            e,
-            traceback.format_exc(),
-        )
+        logger.warning("[tynm] unable to open user profile portrait e={}", e)
+        return None
+
 
-    img = apply_modi_layout(img, foreground_modi, watermark_modi, layout)
+def render_poster(job: PosterJob) -> bytes:
+    """The poster job describes, PNG encoded. Runs in a render worker."""
+    img = render_photo_poster(job) if job.photo_path else render_text_poster(job)
 
-    with Pilmoji(img) as pilmoji:
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_photo_poster(job: PosterJob) -> Image.Image:
+    src_img = Image.open(job.photo_path)
+    src_img_width, src_img_height = src_img.size
+    logger.debug("src_img_width={} src_img_height={}", src_img_width, src_img_height)
+
+    # Add fancy border and text
+    src_img = add_fancy_border(src_img)
+    src_img = add_thank_you_text(src_img)
+
+    # Place NM_IMG on the left like the poster layout
+    img = apply_modi_layout(
+        src_img.convert("RGBA"),
+        load_tynm_image(job.foreground_modi),
+        load_tynm_image(job.watermark_modi),
+        get_poster_layout(job.layout),
+    )
+
+    # Add decorative elements in corners only
+    return add_poster_decorations(img)
+
+
+def render_text_poster(job: PosterJob) -> Image.Image:
+    width, height = POSTER_WIDTH, POSTER_HEIGHT
+    content_height = height - BANNER_HEIGHT
+    layout = get_poster_layout(job.layout)
+
+    img = poster_background(width, height)
+
+    if job.texture_path:
+        try:
+            img = blend_unsplash_texture(img, job.texture_path, width, height)
+        except Exception as e:
+            logger.warning(
+                "Caught error in unsplash background composition. e={} traceback={}",
+                e,
+                traceback.format_exc(),
+            )
+
+    img = apply_modi_layout(
+        img,
+        load_tynm_image(job.foreground_modi),
+        load_tynm_image(job.watermark_modi),
+        layout,
+    )
+
+    with Pilmoji(img, source=LocalEmojiSource) as pilmoji:
         greeting_font = load_font_from_pool(FONT_POOL_GREETING, 58)
         center_x = width // 2
         greeting_y = 90
@@ -1063,7 +1249,7 @@ async def compose_text_reply_poster(
         message_area = get_text_poster_message_area(layout, width, content_height)
         caption_font, caption, caption_line_spacing = fit_caption_to_box(
             pilmoji,
-            text,
+            job.text,
             pick_font(FONT_POOL_CAPTION),
             message_area,
         )
@@ -1081,21 +1267,17 @@ async def compose_text_reply_poster(
             outline_width=3,
         )
 
-        timestamp = util.normalize_datetime(reply_message.date)
-        draw_date_badge(pilmoji.draw, timestamp, (width - 110, 30))
+        draw_date_badge(pilmoji.draw, job.timestamp, (width - 110, 30))
 
-        profile_portrait = await fetch_user_profile_portrait(context, reply_message.from_user)
+        profile_portrait = open_portrait(job.portrait)
         if profile_portrait is not None:
             paste_framed_portrait(img, profile_portrait, layout, content_height)
 
-        username = "~ " + util.extract_pretty_name_from_tg_user(reply_message.from_user)
-        timestamp_str = timestamp.strftime("%d/%m/%Y, %I:%M %p")
-        chat_title = reply_message.chat.title if reply_message.chat else None
-        img = add_poster_bottom_banner(pilmoji, img, username, timestamp_str, chat_title)
-
-    img = add_poster_decorations(img)
+        username = "~ " + job.username
+        timestamp_str = job.timestamp.strftime("%d/%m/%Y, %I:%M %p")
+        img = add_poster_bottom_banner(pilmoji, img, username, timestamp_str, job.chat_title)
 
-    return img, unsplash_photo_path
+    return add_poster_decorations(img)
 
 
 def add_fancy_border(img: Image) -> Image:
@@ -1264,7 +1446,7 @@ def add_thank_you_text(img: Image) -> Image:
         logger.warning("Failed to load poster font, using default. e={}", e)
         font = ImageFont.load_default()
 
-    with Pilmoji(img) as pilmoji:
+    with Pilmoji(img, source=LocalEmojiSource) as pilmoji:
         # Get text dimensions
         text_width, text_height = measure_text(pilmoji, text, font)
 
@@ -0,0 +1,109 @@
+"""
+Render assets shared by every /tynm poster.
+
+Decoding the modi images, opening fonts, drawing the gradient background and
+the decoration sprites give the same result on every call, so each is built
+once and kept in a RenderAssetCache. Entries are evicted least recently used
+first once the cache holds more than MAX_MB of decoded pixels and font files.
+
+Values are shared between posters. Callers copy an image before drawing on it.
+"""
+
+import collections
+import os
+import sys
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from loguru import logger
+from PIL import Image, ImageFont
+
+from src.domain import config
+
+app_config = config.get_config()
+
+MAX_MB = int(app_config.get("TYNM", "ASSET_CACHE_MAX_MB", fallback="128"))
+
+
+def estimate_bytes(value: Any) -> int:
+    """Roughly how much memory value holds on to."""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+
+    if isinstance(value, ImageFont.FreeTypeFont):
+        try:
+            return os.path.getsize(value.path)
+        except (OSError, TypeError):
+            return sys.getsizeof(value)
+
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_bytes(item) for item in value)
+
+    return sys.getsizeof(value)
+
+
+class RenderAssetCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+
+        # key -> (value, bytes), least recently used first
+        self._entries: collections.OrderedDict[Hashable, tuple[Any, int]] = (
+            collections.OrderedDict()
+        )
+        # Assets are preloaded from a worker thread while posters are rendered
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """The asset for key, built with build() the first time it's asked for."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        value = build()
+        self.put(key, value)
+        return value
+
+    def find(self, key: Hashable) -> Any | None:
+        """The asset for key if it's cached, without building it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        nbytes = estimate_bytes(value)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+
+            self._entries[key] = (value, nbytes)
+            self.size_bytes += nbytes
+
+            # The newest entry always stays, even if it's bigger than the cap
+            while self.size_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_bytes
+                logger.debug("[tynm_assets] evicted key={} bytes={}", evicted, evicted_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+
+assets = RenderAssetCache(MAX_MB * 1024 * 1024)
@@ -0,0 +1,139 @@
+"""
+Profile portraits for /tynm posters, cached by the photo's file_unique_id.
+
+A profile photo gets a new file_unique_id whenever it changes, so a cached
+portrait stays good for as long as get_profile_photos returns the same one, and
+a repeat poster skips downloading and decoding it. Portraits are kept cropped
+to a circle at PORTRAIT_SIZE and PNG encoded, in memory up to MEMORY_MAX_MB and
+on disk in PORTRAIT_DIR up to DISK_MAX_MB. Both drop the least recently used
+portraits first.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import re
+from collections.abc import Awaitable, Callable
+from os import path
+
+from loguru import logger
+from PIL import Image, ImageDraw, ImageOps
+
+from src.domain import config, metrics, util
+
+from .tynm_assets import RenderAssetCache
+
+app_config = config.get_config()
+
+MEMORY_MAX_MB = int(app_config.get("TYNM", "PORTRAIT_CACHE_MEMORY_MB", fallback="16"))
+DISK_MAX_MB = int(app_config.get("TYNM", "PORTRAIT_CACHE_DISK_MB", fallback="64"))
+
+PORTRAIT_DIR = path.join(util.RESOURCES_DIR, "external", "portraits")
+# The biggest PosterLayout.portrait_size, so posters only ever scale portraits down
+PORTRAIT_SIZE = 200
+
+MB = 1024 * 1024
+NAMESPACE = "tynm_portraits"
+
+_memory = RenderAssetCache(MEMORY_MAX_MB * MB)
+
+
+def crop_to_circle(img: Image.Image, size: int) -> Image.Image:
+    portrait = ImageOps.fit(img.convert("RGBA"), (size, size), Image.LANCZOS)
+
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, size, size], fill=255)
+    circular = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    circular.paste(portrait, (0, 0), mask)
+    return circular
+
+
+def prepare(photo: bytes) -> bytes:
+    """The downloaded profile photo cropped to a circle and PNG encoded."""
+    with Image.open(io.BytesIO(photo)) as img:
+        portrait = crop_to_circle(img, PORTRAIT_SIZE)
+
+    buffer = io.BytesIO()
+    portrait.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _disk_path(file_unique_id: str) -> str | None:
+    # It ends up in a file name, so only take what Telegram hands out
+    if not re.fullmatch(r"[\w-]+", file_unique_id):
+        return None
+    return path.join(PORTRAIT_DIR, f"{file_unique_id}.png")
+
+
+def _read_disk(file_unique_id: str) -> bytes | None:
+    portrait_path = _disk_path(file_unique_id)
+    if portrait_path is None:
+        return None
+
+    try:
+        with open(portrait_path, "rb") as f:
+            portrait = f.read()
+    except FileNotFoundError:
+        return None
+
+    # The modified time is when it was last used, for _trim_disk
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(portrait_path)
+    return portrait
+
+
+def _write_disk(file_unique_id: str, portrait: bytes):
+    portrait_path = _disk_path(file_unique_id)
+    if portrait_path is None:
+        return
+
+    os.makedirs(PORTRAIT_DIR, exist_ok=True)
+    partial_path = portrait_path + ".partial"
+    with open(partial_path, "wb") as f:
+        f.write(portrait)
+    os.replace(partial_path, portrait_path)
+
+    _trim_disk()
+
+
+def _trim_disk():
+    """Delete the least recently used portraits until they fit in DISK_MAX_MB."""
+    entries = [entry for entry in os.scandir(PORTRAIT_DIR) if entry.name.endswith(".png")]
+    total = sum(entry.stat().st_size for entry in entries)
+
+    for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+        if total <= DISK_MAX_MB * MB:
+            break
+
+        total -= entry.stat().st_size
+        util.delete_file(entry.path)
+
+
+async def get(file_unique_id: str, download: Callable[[], Awaitable[bytes]]) -> bytes:
+    """The cached portrait for file_unique_id, or the result of download() prepared and cached."""
+    portrait = _memory.find(file_unique_id)
+    if portrait is not None:
+        metrics.inc_lookup_cache(NAMESPACE, "memory")
+        return portrait
+
+    portrait = _read_disk(file_unique_id)
+    if portrait is not None:
+        metrics.inc_lookup_cache(NAMESPACE, "disk")
+        _memory.put(file_unique_id, portrait)
+        return portrait
+
+    metrics.inc_lookup_cache(NAMESPACE, "fetch")
+    portrait = await asyncio.to_thread(prepare, await download())
+    _memory.put(file_unique_id, portrait)
+
+    try:
+        await asyncio.to_thread(_write_disk, file_unique_id, portrait)
+    except OSError as e:
+        logger.warning("[tynm_portraits] unable to save portrait - e={}", e)
+
+    return portrait
+
+
+def clear():
+    _memory.clear()
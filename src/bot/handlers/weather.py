@@ -1,14 +1,14 @@
 import random
 import traceback
 
-import requests
+import httpx
 from loguru import logger
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from src.db import bakchod_dao
-from src.domain import ai, config, dc
+from src.db import aio, bakchod_dao
+from src.domain import ai, config, dc, http_client
 
 app_config = config.get_config()
 
@@ -27,7 +27,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
         dc.log_command_usage("weather", update)
 
         # Get Bakchod for metadata access
-        bakchod = bakchod_dao.get_bakchod_from_update(update)
+        bakchod = await aio.run(bakchod_dao.get_bakchod_from_update, update)
 
         # Extract location from message
         location = None
@@ -82,7 +82,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "units": "metric",  # Use metric units (Celsius, m/s)
             }
 
-            response = requests.get(WEATHER_API_URL, params=params, timeout=10)
+            response = await http_client.get(WEATHER_API_URL, params=params, timeout=10)
             response.raise_for_status()
 
             weather_data = response.json()
@@ -105,7 +105,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     "lon": lon,
                     "appid": WEATHER_API_KEY,
                 }
-                aqi_response = requests.get(aqi_url, params=aqi_params, timeout=10)
+                aqi_response = await http_client.get(aqi_url, params=aqi_params, timeout=10)
                 if aqi_response.status_code == 200:
                     aqi_data = aqi_response.json()
                     aqi = aqi_data["list"][0]["main"]["aqi"]
@@ -130,10 +130,10 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if bakchod.metadata is None:
                 bakchod.metadata = {}
             bakchod.metadata["last_weather_location"] = location
-            bakchod.save()
+            await aio.run(bakchod.save)
             logger.info(f"[weather] Saved location '{location}' to Bakchod metadata")
 
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 await sent_message.edit_text(
                     f"Location '{location}' not found. Please check the location name and try again."
@@ -143,7 +143,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await sent_message.edit_text(
                     f"Error fetching weather data: {e.response.status_code}"
                 )
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             logger.error(f"[weather] Request error: {e}")
             await sent_message.edit_text(
                 "Error connecting to weather service. Please try again later."
@@ -1,14 +1,14 @@
 import datetime
-import subprocess
 import traceback
 
 from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.domain import dc, util
+from src.domain import dc, transcode, util
+
+from . import media_cache
 
-WEBM_RESOURCES_DIR = "resources/webm_conversions/"
 CUSTOM_TIMEOUT_SECONDS = 5000
 
 
@@ -29,41 +29,46 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         dc.log_command_usage("webm", update)
 
+        original_sender = util.extract_pretty_name_from_tg_user(update.message.from_user)
+
+        # The same webm forwarded again is the same file to Telegram
+        cache_key = f"webm:{document.file_unique_id}"
+        if await media_cache.reply_cached(
+            cache_key,
+            update.message,
+            caption=build_webm_conversion_response(
+                original_sender, "no time", document.file_name, update.message.caption
+            ),
+        ):
+            return
+
         message = await update.message.reply_text("Starting webm conversion (^◡^)")
 
         try:
             # Count time taken for webm conversion
             time_start = datetime.datetime.now()
 
-            # Download the webm file
-            logger.info("[webm] Starting webm download - " + str(document.file_id) + ".webm")
+            # Download the webm into memory, ffmpeg reads it from a pipe
+            logger.info("[webm] Starting webm download - file_id={}", document.file_id)
             webm_file = await context.bot.get_file(document.file_id)
-            await webm_file.download_to_drive(
-                WEBM_RESOURCES_DIR + str(document.file_id) + ".webm",
-            )
-            logger.info("[webm] Finished downloading webm - " + str(document.file_id) + ".webm")
+            webm_bytes = bytes(await webm_file.download_as_bytearray())
+            logger.info("[webm] Finished downloading webm - file_id={}", document.file_id)
 
             # Webm to mp4 conversion via ffmpeg
             logger.info(
-                "[webm] Starting webm conversion with ffmpeg - " + str(document.file_id) + ".webm"
-            )
-
-            ffmpeg_conversion = subprocess.call(
-                "ffmpeg -i "
-                + WEBM_RESOURCES_DIR
-                + str(document.file_id)
-                + '.webm -vcodec libx264 -crf 28 -vf "pad=ceil(iw/2)*2:ceil(ih/2)*2" '
-                + WEBM_RESOURCES_DIR
-                + str(document.file_id)
-                + ".mp4",
-                shell=True,
+                "[webm] Starting webm conversion with ffmpeg - file_id={}", document.file_id
             )
 
-            if ffmpeg_conversion != 0:
+            try:
+                mp4_path = await transcode.to_mp4(webm_bytes)
+            except transcode.QueueFullError:
+                await message.edit_text(text="Too many conversions running (-_-;) Try again later!")
+                return
+            except (transcode.TranscodeError, transcode.TranscodeTimeoutError) as e:
                 logger.error(
-                    "[webm] ffmpeg conversion had a non-zero return code! webm={} ffmpeg_conversion={}",
+                    "[webm] ffmpeg conversion failed! webm={} e={}",
                     str(document.file_id),
-                    ffmpeg_conversion,
+                    e,
                 )
 
                 await message.edit_text(text="(｡•́︿•̀｡) webm conversion failed (｡•́︿•̀｡)")
@@ -80,8 +85,6 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 pretty_diff,
             )
 
-            original_sender = util.extract_pretty_name_from_tg_user(update.message.from_user)
-
             caption = build_webm_conversion_response(
                 original_sender, pretty_diff, document.file_name, update.message.caption
             )
@@ -91,22 +94,23 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 str(document.file_id),
                 caption,
             )
-            with open(WEBM_RESOURCES_DIR + str(document.file_id) + ".mp4", "rb") as f:
-                await context.bot.send_video(
-                    chat_id=update.message.chat_id,
-                    video=f,
-                    write_timeout=CUSTOM_TIMEOUT_SECONDS,
-                    caption=caption,
-                )
+            try:
+                with open(mp4_path, "rb") as f:
+                    sent = await context.bot.send_video(
+                        chat_id=update.message.chat_id,
+                        video=f,
+                        write_timeout=CUSTOM_TIMEOUT_SECONDS,
+                        caption=caption,
+                    )
+            finally:
+                util.delete_file(mp4_path)
+            await media_cache.remember(cache_key, sent)
 
             try:
                 await message.delete()
             except Exception as e:
                 logger.error("[webm] failed to delete message! error={}", e)
 
-            util.delete_file(WEBM_RESOURCES_DIR + str(document.file_id) + ".webm")
-            util.delete_file(WEBM_RESOURCES_DIR + str(document.file_id) + ".mp4")
-
         except Exception as e:
             logger.error(
                 "Caught Error in webm.conversion - {} \n {}",
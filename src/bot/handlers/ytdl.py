@@ -1,5 +1,4 @@
-import multiprocessing
-import os
+import asyncio
 import traceback
 
 import yt_dlp
@@ -7,18 +6,12 @@ from loguru import logger
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.domain import config, dc, util
+from src.domain import dc, downloads, transcode, util
 
-app_config = config.get_config()
+from . import media_cache
 
-YTDL_MAX_DOWNLOAD_TIME = float(app_config.get("TELEGRAM", "YTDL_MAX_DOWNLOAD_TIME"))
-
-YTDL_OPTS = {
-    "outtmpl": os.path.join(util.RESOURCES_DIR, "external", "%(id)s"),
-    "merge_output_format": "mp4",
-}
-
-ydl = yt_dlp.YoutubeDL(YTDL_OPTS)
+# Only used to look videos up, downloads run in the downloads service
+ydl = yt_dlp.YoutubeDL()
 
 
 async def handle(
@@ -37,63 +30,77 @@ async def handle(
         message = await update.message.reply_text("Downloading video via yt-dlp (^◡^)")
 
         try:
-            video_info = ydl.extract_info(video_url, download=False)
+            # Only reads metadata, but that's still blocking network calls
+            video_info = await asyncio.to_thread(ydl.extract_info, video_url, download=False)
             logger.debug("[ytdl] video_info={}", video_info)
 
-            p_killed = False
-
-            p = multiprocessing.Process(target=download_video, args=(video_url,))
-            p.start()  # Process(...) is not yet running.
-
-            p.join(YTDL_MAX_DOWNLOAD_TIME)
-
-            # If thread is active
-            if p.is_alive():
-                logger.debug("[ytdl] killing process")
-
-                p_killed = True
-
-                # Terminate foo
-                p.terminate()
-                p.join()
+            cache_key = f"ytdl:{video_info.get('extractor_key')}:{video_info['id']}"
+            if await media_cache.reply_cached(cache_key, update.message):
+                await message.delete()
+                return
 
-            if p_killed:
+            try:
+                job = downloads.submit(
+                    video_url,
+                    video_info["id"],
+                    cache_key,
+                    update.message.from_user.id,
+                    on_progress=progress_reporter(message),
+                )
+            except downloads.UserLimitError:
                 await message.edit_text(
-                    "Download cancelled... took too long /(`⌒`メ)/ Try again with please (⌒_⌒;)"
+                    "You already have downloads running (¬_¬) Wait for them to finish!"
                 )
                 return
-
-            external_files = os.listdir(os.path.join(util.RESOURCES_DIR, "external"))
-            video_file = next(
-                (x for x in external_files if str(x).startswith(video_info["id"])),
-                None,
-            )
-
-            if video_file is None:
-                await message.edit_text("Failed to find downloaded video file!")
+            except downloads.QueueFullError:
+                await message.edit_text("Too many downloads queued (-_-;) Try again later!")
                 return
 
-            downloaded_video_path = os.path.join(util.RESOURCES_DIR, "external", video_file)
-
-            caption = """
+            try:
+                try:
+                    downloaded_video_path = await job
+                except downloads.DownloadTimeoutError:
+                    await message.edit_text(
+                        "Download cancelled... took too long /(`⌒`メ)/ Try again with please (⌒_⌒;)"
+                    )
+                    return
+
+                # Someone else asked for the same video and it was uploaded while we waited
+                if await media_cache.reply_cached(cache_key, update.message):
+                    await message.delete()
+                    return
+
+                caption = """
 {}
 URL: {}
 """.format(
-                video_info["title"],
-                video_url,
-            )
-
-            logger.debug("[ytdl] replying to the request message with downloaded video")
-            await message.edit_text("Uploading video (-.-)...zzz")
-            with open(downloaded_video_path, "rb") as f:
-                await update.message.reply_video(
-                    timeout=5000,
-                    video=f,
-                    caption=caption,
+                    video_info["title"],
+                    video_url,
                 )
 
-            await message.delete()
-            util.delete_file(downloaded_video_path)
+                # Formats that couldn't be merged into an mp4, or too big to upload
+                video_path = downloaded_video_path
+                if transcode.needs_transcode(downloaded_video_path):
+                    await message.edit_text("Converting video (-_-)...")
+                    video_path = await transcode.to_mp4(downloaded_video_path)
+
+                logger.debug("[ytdl] replying to the request message with downloaded video")
+                await message.edit_text("Uploading video (-.-)...zzz")
+                try:
+                    with open(video_path, "rb") as f:
+                        sent = await update.message.reply_video(
+                            timeout=5000,
+                            video=f,
+                            caption=caption,
+                        )
+                finally:
+                    if video_path != downloaded_video_path:
+                        util.delete_file(video_path)
+                await media_cache.remember(cache_key, sent)
+
+                await message.delete()
+            finally:
+                job.release()
 
         except Exception as e:
             logger.error("[ytdl] Caught error in ytdl download e={}", e)
@@ -109,9 +116,8 @@ URL: {}
         return
 
 
-def download_video(video_url):
-    logger.debug("[ytdl] starting download video_url={}", video_url)
-    download_info = ydl.download([video_url])
-    logger.debug("[ytdl] finished download download_info={}", download_info)
+def progress_reporter(message):
+    async def report(progress: float):
+        await message.edit_text(f"Downloading video via yt-dlp (^◡^) {progress:.0%}")
 
-    return download_info
+    return report
@@ -36,6 +36,7 @@ sentry_sdk.init(
 
 # Now import modules that use OpenAI - Sentry will have already instrumented it
 from src.bot import run_telegram_bot  # noqa: E402
+from src.db import migrations  # noqa: E402
 from src.domain import otel_logging  # noqa: E402
 from src.server import run_server  # noqa: E402
 
@@ -46,6 +47,9 @@ otel_logging.setup_otel_logging()
 async def main():
     logger.info(r"Starting chaddi-tg _/\_")
 
+    # Migrations are applied by the deploy scripts - only report where the schema is
+    migrations.log_status()
+
     # Uncomment to intercept debug logs from other libs
     # domain_logger.intercept_logs_with_loguru()
 
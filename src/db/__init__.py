@@ -1,6 +1,9 @@
+import contextlib
 import json
+import zlib
 
 from peewee import *  # noqa: F403
+from playhouse.pool import PooledPostgresqlExtDatabase
 from playhouse.postgres_ext import *  # noqa: F403
 
 from src.domain import config
@@ -15,8 +18,14 @@ if app_config.get("DB", "VERBOSE_LOGGING") == "true":
     logger.setLevel(logging.DEBUG)
 
 # db = SqliteDatabase("chaddi.db")
-db = PostgresqlExtDatabase(
+# Connections are opened lazily on first use and handed out per thread from a
+# pool. Connections older than POOL_STALE_TIMEOUT_SECONDS are recycled, and a
+# thread waits up to POOL_WAIT_TIMEOUT_SECONDS for one to free up.
+db = PooledPostgresqlExtDatabase(
     "chaddi_tg",
+    max_connections=int(app_config.get("DB", "POOL_MAX_CONNECTIONS", fallback=20)),
+    stale_timeout=int(app_config.get("DB", "POOL_STALE_TIMEOUT_SECONDS", fallback=300)),
+    timeout=int(app_config.get("DB", "POOL_WAIT_TIMEOUT_SECONDS", fallback=10)),
     user=str(app_config.get("DB", "USER")),
     password=str(app_config.get("DB", "PASSWORD")),
     host=str(app_config.get("DB", "HOST")),
@@ -35,6 +44,20 @@ EMPTY_JSON = "{}"
 EMPTY_JSON = json.loads(EMPTY_JSON)
 
 
+class CompressedJSONField(BlobField):
+    """JSON stored as zlib compressed bytes. Only decoded when the value is read."""
+
+    def db_value(self, value):
+        if value is None:
+            return None
+        return super().db_value(zlib.compress(json.dumps(value, separators=(",", ":")).encode()))
+
+    def python_value(self, value):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(bytes(value)))
+
+
 class Bakchod(BaseModel):
     tg_id = CharField(unique=True, primary_key=True)
     username = CharField(null=True, index=True)
@@ -45,7 +68,22 @@ class Bakchod(BaseModel):
     updated = DateTimeField(null=True, index=True)
     metadata = BinaryJSONField(default=EMPTY_JSON)
 
+    def save(self, force_insert=False, only=None):
+        # rokda only changes through rokda_dao, so saving an instance with a stale
+        # balance can't undo a credit or debit that happened in the meantime
+        if only is None and not force_insert:
+            only = [f for f in self._meta.sorted_fields if f is not Bakchod.rokda]
+        rows = super().save(force_insert=force_insert, only=only)
+
+        # Copies loaded around the identity map (e.g. through a foreign key) would
+        # otherwise leave the mapped instance holding the values from before
+        from . import bakchod_cache
+
+        bakchod_cache.saved(self, only)
+        return rows
+
 
+# Partitioned by month on time_sent, see partitions
 class Message(BaseModel):
     id = AutoField()
     message_id = CharField()
@@ -53,13 +91,19 @@ class Message(BaseModel):
     from_bakchod = ForeignKeyField(Bakchod, backref="messages", index=True)
     to_id = CharField(index=True)
     text = TextField(null=True)
-    update = BinaryJSONField()
 
     class Meta:
         database = db
         indexes = ((("to_id", "time_sent"), False),)
 
 
+class MessageUpdate(BaseModel):
+    """The raw Telegram update of a Message, kept out of the message table so scans stay narrow."""
+
+    message = ForeignKeyField(Message, primary_key=True, on_delete="CASCADE")
+    payload = CompressedJSONField()
+
+
 class Group(BaseModel):
     group_id = CharField(unique=True, primary_key=True)
     name = CharField(null=True)
@@ -110,6 +154,7 @@ class ScheduledJob(BaseModel):
     job_context = BinaryJSONField(default=EMPTY_JSON)
 
 
+# Partitioned by month on executed_at, see partitions
 class CommandUsage(BaseModel):
     id = AutoField()
     command_name = CharField(index=True)
@@ -126,5 +171,70 @@ class CommandUsage(BaseModel):
         )
 
 
-db.connect()
-db.create_tables([Bakchod, Message, Group, GroupMember, Quote, Roll, ScheduledJob, CommandUsage])
+class RokdaTransaction(BaseModel):
+    """One entry in the rokda ledger, written together with the balance change it records."""
+
+    id = AutoField()
+    created = DateTimeField(index=True)
+    bakchod = ForeignKeyField(Bakchod, backref="rokda_transactions", index=True)
+    counterparty = ForeignKeyField(Bakchod, backref="+", null=True)
+    amount = DoubleField()
+    balance = DoubleField()
+    reason = CharField(index=True)
+
+
+class CachedLookup(BaseModel):
+    """A value fetched from an external API, kept until expires. See lookup_cache."""
+
+    # "<namespace>:<key>"
+    key = TextField(primary_key=True)
+    value = CompressedJSONField()
+    expires = DateTimeField(index=True)
+
+
+MODELS = [
+    Bakchod,
+    Message,
+    MessageUpdate,
+    Group,
+    GroupMember,
+    Quote,
+    Roll,
+    ScheduledJob,
+    CommandUsage,
+    RokdaTransaction,
+    CachedLookup,
+]
+
+
+@contextlib.contextmanager
+def connection_scope():
+    """
+    Check a connection out of the pool for the duration of the block and return
+    it afterwards. If this thread already holds a connection it is left alone,
+    unless the block fails with a connection error.
+    """
+    opened = db.is_closed()
+    if opened:
+        db.connect()
+
+    try:
+        yield
+    except (InterfaceError, OperationalError):
+        # The connection may be dead - don't let the thread keep using it
+        reset_connection()
+        raise
+    finally:
+        if opened:
+            db.close()
+
+
+def reset_connection():
+    """Hand this thread's connection back so the next query checks out a fresh one.
+
+    The pool throws away connections that were lost, so this is how a thread
+    recovers from a dropped connection.
+    """
+    if not db.is_closed():
+        with contextlib.suppress(Exception):
+            db.close()
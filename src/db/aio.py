@@ -0,0 +1,45 @@
+"""
+Runs the synchronous peewee DAOs off the event loop.
+
+Queries run on a bounded thread pool (DB_WORKERS threads) instead of the event
+loop, so a slow query or a locked row only ties up a db worker rather than
+Telegram polling and every API request. Each call checks a connection out of the
+pool and returns it when done, so a dropped connection only fails that call.
+
+    from src.db import aio, roll_dao
+
+    roll = await aio.run(roll_dao.get_roll_by_group_id, group_id)
+    count = await aio.run(lambda: Message.select().count())
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from src.domain import config
+
+from . import connection_scope
+
+app_config = config.get_config()
+
+DB_WORKERS = int(app_config.get("DB", "WORKERS", fallback=8))
+
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="chaddi-db")
+
+
+def _run_with_connection(fn, *args, **kwargs):
+    # connection_scope resets the worker's connection on a connection error
+    with connection_scope():
+        return fn(*args, **kwargs)
+
+
+async def run(fn, *args, **kwargs):
+    """Run a blocking db function on the db worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(_run_with_connection, fn, *args, **kwargs)
+    )
+
+
+def shutdown():
+    _executor.shutdown(wait=True, cancel_futures=False)
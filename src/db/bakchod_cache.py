@@ -0,0 +1,289 @@
+"""
+Identity map of Bakchod rows keyed by tg_id.
+
+While running, lookups through bakchod_dao hand out the same Bakchod instance
+for a given tg_id, so a message no longer re-reads the sender's row in every
+DAO it passes through. Writes that don't need to land immediately (lastseen,
+username) go through bakchod_dao.save_deferred and are written as one UPDATE of
+the dirty fields per Bakchod every FLUSH_INTERVAL_SECONDS.
+
+rokda is never written from here - it belongs to rokda_dao. Per-message
+rewards are summed per Bakchod by add_rokda and credited with the same flush,
+as one rokda = rokda + total UPDATE and one ledger entry each, so they can't
+overwrite a debit that landed in between.
+Saving a Bakchod that isn't the mapped instance, e.g. one loaded through a
+foreign key like Roll.victim, copies the saved fields onto the mapped instance,
+so later lookups and full saves don't bring back the old values.
+When the flusher isn't running (scripts, tests) the map is bypassed entirely.
+"""
+
+import asyncio
+import contextlib
+import copy
+import datetime
+import threading
+
+from cachetools import LRUCache
+from loguru import logger
+
+from src.domain import config
+
+from . import Bakchod, RokdaTransaction, connection_scope, db
+
+app_config = config.get_config()
+
+CACHE_SIZE = int(app_config.get("DB", "BAKCHOD_CACHE_SIZE", fallback=5000))
+FLUSH_INTERVAL_SECONDS = int(app_config.get("DB", "BAKCHOD_FLUSH_INTERVAL_SECONDS", fallback=60))
+
+
+class _IdentityMap(LRUCache):
+    """LRUCache that holds on to the pending writes of the Bakchods it evicts."""
+
+    def popitem(self):
+        key, bakchod = super().popitem()
+        if bakchod.is_dirty():
+            _evicted.append(_take_dirty(bakchod))
+        return key, bakchod
+
+
+_cache = _IdentityMap(maxsize=CACHE_SIZE)
+_evicted: list[tuple[str, dict]] = []
+# tg_id -> rewards not yet credited
+_rokda_rewards: dict[str, float] = {}
+# DAO calls may run on db worker threads (see aio)
+_lock = threading.RLock()
+
+_flusher_task: asyncio.Task | None = None
+
+
+def is_running() -> bool:
+    return _flusher_task is not None and not _flusher_task.done()
+
+
+def get(tg_id) -> Bakchod | None:
+    with _lock:
+        return _cache.get(str(tg_id))
+
+
+def put(bakchod: Bakchod) -> Bakchod:
+    """Add a Bakchod to the map. If one is already mapped for this tg_id, that one wins."""
+    key = str(bakchod.tg_id)
+
+    with _lock:
+        existing = _cache.get(key)
+        if existing is not None:
+            return existing
+
+        _cache[key] = bakchod
+        return bakchod
+
+
+def saved(bakchod: Bakchod, only=None):
+    """Copy the fields just saved from another instance of a mapped Bakchod onto the mapped one."""
+    key = str(bakchod.tg_id)
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None or cached is bakchod:
+            return
+
+        for field in only or Bakchod._meta.sorted_fields:
+            name = field if isinstance(field, str) else field.name
+            # rokda is kept in sync by rokda_dao, and pending deferred writes are newer
+            if name == "rokda" or name in cached._dirty or name not in bakchod.__data__:
+                continue
+
+            cached.__data__[name] = copy.deepcopy(bakchod.__data__[name])
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        _evicted.clear()
+        _rokda_rewards.clear()
+
+
+def add_rokda(bakchod: Bakchod, amount: float) -> bool:
+    """Credit amount with the next flush. Returns False if bakchod isn't the mapped instance."""
+    if not is_running():
+        return False
+
+    key = str(bakchod.tg_id)
+
+    with _lock:
+        if _cache.get(key) is not bakchod:
+            return False
+
+        _rokda_rewards[key] = _rokda_rewards.get(key, 0) + amount
+        # Shown straight away, without marking rokda dirty
+        bakchod.__data__["rokda"] = (bakchod.rokda or 0) + amount
+
+    return True
+
+
+def sync_rokda(bakchod: Bakchod, balance: float):
+    """Show a balance read back from the db, plus any rewards not credited yet."""
+    key = str(bakchod.tg_id)
+
+    with _lock:
+        shown = balance + _rokda_rewards.get(key, 0)
+        bakchod.__data__["rokda"] = shown
+
+        cached = _cache.get(key)
+        if cached is not None:
+            cached.__data__["rokda"] = shown
+
+
+def _take_dirty(bakchod: Bakchod) -> tuple[str, dict]:
+    pk_name = Bakchod._meta.primary_key.name
+    data = {
+        f.name: bakchod.__data__.get(f.name)
+        for f in bakchod.dirty_fields
+        if f.name not in (pk_name, "rokda")
+    }
+    bakchod._dirty.clear()
+    return str(bakchod.tg_id), data
+
+
+def collect_dirty() -> list[tuple[str, dict]]:
+    """Snapshot and clear the pending writes. Must be called from the event loop thread."""
+    with _lock:
+        pending = _evicted[:]
+        _evicted.clear()
+
+        pending.extend(_take_dirty(b) for b in list(_cache.values()) if b.is_dirty())
+
+    return [(tg_id, data) for tg_id, data in pending if data]
+
+
+def collect_rokda() -> dict[str, float]:
+    """Snapshot and clear the rewards waiting to be credited."""
+    with _lock:
+        rewards = dict(_rokda_rewards)
+        _rokda_rewards.clear()
+
+    return rewards
+
+
+def write_dirty(pending: list[tuple[str, dict]], rewards: dict[str, float] | None = None):
+    """
+    Write snapshots from collect_dirty and collect_rokda. Safe to call from a
+    worker thread. Returns the balance of each rewarded Bakchod after crediting.
+    """
+    balances = {}
+    if not pending and not rewards:
+        return balances
+
+    now = datetime.datetime.now()
+
+    rewards = rewards or {}
+
+    # An evicted snapshot comes before the cached instance's newer one
+    updates: dict[str, dict] = {}
+    for tg_id, data in pending:
+        updates.setdefault(tg_id, {}).update(data)
+
+    with connection_scope(), db.atomic():
+        # One UPDATE per row, in tg_id order like rokda_dao, so a flush and a
+        # transfer can't lock the same rows in opposite orders and deadlock
+        for tg_id in sorted(updates.keys() | rewards.keys()):
+            data = updates.get(tg_id, {})
+            if tg_id not in rewards:
+                Bakchod.update(**data).where(Bakchod.tg_id == tg_id).execute()
+                continue
+
+            data["rokda"] = Bakchod.rokda + rewards[tg_id]
+            rows = list(
+                Bakchod.update(**data)
+                .where(Bakchod.tg_id == tg_id)
+                .returning(Bakchod.rokda)
+                .tuples()
+                .execute()
+            )
+            if rows:
+                balances[tg_id] = rows[0][0]
+
+        if balances:
+            RokdaTransaction.insert_many(
+                [
+                    {
+                        "created": now,
+                        "bakchod": tg_id,
+                        "amount": rewards[tg_id],
+                        "balance": balance,
+                        "reason": "reward",
+                    }
+                    for tg_id, balance in balances.items()
+                ]
+            ).execute()
+
+    logger.trace("[bakchod_cache] flushed bakchods={} rewarded={}", len(pending), len(balances))
+
+    return balances
+
+
+def _restore_dirty(pending: list[tuple[str, dict]], rewards: dict[str, float]):
+    with _lock:
+        for tg_id, data in pending:
+            bakchod = _cache.get(tg_id)
+            if bakchod is not None:
+                bakchod._dirty.update(data.keys())
+            else:
+                _evicted.append((tg_id, data))
+
+        for tg_id, amount in rewards.items():
+            _rokda_rewards[tg_id] = _rokda_rewards.get(tg_id, 0) + amount
+
+
+async def flush():
+    pending = collect_dirty()
+    rewards = collect_rokda()
+
+    try:
+        balances = await asyncio.to_thread(write_dirty, pending, rewards)
+    except Exception as e:
+        logger.error("[bakchod_cache] flush failed bakchods={} e={}", len(pending), e)
+        _restore_dirty(pending, rewards)
+        return
+
+    with _lock:
+        for tg_id, balance in balances.items():
+            bakchod = _cache.get(tg_id)
+            if bakchod is not None:
+                sync_rokda(bakchod, balance)
+
+
+async def _run_flusher():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        await flush()
+
+
+def start():
+    global _flusher_task
+
+    if is_running():
+        return
+
+    _flusher_task = asyncio.create_task(_run_flusher())
+
+    logger.info(
+        "[bakchod_cache] started - size={} flush_interval_seconds={}",
+        CACHE_SIZE,
+        FLUSH_INTERVAL_SECONDS,
+    )
+
+
+async def stop():
+    """Stop the flusher, write out anything pending and empty the map."""
+    global _flusher_task
+
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _flusher_task
+        _flusher_task = None
+
+    await flush()
+    clear()
+    logger.info("[bakchod_cache] stopped")
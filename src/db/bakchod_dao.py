@@ -6,7 +6,7 @@ from telegram import Update, User
 
 from src.domain import util
 
-from . import Bakchod
+from . import Bakchod, bakchod_cache
 
 
 def _create_bakchod(tg_id: int, username: str, pretty_name: str) -> Bakchod:
@@ -21,14 +21,25 @@ def _create_bakchod(tg_id: int, username: str, pretty_name: str) -> Bakchod:
 
 
 def _get_or_create_bakchod(tg_id: int, username: str, pretty_name: str) -> Bakchod:
+    if bakchod_cache.is_running():
+        cached = bakchod_cache.get(tg_id)
+        if cached is not None:
+            return cached
+
     try:
         exists_in_db = Bakchod.get(Bakchod.tg_id == tg_id)
         if exists_in_db is not None:
-            return exists_in_db
+            return _track(exists_in_db)
 
     except DoesNotExist:
         logger.info("[db] tg_id={} DoesNotExist... Creating new!", tg_id)
-        return _create_bakchod(tg_id, username, pretty_name)
+        return _track(_create_bakchod(tg_id, username, pretty_name))
+
+
+def _track(bakchod: Bakchod) -> Bakchod:
+    if bakchod_cache.is_running():
+        return bakchod_cache.put(bakchod)
+    return bakchod
 
 
 def get_bakchod_from_update(update: Update) -> Bakchod:
@@ -47,14 +58,40 @@ def get_or_create_bakchod_from_tg_user(user: User) -> Bakchod:
     return _get_or_create_bakchod(tg_id, username, pretty_name)
 
 
+def get_bakchod_by_id(tg_id) -> Bakchod:
+    if bakchod_cache.is_running():
+        cached = bakchod_cache.get(tg_id)
+        if cached is not None:
+            return cached
+
+    try:
+        return _track(Bakchod.get_by_id(tg_id))
+
+    except DoesNotExist:
+        logger.warning("[db] tg_id={} DoesNotExist", tg_id)
+
+        return None
+
+
 def get_bakchod_by_username(username: str) -> Bakchod:
     try:
         exists_in_db = Bakchod.get(Bakchod.username == username)
 
         if exists_in_db is not None:
-            return exists_in_db
+            return _track(exists_in_db)
 
     except DoesNotExist:
         logger.warning("[db] username={} DoesNotExist", username)
 
         return None
+
+
+def save_deferred(bakchod: Bakchod):
+    """
+    Save a Bakchod whose changes can wait - the dirty fields are written with the
+    next bakchod_cache flush, coalescing repeated updates into a single UPDATE.
+    """
+    if bakchod_cache.is_running() and bakchod_cache.get(bakchod.tg_id) is bakchod:
+        return
+
+    bakchod.save()
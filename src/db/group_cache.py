@@ -0,0 +1,98 @@
+"""
+In-memory view of Groups and their members.
+
+Warmed from Group and GroupMember at startup so group_dao.log_group_from_update
+can skip the db for known (group, bakchod) pairs. Group rows are only written
+when the title changes, or once every GROUP_TOUCH_INTERVAL_SECONDS to keep
+Group.updated roughly current. Until warmed, every lookup misses and writes are
+ignored, so callers fall back to the db.
+"""
+
+import asyncio
+import datetime
+
+from loguru import logger
+
+from src.domain import config
+
+from . import Group, GroupMember, connection_scope
+
+app_config = config.get_config()
+
+GROUP_TOUCH_INTERVAL = datetime.timedelta(
+    seconds=int(app_config.get("DB", "GROUP_TOUCH_INTERVAL_SECONDS", fallback=3600))
+)
+
+# group_id -> (name, updated)
+_groups: dict[str, tuple[str | None, datetime.datetime]] = {}
+# group_id -> {bakchod_id}
+_members: dict[str, set[str]] = {}
+
+_warm = False
+
+
+def is_warm() -> bool:
+    return _warm
+
+
+def warm():
+    global _warm
+
+    groups = {}
+    members = {}
+    with connection_scope():
+        for group_id, name, updated in Group.select(
+            Group.group_id, Group.name, Group.updated
+        ).tuples():
+            groups[str(group_id)] = (name, updated)
+
+        for group_id, bakchod_id in GroupMember.select(
+            GroupMember.group, GroupMember.bakchod
+        ).tuples():
+            members.setdefault(str(group_id), set()).add(str(bakchod_id))
+
+    _groups.clear()
+    _groups.update(groups)
+    _members.clear()
+    _members.update(members)
+    _warm = True
+
+    logger.info(
+        "[group_cache] warmed - groups={} members={}",
+        len(_groups),
+        sum(len(m) for m in _members.values()),
+    )
+
+
+async def start():
+    await asyncio.to_thread(warm)
+
+
+def clear():
+    global _warm
+
+    _warm = False
+    _groups.clear()
+    _members.clear()
+
+
+def get_group(group_id) -> tuple[str | None, datetime.datetime] | None:
+    return _groups.get(str(group_id))
+
+
+def set_group(group_id, name: str | None, updated: datetime.datetime):
+    if _warm:
+        _groups[str(group_id)] = (name, updated)
+
+
+def is_member(group_id, bakchod_id) -> bool:
+    return str(bakchod_id) in _members.get(str(group_id), ())
+
+
+def add_member(group_id, bakchod_id):
+    if _warm:
+        _members.setdefault(str(group_id), set()).add(str(bakchod_id))
+
+
+def remove_member(group_id, bakchod_id):
+    _members.get(str(group_id), set()).discard(str(bakchod_id))
@@ -4,7 +4,7 @@ from loguru import logger
 from peewee import DoesNotExist
 from telegram import Chat, Update
 
-from src.db import Bakchod, Group, GroupMember, Message
+from src.db import Bakchod, Group, GroupMember, Message, group_cache
 
 
 def get_or_create_group_from_chat(chat: Chat) -> Group:
@@ -29,40 +29,75 @@ def log_group_from_update(update: Update):
         logger.warning("[log_group_from_update] Update has no message or edited_message with chat")
         return
 
+    _touch_group(message.chat)
+
+    if message.from_user is None:
+        logger.warning("[log_group_from_update] Message has no from_user")
+        return
+
+    _add_groupmember(message.from_user.id, message.chat.id)
+
+    # logger.debug("[db] updated Group - id={}", group.name)
+
+    return
+
+
+def _touch_group(chat: Chat):
+    now = datetime.datetime.now()
+
+    cached = group_cache.get_group(chat.id)
+    if cached is not None:
+        name, updated = cached
+
+        # Known Group - only write when the title changed or updated has gone stale
+        if name == chat.title and now - updated < group_cache.GROUP_TOUCH_INTERVAL:
+            return
+
+        Group.update(name=chat.title, updated=now).where(Group.group_id == chat.id).execute()
+        group_cache.set_group(chat.id, chat.title, now)
+        return
+
     try:
         # Check if Group exists
-        group = Group.get(Group.group_id == message.chat.id)
+        group = Group.get(Group.group_id == chat.id)
 
         # Update Group details
-        group.name = message.chat.title
-        group.updated = datetime.datetime.now()
+        group.name = chat.title
+        group.updated = now
         group.save()
 
     except DoesNotExist:
         # Create Group from scratch
         group = Group.create(
-            group_id=message.chat.id,
-            name=message.chat.title,
-            created=datetime.datetime.now(),
-            updated=datetime.datetime.now(),
+            group_id=chat.id,
+            name=chat.title,
+            created=now,
+            updated=now,
         )
 
-    if message.from_user is None:
-        logger.warning("[log_group_from_update] Message has no from_user")
-        return
+    group_cache.set_group(chat.id, group.name, group.updated)
 
-    bakchod = Bakchod.get_by_id(message.from_user.id)
+
+def _add_groupmember(bakchod_id, group_id) -> bool:
+    if group_cache.is_member(group_id, bakchod_id):
+        return False
+
+    created = False
 
     try:
-        _groupmember = GroupMember.get(
-            (GroupMember.group_id == group.group_id) & (GroupMember.bakchod_id == bakchod.tg_id)
-        )
+        GroupMember.get((GroupMember.group_id == group_id) & (GroupMember.bakchod_id == bakchod_id))
     except DoesNotExist:
-        _groupmember = GroupMember.create(group=group, bakchod=bakchod)
+        GroupMember.create(group=group_id, bakchod=bakchod_id)
+        created = True
 
-    # logger.debug("[db] updated Group - id={}", group.name)
+    group_cache.add_member(group_id, bakchod_id)
+
+    return created
 
-    return
+
+def add_bakchod_to_group(bakchod: Bakchod, group_id: str) -> bool:
+    """Add a Bakchod to a Group. Returns True if they weren't already a member."""
+    return _add_groupmember(bakchod.tg_id, group_id)
 
 
 def get_group_from_update(update: Update) -> Group:
@@ -115,6 +150,8 @@ def remove_bakchod_from_group(bakchod: Bakchod, group_id: str):
             (GroupMember.group_id == group_id) & (GroupMember.bakchod_id == bakchod.tg_id)
         ).execute()
 
+        group_cache.remove_member(group_id, bakchod.tg_id)
+
     except Exception as e:
         logger.warning(
             "[group_dao] Caught Ex remove_bakchod_from_group - bakchod={} group_id={} e={}",
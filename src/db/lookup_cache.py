@@ -0,0 +1,205 @@
+"""
+Two-tier TTL cache for lookups against external APIs.
+
+A LookupCache keeps the max_entries most recently used values in memory, in
+front of the CachedLookup table, so values survive restarts. Entries expire ttl
+after they were fetched. Concurrent get_or_fetch calls for the same key share a
+single fetch, so a link posted in several groups at once costs one upstream
+request. The table is best effort - if the db can't be reached, lookups fall
+through to the fetch. With a negative_ttl, keys whose fetch found nothing are
+remembered in memory for that long instead of being fetched again right away.
+
+    songs = LookupCache("songlink", ttl=datetime.timedelta(days=7))
+    links = await songs.get_or_fetch(url, lambda: fetch_links(url))
+
+Expired rows are deleted by prune_expired, run daily by the scheduler.
+"""
+
+import asyncio
+import collections
+import datetime
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+
+from src.domain import metrics
+
+from . import CachedLookup, aio
+
+
+def load(key: str) -> tuple[Any, datetime.datetime] | None:
+    """The stored (value, expires) for key, unless it has expired."""
+    rows = list(
+        CachedLookup.select(CachedLookup.value, CachedLookup.expires)
+        .where((CachedLookup.key == key) & (CachedLookup.expires > datetime.datetime.now()))
+        .tuples()
+    )
+    if not rows:
+        return None
+
+    return rows[0]
+
+
+def store(key: str, value: Any, expires: datetime.datetime):
+    CachedLookup.insert(key=key, value=value, expires=expires).on_conflict(
+        conflict_target=[CachedLookup.key],
+        preserve=[CachedLookup.value, CachedLookup.expires],
+    ).execute()
+
+
+def remove(key: str):
+    CachedLookup.delete().where(CachedLookup.key == key).execute()
+
+
+def prune_expired() -> int:
+    deleted = CachedLookup.delete().where(CachedLookup.expires <= datetime.datetime.now()).execute()
+    logger.info("[lookup_cache] pruned expired lookups - deleted={}", deleted)
+    return deleted
+
+
+class LookupCache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: datetime.timedelta,
+        max_entries: int = 1000,
+        negative_ttl: datetime.timedelta | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+
+        # key -> (value, expires), least recently used first
+        self._entries: collections.OrderedDict[str, tuple[Any, datetime.datetime]] = (
+            collections.OrderedDict()
+        )
+        self._fetches: dict[str, asyncio.Task] = {}
+        # key -> when to fetch it again, for fetches that returned None
+        self._misses: collections.OrderedDict[str, datetime.datetime] = collections.OrderedDict()
+
+    def _remember(self, key: str, value: Any, expires: datetime.datetime):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _remember_miss(self, key: str):
+        self._misses[key] = datetime.datetime.now() + self.negative_ttl
+        self._misses.move_to_end(key)
+
+        while len(self._misses) > self.max_entries:
+            self._misses.popitem(last=False)
+
+    def is_known_miss(self, key: str) -> bool:
+        retry_at = self._misses.get(key)
+        if retry_at is None:
+            return False
+
+        if retry_at <= datetime.datetime.now():
+            del self._misses[key]
+            return False
+
+        return True
+
+    def get(self, key: str) -> Any | None:
+        """The value in memory for key, if it hasn't expired. Doesn't touch the db."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires = entry
+        if expires <= datetime.datetime.now():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any | None:
+        """
+        The cached value for key, or else the result of awaiting fetch(), which is
+        cached. A fetch that returns None is only remembered if there's a negative_ttl.
+        """
+        value = self.get(key)
+        if value is not None:
+            metrics.inc_lookup_cache(self.namespace, "memory")
+            return value
+
+        if self.is_known_miss(key):
+            metrics.inc_lookup_cache(self.namespace, "negative")
+            return None
+
+        task = self._fetches.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_or_fetch(key, fetch))
+            self._fetches[key] = task
+            task.add_done_callback(lambda _: self._fetches.pop(key, None))
+        else:
+            metrics.inc_lookup_cache(self.namespace, "coalesced")
+
+        # One waiter being cancelled mustn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def lookup(self, key: str) -> Any | None:
+        """The cached value for key from memory or the db, without fetching."""
+        value = self.get(key)
+        if value is not None:
+            metrics.inc_lookup_cache(self.namespace, "memory")
+            return value
+
+        return await self._load(key)
+
+    async def put(self, key: str, value: Any):
+        expires = datetime.datetime.now() + self.ttl
+        self._remember(key, value, expires)
+        self._misses.pop(key, None)
+
+        db_key = f"{self.namespace}:{key}"
+        try:
+            await aio.run(store, db_key, value, expires)
+        except Exception as e:
+            logger.warning("[lookup_cache] store failed - key={} e={}", db_key, e)
+
+    async def forget(self, key: str):
+        """Drop key, e.g. once the cached value turns out to be stale."""
+        self._entries.pop(key, None)
+
+        db_key = f"{self.namespace}:{key}"
+        try:
+            await aio.run(remove, db_key)
+        except Exception as e:
+            logger.warning("[lookup_cache] remove failed - key={} e={}", db_key, e)
+
+    async def _load(self, key: str) -> Any | None:
+        db_key = f"{self.namespace}:{key}"
+
+        try:
+            stored = await aio.run(load, db_key)
+        except Exception as e:
+            logger.warning("[lookup_cache] load failed - key={} e={}", db_key, e)
+            return None
+
+        if stored is None:
+            return None
+
+        metrics.inc_lookup_cache(self.namespace, "db")
+        self._remember(key, *stored)
+        return stored[0]
+
+    async def _load_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any | None:
+        value = await self._load(key)
+        if value is not None:
+            return value
+
+        metrics.inc_lookup_cache(self.namespace, "fetch")
+        value = await fetch()
+        if value is None:
+            if self.negative_ttl is not None:
+                self._remember_miss(key)
+            return None
+
+        await self.put(key, value)
+        return value
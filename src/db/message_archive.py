@@ -0,0 +1,171 @@
+"""
+Cold storage for old Messages.
+
+Messages older than MESSAGE_ARCHIVE_AFTER_DAYS are streamed out of Postgres
+through a server-side cursor into gzipped JSON lines files, one file per group
+and month per run:
+
+    MESSAGE_ARCHIVE_DIR/group=<to_id>/month=<YYYY-MM>/<run>.jsonl.gz
+
+The hive-style directories let tools like DuckDB or pandas scan the archive
+directly, or use iter_archived_messages. Once the export is done, each file is
+finished in its own transaction: the rows it holds and their raw updates are
+deleted by id, in batches of MESSAGE_ARCHIVE_BATCH_SIZE, and the file is renamed
+into place. A run that dies part way leaves the files it hadn't finished as
+*.part, which readers ignore, with their rows still in the db for the next run.
+"""
+
+import datetime
+import gzip
+import itertools
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+from loguru import logger
+from peewee import JOIN
+from playhouse.postgres_ext import ServerSide
+
+from src.domain import config
+
+from . import Message, MessageUpdate, connection_scope, db
+
+app_config = config.get_config()
+
+# 0 disables archiving
+ARCHIVE_AFTER_DAYS = int(app_config.get("DB", "MESSAGE_ARCHIVE_AFTER_DAYS", fallback="0"))
+ARCHIVE_DIR = Path(app_config.get("DB", "MESSAGE_ARCHIVE_DIR", fallback="../archive/messages"))
+BATCH_SIZE = int(app_config.get("DB", "MESSAGE_ARCHIVE_BATCH_SIZE", fallback=5000))
+
+
+def _archive_query(cutoff: datetime.datetime):
+    return (
+        Message.select(
+            Message.id,
+            Message.message_id,
+            Message.time_sent,
+            Message.from_bakchod,
+            Message.to_id,
+            Message.text,
+            MessageUpdate.payload.alias("update"),
+        )
+        .join(MessageUpdate, JOIN.LEFT_OUTER, on=(MessageUpdate.message == Message.id))
+        .where(Message.time_sent < cutoff)
+        # One file is open at a time
+        .order_by(Message.to_id, Message.time_sent)
+        .dicts()
+    )
+
+
+def _serialise(row: dict) -> str:
+    return json.dumps(
+        {
+            "id": row["id"],
+            "message_id": row["message_id"],
+            "time_sent": row["time_sent"].isoformat(),
+            "from_bakchod": row["from_bakchod"],
+            "to_id": row["to_id"],
+            "text": row["text"],
+            "update": row["update"],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _file_key(row: dict) -> tuple[str, str]:
+    return row["to_id"], f"{row['time_sent']:%Y-%m}"
+
+
+def export_messages(
+    cutoff: datetime.datetime, run_id: str, archive_dir: Path = ARCHIVE_DIR
+) -> dict[Path, list[int]]:
+    """Write every Message older than cutoff to *.part files. Returns the ids in each file."""
+    files = {}
+
+    # Server-side cursors only live inside a transaction
+    with db.atomic():
+        cursor = ServerSide(_archive_query(cutoff), array_size=BATCH_SIZE)
+
+        # Rows come ordered by group and time, so each file is written in one go
+        for (to_id, month), group_rows in itertools.groupby(cursor, key=_file_key):
+            part = archive_dir / f"group={to_id}" / f"month={month}" / f"{run_id}.jsonl.gz.part"
+            part.parent.mkdir(parents=True, exist_ok=True)
+            ids = files[part] = []
+
+            with gzip.open(part, "wt", encoding="utf-8") as out:
+                for row in group_rows:
+                    out.write(_serialise(row))
+                    out.write("\n")
+                    ids.append(row["id"])
+
+    return files
+
+
+def delete_messages(ids: list[int]):
+    """Delete Messages by id, and their raw updates, a batch per statement."""
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start : start + BATCH_SIZE]
+        MessageUpdate.delete().where(MessageUpdate.message.in_(batch)).execute()
+        Message.delete().where(Message.id.in_(batch)).execute()
+
+
+def finish_file(part: Path, ids: list[int]):
+    """Delete the Messages written to part and put the file in place for readers, together."""
+    with db.atomic():
+        delete_messages(ids)
+        # Renamed last, so a failed delete leaves the file as *.part and the
+        # rows in the db. Only a crash between the rename and the commit can
+        # leave rows both archived and in the db.
+        part.rename(part.with_name(part.name.removesuffix(".part")))
+
+
+def archive_old_messages(
+    after_days: int = ARCHIVE_AFTER_DAYS, archive_dir: Path = ARCHIVE_DIR
+) -> int:
+    """Move Messages older than after_days into the archive. Returns how many were moved."""
+    if after_days <= 0:
+        return 0
+
+    now = datetime.datetime.now()
+    cutoff = now - datetime.timedelta(days=after_days)
+    run_id = f"{now:%Y%m%dT%H%M%S}"
+    moved = 0
+
+    with connection_scope():
+        files = export_messages(cutoff, run_id, archive_dir)
+
+        # By id rather than by cutoff, so only rows that made it into a file go
+        for part, ids in files.items():
+            finish_file(part, ids)
+            moved += len(ids)
+
+    logger.info(
+        "[message_archive] archived - cutoff={} files={} moved={}",
+        cutoff,
+        len(files),
+        moved,
+    )
+
+    return moved
+
+
+def iter_archived_messages(
+    group_id: str | None = None,
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+    archive_dir: Path = ARCHIVE_DIR,
+) -> Iterator[dict]:
+    """Scan archived Messages, optionally for one group and months from since to until."""
+    group = group_id if group_id is not None else "*"
+
+    for path in sorted(archive_dir.glob(f"group={group}/month=*/*.jsonl.gz")):
+        month = path.parent.name.removeprefix("month=")
+        if since is not None and month < f"{since:%Y-%m}":
+            continue
+        if until is not None and month > f"{until:%Y-%m}":
+            continue
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
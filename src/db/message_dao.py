@@ -5,25 +5,27 @@ from telegram import Update
 
 from src.domain import metrics, util
 
-from . import Bakchod, Message
+from . import Message, MessageUpdate, bakchod_dao, message_queue
 
 
 def log_message_from_update(update: Update):
     # logger.debug("[log] Building Message based on update={}", update.to_json())
 
-    from_bakchod = Bakchod.get_by_id(update.message.from_user.id)
+    from_bakchod = bakchod_dao.get_bakchod_by_id(update.message.from_user.id)
 
-    m = Message.create(
+    m = Message(
         message_id=update.message.message_id,
         time_sent=datetime.datetime.now(),
         from_bakchod=from_bakchod,
         to_id=update.message.chat.id,
         text=update.message.text,
-        update=update.to_dict(),
     )
 
+    # Written to the db in bulk by message_queue
+    message_queue.enqueue(m, update.to_dict())
+
     logger.trace(
-        "[db] saved Message - id={} from={}",
+        "[db] queued Message - id={} from={}",
         m.message_id,
         util.extract_pretty_name_from_bakchod(from_bakchod),
     )
@@ -31,3 +33,12 @@ def log_message_from_update(update: Update):
     metrics.inc_message_count(update)
 
     return m
+
+
+def get_updates_by_message_ids(message_ids: list[int]) -> dict[int, dict]:
+    """Raw updates for the given Message ids. Messages without one are left out."""
+    if not message_ids:
+        return {}
+
+    query = MessageUpdate.select().where(MessageUpdate.message.in_(message_ids))
+    return {mu.message_id: mu.payload for mu in query}
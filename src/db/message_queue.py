@@ -0,0 +1,228 @@
+"""
+Write-behind queue for Message rows.
+
+Messages are buffered in memory and written to the database with a bulk
+insert_many, either once FLUSH_MAX_ROWS are pending or every FLUSH_INTERVAL_MS -
+whichever comes first. The raw update of each Message goes to MessageUpdate in
+the same transaction. The flush runs on a worker thread so the event loop never
+waits on Postgres. When the flusher isn't running (scripts, tests) rows are
+written straight away.
+
+If the database is unavailable, a failed flush is requeued whole. If a row is
+rejected (a constraint or a bad value), the batch is split and retried until
+the rejected rows are found, and only those are dropped.
+
+Rows get their id when they're inserted, so a queued Message has id None.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+
+from loguru import logger
+from peewee import DataError, IntegrityError, chunked
+
+from src.domain import config, metrics
+
+from . import Message, MessageUpdate, connection_scope, db
+
+app_config = config.get_config()
+
+FLUSH_MAX_ROWS = int(app_config.get("DB", "MESSAGE_QUEUE_FLUSH_ROWS", fallback=200))
+FLUSH_INTERVAL_MS = int(app_config.get("DB", "MESSAGE_QUEUE_FLUSH_INTERVAL_MS", fallback=500))
+MAX_PENDING_ROWS = int(app_config.get("DB", "MESSAGE_QUEUE_MAX_PENDING_ROWS", fallback=20000))
+
+# (Message row, raw update)
+_pending: list[tuple[dict, dict | None]] = []
+# Errors caused by the rows being written rather than by the database
+ROW_ERRORS = (IntegrityError, DataError)
+_lock = threading.Lock()
+
+_flusher_task: asyncio.Task | None = None
+_flush_requested: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def is_running() -> bool:
+    return _flusher_task is not None and not _flusher_task.done()
+
+
+def get_depth() -> int:
+    with _lock:
+        return len(_pending)
+
+
+def enqueue(message: Message, update: dict | None = None):
+    """Queue an unsaved Message, and optionally its raw update, to be inserted with the next flush."""
+    row = (message.__data__.copy(), update)
+
+    if not is_running():
+        _insert_rows([row])
+        return
+
+    with _lock:
+        _pending.append(row)
+        depth = len(_pending)
+
+    metrics.set_message_queue_depth(depth)
+
+    if depth >= FLUSH_MAX_ROWS:
+        # enqueue may be called from a db worker thread
+        _loop.call_soon_threadsafe(_flush_requested.set)
+
+
+def flush() -> int:
+    """Write all pending rows to the database. Returns the number of rows written."""
+    with _lock:
+        rows = _pending[:]
+        _pending.clear()
+
+    if not rows:
+        return 0
+
+    try:
+        _insert_rows(rows)
+        written, unwritten = len(rows), []
+    except ROW_ERRORS as e:
+        logger.warning("[message_queue] flush rejected, splitting rows={} e={}", len(rows), e)
+        written, unwritten = _insert_splitting(rows, e)
+    except Exception as e:
+        logger.error("[message_queue] flush failed, requeueing rows={} e={}", len(rows), e)
+        written, unwritten = 0, rows
+
+    if unwritten:
+        _requeue(unwritten)
+
+    metrics.set_message_queue_depth(get_depth())
+    return written
+
+
+def _insert_splitting(rows: list[tuple[dict, dict | None]], error: Exception) -> tuple[int, list]:
+    """
+    Insert rejected rows in halves until the rejected ones are found on their own,
+    and drop those. Returns the number of rows written and the rows left unwritten
+    because the database itself failed.
+    """
+    written = 0
+    batches = []
+    _split_rejected(rows, error, batches)
+
+    while batches:
+        batch = batches.pop()
+
+        try:
+            _insert_rows(batch)
+            written += len(batch)
+        except ROW_ERRORS as e:
+            _split_rejected(batch, e, batches)
+        except Exception as e:
+            logger.error("[message_queue] flush failed while splitting - e={}", e)
+            return written, [row for b in [batch, *reversed(batches)] for row in b]
+
+    return written, []
+
+
+def _split_rejected(batch: list[tuple[dict, dict | None]], error: Exception, batches: list):
+    """Queue up both halves of a rejected batch to be retried, or drop it if it's a single row."""
+    if len(batch) > 1:
+        middle = len(batch) // 2
+        # batches is popped from the end, so the first half goes first
+        batches.extend([batch[middle:], batch[:middle]])
+        return
+
+    message = batch[0][0]
+    logger.error(
+        "[message_queue] dropped rejected row - message_id={} to_id={} e={}",
+        message.get("message_id"),
+        message.get("to_id"),
+        error,
+    )
+    metrics.observe_message_queue_flush(0, 1, "dropped")
+
+
+def _requeue(rows: list[tuple[dict, dict | None]]):
+    with _lock:
+        _pending[:0] = rows
+        dropped = len(_pending) - MAX_PENDING_ROWS
+        if dropped > 0:
+            # Drop the oldest rows rather than growing without bound while the db is down
+            del _pending[:dropped]
+            logger.error("[message_queue] queue full, dropped rows={}", dropped)
+            metrics.observe_message_queue_flush(0, dropped, "dropped")
+
+
+def _insert_batch(batch: list[tuple[dict, dict | None]]):
+    messages = [message for message, _ in batch]
+
+    if all(update is None for _, update in batch):
+        Message.insert_many(messages).execute()
+        return
+
+    ids = Message.insert_many(messages).returning(Message.id).tuples().execute()
+
+    updates = [
+        {"message": message_id, "payload": update}
+        for (message_id,), (_, update) in zip(ids, batch, strict=True)
+        if update is not None
+    ]
+    MessageUpdate.insert_many(updates).execute()
+
+
+def _insert_rows(rows: list[tuple[dict, dict | None]]):
+    start = time.perf_counter()
+    status = "error"
+
+    try:
+        with connection_scope(), db.atomic():
+            for batch in chunked(rows, FLUSH_MAX_ROWS):
+                _insert_batch(batch)
+        status = "ok"
+    finally:
+        metrics.observe_message_queue_flush(time.perf_counter() - start, len(rows), status)
+
+    logger.trace("[message_queue] flushed rows={}", len(rows))
+
+
+async def _run_flusher():
+    while True:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(_flush_requested.wait(), timeout=FLUSH_INTERVAL_MS / 1000)
+
+        _flush_requested.clear()
+
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            logger.error("[message_queue] Caught Exception in flusher - e={}", e)
+
+
+def start():
+    global _flusher_task, _flush_requested, _loop
+
+    if is_running():
+        return
+
+    _loop = asyncio.get_running_loop()
+    _flush_requested = asyncio.Event()
+    _flusher_task = asyncio.create_task(_run_flusher())
+
+    logger.info(
+        "[message_queue] started - flush_rows={} flush_interval_ms={}",
+        FLUSH_MAX_ROWS,
+        FLUSH_INTERVAL_MS,
+    )
+
+
+async def stop():
+    """Stop the flusher and write out anything still pending."""
+    global _flusher_task
+
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _flusher_task
+        _flusher_task = None
+
+    flushed = await asyncio.to_thread(flush)
+    logger.info("[message_queue] stopped - flushed rows={}", flushed)
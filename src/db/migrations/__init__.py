@@ -0,0 +1,178 @@
+"""
+Versioned schema migrations.
+
+Every module in this package named mNNNN_description.py is one migration and
+defines up(db) and down(db). The versions that have been applied are recorded in
+the schema_migration table. Nothing runs on import or at startup; migrations are
+applied explicitly as a deploy step:
+
+    python -m src.db.migrations status
+    python -m src.db.migrations up [--target N]
+    python -m src.db.migrations down [--steps N]
+
+A migration runs inside a transaction together with its version bookkeeping,
+unless the module sets ATOMIC = False. That is needed for statements Postgres
+refuses to run in a transaction, like CREATE INDEX CONCURRENTLY, which is how
+indexes get added to big tables without locking out writes.
+"""
+
+import datetime
+import importlib
+import pkgutil
+import re
+from dataclasses import dataclass
+from types import ModuleType
+
+from loguru import logger
+from peewee import DateTimeField, IntegerField, Model, TextField
+
+from .. import connection_scope, db
+
+_MODULE_NAME = re.compile(r"^m(\d{4})_(\w+)$")
+
+
+class SchemaMigration(Model):
+    version = IntegerField(primary_key=True)
+    name = TextField()
+    applied_at = DateTimeField()
+
+    class Meta:
+        database = db
+        table_name = "schema_migration"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def atomic(self) -> bool:
+        return getattr(self.module, "ATOMIC", True)
+
+
+def create_index_concurrently(db, name: str, table: str, columns: list[str]):
+    """
+    CREATE INDEX CONCURRENTLY, for use in migrations with ATOMIC = False.
+
+    A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS
+    would skip over, so a leftover invalid index is dropped and rebuilt.
+    """
+    invalid = db.execute_sql(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = %s AND NOT i.indisvalid",
+        (name,),
+    ).fetchone()
+    if invalid:
+        logger.warning("[migrations] rebuilding invalid index - name={}", name)
+        db.execute_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+    cols = ", ".join(f'"{c}"' for c in columns)
+    db.execute_sql(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" ({cols})')
+
+
+def discover() -> list[Migration]:
+    """All migrations in this package, oldest first."""
+    migrations = []
+
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match is None:
+            continue
+
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+
+    migrations.sort(key=lambda m: m.version)
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions - versions={versions}")
+
+    return migrations
+
+
+def applied_versions() -> set[int]:
+    if not SchemaMigration.table_exists():
+        return set()
+    return {version for (version,) in SchemaMigration.select(SchemaMigration.version).tuples()}
+
+
+def current_version() -> int:
+    return max(applied_versions(), default=0)
+
+
+def pending(migrations: list[Migration] | None = None) -> list[Migration]:
+    migrations = discover() if migrations is None else migrations
+    applied = applied_versions()
+    return [m for m in migrations if m.version not in applied]
+
+
+def _apply(migration: Migration, direction: str):
+    step = getattr(migration.module, direction)
+
+    def record():
+        if direction == "up":
+            SchemaMigration.insert(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.datetime.now(),
+            ).execute()
+        else:
+            SchemaMigration.delete().where(SchemaMigration.version == migration.version).execute()
+
+    logger.info(
+        "[migrations] {} - version={} name={}", direction, migration.version, migration.name
+    )
+
+    if migration.atomic:
+        with db.atomic():
+            step(db)
+            record()
+    else:
+        # Non-atomic migrations must be safe to re-run if they fail half way
+        step(db)
+        record()
+
+
+def migrate(target: int | None = None, migrations: list[Migration] | None = None) -> list[int]:
+    """Apply pending migrations up to and including target. Returns the versions applied."""
+    with connection_scope():
+        db.create_tables([SchemaMigration], safe=True)
+        to_apply = [m for m in pending(migrations) if target is None or m.version <= target]
+
+        for migration in to_apply:
+            _apply(migration, "up")
+
+    return [m.version for m in to_apply]
+
+
+def rollback(steps: int = 1, migrations: list[Migration] | None = None) -> list[int]:
+    """Undo the last steps applied migrations, newest first. Returns the versions undone."""
+    migrations = discover() if migrations is None else migrations
+
+    with connection_scope():
+        applied = applied_versions()
+        to_undo = [m for m in reversed(migrations) if m.version in applied][:steps]
+
+        for migration in to_undo:
+            _apply(migration, "down")
+
+    return [m.version for m in to_undo]
+
+
+def log_status():
+    """Log the schema version and warn about migrations that haven't been applied."""
+    with connection_scope():
+        waiting = pending()
+        version = current_version()
+
+    if waiting:
+        logger.warning(
+            "[migrations] schema is behind - version={} pending={}",
+            version,
+            [m.version for m in waiting],
+        )
+    else:
+        logger.info("[migrations] schema is up to date - version={}", version)
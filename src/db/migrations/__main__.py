@@ -0,0 +1,41 @@
+import argparse
+
+from loguru import logger
+
+from src.db import connection_scope
+
+from . import current_version, discover, migrate, pending, rollback
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.db.migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("status", help="show the schema version and pending migrations")
+
+    up = subparsers.add_parser("up", help="apply pending migrations")
+    up.add_argument("--target", type=int, default=None, help="stop after this version")
+
+    down = subparsers.add_parser("down", help="undo applied migrations")
+    down.add_argument("--steps", type=int, default=1, help="how many to undo")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        migrations = discover()
+        with connection_scope():
+            version = current_version()
+            waiting = pending(migrations)
+        logger.info("[migrations] version={} latest={}", version, migrations[-1].version)
+        for m in waiting:
+            logger.info("[migrations] pending - version={} name={}", m.version, m.name)
+    elif args.command == "up":
+        applied = migrate(target=args.target)
+        logger.info("[migrations] applied versions={}", applied)
+    elif args.command == "down":
+        undone = rollback(steps=args.steps)
+        logger.info("[migrations] rolled back versions={}", undone)
+
+
+if __name__ == "__main__":
+    main()
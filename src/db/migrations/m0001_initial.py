@@ -0,0 +1,124 @@
+"""
+Tables as they existed before migrations, when create_tables ran on import.
+
+The models are frozen copies of the ones in src.db at the time, so later model
+changes don't change what this migration creates on a fresh database. Later
+migrations take the schema from here - don't edit these.
+"""
+
+from peewee import (
+    AutoField,
+    CharField,
+    DateTimeField,
+    DoubleField,
+    ForeignKeyField,
+    Model,
+    TextField,
+)
+from playhouse.postgres_ext import BinaryJSONField
+
+
+class BaseModel(Model):
+    pass
+
+
+class Bakchod(BaseModel):
+    tg_id = CharField(unique=True, primary_key=True)
+    username = CharField(null=True, index=True)
+    pretty_name = CharField(null=True)
+    rokda = DoubleField(default=500)
+    lastseen = DateTimeField(null=True, index=True)
+    created = DateTimeField(null=True)
+    updated = DateTimeField(null=True, index=True)
+    metadata = BinaryJSONField(default=dict)
+
+
+class Message(BaseModel):
+    id = AutoField()
+    message_id = CharField()
+    time_sent = DateTimeField(index=True)
+    from_bakchod = ForeignKeyField(Bakchod, backref="messages", index=True)
+    to_id = CharField(index=True)
+    text = TextField(null=True)
+    update = BinaryJSONField()
+
+    class Meta:
+        indexes = ((("to_id", "time_sent"), False),)
+
+
+class Group(BaseModel):
+    group_id = CharField(unique=True, primary_key=True)
+    name = CharField(null=True)
+    created = DateTimeField()
+    updated = DateTimeField()
+    metadata = BinaryJSONField(default=dict)
+
+
+class GroupMember(BaseModel):
+    bakchod = ForeignKeyField(Bakchod, backref="group_member", index=True)
+    group = ForeignKeyField(Group, backref="group_member", index=True)
+
+    class Meta:
+        indexes = ((("bakchod", "group"), True),)
+
+
+class Quote(BaseModel):
+    quote_id = CharField(unique=True, primary_key=True)
+    message_id = CharField()
+    created = DateTimeField(index=True)
+    author_bakchod = ForeignKeyField(Bakchod, backref="quotes", index=True)
+    quote_capture_bakchod = ForeignKeyField(Bakchod, backref="quotes_captured", index=True)
+    quoted_in_group = ForeignKeyField(Group, backref="quotes", index=True)
+    text = TextField(null=True)
+    update = BinaryJSONField()
+
+
+class Roll(BaseModel):
+    roll_id = CharField(unique=True, primary_key=True)
+    created = DateTimeField()
+    updated = DateTimeField()
+    expiry = DateTimeField(index=True)
+    rule = CharField()
+    goal = CharField()
+    group = ForeignKeyField(Group, backref="roll", index=True)
+    victim = ForeignKeyField(Bakchod, backref="roll_victim", null=True)
+    winrar = ForeignKeyField(Bakchod, backref="roll_winrar", null=True)
+    prize = CharField(null=True)
+
+
+class ScheduledJob(BaseModel):
+    job_id = AutoField()
+    created = DateTimeField()
+    updated = DateTimeField()
+    from_bakchod = ForeignKeyField(Bakchod, backref="scheduled_jobs", index=True)
+    group = ForeignKeyField(Group, backref="scheduled_jobs", index=True)
+    job_context = BinaryJSONField(default=dict)
+
+
+class CommandUsage(BaseModel):
+    id = AutoField()
+    command_name = CharField(index=True)
+    executed_at = DateTimeField(index=True)
+    from_bakchod = ForeignKeyField(Bakchod, backref="command_usage", null=True, index=True)
+    group = ForeignKeyField(Group, backref="command_usage", null=True, index=True)
+    metadata = BinaryJSONField(default=dict)
+
+    class Meta:
+        indexes = (
+            (("command_name", "group", "executed_at"), False),
+            (("command_name", "from_bakchod", "executed_at"), False),
+        )
+
+
+MODELS = [Bakchod, Message, Group, GroupMember, Quote, Roll, ScheduledJob, CommandUsage]
+
+
+def up(db):
+    with db.bind_ctx(MODELS):
+        # safe=True - databases created before migrations already have these
+        db.create_tables(MODELS, safe=True)
+
+
+def down(db):
+    with db.bind_ctx(MODELS):
+        db.drop_tables(MODELS, safe=True)
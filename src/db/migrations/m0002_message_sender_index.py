@@ -0,0 +1,17 @@
+"""Index Message by sender and time for the per-user activity and dashboard queries."""
+
+from . import create_index_concurrently
+
+ATOMIC = False
+
+INDEX_NAME = "message_from_bakchod_id_time_sent"
+
+
+def up(db):
+    create_index_concurrently(db, INDEX_NAME, "message", ["from_bakchod_id", "time_sent"])
+
+
+def down(db):
+    # Not CONCURRENTLY - Postgres refuses that on a partitioned table, which
+    # message is from m0004 on. Dropping an index only locks message briefly.
+    db.execute_sql(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
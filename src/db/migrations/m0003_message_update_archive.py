@@ -0,0 +1,103 @@
+"""
+Move the raw update JSON out of message into messageupdate.
+
+Runs outside a transaction so the backfill commits batch by batch and never
+holds a long lock on message. Safe to re-run: the backfill resumes after the
+highest message id already copied, and the column is only dropped once
+everything has been copied.
+
+The models are frozen copies, like m0001's - don't edit them.
+"""
+
+import json
+
+from loguru import logger
+from peewee import AutoField, ForeignKeyField, Model
+
+from .. import CompressedJSONField
+
+ATOMIC = False
+
+BATCH_SIZE = 5000
+
+
+class BaseModel(Model):
+    pass
+
+
+class Message(BaseModel):
+    # Only referenced by messageupdate here
+    id = AutoField()
+
+
+class MessageUpdate(BaseModel):
+    message = ForeignKeyField(Message, primary_key=True, on_delete="CASCADE")
+    payload = CompressedJSONField()
+
+
+MODELS = [Message, MessageUpdate]
+
+
+def _has_update_column(db) -> bool:
+    return any(c.name == "update" for c in db.get_columns("message"))
+
+
+def up(db):
+    with db.bind_ctx(MODELS):
+        db.create_tables([MessageUpdate], safe=True)
+
+        if not _has_update_column(db):
+            return
+
+        last_id = db.execute_sql(
+            "SELECT COALESCE(MAX(message_id), 0) FROM messageupdate"
+        ).fetchone()[0]
+        copied = 0
+
+        while True:
+            rows = db.execute_sql(
+                'SELECT id, "update" FROM message WHERE id > %s ORDER BY id LIMIT %s',
+                (last_id, BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+
+            with db.atomic():
+                MessageUpdate.insert_many(
+                    [{"message": message_id, "payload": update} for message_id, update in rows]
+                ).on_conflict_ignore().execute()
+
+            last_id = rows[-1][0]
+            copied += len(rows)
+            logger.info("[migrations] copied message updates - rows={} last_id={}", copied, last_id)
+
+        # Only a catalog change - the old values are reclaimed as rows get rewritten or vacuumed
+        db.execute_sql('ALTER TABLE message DROP COLUMN IF EXISTS "update"')
+
+
+def down(db):
+    with db.bind_ctx(MODELS):
+        if not _has_update_column(db):
+            db.execute_sql('ALTER TABLE message ADD COLUMN "update" JSONB')
+
+        last_id = 0
+        while True:
+            batch = list(
+                MessageUpdate.select()
+                .where(MessageUpdate.message > last_id)
+                .order_by(MessageUpdate.message)
+                .limit(BATCH_SIZE)
+            )
+            if not batch:
+                break
+
+            with db.atomic():
+                for mu in batch:
+                    db.execute_sql(
+                        'UPDATE message SET "update" = %s::jsonb WHERE id = %s',
+                        (json.dumps(mu.payload), mu.message_id),
+                    )
+
+            last_id = batch[-1].message_id
+
+        db.drop_tables([MessageUpdate], safe=True)
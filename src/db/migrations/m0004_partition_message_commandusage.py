@@ -0,0 +1,131 @@
+"""
+Partition message and commandusage by month.
+
+The existing table is kept and attached as the first partition,
+<table>_legacy, which covers everything up to BOUND. New monthly partitions
+start from BOUND. Nothing is copied, so the migration takes about as long as
+one validation scan. Each table goes through two steps:
+
+1. While the app keeps writing: add a NOT VALID CHECK that matches the legacy
+   partition's range and validate it. Also build the (id, key) unique index
+   the partitioned primary key needs, CONCURRENTLY. Neither step blocks
+   writes.
+2. One short transaction: rename the table to <table>_legacy, create the
+   partitioned parent with the same indexes and foreign keys, and attach the
+   legacy table. The validated CHECK and the matching indexes let Postgres
+   attach it without scanning or building anything.
+
+BOUND is the start of the month after next. That leaves a month of slack, so
+the CHECK can't start rejecting inserts when the migration runs across a month
+boundary. Until BOUND is reached, new rows still land in the legacy partition.
+
+messageupdate loses its foreign key to message. A partitioned primary key has
+to include time_sent, so message.id alone can't be referenced any more.
+"""
+
+import datetime
+
+from .. import partitions
+
+ATOMIC = False
+
+# table -> (partition key, indexes, foreign keys) - as created by m0001 and m0002
+TABLES = {
+    "message": (
+        "time_sent",
+        [
+            ["time_sent"],
+            ["from_bakchod_id"],
+            ["to_id"],
+            ["to_id", "time_sent"],
+            ["from_bakchod_id", "time_sent"],
+        ],
+        [("from_bakchod_id", "bakchod", "tg_id")],
+    ),
+    "commandusage": (
+        "executed_at",
+        [
+            ["command_name"],
+            ["executed_at"],
+            ["from_bakchod_id"],
+            ["group_id"],
+            ["command_name", "group_id", "executed_at"],
+            ["command_name", "from_bakchod_id", "executed_at"],
+        ],
+        [("from_bakchod_id", "bakchod", "tg_id"), ("group_id", "group", "group_id")],
+    ),
+}
+
+
+def _columns(columns: list[str]) -> str:
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _prepare(db, table: str, key: str, bound: datetime.date):
+    check = f"{table}_legacy_bound"
+    exists = db.execute_sql("SELECT 1 FROM pg_constraint WHERE conname = %s", (check,)).fetchone()
+    if not exists:
+        db.execute_sql(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{check}" CHECK ("{key}" < %s) NOT VALID',
+            (bound.isoformat(),),
+        )
+    db.execute_sql(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{check}"')
+
+    db.execute_sql(
+        f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "{table}_legacy_id_{key}" '
+        f'ON "{table}" ("id", "{key}")'
+    )
+
+
+def _swap(db, table: str, key: str, indexes, foreign_keys, bound: datetime.date):
+    legacy = f"{table}_legacy"
+
+    db.execute_sql(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    db.execute_sql(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey"')
+
+    db.execute_sql(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{key}")'
+    )
+    db.execute_sql(f'ALTER TABLE "{table}" ADD PRIMARY KEY ("id", "{key}")')
+    db.execute_sql(f'ALTER SEQUENCE "{table}_id_seq" OWNED BY "{table}"."id"')
+
+    for columns in indexes:
+        db.execute_sql(f'CREATE INDEX ON "{table}" ({_columns(columns)})')
+
+    for column, ref_table, ref_column in foreign_keys:
+        db.execute_sql(
+            f'ALTER TABLE "{table}" ADD FOREIGN KEY ("{column}") '
+            f'REFERENCES "{ref_table}" ("{ref_column}")'
+        )
+
+    db.execute_sql(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" FOR VALUES FROM (MINVALUE) TO (%s)',
+        (bound.isoformat(),),
+    )
+    # Implied by the partition bound from now on
+    db.execute_sql(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{table}_legacy_bound"')
+
+
+def up(db):
+    bound = partitions.add_months(partitions.month_start(datetime.date.today()), 2)
+
+    for table, (key, indexes, foreign_keys) in TABLES.items():
+        if partitions.is_partitioned(table):
+            continue
+
+        _prepare(db, table, key, bound)
+
+        with db.atomic():
+            if table == "message":
+                db.execute_sql(
+                    'ALTER TABLE "messageupdate" DROP CONSTRAINT IF EXISTS "messageupdate_message_id_fkey"'
+                )
+            _swap(db, table, key, indexes, foreign_keys, bound)
+
+    partitions.ensure_partitions()
+
+
+def down(db):
+    # Folding the partitions back into one table means rewriting all of message -
+    # do that by hand if it is ever needed.
+    raise RuntimeError("m0004 can't be rolled back automatically")
@@ -0,0 +1,56 @@
+"""
+Add the rokda ledger, opening it with every Bakchod's current balance.
+
+The models are frozen copies, like m0001's - don't edit them.
+"""
+
+import datetime
+
+from peewee import AutoField, CharField, DateTimeField, DoubleField, ForeignKeyField, Model, Value
+
+
+class BaseModel(Model):
+    pass
+
+
+class Bakchod(BaseModel):
+    # Only the columns the opening balances are read from
+    tg_id = CharField(unique=True, primary_key=True)
+    rokda = DoubleField(default=500)
+
+
+class RokdaTransaction(BaseModel):
+    id = AutoField()
+    created = DateTimeField(index=True)
+    bakchod = ForeignKeyField(Bakchod, backref="rokda_transactions", index=True)
+    counterparty = ForeignKeyField(Bakchod, backref="+", null=True)
+    amount = DoubleField()
+    balance = DoubleField()
+    reason = CharField(index=True)
+
+
+MODELS = [Bakchod, RokdaTransaction]
+
+
+def up(db):
+    with db.bind_ctx(MODELS):
+        db.create_tables([RokdaTransaction])
+
+        now = datetime.datetime.now()
+        RokdaTransaction.insert_from(
+            Bakchod.select(
+                Value(now), Bakchod.tg_id, Bakchod.rokda, Bakchod.rokda, Value("opening_balance")
+            ),
+            fields=[
+                RokdaTransaction.created,
+                RokdaTransaction.bakchod,
+                RokdaTransaction.amount,
+                RokdaTransaction.balance,
+                RokdaTransaction.reason,
+            ],
+        ).execute()
+
+
+def down(db):
+    with db.bind_ctx(MODELS):
+        db.drop_tables([RokdaTransaction])
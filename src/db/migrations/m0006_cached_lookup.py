@@ -0,0 +1,28 @@
+"""
+Add the table behind lookup_cache.
+
+The model is a frozen copy, like m0001's - don't edit it.
+"""
+
+from peewee import DateTimeField, Model, TextField
+
+from .. import CompressedJSONField
+
+
+class CachedLookup(Model):
+    key = TextField(primary_key=True)
+    value = CompressedJSONField()
+    expires = DateTimeField(index=True)
+
+
+MODELS = [CachedLookup]
+
+
+def up(db):
+    with db.bind_ctx(MODELS):
+        db.create_tables(MODELS)
+
+
+def down(db):
+    with db.bind_ctx(MODELS):
+        db.drop_tables(MODELS)
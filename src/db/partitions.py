@@ -0,0 +1,189 @@
+"""
+Monthly range partitions for the append-only Message and CommandUsage logs.
+
+Both tables are partitioned by month on their timestamp (see migration m0004),
+so queries over a recent window only touch the newest partitions. maintain() is
+run daily by the scheduler. It creates partitions PARTITION_MONTHS_AHEAD months
+ahead and, if PARTITION_RETENTION_MONTHS is set, detaches (and with
+PARTITION_DROP_DETACHED, drops) partitions that ended before the retention
+window. Rows in tables that reference a detached partition's ids, like
+messageupdate, are deleted first: partitioning cost them their foreign keys and
+with them ON DELETE CASCADE. There is no default partition: it would stop Postgres from scanning
+partitions in order for ORDER BY time LIMIT n queries.
+"""
+
+import datetime
+import re
+
+from loguru import logger
+
+from src.domain import config
+
+from . import connection_scope, db
+
+app_config = config.get_config()
+
+MONTHS_AHEAD = int(app_config.get("DB", "PARTITION_MONTHS_AHEAD", fallback=3))
+# 0 keeps every partition attached
+RETENTION_MONTHS = int(app_config.get("DB", "PARTITION_RETENTION_MONTHS", fallback="0"))
+DROP_DETACHED = app_config.get("DB", "PARTITION_DROP_DETACHED", fallback="false") == "true"
+
+# table -> partition key
+PARTITIONED_TABLES = {
+    "message": "time_sent",
+    "commandusage": "executed_at",
+}
+
+# table -> (table, column) of the rows that reference it by id
+DEPENDENT_TABLES = {
+    "message": [("messageupdate", "message_id")],
+}
+DELETE_BATCH_SIZE = 5000
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(d: datetime.date) -> datetime.date:
+    return datetime.date(d.year, d.month, 1)
+
+
+def add_months(d: datetime.date, months: int) -> datetime.date:
+    index = d.year * 12 + d.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _parse_bound(value: str) -> datetime.datetime | None:
+    if value == "MINVALUE":
+        return None
+    return datetime.datetime.fromisoformat(value.strip("'"))
+
+
+def is_partitioned(table: str) -> bool:
+    row = db.execute_sql("SELECT relkind FROM pg_class WHERE relname = %s", (table,)).fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(table: str) -> list[tuple[str, datetime.datetime | None, datetime.datetime]]:
+    """(name, lower bound, upper bound) of each partition, oldest first. None is MINVALUE."""
+    rows = db.execute_sql(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        (table,),
+    ).fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound)
+        if match is None:
+            continue
+        partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+
+    partitions.sort(key=lambda p: p[2])
+    return partitions
+
+
+def create_partition(table: str, month: datetime.date) -> str:
+    name = partition_name(table, month)
+    db.execute_sql(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+        (month.isoformat(), add_months(month, 1).isoformat()),
+    )
+    return name
+
+
+def ensure_partitions(
+    months_ahead: int = MONTHS_AHEAD, today: datetime.date | None = None
+) -> list[str]:
+    """Create any missing partitions from this month to months_ahead months out."""
+    first = month_start(today or datetime.date.today())
+    created = []
+
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            # Not migrated yet
+            continue
+
+        existing = list_partitions(table)
+
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            start = datetime.datetime.combine(month, datetime.time())
+
+            covered = any(
+                (lower is None or lower <= start) and start < upper for _, lower, upper in existing
+            )
+            if not covered:
+                created.append(create_partition(table, month))
+
+    if created:
+        logger.info("[partitions] created partitions={}", created)
+
+    return created
+
+
+def delete_dependent_rows(table: str, partition: str) -> int:
+    """Delete the rows of DEPENDENT_TABLES that reference partition, in batches."""
+    deleted = 0
+
+    for dependent, column in DEPENDENT_TABLES.get(table, []):
+        while True:
+            cursor = db.execute_sql(
+                f'DELETE FROM "{dependent}" WHERE "{column}" IN ('
+                f'SELECT d."{column}" FROM "{dependent}" d '
+                f'JOIN "{partition}" p ON p."id" = d."{column}" LIMIT %s)',
+                (DELETE_BATCH_SIZE,),
+            )
+            deleted += cursor.rowcount
+            if cursor.rowcount < DELETE_BATCH_SIZE:
+                break
+
+    return deleted
+
+
+def detach_old_partitions(
+    retention_months: int = RETENTION_MONTHS,
+    drop: bool = DROP_DETACHED,
+    today: datetime.date | None = None,
+) -> list[str]:
+    """Detach partitions that ended before the retention window. Returns their names."""
+    if retention_months <= 0:
+        return []
+
+    cutoff = datetime.datetime.combine(
+        add_months(month_start(today or datetime.date.today()), -retention_months),
+        datetime.time(),
+    )
+    detached = []
+
+    for table in PARTITIONED_TABLES:
+        for name, _, upper in list_partitions(table):
+            if upper > cutoff:
+                continue
+
+            # Before detaching, so a failure leaves the partition for the next run
+            deleted = delete_dependent_rows(table, name)
+            if deleted:
+                logger.info(
+                    "[partitions] deleted dependent rows - partition={} rows={}", name, deleted
+                )
+
+            db.execute_sql(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            if drop:
+                db.execute_sql(f'DROP TABLE "{name}"')
+            detached.append(name)
+
+    if detached:
+        logger.info("[partitions] detached partitions={} dropped={}", detached, drop)
+
+    return detached
+
+
+def maintain():
+    with connection_scope():
+        ensure_partitions()
+        detach_old_partitions()
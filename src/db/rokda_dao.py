@@ -0,0 +1,207 @@
+"""
+The rokda ledger.
+
+Every balance change is a single UPDATE ... SET rokda = f(rokda) ... RETURNING
+rokda, so concurrent credits and debits can't lose each other's updates, and is
+recorded as a RokdaTransaction in the same transaction. Conditions like "has
+enough rokda" are part of the UPDATE's WHERE clause rather than checked in
+Python first. Changes that depend on the current balance, or touch two rows,
+lock the rows first in tg_id order. Bakchod.save() never writes rokda, so this
+is the only way balances change.
+
+Per-message rewards are credited with the next bakchod_cache flush while it
+runs, see bakchod_cache.add_rokda.
+"""
+
+import datetime
+from collections.abc import Callable
+
+from loguru import logger
+
+from . import Bakchod, RokdaTransaction, bakchod_cache, db
+
+
+def _change(
+    bakchod: Bakchod,
+    rokda,
+    amount: float,
+    reason: str,
+    condition=None,
+    counterparty: Bakchod | None = None,
+) -> float | None:
+    """Set rokda to the expression and log it. Returns the new balance, or None if no row matched."""
+    query = Bakchod.update(rokda=rokda).where(Bakchod.tg_id == bakchod.tg_id)
+    if condition is not None:
+        query = query.where(condition)
+
+    rows = list(query.returning(Bakchod.rokda).tuples().execute())
+    if not rows:
+        return None
+
+    balance = rows[0][0]
+
+    RokdaTransaction.insert(
+        created=datetime.datetime.now(),
+        bakchod=bakchod.tg_id,
+        counterparty=counterparty.tg_id if counterparty is not None else None,
+        amount=amount,
+        balance=balance,
+        reason=reason,
+    ).execute()
+
+    return balance
+
+
+def _lock(*bakchods: Bakchod) -> dict[str, float]:
+    """
+    Lock the rows until the transaction ends and return their balances by tg_id.
+    Rows are always locked in tg_id order, so two transactions over the same
+    rows can't deadlock.
+    """
+    query = (
+        Bakchod.select(Bakchod.tg_id, Bakchod.rokda)
+        .where(Bakchod.tg_id.in_([b.tg_id for b in bakchods]))
+        .order_by(Bakchod.tg_id)
+    )
+    # SQLite has no row locks - a write locks the whole database
+    if db.for_update:
+        query = query.for_update()
+
+    return dict(query.tuples())
+
+
+def _set(
+    bakchod: Bakchod,
+    balance_for: Callable[[float], float],
+    reason: str,
+    counterparty: Bakchod | None = None,
+) -> tuple[float, float] | None:
+    """
+    Set the balance to balance_for(current balance). Whatever it goes down by is
+    credited to counterparty in the same transaction. Returns the (old, new) balances.
+    """
+    counterparty_balance = None
+
+    with db.atomic():
+        locked = [bakchod] if counterparty is None else [bakchod, counterparty]
+        previous = _lock(*locked).get(bakchod.tg_id)
+        if previous is None:
+            return None
+
+        target = balance_for(previous)
+        balance = _change(bakchod, target, target - previous, reason, counterparty=counterparty)
+
+        taken = previous - balance
+        if counterparty is not None and taken > 0:
+            counterparty_balance = _change(
+                counterparty, Bakchod.rokda + taken, taken, reason, counterparty=bakchod
+            )
+
+    bakchod_cache.sync_rokda(bakchod, balance)
+    if counterparty_balance is not None:
+        bakchod_cache.sync_rokda(counterparty, counterparty_balance)
+
+    return previous, balance
+
+
+def _apply(bakchod: Bakchod, rokda, amount: float, reason: str, **kwargs) -> float | None:
+    with db.atomic():
+        balance = _change(bakchod, rokda, amount, reason, **kwargs)
+
+    if balance is not None:
+        bakchod_cache.sync_rokda(bakchod, balance)
+
+    return balance
+
+
+def credit(
+    bakchod: Bakchod, amount: float, reason: str, counterparty: Bakchod | None = None
+) -> float | None:
+    """Add amount to the balance. Returns the new balance."""
+    return _apply(bakchod, Bakchod.rokda + amount, amount, reason, counterparty=counterparty)
+
+
+def debit(
+    bakchod: Bakchod, amount: float, reason: str, counterparty: Bakchod | None = None
+) -> float | None:
+    """Take amount only if the balance is more than it. Returns the new balance, or None if it isn't."""
+    return _apply(
+        bakchod,
+        Bakchod.rokda - amount,
+        -amount,
+        reason,
+        condition=Bakchod.rokda > amount,
+        counterparty=counterparty,
+    )
+
+
+def debit_upto(
+    bakchod: Bakchod, amount: float, reason: str, counterparty: Bakchod | None = None
+) -> float | None:
+    """
+    Take amount, bottoming out at 0, and give what was taken to counterparty.
+    Returns the new balance. The ledger records what was actually taken.
+    """
+    balances = _set(bakchod, lambda current: max(current - amount, 0), reason, counterparty)
+    return balances[1] if balances is not None else None
+
+
+def set_balance(bakchod: Bakchod, balance: float, reason: str) -> float | None:
+    """Overwrite the balance, for admins. Returns the new balance."""
+    balances = _set(bakchod, lambda _: balance, reason)
+    return balances[1] if balances is not None else None
+
+
+def debit_all_but(
+    bakchod: Bakchod, keep: float, reason: str, counterparty: Bakchod | None = None
+) -> float:
+    """Take whatever is over keep and give it to counterparty. Returns how much was taken."""
+    balances = _set(bakchod, lambda current: min(current, keep), reason, counterparty)
+    if balances is None:
+        return 0
+
+    previous, balance = balances
+    return previous - balance
+
+
+def reward(bakchod: Bakchod, amount: float, reason: str = "reward") -> float | None:
+    """Credit a per-message reward, coalesced into the next bakchod_cache flush if it's running."""
+    if bakchod_cache.add_rokda(bakchod, amount):
+        return bakchod.rokda
+
+    return credit(bakchod, amount, reason)
+
+
+def transfer(
+    sender: Bakchod, receiver: Bakchod, amount: float, reason: str
+) -> tuple[float, float] | None:
+    """
+    Move amount from sender to receiver in one transaction, if the sender has at
+    least that much. Returns the (sender, receiver) balances, or None if nothing moved.
+    """
+    with db.atomic() as txn:
+        _lock(sender, receiver)
+
+        sender_balance = _change(
+            sender,
+            Bakchod.rokda - amount,
+            -amount,
+            reason,
+            condition=Bakchod.rokda >= amount,
+            counterparty=receiver,
+        )
+        if sender_balance is None:
+            return None
+
+        receiver_balance = _change(
+            receiver, Bakchod.rokda + amount, amount, reason, counterparty=sender
+        )
+        if receiver_balance is None:
+            txn.rollback()
+            logger.warning("[rokda_dao] transfer receiver missing - receiver={}", receiver.tg_id)
+            return None
+
+    bakchod_cache.sync_rokda(sender, sender_balance)
+    bakchod_cache.sync_rokda(receiver, receiver_balance)
+
+    return sender_balance, receiver_balance
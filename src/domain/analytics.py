@@ -1,6 +1,35 @@
-"""Analytics and telemetry initialization."""
+"""
+Analytics and telemetry.
 
+PostHog events and Sentry metric counts are never sent from the code that
+records them. capture() samples the event (SAMPLE_RATES, e.g.
+"message_synced=0.01") and appends it to a bounded in-memory queue. Once
+QUEUE_SIZE events are waiting the oldest are dropped. count() adds to a local
+counter.
+
+A background task flushes both every FLUSH_INTERVAL_SECONDS. Counters become a
+single Sentry metrics.count per name and attribute set. Events are posted to
+PostHog's batch API, BATCH_SIZE at a time, from a worker thread. Events that
+can't be delivered for now are written to SPILL_FILE (the newest
+SPILL_MAX_EVENTS) and sent before the next batch. Events PostHog rejects are
+dropped. When the flusher isn't running (scripts, tests) events go straight to
+the PostHog client.
+"""
+
+import asyncio
+import collections
+import contextlib
+import datetime
+import json
+import random
+import threading
+import uuid
+from pathlib import Path
+
+from loguru import logger
 from posthog import Posthog
+from posthog.request import APIError, batch_post
+from sentry_sdk import metrics
 
 from . import config
 
@@ -12,3 +41,224 @@ posthog = Posthog(
     enable_exception_autocapture=True,
     capture_exception_code_variables=True,
 )
+
+QUEUE_SIZE = int(app_config.get("ANALYTICS", "QUEUE_SIZE", fallback=10000))
+BATCH_SIZE = int(app_config.get("ANALYTICS", "BATCH_SIZE", fallback=100))
+FLUSH_INTERVAL_SECONDS = int(app_config.get("ANALYTICS", "FLUSH_INTERVAL_SECONDS", fallback=10))
+SPILL_FILE = Path(
+    app_config.get("ANALYTICS", "SPILL_FILE", fallback="../logs/analytics-spill.jsonl")
+)
+SPILL_MAX_EVENTS = int(app_config.get("ANALYTICS", "SPILL_MAX_EVENTS", fallback=50000))
+
+# 4xx answers worth sending again later: timeouts and rate limits
+RETRYABLE_STATUSES = {408, 429}
+# Rejections that may be down to a few of the events in a batch
+SPLIT_STATUSES = {400, 413}
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    """'message_synced=0.01, command_used=1' -> {'message_synced': 0.01, 'command_used': 1.0}"""
+    rates = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        event, rate = item.split("=", 1)
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+# Events that aren't listed are always sent
+SAMPLE_RATES = parse_sample_rates(app_config.get("ANALYTICS", "SAMPLE_RATES", fallback=""))
+
+_events: collections.deque[dict] = collections.deque(maxlen=QUEUE_SIZE)
+# (name, sorted attributes) -> total
+_counts: dict[tuple[str, tuple], float] = {}
+_dropped = 0
+# capture may be called from db worker threads (see aio)
+_lock = threading.Lock()
+
+_flusher_task: asyncio.Task | None = None
+
+
+def is_running() -> bool:
+    return _flusher_task is not None and not _flusher_task.done()
+
+
+def capture(event: str, distinct_id: str, properties: dict):
+    """Queue a PostHog event, unless it's sampled out."""
+    global _dropped
+
+    rate = SAMPLE_RATES.get(event, 1.0)
+    if rate < 1.0:
+        if random.random() >= rate:
+            return
+        # Lets analyses scale sampled counts back up
+        properties = {**properties, "sample_rate": rate}
+
+    if not is_running():
+        posthog.capture(event, distinct_id=distinct_id, properties=properties)
+        return
+
+    with _lock:
+        if len(_events) == _events.maxlen:
+            _dropped += 1
+        _events.append(
+            {
+                "type": "capture",
+                "event": event,
+                "distinct_id": distinct_id,
+                "properties": properties,
+                "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+                "uuid": str(uuid.uuid4()),
+            }
+        )
+
+
+def count(name: str, value: float = 1, attributes: dict | None = None):
+    """Add to a Sentry counter, sent as one total per flush."""
+    if not is_running():
+        metrics.count(name, value, attributes=attributes)
+        return
+
+    key = (name, tuple(sorted((attributes or {}).items())))
+
+    with _lock:
+        _counts[key] = _counts.get(key, 0) + value
+
+
+def _read_spill() -> list[dict]:
+    if not SPILL_FILE.exists():
+        return []
+
+    with SPILL_FILE.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _spill(events: list[dict]):
+    SPILL_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = SPILL_FILE.with_name(SPILL_FILE.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for event in events[-SPILL_MAX_EVENTS:]:
+            f.write(json.dumps(event, separators=(",", ":")))
+            f.write("\n")
+    tmp.replace(SPILL_FILE)
+
+
+def _is_rejected(e: Exception) -> bool:
+    """Whether PostHog refused the batch itself, so sending it again can't help."""
+    return (
+        isinstance(e, APIError)
+        and isinstance(e.status, int)
+        and 400 <= e.status < 500
+        and e.status not in RETRYABLE_STATUSES
+    )
+
+
+def _post(batch: list[dict]):
+    batch_post(
+        posthog.api_key,
+        host=posthog.host,
+        gzip=posthog.gzip,
+        timeout=posthog.timeout,
+        batch=batch,
+    )
+
+
+def export(events: list[dict]) -> int:
+    """
+    Post previously spilled events and then events to PostHog. Safe to call
+    from a worker thread. Returns how many were sent.
+
+    A batch PostHog rejects as malformed or too large is split in half until
+    the offending events are on their own and can be dropped. Any other
+    rejection drops the batch. On a network error, a 5xx or a 429 whatever
+    isn't sent yet is spilled.
+    """
+    events = _read_spill() + events
+    sent = 0
+    # Next batch last
+    batches = [events[start : start + BATCH_SIZE] for start in range(0, len(events), BATCH_SIZE)]
+    batches.reverse()
+
+    while batches:
+        batch = batches.pop()
+        try:
+            _post(batch)
+        except Exception as e:
+            if not _is_rejected(e):
+                unsent = batch + [event for pending in reversed(batches) for event in pending]
+                _spill(unsent)
+                logger.warning("[analytics] export failed, spilled events={} e={}", len(unsent), e)
+                return sent
+
+            if e.status in SPLIT_STATUSES and len(batch) > 1:
+                middle = len(batch) // 2
+                batches += [batch[middle:], batch[:middle]]
+            else:
+                logger.warning("[analytics] batch rejected, dropped events={} e={}", len(batch), e)
+            continue
+
+        sent += len(batch)
+
+    SPILL_FILE.unlink(missing_ok=True)
+    return sent
+
+
+async def flush():
+    global _dropped
+
+    with _lock:
+        events = list(_events)
+        _events.clear()
+        counts = dict(_counts)
+        _counts.clear()
+        dropped = _dropped
+        _dropped = 0
+
+    if dropped:
+        logger.warning("[analytics] queue full, dropped events={}", dropped)
+
+    for (name, attributes), value in counts.items():
+        metrics.count(name, value, attributes=dict(attributes))
+
+    if events or SPILL_FILE.exists():
+        try:
+            await asyncio.to_thread(export, events)
+        except Exception as e:
+            logger.error("[analytics] flush failed events={} e={}", len(events), e)
+
+
+async def _run_flusher():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        await flush()
+
+
+def start():
+    global _flusher_task
+
+    if is_running():
+        return
+
+    _flusher_task = asyncio.create_task(_run_flusher())
+
+    logger.info(
+        "[analytics] started - flush_interval_seconds={} sample_rates={}",
+        FLUSH_INTERVAL_SECONDS,
+        SAMPLE_RATES,
+    )
+
+
+async def stop():
+    """Stop the flusher and send anything still queued."""
+    global _flusher_task
+
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _flusher_task
+        _flusher_task = None
+
+    await flush()
+    logger.info("[analytics] stopped")
@@ -6,16 +6,69 @@ from datetime import datetime
 import sentry_sdk
 from loguru import logger
 from playhouse.shortcuts import model_to_dict
-from sentry_sdk import metrics
 from telegram import Update
 
-from src.db import Bakchod, CommandUsage, Group, bakchod_dao, group_dao, message_dao
+from src.db import CommandUsage, Message, aio, bakchod_dao, group_dao, message_dao
 from src.server import sio
 
 from . import analytics, util
 from . import metrics as prom_metrics
 
 
+def _telegram_context(update: Update) -> dict:
+    # Also used while reporting errors, so tolerate a partial update
+    from_user = update.message.from_user
+    chat = update.message.chat
+    return {
+        "user_id": str(getattr(from_user, "id", None)),
+        "username": getattr(from_user, "username", None),
+        "chat_id": str(getattr(chat, "id", None)),
+        "chat_type": getattr(chat, "type", None),
+        "chat_title": getattr(chat, "title", None),
+    }
+
+
+# Background db writes, held on to until they finish so they aren't garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(fn, *args):
+    """Run fn on the db worker pool without waiting for it. Outside the event loop it runs inline."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        fn(*args)
+        return
+
+    task = asyncio.create_task(aio.run(fn, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _save_command_usage(command_name: str, update: Update):
+    try:
+        # sync_persistence_data has already made sure the Bakchod and Group exist
+        CommandUsage.insert(
+            command_name=command_name,
+            executed_at=datetime.now(),
+            from_bakchod=update.message.from_user.id,
+            group=update.message.chat.id,
+        ).execute()
+    except Exception as db_error:
+        logger.warning(
+            "[dc] Failed to log command usage to database: {}",
+            db_error,
+        )
+        # Sentry: Capture database error with the command's context
+        with sentry_sdk.new_scope() as scope:
+            scope.set_tag("command", command_name)
+            scope.set_tag("module", "dc.log_command_usage")
+            scope.set_context("telegram", _telegram_context(update))
+            sentry_sdk.capture_exception(db_error)
+        # Sentry: Track database error metric
+        analytics.count("dc.command.db_error", attributes={"command": command_name})
+
+
 def log_command_usage(command_name: str, update: Update):
     try:
         if not hasattr(update, "message"):
@@ -34,7 +87,7 @@ def log_command_usage(command_name: str, update: Update):
             group_name,
         )
 
-        # Sentry: Add breadcrumb and context
+        # Sentry: Add breadcrumb
         sentry_sdk.add_breadcrumb(
             category="command",
             message=f"Command {command_name} invoked",
@@ -42,69 +95,33 @@ def log_command_usage(command_name: str, update: Update):
             data={"user": user_name, "group": group_name},
         )
 
-        with sentry_sdk.new_scope() as scope:
-            scope.set_tag("command", command_name)
-            scope.set_tag("module", "dc.log_command_usage")
-            scope.set_context(
-                "telegram",
-                {
-                    "user_id": str(from_user.id),
-                    "username": from_user.username,
-                    "chat_id": str(chat.id),
-                    "chat_type": chat.type,
-                    "chat_title": group_name,
-                },
-            )
+        # Sentry: Track command usage metric
+        analytics.count(
+            "dc.command.used",
+            attributes={"command": command_name, "chat_type": chat.type},
+        )
 
-            # Sentry: Track command usage metric
-            metrics.count(
-                "dc.command.used",
-                1,
-                attributes={"command": command_name, "chat_type": chat.type},
-            )
+        # PostHog: Track command usage event
+        analytics.capture(
+            "command_used",
+            distinct_id=str(from_user.id),
+            properties={
+                "command_name": command_name,
+                "user_id": str(from_user.id),
+                "username": from_user.username,
+                "user_name": user_name,
+                "chat_id": str(chat.id),
+                "chat_type": chat.type,
+                "chat_title": group_name,
+            },
+        )
+
+        sync_persistence_data(update)
+
+        # Nothing waits on the CommandUsage row, so it's written on a db worker
+        _run_in_background(_save_command_usage, command_name, update)
 
-            # PostHog: Track command usage event
-            try:
-                analytics.posthog.capture(
-                    distinct_id=str(from_user.id),
-                    event="command_used",
-                    properties={
-                        "command_name": command_name,
-                        "user_id": str(from_user.id),
-                        "username": from_user.username,
-                        "user_name": user_name,
-                        "chat_id": str(chat.id),
-                        "chat_type": chat.type,
-                        "chat_title": group_name,
-                    },
-                )
-            except Exception as ph_error:
-                logger.warning("[dc] Failed to send PostHog event: {}", ph_error)
-
-            sync_persistence_data(update)
-
-            # Log command usage to database
-            try:
-                bakchod = Bakchod.get(Bakchod.tg_id == from_user.id)
-                group = Group.get(Group.group_id == chat.id)
-
-                CommandUsage.create(
-                    command_name=command_name,
-                    executed_at=datetime.now(),
-                    from_bakchod=bakchod,
-                    group=group,
-                )
-            except Exception as db_error:
-                logger.warning(
-                    "[dc] Failed to log command usage to database: {}",
-                    db_error,
-                )
-                # Sentry: Capture database error (scope context already set)
-                sentry_sdk.capture_exception(db_error)
-                # Sentry: Track database error metric
-                metrics.count("dc.command.db_error", 1, attributes={"command": command_name})
-
-            prom_metrics.inc_command_usage_count(command_name, update)
+        prom_metrics.inc_command_usage_count(command_name, update)
 
         return
 
@@ -127,69 +144,57 @@ def sync_persistence_data(update: Update):
         return
 
     try:
-        # Sentry: Add context for sync operation
-        with sentry_sdk.new_scope() as scope:
-            scope.set_tag("module", "dc.sync_persistence_data")
-            scope.set_context(
-                "telegram",
-                {
-                    "user_id": str(from_user.id),
-                    "username": from_user.username,
-                    "chat_id": str(update.message.chat.id),
-                    "chat_type": update.message.chat.type,
-                },
-            )
+        b = bakchod_dao.get_or_create_bakchod_from_tg_user(from_user)
 
-            b = bakchod_dao.get_or_create_bakchod_from_tg_user(from_user)
+        # Update username
+        b.username = from_user.username
 
-            # Update username
-            b.username = from_user.username
+        # Update prettyname
+        b.pretty_name = util.extract_pretty_name_from_tg_user(from_user)
 
-            # Update prettyname
-            b.pretty_name = util.extract_pretty_name_from_tg_user(from_user)
+        # Update lastseen of Bakchod
+        b.lastseen = datetime.now()
 
-            # Update lastseen of Bakchod
-            b.lastseen = datetime.now()
+        b.updated = datetime.now()
 
-            b.updated = datetime.now()
+        bakchod_dao.save_deferred(b)
 
-            b.save()
+        m = message_dao.log_message_from_update(update)
 
-            m = message_dao.log_message_from_update(update)
+        group_dao.log_group_from_update(update)
 
-            group_dao.log_group_from_update(update)
+        # Sentry: Track message sync metric
+        analytics.count(
+            "dc.message.synced",
+            attributes={"chat_type": update.message.chat.type},
+        )
 
-            # Sentry: Track message sync metric
-            metrics.count(
-                "dc.message.synced",
-                1,
-                attributes={"chat_type": update.message.chat.type},
-            )
+        # PostHog: Track message sync event
+        analytics.capture(
+            "message_synced",
+            distinct_id=str(from_user.id),
+            properties={
+                "user_id": str(from_user.id),
+                "username": from_user.username,
+                "chat_id": str(update.message.chat.id),
+                "chat_type": update.message.chat.type,
+                "chat_title": update.message.chat.title,
+                "message_id": str(update.message.message_id),
+            },
+        )
 
-            # PostHog: Track message sync event
-            try:
-                analytics.posthog.capture(
-                    distinct_id=str(from_user.id),
-                    event="message_synced",
-                    properties={
-                        "user_id": str(from_user.id),
-                        "username": from_user.username,
-                        "chat_id": str(update.message.chat.id),
-                        "chat_type": update.message.chat.type,
-                        "chat_title": update.message.chat.title,
-                        "message_id": str(update.message.message_id),
-                    },
-                )
-            except Exception as ph_error:
-                logger.debug("[dc] Failed to send PostHog sync event: {}", ph_error)
-
-            # Create a task to emit the message asynchronously without blocking
-            asyncio.create_task(
-                sio.emit(
-                    "message",
-                    {"message": json.loads(json.dumps(model_to_dict(m), default=str))},
-                )
+        # Create a task to emit the message asynchronously without blocking. It's
+        # still waiting in message_queue, so it has no id to send yet
+        asyncio.create_task(
+            sio.emit(
+                "message",
+                {
+                    "message": json.loads(
+                        json.dumps(model_to_dict(m, exclude=[Message.id]), default=str)
+                    )
+                },
             )
+        )
 
     except Exception as e:
         logger.error(
@@ -197,8 +202,11 @@ def sync_persistence_data(update: Update):
             e,
             traceback.format_exc(),
         )
-        # Sentry: Capture exception
-        sentry_sdk.capture_exception(e)
+        # Sentry: Capture exception with the message's context
+        with sentry_sdk.new_scope() as scope:
+            scope.set_tag("module", "dc.sync_persistence_data")
+            scope.set_context("telegram", _telegram_context(update))
+            sentry_sdk.capture_exception(e)
         raise
 
     return
@@ -0,0 +1,371 @@
+"""
+Background yt-dlp downloads.
+
+submit() queues a download and returns its Job straight away. WORKERS worker
+tasks take jobs off the queue and run yt-dlp for each in a subprocess, so the
+event loop keeps handling messages while videos download, and a download that
+runs past MAX_DOWNLOAD_SECONDS can be killed. At most MAX_QUEUED_JOBS jobs wait
+for a worker, and a user can have MAX_JOBS_PER_USER jobs in flight. Asking for
+a video that is already being downloaded, or was downloaded and is still being
+sent, joins that job instead of starting another one.
+
+    job = downloads.submit(url, video_id, key, user_id, on_progress=report)
+    try:
+        path = await job
+        ...
+    finally:
+        job.release()
+
+The downloaded file is deleted once every submitter has released the job. When
+the workers aren't running (scripts, tests) each job runs in its own task.
+"""
+
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import os
+import sys
+import time
+from collections.abc import Awaitable, Callable
+
+from loguru import logger
+
+from . import config, metrics, util
+
+app_config = config.get_config()
+
+WORKERS = int(app_config.get("TELEGRAM", "YTDL_WORKERS", fallback="2"))
+MAX_QUEUED_JOBS = int(app_config.get("TELEGRAM", "YTDL_MAX_QUEUED_JOBS", fallback="10"))
+MAX_JOBS_PER_USER = int(app_config.get("TELEGRAM", "YTDL_MAX_JOBS_PER_USER", fallback="2"))
+MAX_DOWNLOAD_SECONDS = float(app_config.get("TELEGRAM", "YTDL_MAX_DOWNLOAD_TIME", fallback="60"))
+# Telegram rate limits edits, so progress is reported at most this often
+PROGRESS_INTERVAL_SECONDS = float(
+    app_config.get("TELEGRAM", "YTDL_PROGRESS_INTERVAL_SECONDS", fallback="3")
+)
+
+DOWNLOAD_DIR = os.path.join(util.RESOURCES_DIR, "external")
+
+PROGRESS_PREFIX = "chaddi-progress"
+PROGRESS_TEMPLATE = (
+    f"download:{PROGRESS_PREFIX} %(progress.downloaded_bytes)s "
+    "%(progress.total_bytes)s %(progress.total_bytes_estimate)s"
+)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class UserLimitError(Exception):
+    pass
+
+
+class DownloadTimeoutError(Exception):
+    pass
+
+
+class DownloadError(Exception):
+    pass
+
+
+@dataclasses.dataclass(eq=False)
+class Job:
+    key: str
+    url: str
+    video_id: str
+    user_id: int
+    future: asyncio.Future
+    # queued -> downloading -> done | failed
+    status: str = "queued"
+    progress: float = 0.0
+    holders: int = 1
+    on_progress: list[Callable[[float], Awaitable]] = dataclasses.field(default_factory=list)
+
+    def __await__(self):
+        """The path of the downloaded file. Waiters being cancelled doesn't cancel the job."""
+        return asyncio.shield(self.future).__await__()
+
+    def release(self):
+        """Let go of the job. The file is deleted after the last holder lets go."""
+        self.holders -= 1
+        if self.holders > 0:
+            return
+
+        if self.future.done():
+            _forget(self)
+            _delete_download(self)
+        else:
+            self.on_progress.clear()
+
+
+# key -> Job that is in flight, or done and still held
+_jobs: dict[str, Job] = {}
+# user_id -> jobs they submitted that are in flight
+_user_jobs: collections.Counter[int] = collections.Counter()
+
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+
+
+def is_running() -> bool:
+    return any(not worker.done() for worker in _workers)
+
+
+def get_job(key: str) -> Job | None:
+    return _jobs.get(key)
+
+
+def submit(
+    url: str,
+    video_id: str,
+    key: str,
+    user_id: int,
+    on_progress: Callable[[float], Awaitable] | None = None,
+) -> Job:
+    """
+    Queue a download of url, or join the one already in flight for key.
+    Raises UserLimitError or QueueFullError instead of queueing past the limits.
+    """
+    job = _jobs.get(key)
+    if job is not None:
+        job.holders += 1
+        if on_progress is not None:
+            job.on_progress.append(on_progress)
+        logger.info("[downloads] joined job - key={} status={}", key, job.status)
+        return job
+
+    if _user_jobs[user_id] >= MAX_JOBS_PER_USER:
+        raise UserLimitError(f"{_user_jobs[user_id]} downloads in flight")
+
+    job = Job(
+        key=key,
+        url=url,
+        video_id=video_id,
+        user_id=user_id,
+        future=asyncio.get_running_loop().create_future(),
+        on_progress=[on_progress] if on_progress is not None else [],
+    )
+
+    if is_running():
+        try:
+            _queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{_queue.qsize()} downloads queued") from None
+    else:
+        asyncio.create_task(_run(job))
+
+    _jobs[key] = job
+    _user_jobs[user_id] += 1
+    _set_queue_depth()
+
+    logger.info("[downloads] queued - key={} url={} user_id={}", key, url, user_id)
+    return job
+
+
+def _forget(job: Job):
+    # A newer job may have taken the key since this one failed
+    if _jobs.get(job.key) is job:
+        del _jobs[job.key]
+
+
+def _set_queue_depth():
+    metrics.set_ytdl_queue_depth(sum(not job.future.done() for job in _jobs.values()))
+
+
+def _command(url: str) -> list[str]:
+    return [
+        sys.executable,
+        "-m",
+        "yt_dlp",
+        "--quiet",
+        "--no-warnings",
+        "--progress",
+        "--newline",
+        "--progress-template",
+        PROGRESS_TEMPLATE,
+        "--merge-output-format",
+        "mp4",
+        "--output",
+        os.path.join(DOWNLOAD_DIR, "%(id)s.%(ext)s"),
+        # The url comes from a chat message, it mustn't be read as an option
+        "--",
+        url,
+    ]
+
+
+def parse_progress(line: str) -> float | None:
+    """The fraction downloaded from a PROGRESS_TEMPLATE line, if it has one."""
+    parts = line.split()
+    if len(parts) != 4 or parts[0] != PROGRESS_PREFIX:
+        return None
+
+    try:
+        downloaded = float(parts[1])
+    except ValueError:
+        return None
+
+    for total in parts[2:]:
+        try:
+            total = float(total)
+        except ValueError:
+            continue
+        if total > 0:
+            return min(downloaded / total, 1.0)
+
+    return None
+
+
+async def _report_progress(job: Job):
+    for callback in list(job.on_progress):
+        try:
+            await callback(job.progress)
+        except Exception as e:
+            logger.debug("[downloads] progress callback failed - key={} e={}", job.key, e)
+
+
+async def _download(job: Job) -> str:
+    process = await asyncio.create_subprocess_exec(
+        *_command(job.url),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr = b""
+
+    try:
+        async with asyncio.timeout(MAX_DOWNLOAD_SECONDS):
+            stderr_task = asyncio.create_task(process.stderr.read())
+            reported_at = 0.0
+
+            async for line in process.stdout:
+                progress = parse_progress(line.decode(errors="replace"))
+                if progress is None:
+                    continue
+
+                job.progress = progress
+                if time.monotonic() - reported_at >= PROGRESS_INTERVAL_SECONDS:
+                    reported_at = time.monotonic()
+                    await _report_progress(job)
+
+            stderr = await stderr_task
+            await process.wait()
+    except TimeoutError:
+        raise DownloadTimeoutError(f"took longer than {MAX_DOWNLOAD_SECONDS}s") from None
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    if process.returncode != 0:
+        raise DownloadError(stderr.decode(errors="replace").strip()[-500:])
+
+    path = _find_download(job.video_id)
+    if path is None:
+        raise DownloadError("downloaded file not found")
+
+    return path
+
+
+def _find_download(video_id: str) -> str | None:
+    video_file = next(
+        (x for x in os.listdir(DOWNLOAD_DIR) if str(x).startswith(f"{video_id}.")),
+        None,
+    )
+    return os.path.join(DOWNLOAD_DIR, video_file) if video_file is not None else None
+
+
+def _delete_download(job: Job):
+    if job.future.cancelled() or job.future.exception() is not None:
+        return
+
+    util.delete_file(job.future.result())
+
+
+async def _run(job: Job):
+    job.status = "downloading"
+    start = time.perf_counter()
+    status = "error"
+
+    try:
+        path = await _download(job)
+        status = "success"
+        job.status = "done"
+        job.future.set_result(path)
+    except asyncio.CancelledError:
+        job.status = "failed"
+        job.future.cancel()
+        raise
+    except Exception as e:
+        status = "timeout" if isinstance(e, DownloadTimeoutError) else "error"
+        job.status = "failed"
+        job.future.set_exception(e)
+        logger.warning("[downloads] failed - key={} e={}", job.key, e)
+    finally:
+        _user_jobs[job.user_id] -= 1
+        if _user_jobs[job.user_id] <= 0:
+            del _user_jobs[job.user_id]
+
+        # The file stays up for joining until the last holder releases the job,
+        # which deletes it. Failed jobs are dropped so the video can be retried.
+        if job.status == "failed" or job.holders <= 0:
+            _forget(job)
+        # Everyone who asked for it gave up while it was downloading
+        if job.holders <= 0:
+            _delete_download(job)
+
+        _set_queue_depth()
+        metrics.observe_ytdl_download(time.perf_counter() - start, status)
+
+    logger.info(
+        "[downloads] finished - key={} seconds={:.1f}", job.key, time.perf_counter() - start
+    )
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            await _run(job)
+        except Exception as e:
+            logger.error("[downloads] worker error - key={} e={}", job.key, e)
+        finally:
+            _queue.task_done()
+
+
+def start():
+    global _queue
+
+    if is_running():
+        return
+
+    _queue = asyncio.Queue(maxsize=MAX_QUEUED_JOBS)
+    _workers[:] = [asyncio.create_task(_worker()) for _ in range(WORKERS)]
+
+    logger.info(
+        "[downloads] started - workers={} max_queued_jobs={} max_jobs_per_user={}",
+        WORKERS,
+        MAX_QUEUED_JOBS,
+        MAX_JOBS_PER_USER,
+    )
+
+
+async def stop():
+    """Stop the workers. Running downloads are killed and waiting jobs fail."""
+    global _queue
+
+    for worker in _workers:
+        worker.cancel()
+    for worker in _workers:
+        with contextlib.suppress(asyncio.CancelledError):
+            await worker
+    _workers.clear()
+
+    if _queue is not None:
+        while not _queue.empty():
+            job = _queue.get_nowait()
+            job.future.cancel()
+            _forget(job)
+        _queue = None
+
+    _user_jobs.clear()
+    logger.info("[downloads] stopped")
@@ -0,0 +1,81 @@
+"""
+Emoji images for Pilmoji, read from a local store instead of an emoji CDN.
+
+The store is a directory of PNGs named by codepoint sequence - lower case hex
+joined with "-", without the U+FE0F variation selector, the way Twemoji names
+its files: 1f64f.png for 🙏, 1f1ee-1f1f3.png for 🇮🇳. Glyphs are read the
+first time they're drawn and the last CACHE_SIZE of them are kept in memory.
+
+    with Pilmoji(img, source=LocalEmojiSource) as pilmoji:
+        ...
+
+An emoji missing from the store is drawn with the text font instead. Build the
+store from the pinned Twemoji release with `make emoji-store`, or from a local
+emoji set with `python -m src.domain.emoji_glyphs`. warn_if_empty() is checked
+at startup, so a deploy without a store shows up in the logs.
+"""
+
+import functools
+import io
+import os
+from os import path
+
+from loguru import logger
+from pilmoji.source import BaseSource
+
+from src.domain import config
+
+app_config = config.get_config()
+
+STORE_DIR = app_config.get("EMOJI", "STORE_DIR", fallback="resources/emoji")
+CACHE_SIZE = int(app_config.get("EMOJI", "CACHE_SIZE", fallback="512"))
+
+VARIATION_SELECTOR = "\ufe0f"
+GLYPH_EXTENSION = ".png"
+
+
+def warn_if_empty() -> int:
+    """Log a warning if the store has no glyphs. Returns how many it has."""
+    try:
+        count = sum(1 for name in os.listdir(STORE_DIR) if name.endswith(GLYPH_EXTENSION))
+    except FileNotFoundError:
+        count = 0
+
+    if count == 0:
+        logger.warning(
+            "[emoji_glyphs] store is empty, emojis will be drawn with the text font - "
+            "store_dir={} (build it with make emoji-store)",
+            STORE_DIR,
+        )
+
+    return count
+
+
+def glyph_name(emoji: str) -> str:
+    """The store file name, without extension, for emoji."""
+    return "-".join(f"{ord(c):x}" for c in emoji if c != VARIATION_SELECTOR)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def read_glyph(name: str) -> bytes | None:
+    try:
+        with open(path.join(STORE_DIR, name + GLYPH_EXTENSION), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.debug("[emoji_glyphs] glyph not in store - name={}", name)
+        return None
+
+
+def get_glyph(emoji: str) -> bytes | None:
+    """The encoded PNG for emoji, or None if the store doesn't have it."""
+    name = glyph_name(emoji)
+    return read_glyph(name) if name else None
+
+
+class LocalEmojiSource(BaseSource):
+    def get_emoji(self, emoji: str, /) -> io.BytesIO | None:
+        glyph = get_glyph(emoji)
+        return io.BytesIO(glyph) if glyph is not None else None
+
+    def get_discord_emoji(self, id: int, /) -> io.BytesIO | None:
+        return None
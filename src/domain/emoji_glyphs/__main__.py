@@ -0,0 +1,36 @@
+import argparse
+
+from loguru import logger
+
+from . import STORE_DIR, build
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.domain.emoji_glyphs")
+    parser.add_argument("--out", default=STORE_DIR, help="store directory to write glyphs to")
+    parser.add_argument("--size", type=int, default=build.GLYPH_SIZE, help="glyph size in pixels")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    from_dir = subparsers.add_parser(
+        "from-dir", help="copy PNGs named by codepoint, e.g. Twemoji's assets/72x72"
+    )
+    from_dir.add_argument("source")
+
+    from_font = subparsers.add_parser(
+        "from-font", help="rasterise a colour emoji font, e.g. NotoColorEmoji.ttf"
+    )
+    from_font.add_argument("font")
+    from_font.add_argument("--font-size", type=int, default=build.EMOJI_FONT_SIZE)
+
+    args = parser.parse_args()
+
+    if args.command == "from-dir":
+        count = build.build_from_directory(args.source, args.out, args.size)
+    elif args.command == "from-font":
+        count = build.build_from_font(args.font, args.out, args.size, args.font_size)
+
+    logger.info("[emoji_glyphs] built store - glyphs={} out={}", count, args.out)
+
+
+if __name__ == "__main__":
+    main()
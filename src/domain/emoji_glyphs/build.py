@@ -0,0 +1,111 @@
+"""
+Filling the emoji glyph store from a local emoji set - either a directory of
+PNGs named by codepoint (Twemoji's assets/72x72, Noto's png/128) or a colour
+emoji font (NotoColorEmoji.ttf). Glyphs are saved as square RGBA PNGs.
+"""
+
+import os
+import re
+from os import path
+
+import emoji as emoji_data
+from loguru import logger
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from . import GLYPH_EXTENSION, glyph_name
+
+GLYPH_SIZE = 128
+# Colour bitmap fonts like Noto Color Emoji only come in this size
+EMOJI_FONT_SIZE = 109
+# Private use, so no font has an emoji for it - rendering it shows what the
+# font draws for a missing glyph
+MISSING_GLYPH = "\ue000"
+
+
+def parse_glyph_name(file_name: str) -> str | None:
+    """The store name for an image named by codepoints, e.g. 1f1ee-1f1f3.png or emoji_u1f1ee_1f1f3.png."""
+    stem, extension = path.splitext(file_name)
+    if extension.lower() != GLYPH_EXTENSION:
+        return None
+
+    try:
+        emoji = "".join(
+            chr(int(part, 16)) for part in re.split(r"[-_]", stem.lower().removeprefix("emoji_u"))
+        )
+    except ValueError:
+        return None
+
+    return glyph_name(emoji) or None
+
+
+def fit_square(img: Image.Image, size: int) -> Image.Image:
+    img = ImageOps.contain(img.convert("RGBA"), (size, size), Image.Resampling.LANCZOS)
+    if img.size == (size, size):
+        return img
+
+    square = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    square.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
+    return square
+
+
+def save_glyph(img: Image.Image, out_dir: str, name: str, size: int):
+    fit_square(img, size).save(path.join(out_dir, name + GLYPH_EXTENSION), optimize=True)
+
+
+def build_from_directory(source_dir: str, out_dir: str, size: int = GLYPH_SIZE) -> int:
+    """Copy every codepoint named PNG in source_dir into the store. Returns how many were saved."""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+
+    for file_name in sorted(os.listdir(source_dir)):
+        name = parse_glyph_name(file_name)
+        if name is None:
+            logger.debug("[emoji_glyphs] skipping - file_name={}", file_name)
+            continue
+
+        with Image.open(path.join(source_dir, file_name)) as img:
+            save_glyph(img, out_dir, name, size)
+        count += 1
+
+    return count
+
+
+def rasterise(font: ImageFont.FreeTypeFont, emoji: str) -> Image.Image | None:
+    canvas = Image.new("RGBA", (font.size * 4, font.size * 2), (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).text(
+        (font.size // 2, font.size // 2), emoji, font=font, embedded_color=True
+    )
+
+    box = canvas.getbbox()
+    return canvas.crop(box) if box is not None else None
+
+
+def build_from_font(
+    font_path: str,
+    out_dir: str,
+    size: int = GLYPH_SIZE,
+    font_size: int = EMOJI_FONT_SIZE,
+) -> int:
+    """Rasterise every emoji the font has into the store. Returns how many were saved."""
+    font = ImageFont.truetype(font_path, font_size)
+    missing = rasterise(font, MISSING_GLYPH)
+    missing = missing.tobytes() if missing is not None else None
+
+    os.makedirs(out_dir, exist_ok=True)
+    saved = set()
+
+    for emoji in sorted(emoji_data.EMOJI_DATA):
+        name = glyph_name(emoji)
+        # Emojis with and without the variation selector share a glyph
+        if name in saved:
+            continue
+
+        img = rasterise(font, emoji)
+        if img is None or img.tobytes() == missing:
+            logger.debug("[emoji_glyphs] not in font - name={}", name)
+            continue
+
+        save_glyph(img, out_dir, name, size)
+        saved.add(name)
+
+    return len(saved)
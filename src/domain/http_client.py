@@ -0,0 +1,89 @@
+"""
+The process-wide HTTP client.
+
+Every outbound request goes through one httpx.AsyncClient so connections are
+kept alive and reused across messages instead of paying for a new TLS
+handshake each time, over HTTP/2 where the server supports it. Requests get
+TIMEOUT_SECONDS (CONNECT_TIMEOUT_SECONDS to connect) unless they pass their
+own timeout, and at most MAX_CONNECTIONS_PER_HOST run against one host at a
+time so a slow API can't take every pooled connection. The per host limits of
+the MAX_LIMITED_HOSTS most recently used hosts are kept.
+
+The client is created on first use, inside the running event loop, and closed
+by close() on shutdown.
+"""
+
+import asyncio
+
+import httpx
+from cachetools import LRUCache
+from loguru import logger
+
+from . import config
+
+app_config = config.get_config()
+
+TIMEOUT_SECONDS = float(app_config.get("HTTP", "TIMEOUT_SECONDS", fallback="15"))
+CONNECT_TIMEOUT_SECONDS = float(app_config.get("HTTP", "CONNECT_TIMEOUT_SECONDS", fallback="5"))
+MAX_CONNECTIONS = int(app_config.get("HTTP", "MAX_CONNECTIONS", fallback="100"))
+MAX_KEEPALIVE_CONNECTIONS = int(app_config.get("HTTP", "MAX_KEEPALIVE_CONNECTIONS", fallback="20"))
+KEEPALIVE_EXPIRY_SECONDS = float(app_config.get("HTTP", "KEEPALIVE_EXPIRY_SECONDS", fallback="60"))
+MAX_CONNECTIONS_PER_HOST = int(app_config.get("HTTP", "MAX_CONNECTIONS_PER_HOST", fallback="10"))
+MAX_LIMITED_HOSTS = int(app_config.get("HTTP", "MAX_LIMITED_HOSTS", fallback="256"))
+
+_client: httpx.AsyncClient | None = None
+# Handlers fetch arbitrary user supplied URLs, so only the recently used hosts are
+# kept. A host evicted while busy gets a fresh limit on its next request.
+_host_limits: LRUCache[str, asyncio.Semaphore] = LRUCache(maxsize=MAX_LIMITED_HOSTS)
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+        logger.info(
+            "[http_client] created - max_connections={} max_connections_per_host={}",
+            MAX_CONNECTIONS,
+            MAX_CONNECTIONS_PER_HOST,
+        )
+
+    return _client
+
+
+def _host_limit(host: str) -> asyncio.Semaphore:
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return limit
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request with the shared client. Takes the same arguments as httpx.AsyncClient.request."""
+    async with _host_limit(httpx.URL(url).host):
+        return await get_client().request(method, url, **kwargs)
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def close():
+    """Close the pooled connections. The next request creates a new client."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("[http_client] closed")
+
+    _host_limits.clear()
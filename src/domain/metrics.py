@@ -1,4 +1,4 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 from telegram import Update
 
 messages_count = Counter(
@@ -11,6 +11,75 @@ command_usage_count = Counter(
     ["group_id", "group_name", "command_name"],
 )
 
+message_queue_depth = Gauge(
+    "chaddi_message_queue_depth",
+    "Number of Messages waiting to be flushed to the database",
+)
+
+message_queue_flush_latency = Histogram(
+    "chaddi_message_queue_flush_latency_seconds",
+    "Time taken to flush a batch of Messages to the database",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+
+message_queue_flushed_count = Counter(
+    "chaddi_message_queue_flushed_count",
+    "chaddi_message_queue_flushed_count",
+    ["status"],
+)
+
+passive_handler_latency = Histogram(
+    "chaddi_passive_handler_latency_seconds",
+    "Time taken by each passive message handler",
+    ["handler", "status"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+)
+
+passive_handler_timeouts_count = Counter(
+    "chaddi_passive_handler_timeouts_count",
+    "chaddi_passive_handler_timeouts_count",
+    ["handler"],
+)
+
+instagram_strategy_latency = Histogram(
+    "chaddi_instagram_strategy_latency_seconds",
+    "Time taken by each Instagram media resolving strategy",
+    ["strategy", "status"],
+    buckets=[0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
+lookup_cache_count = Counter(
+    "chaddi_lookup_cache_count",
+    "Lookups by cache namespace and where they were answered from",
+    ["namespace", "result"],
+)
+
+ytdl_jobs_in_flight = Gauge(
+    "chaddi_ytdl_jobs_in_flight",
+    "Number of yt-dlp downloads queued or running",
+)
+
+ytdl_download_latency = Histogram(
+    "chaddi_ytdl_download_latency_seconds",
+    "Time taken by each yt-dlp download",
+    ["status"],
+    buckets=[1, 2.5, 5, 10, 20, 30, 60, 120, 300],
+)
+
+transcode_latency = Histogram(
+    "chaddi_transcode_latency_seconds",
+    "Time taken by each ffmpeg conversion",
+    ["preset", "status"],
+    buckets=[1, 2.5, 5, 10, 20, 30, 60, 120, 300],
+)
+
+render_latency = Histogram(
+    "chaddi_render_latency_seconds",
+    "Time taken by each image render, including waiting for a worker",
+    ["name", "status"],
+    buckets=[0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
 
 def inc_message_count(update: Update):
     messages_count.labels(
@@ -26,3 +95,51 @@ def inc_command_usage_count(command_name: str, update: Update):
         command_name=command_name,
     ).inc()
     return
+
+
+def set_message_queue_depth(depth: int):
+    message_queue_depth.set(depth)
+    return
+
+
+def observe_message_queue_flush(seconds: float, rows: int, status: str):
+    message_queue_flush_latency.observe(seconds)
+    message_queue_flushed_count.labels(status=status).inc(rows)
+    return
+
+
+def observe_passive_handler(handler: str, seconds: float, status: str):
+    passive_handler_latency.labels(handler=handler, status=status).observe(seconds)
+    if status == "timeout":
+        passive_handler_timeouts_count.labels(handler=handler).inc()
+    return
+
+
+def inc_lookup_cache(namespace: str, result: str):
+    lookup_cache_count.labels(namespace=namespace, result=result).inc()
+    return
+
+
+def observe_instagram_strategy(strategy: str, seconds: float, status: str):
+    instagram_strategy_latency.labels(strategy=strategy, status=status).observe(seconds)
+    return
+
+
+def set_ytdl_queue_depth(depth: int):
+    ytdl_jobs_in_flight.set(depth)
+    return
+
+
+def observe_ytdl_download(seconds: float, status: str):
+    ytdl_download_latency.labels(status=status).observe(seconds)
+    return
+
+
+def observe_transcode(preset: str, seconds: float, status: str):
+    transcode_latency.labels(preset=preset, status=status).observe(seconds)
+    return
+
+
+def observe_render(name: str, seconds: float, status: str):
+    render_latency.labels(name=name, status=status).observe(seconds)
+    return
@@ -0,0 +1,149 @@
+"""
+Image rendering in worker processes.
+
+Pillow holds the GIL while it draws, so a poster rendered in a thread still
+stalls the event loop and renders can't overlap. run(fn, *args) calls fn in one
+of WORKERS worker processes instead and awaits the result. At most
+MAX_QUEUED_JOBS more renders wait for a worker.
+
+fn, its arguments and its result are pickled between processes - fn has to be
+a module level function, and it should take a plain job spec and return encoded
+bytes rather than live Images.
+
+start() launches the workers from a forkserver - forking the bot itself isn't
+safe once the db pool, the default executor and exporter threads are running.
+Each worker imports what it renders with and runs start's initializer (e.g.
+preloading fonts and decoded images) once. Until then, in scripts and tests,
+renders run in a thread.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from loguru import logger
+
+from . import config, metrics
+
+app_config = config.get_config()
+
+WORKERS = int(app_config.get("RENDER", "WORKERS", fallback=str(os.cpu_count() or 1)))
+MAX_QUEUED_JOBS = int(app_config.get("RENDER", "MAX_QUEUED_JOBS", fallback="8"))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+_executor: ProcessPoolExecutor | None = None
+# Runs once in every worker, including the ones of a replaced pool
+_initializer: Callable[[], Any] | None = None
+# Renders running or waiting for a worker
+_pending = 0
+
+
+def is_running() -> bool:
+    return _executor is not None
+
+
+async def run(fn: Callable[..., Any], *args: Any) -> Any:
+    """fn(*args), worked out in a render worker. Raises QueueFullError when too many are waiting."""
+    global _pending
+
+    if _pending >= WORKERS + MAX_QUEUED_JOBS:
+        raise QueueFullError(f"{_pending} renders pending")
+
+    _pending += 1
+    start = time.perf_counter()
+    status = "error"
+    # The pool this render went to, to tell whether it has been replaced already
+    executor = _executor
+
+    try:
+        if executor is None:
+            result = await asyncio.to_thread(fn, *args)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        status = "success"
+        return result
+    except BrokenProcessPool:
+        # A worker died mid-render (OOM killer, crash in a C extension) and took
+        # the pool down with it, failing every render in flight. The first one
+        # to get here replaces it so the next render has somewhere to go.
+        if _replace(executor):
+            logger.error("[rendering] worker pool broke, restarting - fn={}", fn.__name__)
+            await asyncio.to_thread(_warm_up, _executor)
+        raise
+    finally:
+        _pending -= 1
+        metrics.observe_render(fn.__name__, time.perf_counter() - start, status)
+
+
+def _new_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=WORKERS,
+        # Workers are forked from a single threaded server process, never from
+        # the bot, so replacing a broken pool at runtime is safe too
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_initializer,
+    )
+
+
+def _warm_up(executor: ProcessPoolExecutor):
+    """Start the workers now, rather than on the first render. Blocks while they start."""
+    try:
+        # Workers are started as jobs come in, one per job while none is idle
+        for future in [executor.submit(os.getpid) for _ in range(WORKERS)]:
+            future.result()
+    except BrokenProcessPool as e:
+        logger.error("[rendering] worker pool broke while starting - e={}", e)
+
+
+def _replace(broken: ProcessPoolExecutor) -> bool:
+    """Swap in a new pool for broken, unless it was already swapped out or stopped."""
+    global _executor
+
+    if broken is None or _executor is not broken:
+        return False
+
+    broken.shutdown(wait=False, cancel_futures=True)
+    _executor = _new_executor()
+    return True
+
+
+def start(initializer: Callable[[], Any] | None = None):
+    """
+    Start the render workers, running initializer in each one first. Call it off
+    the event loop - it blocks while the workers start.
+    """
+    global _executor, _initializer
+
+    if _executor is not None:
+        return
+
+    _initializer = initializer
+    _executor = _new_executor()
+    _warm_up(_executor)
+
+    logger.info(
+        "[rendering] started - workers={} max_queued_jobs={}",
+        WORKERS,
+        MAX_QUEUED_JOBS,
+    )
+
+
+def stop():
+    """Stop the workers. Renders waiting for one are cancelled."""
+    global _executor
+
+    if _executor is None:
+        return
+
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    logger.info("[rendering] stopped")
@@ -1,9 +1,16 @@
-def reward_rokda(r):
+def reward_amount(r):
     if r is None or (r < 0):
         r = 0
 
     # Egalitarian policy - Poor users get more increment than richer users
-    r += 100 / (r + 10) + 1
+    return round(100 / (r + 10) + 1, 2)
+
+
+def reward_rokda(r):
+    if r is None or (r < 0):
+        r = 0
+
+    r += reward_amount(r)
     r = round(r, 2)
 
     return r
@@ -12,7 +12,7 @@ from telegram.error import BadRequest, Forbidden
 from telegram.ext import ContextTypes, JobQueue
 
 from src.bot.handlers.remind import build_job_name, reminder_handler
-from src.db import Group, Quote, ScheduledJob
+from src.db import Group, Quote, ScheduledJob, aio, lookup_cache, message_archive, partitions
 from src.domain import util
 
 
@@ -134,3 +134,61 @@ def schedule_daily_posts(job_queue: JobQueue):
 
     job_queue.run_daily(daily_post_callback, time=daily_time, name="daily_good_morning")
     logger.info("Scheduled daily good morning job for 8:00 AM IST")
+
+
+async def partition_maintenance_callback(context: ContextTypes.DEFAULT_TYPE):
+    try:
+        await aio.run(partitions.maintain)
+    except Exception as e:
+        logger.error("[partitions] maintenance failed - e={}", e)
+
+
+def schedule_partition_maintenance(job_queue: JobQueue):
+    # Once shortly after startup, then daily - partitions are created months ahead
+    job_queue.run_repeating(
+        partition_maintenance_callback,
+        interval=datetime.timedelta(days=1),
+        first=datetime.timedelta(minutes=1),
+        name="db_partition_maintenance",
+    )
+    logger.info("Scheduled daily db partition maintenance")
+
+
+async def message_archive_callback(context: ContextTypes.DEFAULT_TYPE):
+    try:
+        await aio.run(message_archive.archive_old_messages)
+    except Exception as e:
+        logger.error("[message_archive] archiving failed - e={}", e)
+
+
+def schedule_message_archive(job_queue: JobQueue):
+    if message_archive.ARCHIVE_AFTER_DAYS <= 0:
+        logger.info("Message archiving is disabled")
+        return
+
+    # 4:00 AM IST, when the groups are quiet
+    ist = pytz.timezone("Asia/Kolkata")
+    daily_time = datetime.time(hour=4, minute=0, tzinfo=ist)
+
+    job_queue.run_daily(message_archive_callback, time=daily_time, name="db_message_archive")
+    logger.info(
+        "Scheduled daily message archiving for 4:00 AM IST - after_days={}",
+        message_archive.ARCHIVE_AFTER_DAYS,
+    )
+
+
+async def lookup_cache_prune_callback(context: ContextTypes.DEFAULT_TYPE):
+    try:
+        await aio.run(lookup_cache.prune_expired)
+    except Exception as e:
+        logger.error("[lookup_cache] pruning failed - e={}", e)
+
+
+def schedule_lookup_cache_prune(job_queue: JobQueue):
+    job_queue.run_repeating(
+        lookup_cache_prune_callback,
+        interval=datetime.timedelta(days=1),
+        first=datetime.timedelta(minutes=5),
+        name="db_lookup_cache_prune",
+    )
+    logger.info("Scheduled daily pruning of expired cached lookups")
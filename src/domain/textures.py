@@ -0,0 +1,199 @@
+"""
+Unsplash photos for poster backgrounds, downloaded ahead of time.
+
+Fetching a random Unsplash photo takes three requests (the random photo, its
+download tracking and the image itself), which used to happen while someone
+waited on /tynm. Instead a refiller task keeps POOL_SIZE textures in
+TEXTURE_DIR, already cropped to the poster size, and take() hands one out
+straight away. The refiller replaces it in the background.
+
+A texture that was taken is the caller's to delete. Textures older than
+MAX_AGE_HOURS are rotated out, so posters don't keep drawing from the same few
+photos when /tynm is quiet. The pool lives on disk, so textures fetched before
+a restart are used after it.
+
+When the pool is empty, or the refiller isn't running (scripts, tests, no
+Unsplash key), take() returns None and posters keep their plain background.
+"""
+
+import asyncio
+import collections
+import contextlib
+import os
+import time
+import uuid
+
+from loguru import logger
+from PIL import Image, ImageOps
+
+from . import config, metrics, util
+
+app_config = config.get_config()
+
+POOL_SIZE = int(app_config.get("UNSPLASH", "TEXTURE_POOL_SIZE", fallback="4"))
+MAX_AGE_SECONDS = float(app_config.get("UNSPLASH", "TEXTURE_MAX_AGE_HOURS", fallback="24")) * 3600
+# How long to wait before fetching again after Unsplash failed
+RETRY_SECONDS = float(app_config.get("UNSPLASH", "TEXTURE_RETRY_SECONDS", fallback="300"))
+
+TEXTURE_DIR = os.path.join(util.RESOURCES_DIR, "external", "textures")
+TEXTURE_EXTENSION = ".jpg"
+
+
+class TextureError(Exception):
+    pass
+
+
+# Paths of textures ready to be taken, oldest first
+_pool: collections.deque[str] = collections.deque()
+# Set when a texture is taken, to wake the refiller
+_wanted: asyncio.Event | None = None
+_refiller_task: asyncio.Task | None = None
+_size: tuple[int, int] = (0, 0)
+
+
+def is_running() -> bool:
+    return _refiller_task is not None and not _refiller_task.done()
+
+
+def _is_stale(path: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) > MAX_AGE_SECONDS
+    except FileNotFoundError:
+        return True
+
+
+def take() -> str | None:
+    """A prefetched texture, now the caller's to delete, or None if there isn't one ready."""
+    while _pool:
+        path = _pool.popleft()
+        if _is_stale(path):
+            util.delete_file(path)
+            continue
+
+        if _wanted is not None:
+            _wanted.set()
+        metrics.inc_lookup_cache("unsplash_textures", "hit")
+        logger.info("[textures] taken - path={} left={}", path, len(_pool))
+        return path
+
+    if _wanted is not None:
+        _wanted.set()
+    metrics.inc_lookup_cache("unsplash_textures", "miss")
+    return None
+
+
+def _rotate():
+    for path in [path for path in _pool if _is_stale(path)]:
+        _pool.remove(path)
+        util.delete_file(path)
+        logger.info("[textures] rotated out - path={}", path)
+
+
+def _load_existing():
+    """Pick up textures left on disk by the last run."""
+    os.makedirs(TEXTURE_DIR, exist_ok=True)
+
+    paths = [
+        os.path.join(TEXTURE_DIR, name)
+        for name in os.listdir(TEXTURE_DIR)
+        if name.endswith(TEXTURE_EXTENSION)
+    ]
+    paths.sort(key=os.path.getmtime)
+
+    for path in paths:
+        if _is_stale(path) or len(_pool) >= POOL_SIZE:
+            util.delete_file(path)
+        else:
+            _pool.append(path)
+
+
+def _crop_to_size(source: str) -> str:
+    path = os.path.join(TEXTURE_DIR, f"{uuid.uuid4()}{TEXTURE_EXTENSION}")
+
+    with Image.open(source) as photo:
+        photo.draft("RGB", _size)
+        texture = ImageOps.fit(photo.convert("RGB"), _size, Image.Resampling.LANCZOS)
+
+    texture.save(path, quality=90)
+    return path
+
+
+async def _fetch():
+    downloaded = await util.fetch_random_unsplash_photo_path(*_size)
+    if downloaded is None:
+        raise TextureError("no photo from Unsplash")
+
+    try:
+        path = await asyncio.to_thread(_crop_to_size, downloaded)
+    finally:
+        util.delete_file(downloaded)
+
+    _pool.append(path)
+    logger.info("[textures] fetched - path={} pool={}", path, len(_pool))
+
+
+def _seconds_until_stale() -> float:
+    if not _pool:
+        return MAX_AGE_SECONDS
+
+    with contextlib.suppress(FileNotFoundError):
+        return max(os.path.getmtime(_pool[0]) + MAX_AGE_SECONDS - time.time(), 0)
+    return 0
+
+
+async def _run_refiller():
+    _load_existing()
+
+    while True:
+        _rotate()
+
+        if len(_pool) < POOL_SIZE:
+            try:
+                await _fetch()
+            except Exception as e:
+                logger.warning("[textures] fetch failed, retrying later - e={}", e)
+                await asyncio.sleep(RETRY_SECONDS)
+            continue
+
+        _wanted.clear()
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(_wanted.wait(), timeout=_seconds_until_stale())
+
+
+def start(width: int, height: int):
+    """Start keeping textures of width x height ready."""
+    global _refiller_task, _wanted, _size
+
+    if is_running():
+        return
+
+    if not util.is_unsplash_configured():
+        logger.info("[textures] Unsplash isn't configured, posters won't have textures")
+        return
+
+    _size = (width, height)
+    _wanted = asyncio.Event()
+    _refiller_task = asyncio.create_task(_run_refiller())
+
+    logger.info(
+        "[textures] started - pool_size={} max_age_seconds={} size={}x{}",
+        POOL_SIZE,
+        MAX_AGE_SECONDS,
+        width,
+        height,
+    )
+
+
+async def stop():
+    """Stop refilling. Textures stay on disk for the next start."""
+    global _refiller_task, _wanted
+
+    if _refiller_task is not None:
+        _refiller_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _refiller_task
+        _refiller_task = None
+
+    _wanted = None
+    _pool.clear()
+    logger.info("[textures] stopped")
@@ -0,0 +1,191 @@
+"""
+Video transcoding with ffmpeg.
+
+to_mp4() converts a video into an H.264 mp4 that Telegram plays inline. ffmpeg
+runs as an async subprocess, so the event loop carries on while it encodes. At
+most WORKERS conversions run at once, and up to MAX_QUEUED_JOBS more wait for a
+slot. A conversion that runs past TIMEOUT_SECONDS is killed.
+
+Sources given as bytes are piped to ffmpeg's stdin, which works for streamable
+containers like webm. mp4 output needs a seekable file for +faststart, so the
+result is always written to a temporary file, which the caller deletes.
+
+The x264 preset and quality come from the size of the input - small clips get
+a slow, good looking encode, big ones a fast one that keeps them under
+Telegram's upload limit.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import math
+import os
+import tempfile
+import time
+
+from loguru import logger
+
+from . import config, metrics
+
+app_config = config.get_config()
+
+WORKERS = int(app_config.get("TRANSCODE", "WORKERS", fallback="2"))
+MAX_QUEUED_JOBS = int(app_config.get("TRANSCODE", "MAX_QUEUED_JOBS", fallback="10"))
+TIMEOUT_SECONDS = float(app_config.get("TRANSCODE", "TIMEOUT_SECONDS", fallback="300"))
+FFMPEG = app_config.get("TRANSCODE", "FFMPEG_PATH", fallback="ffmpeg")
+
+# Bots can't upload files bigger than this
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+MB = 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class Preset:
+    name: str
+    # x264 -preset
+    speed: str
+    crf: int
+    max_input_bytes: float
+
+
+# Smallest first, see choose_preset
+PRESETS = (
+    Preset("small", speed="medium", crf=23, max_input_bytes=8 * MB),
+    Preset("medium", speed="veryfast", crf=28, max_input_bytes=32 * MB),
+    Preset("large", speed="ultrafast", crf=32, max_input_bytes=math.inf),
+)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class TranscodeTimeoutError(Exception):
+    pass
+
+
+class TranscodeError(Exception):
+    pass
+
+
+_slots: asyncio.Semaphore | None = None
+# Conversions running or waiting for a slot
+_pending = 0
+
+
+def choose_preset(input_bytes: int) -> Preset:
+    return next(preset for preset in PRESETS if input_bytes <= preset.max_input_bytes)
+
+
+def needs_transcode(path: str) -> bool:
+    """Whether a video at path has to be converted before Telegram can take it as one."""
+    return not path.endswith(".mp4") or os.path.getsize(path) > MAX_UPLOAD_BYTES
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+
+    if _slots is None:
+        _slots = asyncio.Semaphore(WORKERS)
+    return _slots
+
+
+def _command(source: str | None, preset: Preset, output: str) -> list[str]:
+    return [
+        FFMPEG,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        source if source is not None else "pipe:0",
+        "-vcodec",
+        "libx264",
+        "-preset",
+        preset.speed,
+        "-crf",
+        str(preset.crf),
+        # x264 needs even dimensions
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-pix_fmt",
+        "yuv420p",
+        "-movflags",
+        "+faststart",
+        output,
+    ]
+
+
+async def to_mp4(source: str | bytes, preset: Preset | None = None) -> str:
+    """
+    Convert the video at path source, or in the bytes source, to mp4 and return
+    the path of the result. Raises QueueFullError when too many conversions are
+    waiting, TranscodeTimeoutError or TranscodeError when ffmpeg doesn't finish.
+    """
+    global _pending
+
+    if _pending >= WORKERS + MAX_QUEUED_JOBS:
+        raise QueueFullError(f"{_pending} conversions pending")
+
+    input_bytes = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    preset = preset or choose_preset(input_bytes)
+
+    _pending += 1
+    try:
+        async with _get_slots():
+            return await _run(source, preset, input_bytes)
+    finally:
+        _pending -= 1
+
+
+async def _run(source: str | bytes, preset: Preset, input_bytes: int) -> str:
+    fd, output = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+
+    piped = isinstance(source, bytes)
+    start = time.perf_counter()
+    status = "error"
+
+    logger.info(
+        "[transcode] starting - input_bytes={} preset={} piped={}", input_bytes, preset.name, piped
+    )
+
+    process = await asyncio.create_subprocess_exec(
+        *_command(None if piped else source, preset, output),
+        stdin=asyncio.subprocess.PIPE if piped else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        async with asyncio.timeout(TIMEOUT_SECONDS):
+            _, stderr = await process.communicate(source if piped else None)
+
+        if process.returncode != 0:
+            raise TranscodeError(stderr.decode(errors="replace").strip()[-500:])
+
+        status = "success"
+    except TimeoutError:
+        status = "timeout"
+        raise TranscodeTimeoutError(f"took longer than {TIMEOUT_SECONDS}s") from None
+    finally:
+        if process.returncode is None:
+            process.kill()
+            with contextlib.suppress(ProcessLookupError):
+                await process.wait()
+
+        seconds = time.perf_counter() - start
+        metrics.observe_transcode(preset.name, seconds, status)
+
+        if status != "success":
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(output)
+
+    logger.info(
+        "[transcode] finished - preset={} seconds={:.1f} output_bytes={}",
+        preset.name,
+        seconds,
+        os.path.getsize(output),
+    )
+    return output
@@ -6,13 +6,12 @@ from datetime import datetime
 
 import en_core_web_sm
 import pytz
-import requests
 from loguru import logger
 from telegram import Update, User
 
-from src.db import Bakchod, GroupMember
+from src.db import Bakchod, GroupMember, bakchod_dao, rokda_dao
 
-from . import config
+from . import config, http_client
 
 app_config = config.get_config()
 
@@ -76,7 +75,7 @@ def delete_file(file):
         logger.warning("[util] unabled to delete... does not exist file={}", file)
 
 
-def acquire_external_resource(resource_url, resource_name):
+async def acquire_external_resource(resource_url, resource_name):
     resource_path = os.path.join(RESOURCES_DIR, "external", resource_name)
 
     if os.path.exists(resource_path):
@@ -88,7 +87,7 @@ def acquire_external_resource(resource_url, resource_name):
     else:
         logger.info("[acquire_external_resource] downloading resource_url={}", resource_url)
 
-        r = requests.get(resource_url, allow_redirects=True, timeout=30)
+        r = await http_client.get(resource_url, timeout=30)
         r.raise_for_status()  # Raise an exception for bad status codes
 
         # Ensure the directory exists
@@ -111,12 +110,16 @@ def build_unsplash_image_url(raw_url: str, width: int, height: int) -> str:
     return f"{raw_url}{separator}w={width}&h={height}&fit=crop&fm=jpg"
 
 
-def fetch_random_unsplash_photo_path(
+def is_unsplash_configured() -> bool:
+    return bool(UNSPLASH_ACCESS_KEY) and UNSPLASH_ACCESS_KEY != "YOUR_UNSPLASH_ACCESS_KEY"
+
+
+async def fetch_random_unsplash_photo_path(
     width: int,
     height: int,
     query: str = "nature,water,india",
 ) -> str | None:
-    if not UNSPLASH_ACCESS_KEY or UNSPLASH_ACCESS_KEY == "YOUR_UNSPLASH_ACCESS_KEY":
+    if not is_unsplash_configured():
         logger.warning("[fetch_random_unsplash_photo_path] Unsplash ACCESS_KEY not configured")
         return None
 
@@ -136,7 +139,7 @@ def fetch_random_unsplash_photo_path(
         width,
         height,
     )
-    response = requests.get(
+    response = await http_client.get(
         UNSPLASH_RANDOM_PHOTO_URL,
         params=params,
         headers=headers,
@@ -149,14 +152,14 @@ def fetch_random_unsplash_photo_path(
     download_location = photo.get("links", {}).get("download_location")
     if download_location:
         try:
-            requests.get(download_location, headers=headers, timeout=10)
+            await http_client.get(download_location, headers=headers, timeout=10)
         except Exception as e:
             logger.warning(
                 "[fetch_random_unsplash_photo_path] failed to track Unsplash download e={}",
                 e,
             )
 
-    return acquire_external_resource(image_url, f"{uuid.uuid4()}.jpg")
+    return await acquire_external_resource(image_url, f"{uuid.uuid4()}.jpg")
 
 
 def choose_random_element_from_list(input_list):
@@ -196,7 +199,7 @@ def get_random_bakchod_from_group(group_id: str, bakchod_id_to_avoid: str) -> Ba
         logger.warning("No group members found for group_id={}", group_id)
         return None
 
-    random_bakchod = Bakchod.get_by_id(random_groupmember.bakchod_id)
+    random_bakchod = bakchod_dao.get_bakchod_by_id(random_groupmember.bakchod_id)
     logger.info("random_bakchod={}", random_bakchod.username)
 
     return random_bakchod
@@ -206,16 +209,14 @@ def is_admin_tg_user(user: User):
     return str(user.id) in ADMIN_IDS
 
 
-def paywall_user(bakchod_id: str, cost):
-    b = Bakchod.get_by_id(bakchod_id)
+def paywall_user(bakchod_id: str, cost, reason: str = "paywall"):
+    b = bakchod_dao.get_bakchod_by_id(bakchod_id)
 
     if b is not None:
-        if b.rokda <= cost:
+        if rokda_dao.debit(b, cost, reason) is None:
             logger.info("[paywall] {} doesn't have enough rokda cost={}", b.tg_id, cost)
             return False
         else:
-            b.rokda = b.rokda - cost
-            b.save()
             return True
     else:
         return False
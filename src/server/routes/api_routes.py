@@ -19,7 +19,11 @@ from src.db import (
     Message,
     Quote,
     ScheduledJob,
+    aio,
+    bakchod_dao,
     group_dao,
+    message_dao,
+    rokda_dao,
 )
 from src.domain import util
 
@@ -80,6 +84,19 @@ class SetBakchodRokdaParams(BaseModel):
     rokda: str
 
 
+def _set_bakchod_rokda(bakchod_id: str, rokda: str):
+    b = bakchod_dao.get_bakchod_by_id(bakchod_id)
+    if b is None:
+        raise Exception("Unable to find Bakchod")
+
+    rokda_to_set = float(rokda)
+
+    if not math.isfinite(rokda_to_set):
+        raise Exception("Bad params: rokda")
+
+    rokda_dao.set_balance(b, rokda_to_set, "admin")
+
+
 @router.post("/bakchod/rokda", response_class=JSONResponse)
 async def post_api_set_bakchod_rokda(
     request: Request, set_bakchod_rokda_params: SetBakchodRokdaParams
@@ -94,17 +111,11 @@ async def post_api_set_bakchod_rokda(
     }
 
     try:
-        b = Bakchod.get_by_id(set_bakchod_rokda_params.bakchod_id)
-        if b is None:
-            raise Exception("Unable to find Bakchod")
-
-        rokda_to_set = float(set_bakchod_rokda_params.rokda)
-
-        if not math.isfinite(rokda_to_set):
-            raise Exception("Bad params: rokda")
-
-        b.rokda = rokda_to_set
-        b.save()
+        await aio.run(
+            _set_bakchod_rokda,
+            set_bakchod_rokda_params.bakchod_id,
+            set_bakchod_rokda_params.rokda,
+        )
 
         return JSONResponse(content=response_message, status_code=200)
 
@@ -118,6 +129,21 @@ class SetBakchodMetadataParams(BaseModel):
     metadata: str
 
 
+def _set_bakchod_metadata(bakchod_id: str, metadata: str):
+    b = bakchod_dao.get_bakchod_by_id(bakchod_id)
+    if b is None:
+        raise Exception("Unable to find Bakchod")
+
+    # Check if metadata is a JSON
+    try:
+        metadata_json = json.loads(metadata)
+    except Exception as e:
+        raise Exception("Error during json.loads(metadata) :: " + str(e)) from e
+
+    b.metadata = metadata_json
+    b.save()
+
+
 @router.post("/bakchod/metadata", response_class=JSONResponse)
 async def post_api_set_bakchod_metadata(
     request: Request, set_bakchod_metadata_params: SetBakchodMetadataParams
@@ -132,18 +158,11 @@ async def post_api_set_bakchod_metadata(
     }
 
     try:
-        b = Bakchod.get_by_id(set_bakchod_metadata_params.bakchod_id)
-        if b is None:
-            raise Exception("Unable to find Bakchod")
-
-        # Check if metadata is a JSON
-        try:
-            metadata_json = json.loads(set_bakchod_metadata_params.metadata)
-        except Exception as e:
-            raise Exception("Error during json.loads(metadata) :: " + str(e)) from e
-
-        b.metadata = metadata_json
-        b.save()
+        await aio.run(
+            _set_bakchod_metadata,
+            set_bakchod_metadata_params.bakchod_id,
+            set_bakchod_metadata_params.metadata,
+        )
 
         return JSONResponse(content=response_message, status_code=200)
 
@@ -157,6 +176,21 @@ class SetGroupMetadataParams(BaseModel):
     metadata: str
 
 
+def _set_group_metadata(group_id: str, metadata: str):
+    g = Group.get_by_id(group_id)
+    if g is None:
+        raise Exception("Unable to find Group")
+
+    # Check if metadata is a JSON
+    try:
+        metadata_json = json.loads(metadata)
+    except Exception as e:
+        raise Exception("Error during json.loads(metadata) :: " + str(e)) from e
+
+    g.metadata = metadata_json
+    g.save()
+
+
 @router.post("/group/metadata", response_class=JSONResponse)
 async def post_api_set_group_metadata(
     request: Request, set_group_metadata_params: SetGroupMetadataParams
@@ -171,18 +205,11 @@ async def post_api_set_group_metadata(
     }
 
     try:
-        g = Group.get_by_id(set_group_metadata_params.group_id)
-        if g is None:
-            raise Exception("Unable to find Group")
-
-        # Check if metadata is a JSON
-        try:
-            metadata_json = json.loads(set_group_metadata_params.metadata)
-        except Exception as e:
-            raise Exception("Error during json.loads(metadata) :: " + str(e)) from e
-
-        g.metadata = metadata_json
-        g.save()
+        await aio.run(
+            _set_group_metadata,
+            set_group_metadata_params.group_id,
+            set_group_metadata_params.metadata,
+        )
 
         return JSONResponse(content=response_message, status_code=200)
 
@@ -191,42 +218,62 @@ async def post_api_set_group_metadata(
         return handle_http_error(str(e), 500)
 
 
-@router.get("/quotes", response_class=JSONResponse)
-async def get_api_quotes(request: Request, page_number: int = 1):
-    items_per_page = 50
+def _select_quotes():
+    """Quotes with their author, capturer and group joined in, so reading them doesn't query."""
+    author = Bakchod.alias()
+    capturer = Bakchod.alias()
 
-    logger.info("get_api_quotes page_number={}", page_number)
+    return (
+        Quote.select(Quote, author, capturer, Group)
+        .join(author, on=(Quote.author_bakchod == author.tg_id), attr="author_bakchod")
+        .switch(Quote)
+        .join(
+            capturer,
+            on=(Quote.quote_capture_bakchod == capturer.tg_id),
+            attr="quote_capture_bakchod",
+        )
+        .switch(Quote)
+        .join(Group, on=(Quote.quoted_in_group == Group.group_id), attr="quoted_in_group")
+    )
 
-    response = {
+
+def _quote_to_dict(quote):
+    return {
+        "quote_id": quote.quote_id,
+        "created": str(quote.created),
+        "text": quote.text,
+        "author_bakchod": util.extract_pretty_name_from_bakchod(quote.author_bakchod),
+        "quoted_in_group": quote.quoted_in_group.name,
+        "quote_capture_bakchod": util.extract_pretty_name_from_bakchod(quote.quote_capture_bakchod),
+    }
+
+
+def _compute_quotes(page_number: int, items_per_page: int):
+    quotes = (
+        _select_quotes()
+        .order_by(Quote.created.desc())
+        .paginate(page_number, items_per_page)
+        .execute()
+    )
+
+    total_quotes = Quote.select().count()
+
+    return {
         "current_page": page_number,
-        "total_quotes": 0,
-        "total_pages": 0,
-        "groups": [],
+        "total_quotes": total_quotes,
+        "total_pages": math.ceil(total_quotes / items_per_page),
+        "groups": [_quote_to_dict(quote) for quote in quotes],
     }
 
-    try:
-        quotes = (
-            Quote.select()
-            .order_by(Quote.created.desc())
-            .paginate(page_number, items_per_page)
-            .execute()
-        )
 
-        for quote in quotes:
-            q = {
-                "quote_id": quote.quote_id,
-                "created": str(quote.created),
-                "text": quote.text,
-                "author_bakchod": util.extract_pretty_name_from_bakchod(quote.author_bakchod),
-                "quoted_in_group": quote.quoted_in_group.name,
-                "quote_capture_bakchod": util.extract_pretty_name_from_bakchod(
-                    quote.quote_capture_bakchod
-                ),
-            }
-            response["groups"].append(q)
+@router.get("/quotes", response_class=JSONResponse)
+async def get_api_quotes(request: Request, page_number: int = 1):
+    items_per_page = 50
 
-        response["total_quotes"] = Quote.select().count()
-        response["total_pages"] = math.ceil(response["total_quotes"] / items_per_page)
+    logger.info("get_api_quotes page_number={}", page_number)
+
+    try:
+        response = await aio.run(_compute_quotes, page_number, items_per_page)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -235,26 +282,21 @@ async def get_api_quotes(request: Request, page_number: int = 1):
         return handle_http_error(str(e), 500)
 
 
+def _compute_quote_details(quote_id: str):
+    if quote_id == "random":
+        q = _select_quotes().order_by(fn.Random()).get()
+    else:
+        q = _select_quotes().where(Quote.quote_id == quote_id).get()
+
+    return _quote_to_dict(q)
+
+
 @router.get("/quotes/{quote_id}", response_class=JSONResponse)
 async def get_api_quote_details(request: Request, quote_id: str = "random"):
     logger.info("get_api_quotes quote_id={}", quote_id)
 
     try:
-        q = None
-
-        if quote_id == "random":
-            q = Quote.select().order_by(fn.Random()).get()
-        else:
-            q = Quote.get_by_id(quote_id)
-
-        response_message = {
-            "quote_id": q.quote_id,
-            "created": str(q.created),
-            "text": q.text,
-            "author_bakchod": util.extract_pretty_name_from_bakchod(q.author_bakchod),
-            "quoted_in_group": q.quoted_in_group.name,
-            "quote_capture_bakchod": util.extract_pretty_name_from_bakchod(q.quote_capture_bakchod),
-        }
+        response_message = await aio.run(_compute_quote_details, quote_id)
 
         return JSONResponse(content=response_message, status_code=200)
 
@@ -270,12 +312,7 @@ async def get_api_quote_details(request: Request, quote_id: str = "random"):
         return handle_http_error(str(e), 500)
 
 
-@router.get("/groups", response_class=JSONResponse)
-async def get_api_groups(request: Request, page_number: int = 1):
-    items_per_page = 50
-
-    logger.info("get_api_groups page_number={}", page_number)
-
+def _compute_groups(page_number: int, items_per_page: int):
     response = {
         "current_page": page_number,
         "total_groups": 0,
@@ -283,25 +320,36 @@ async def get_api_groups(request: Request, page_number: int = 1):
         "groups": [],
     }
 
-    try:
-        groups = (
-            Group.select()
-            .order_by(Group.updated.desc())
-            .paginate(page_number, items_per_page)
-            .execute()
-        )
+    groups = (
+        Group.select()
+        .order_by(Group.updated.desc())
+        .paginate(page_number, items_per_page)
+        .execute()
+    )
+
+    for group in groups:
+        g = {
+            "group_id": group.group_id,
+            "name": group.name,
+            "created": str(group.created),
+            "updated": str(group.updated),
+        }
+        response["groups"].append(g)
+
+    response["total_groups"] = Group.select().count()
+    response["total_pages"] = math.ceil(response["total_groups"] / items_per_page)
+
+    return response
 
-        for group in groups:
-            g = {
-                "group_id": group.group_id,
-                "name": group.name,
-                "created": str(group.created),
-                "updated": str(group.updated),
-            }
-            response["groups"].append(g)
 
-        response["total_groups"] = Group.select().count()
-        response["total_pages"] = math.ceil(response["total_groups"] / items_per_page)
+@router.get("/groups", response_class=JSONResponse)
+async def get_api_groups(request: Request, page_number: int = 1):
+    items_per_page = 50
+
+    logger.info("get_api_groups page_number={}", page_number)
+
+    try:
+        response = await aio.run(_compute_groups, page_number, items_per_page)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -310,6 +358,10 @@ async def get_api_groups(request: Request, page_number: int = 1):
         return handle_http_error(str(e), 500)
 
 
+def _compute_group_details(group_id):
+    return quick_model_to_dict(Group.get_by_id(group_id))
+
+
 @router.get("/groups/{group_id}", response_class=JSONResponse)
 async def get_api_group_details(request: Request, group_id):
     response = {}
@@ -318,8 +370,7 @@ async def get_api_group_details(request: Request, group_id):
         if group_id is None:
             raise Exception("group_id was None")
 
-        g = Group.get_by_id(group_id)
-        response = json.loads(json.dumps(model_to_dict(g), sort_keys=True, default=str))
+        response = await aio.run(_compute_group_details, group_id)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -328,31 +379,37 @@ async def get_api_group_details(request: Request, group_id):
         return handle_http_error(str(e), 500)
 
 
+def _compute_group_members(group_id):
+    try:
+        Group.get_by_id(group_id)
+    except DoesNotExist as e:
+        raise Exception("Group not found") from e
+
+    groupmembers = group_dao.get_all_groupmembers_by_group_id(group_id)
+
+    members = []
+    for groupmember in groupmembers:
+        bakchod = groupmember.bakchod
+        members.append(
+            {
+                "tg_id": bakchod.tg_id,
+                "username": bakchod.username,
+                "pretty_name": bakchod.pretty_name,
+                "rokda": bakchod.rokda,
+                "lastseen": str(bakchod.lastseen) if bakchod.lastseen else None,
+            }
+        )
+
+    return members
+
+
 @router.get("/groups/{group_id}/members", response_class=JSONResponse)
 async def get_api_group_members(request: Request, group_id):
     try:
         if group_id is None:
             raise Exception("group_id was None")
 
-        try:
-            Group.get_by_id(group_id)
-        except DoesNotExist as e:
-            raise Exception("Group not found") from e
-
-        groupmembers = group_dao.get_all_groupmembers_by_group_id(group_id)
-
-        members = []
-        for groupmember in groupmembers:
-            bakchod = groupmember.bakchod
-            members.append(
-                {
-                    "tg_id": bakchod.tg_id,
-                    "username": bakchod.username,
-                    "pretty_name": bakchod.pretty_name,
-                    "rokda": bakchod.rokda,
-                    "lastseen": str(bakchod.lastseen) if bakchod.lastseen else None,
-                }
-            )
+        members = await aio.run(_compute_group_members, group_id)
 
         return JSONResponse(
             content={"members": members, "total": len(members)},
@@ -364,53 +421,68 @@ async def get_api_group_members(request: Request, group_id):
         return handle_http_error(str(e), 500)
 
 
-@router.get("/groups/{group_id}/messages", response_class=JSONResponse)
-async def get_api_group_messages(
-    request: Request, group_id, page_number: int = 1, include_update: bool = False
-):
-    try:
-        items_per_page = 50
+def _compute_group_messages(group_id, page_number: int, items_per_page: int, include_update: bool):
+    group = None
 
-        if group_id is None:
-            raise Exception("group_id was None")
+    try:
+        group = Group.get_by_id(group_id)
+    except Exception as e:
+        logger.error("Caught Exception - e={}", e)
 
-        group = None
+    if group is None:
+        raise Exception("Group not found")
 
-        try:
-            group = Group.get_by_id(group_id)
-        except Exception as e:
-            logger.error("Caught Exception - e={}", e)
+    total_messages = Message.select().where(Message.to_id == group_id).count()
 
-        if group is None:
-            raise Exception("Group not found")
+    total_pages = math.ceil(total_messages / items_per_page)
 
-        total_messages = Message.select().where(Message.to_id == group_id).count()
+    messages = list(group_dao.get_all_messages_by_group_id(group_id, page_number, items_per_page))
 
-        total_pages = math.ceil(total_messages / items_per_page)
+    # The raw update lives in its own table and is only fetched when asked for
+    updates = (
+        message_dao.get_updates_by_message_ids([message.id for message in messages])
+        if include_update
+        else {}
+    )
 
-        messages = group_dao.get_all_messages_by_group_id(group_id, page_number, items_per_page)
+    response = {
+        "current_page": page_number,
+        "total_pages": total_pages,
+        "total_messages": total_messages,
+        "messages": [],
+    }
 
-        response = {
-            "current_page": page_number,
-            "total_pages": total_pages,
-            "total_messages": total_messages,
-            "messages": [],
+    for message in messages:
+        m = {
+            "message_id": message.message_id,
+            "text": message.text,
+            "time_sent": str(message.time_sent),
+            "from_bakchod": {
+                "tg_id": message.from_bakchod.tg_id,
+                "username": message.from_bakchod.username,
+                "pretty_name": message.from_bakchod.pretty_name,
+            },
         }
+        if include_update:
+            m["update"] = json.dumps(updates.get(message.id))
+        response["messages"].append(m)
 
-        for message in messages:
-            m = {
-                "message_id": message.message_id,
-                "text": message.text,
-                "time_sent": str(message.time_sent),
-                "from_bakchod": {
-                    "tg_id": message.from_bakchod.tg_id,
-                    "username": message.from_bakchod.username,
-                    "pretty_name": message.from_bakchod.pretty_name,
-                },
-            }
-            if include_update:
-                m["update"] = json.dumps(message.update)
-            response["messages"].append(m)
+    return response
+
+
+@router.get("/groups/{group_id}/messages", response_class=JSONResponse)
+async def get_api_group_messages(
+    request: Request, group_id, page_number: int = 1, include_update: bool = False
+):
+    try:
+        items_per_page = 50
+
+        if group_id is None:
+            raise Exception("group_id was None")
+
+        response = await aio.run(
+            _compute_group_messages, group_id, page_number, items_per_page, include_update
+        )
 
         return JSONResponse(content=response, status_code=200)
 
@@ -419,12 +491,7 @@ async def get_api_group_messages(
         return handle_http_error(str(e), 500)
 
 
-@router.get("/bakchods", response_class=JSONResponse)
-async def get_api_bakchods(request: Request, page_number: int = 1):
-    items_per_page = 50
-
-    logger.info("get_api_bakchods page_number={}", page_number)
-
+def _compute_bakchods(page_number: int, items_per_page: int):
     response = {
         "current_page": page_number,
         "total_bakchods": 0,
@@ -432,19 +499,30 @@ async def get_api_bakchods(request: Request, page_number: int = 1):
         "bakchods": [],
     }
 
-    try:
-        bakchods = (
-            Bakchod.select()
-            .order_by(Bakchod.updated.desc())
-            .paginate(page_number, items_per_page)
-            .execute()
-        )
+    bakchods = (
+        Bakchod.select()
+        .order_by(Bakchod.updated.desc())
+        .paginate(page_number, items_per_page)
+        .execute()
+    )
+
+    for bakchod in bakchods:
+        response["bakchods"].append(quick_model_to_dict(bakchod))
+
+    response["total_bakchods"] = Bakchod.select().count()
+    response["total_pages"] = math.ceil(response["total_bakchods"] / items_per_page)
+
+    return response
+
+
+@router.get("/bakchods", response_class=JSONResponse)
+async def get_api_bakchods(request: Request, page_number: int = 1):
+    items_per_page = 50
 
-        for bakchod in bakchods:
-            response["bakchods"].append(quick_model_to_dict(bakchod))
+    logger.info("get_api_bakchods page_number={}", page_number)
 
-        response["total_bakchods"] = Bakchod.select().count()
-        response["total_pages"] = math.ceil(response["total_bakchods"] / items_per_page)
+    try:
+        response = await aio.run(_compute_bakchods, page_number, items_per_page)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -453,6 +531,10 @@ async def get_api_bakchods(request: Request, page_number: int = 1):
         return handle_http_error(str(e), 500)
 
 
+def _compute_bakchod_details(tg_id):
+    return quick_model_to_dict(Bakchod.get_by_id(tg_id))
+
+
 @router.get("/bakchods/{tg_id}", response_class=JSONResponse)
 async def get_api_bakchod_details(request: Request, tg_id):
     try:
@@ -460,8 +542,7 @@ async def get_api_bakchod_details(request: Request, tg_id):
             raise Exception("tg_id was None")
 
         try:
-            b = Bakchod.get_by_id(tg_id)
-            response = quick_model_to_dict(b)
+            response = await aio.run(_compute_bakchod_details, tg_id)
             return JSONResponse(content=response, status_code=200)
 
         except Exception:
@@ -513,7 +594,7 @@ async def get_dashboard_metrics(request: Request):
     try:
         cache_key = "metrics"
         if cache_key not in metrics_cache:
-            metrics_cache[cache_key] = _compute_dashboard_metrics()
+            metrics_cache[cache_key] = await aio.run(_compute_dashboard_metrics)
 
         response = metrics_cache[cache_key]
         return JSONResponse(content=response, status_code=200)
@@ -523,51 +604,54 @@ async def get_dashboard_metrics(request: Request):
         return handle_http_error(str(e), 500)
 
 
+def _compute_dashboard_activity():
+    """Compute most active users and groups"""
+    # Get most active bakchod
+    most_active_bakchod = (
+        Bakchod.select(Bakchod, fn.COUNT(Message.id).alias("msg_count"))
+        .join(Message, on=(Message.from_bakchod == Bakchod.tg_id))
+        .group_by(Bakchod)
+        .order_by(fn.COUNT(Message.id).desc())
+        .first()
+    )
+
+    # Get most active group
+    most_active_group = (
+        Group.select(Group, fn.COUNT(Message.id).alias("msg_count"))
+        .join(Message, on=(Message.to_id == Group.group_id))
+        .group_by(Group)
+        .order_by(fn.COUNT(Message.id).desc())
+        .first()
+    )
+
+    # Get latest message timestamp
+    latest_message = Message.select().order_by(Message.time_sent.desc()).first()
+
+    return {
+        "most_active_bakchod": (
+            {
+                "pretty_name": (most_active_bakchod.pretty_name if most_active_bakchod else None),
+                "username": (most_active_bakchod.username if most_active_bakchod else None),
+            }
+            if most_active_bakchod
+            else None
+        ),
+        "most_active_group": (
+            {
+                "name": most_active_group.name if most_active_group else None,
+            }
+            if most_active_group
+            else None
+        ),
+        "latest_message_time": (str(latest_message.time_sent) if latest_message else None),
+    }
+
+
 @router.get("/dashboard/activity", response_class=JSONResponse)
 async def get_dashboard_activity(request: Request):
     """Get most active users and groups"""
     try:
-        # Get most active bakchod
-        most_active_bakchod = (
-            Bakchod.select(Bakchod, fn.COUNT(Message.id).alias("msg_count"))
-            .join(Message, on=(Message.from_bakchod == Bakchod.tg_id))
-            .group_by(Bakchod)
-            .order_by(fn.COUNT(Message.id).desc())
-            .first()
-        )
-
-        # Get most active group
-        most_active_group = (
-            Group.select(Group, fn.COUNT(Message.id).alias("msg_count"))
-            .join(Message, on=(Message.to_id == Group.group_id))
-            .group_by(Group)
-            .order_by(fn.COUNT(Message.id).desc())
-            .first()
-        )
-
-        # Get latest message timestamp
-        latest_message = Message.select().order_by(Message.time_sent.desc()).first()
-
-        response = {
-            "most_active_bakchod": (
-                {
-                    "pretty_name": (
-                        most_active_bakchod.pretty_name if most_active_bakchod else None
-                    ),
-                    "username": (most_active_bakchod.username if most_active_bakchod else None),
-                }
-                if most_active_bakchod
-                else None
-            ),
-            "most_active_group": (
-                {
-                    "name": most_active_group.name if most_active_group else None,
-                }
-                if most_active_group
-                else None
-            ),
-            "latest_message_time": (str(latest_message.time_sent) if latest_message else None),
-        }
+        response = await aio.run(_compute_dashboard_activity)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -576,28 +660,33 @@ async def get_dashboard_activity(request: Request):
         return handle_http_error(str(e), 500)
 
 
+def _compute_dashboard_random_quote():
+    """Pick a random quote"""
+    random_quote = Quote.select().order_by(fn.Random()).first()
+
+    if not random_quote:
+        return {"quote": None}
+
+    return {
+        "quote": {
+            "text": random_quote.text,
+            "created": str(random_quote.created),
+            "author_bakchod": {
+                "pretty_name": random_quote.author_bakchod.pretty_name,
+                "username": random_quote.author_bakchod.username,
+            },
+            "quoted_in_group": {
+                "name": random_quote.quoted_in_group.name,
+            },
+        }
+    }
+
+
 @router.get("/dashboard/random-quote", response_class=JSONResponse)
 async def get_dashboard_random_quote(request: Request):
     """Get a random quote"""
     try:
-        random_quote = Quote.select().order_by(fn.Random()).first()
-
-        if not random_quote:
-            return JSONResponse(content={"quote": None}, status_code=200)
-
-        response = {
-            "quote": {
-                "text": random_quote.text,
-                "created": str(random_quote.created),
-                "author_bakchod": {
-                    "pretty_name": random_quote.author_bakchod.pretty_name,
-                    "username": random_quote.author_bakchod.username,
-                },
-                "quoted_in_group": {
-                    "name": random_quote.quoted_in_group.name,
-                },
-            }
-        }
+        response = await aio.run(_compute_dashboard_random_quote)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -636,12 +725,7 @@ async def get_dashboard_version(request: Request):
         return handle_http_error(str(e), 500)
 
 
-@router.get("/jobs", response_class=JSONResponse)
-async def get_api_jobs(request: Request, page_number: int = 1):
-    items_per_page = 50
-
-    logger.info("get_api_jobs page_number={}", page_number)
-
+def _compute_jobs(page_number: int, items_per_page: int):
     response = {
         "current_page": page_number,
         "total_jobs": 0,
@@ -649,27 +733,41 @@ async def get_api_jobs(request: Request, page_number: int = 1):
         "jobs": [],
     }
 
-    try:
-        jobs = (
-            ScheduledJob.select()
-            .order_by(ScheduledJob.created.desc())
-            .paginate(page_number, items_per_page)
-            .execute()
-        )
+    jobs = (
+        ScheduledJob.select(ScheduledJob, Bakchod, Group)
+        .join(Bakchod, on=(ScheduledJob.from_bakchod == Bakchod.tg_id), attr="from_bakchod")
+        .switch(ScheduledJob)
+        .join(Group, on=(ScheduledJob.group == Group.group_id), attr="group")
+        .order_by(ScheduledJob.created.desc())
+        .paginate(page_number, items_per_page)
+        .execute()
+    )
 
-        for job in jobs:
-            j = {
-                "job_id": job.job_id,
-                "created": str(job.created),
-                "updated": str(job.updated),
-                "from_bakchod": util.extract_pretty_name_from_bakchod(job.from_bakchod),
-                "group": job.group.name if job.group else None,
-                "job_context": job.job_context,
-            }
-            response["jobs"].append(j)
+    for job in jobs:
+        j = {
+            "job_id": job.job_id,
+            "created": str(job.created),
+            "updated": str(job.updated),
+            "from_bakchod": util.extract_pretty_name_from_bakchod(job.from_bakchod),
+            "group": job.group.name if job.group else None,
+            "job_context": job.job_context,
+        }
+        response["jobs"].append(j)
+
+    response["total_jobs"] = ScheduledJob.select().count()
+    response["total_pages"] = math.ceil(response["total_jobs"] / items_per_page)
+
+    return response
 
-        response["total_jobs"] = ScheduledJob.select().count()
-        response["total_pages"] = math.ceil(response["total_jobs"] / items_per_page)
+
+@router.get("/jobs", response_class=JSONResponse)
+async def get_api_jobs(request: Request, page_number: int = 1):
+    items_per_page = 50
+
+    logger.info("get_api_jobs page_number={}", page_number)
+
+    try:
+        response = await aio.run(_compute_jobs, page_number, items_per_page)
 
         return JSONResponse(content=response, status_code=200)
 
@@ -685,7 +783,7 @@ async def get_api_commands_stats(request: Request):
     try:
         cache_key = "stats"
         if cache_key not in commands_stats_cache:
-            commands_stats_cache[cache_key] = _compute_commands_stats()
+            commands_stats_cache[cache_key] = await aio.run(_compute_commands_stats)
 
         return JSONResponse(content=commands_stats_cache[cache_key], status_code=200)
 
@@ -719,7 +817,7 @@ async def get_api_commands_top(request: Request, limit: int = 10):
     try:
         cache_key = f"top_{limit}"
         if cache_key not in commands_agg_cache:
-            commands_agg_cache[cache_key] = _compute_commands_top(limit)
+            commands_agg_cache[cache_key] = await aio.run(_compute_commands_top, limit)
 
         return JSONResponse(content=commands_agg_cache[cache_key], status_code=200)
 
@@ -746,7 +844,7 @@ async def get_api_commands_by_group(request: Request, limit: int = 10):
     try:
         cache_key = f"by_group_{limit}"
         if cache_key not in commands_agg_cache:
-            commands_agg_cache[cache_key] = _compute_commands_by_group(limit)
+            commands_agg_cache[cache_key] = await aio.run(_compute_commands_by_group, limit)
 
         return JSONResponse(content=commands_agg_cache[cache_key], status_code=200)
 
@@ -774,7 +872,7 @@ async def get_api_commands_by_user(request: Request, limit: int = 10):
     try:
         cache_key = f"by_user_{limit}"
         if cache_key not in commands_agg_cache:
-            commands_agg_cache[cache_key] = _compute_commands_by_user(limit)
+            commands_agg_cache[cache_key] = await aio.run(_compute_commands_by_user, limit)
 
         return JSONResponse(content=commands_agg_cache[cache_key], status_code=200)
 
@@ -808,7 +906,7 @@ async def get_api_commands_hourly(request: Request):
     try:
         cache_key = "hourly"
         if cache_key not in commands_hourly_cache:
-            commands_hourly_cache[cache_key] = _compute_commands_hourly()
+            commands_hourly_cache[cache_key] = await aio.run(_compute_commands_hourly)
 
         return JSONResponse(content=commands_hourly_cache[cache_key], status_code=200)
 
@@ -852,7 +950,7 @@ async def get_api_commands_recent(request: Request, limit: int = 50):
     try:
         cache_key = f"recent_{limit}"
         if cache_key not in commands_recent_cache:
-            commands_recent_cache[cache_key] = _compute_commands_recent(limit)
+            commands_recent_cache[cache_key] = await aio.run(_compute_commands_recent, limit)
 
         return JSONResponse(content=commands_recent_cache[cache_key], status_code=200)
 
@@ -895,7 +993,7 @@ async def post_api_group_send_message(
     logger.info("post_api_group_send_message group_id={} message={}", group_id, params.message)
 
     try:
-        g = Group.get_by_id(group_id)
+        g = await aio.run(Group.get_by_id, group_id)
         if g is None:
             raise Exception("Group not found")
 
@@ -912,31 +1010,37 @@ async def post_api_group_send_message(
         return handle_http_error(str(e), 500)
 
 
+def _compute_bakchod_groups(tg_id: str):
+    b = Bakchod.get_by_id(tg_id)
+    if b is None:
+        raise Exception("Bakchod not found")
+
+    groupmember_rows = (
+        GroupMember.select(Group)
+        .join(Group, on=(GroupMember.group == Group.group_id))
+        .where(GroupMember.bakchod == b.tg_id)
+    )
+
+    groups = []
+    for group_row in groupmember_rows:
+        groups.append(
+            {
+                "group_id": group_row.group_id,
+                "name": group_row.name,
+                "created": str(group_row.created),
+                "updated": str(group_row.updated),
+            }
+        )
+
+    return groups
+
+
 @router.get("/bakchods/{tg_id}/groups", response_class=JSONResponse)
 async def get_api_bakchod_groups(request: Request, tg_id: str):
     logger.info("get_api_bakchod_groups tg_id={}", tg_id)
 
     try:
-        b = Bakchod.get_by_id(tg_id)
-        if b is None:
-            raise Exception("Bakchod not found")
-
-        groupmember_rows = (
-            GroupMember.select(Group)
-            .join(Group, on=(GroupMember.group == Group.group_id))
-            .where(GroupMember.bakchod == b.tg_id)
-        )
-
-        groups = []
-        for group_row in groupmember_rows:
-            groups.append(
-                {
-                    "group_id": group_row.group_id,
-                    "name": group_row.name,
-                    "created": str(group_row.created),
-                    "updated": str(group_row.updated),
-                }
-            )
+        groups = await aio.run(_compute_bakchod_groups, tg_id)
 
         return JSONResponse(content=groups, status_code=200)
 
@@ -9,8 +9,9 @@ from peewee import SqliteDatabase
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
-# Create a test in-memory SQLite database
-test_db = SqliteDatabase(":memory:")
+# Create a test in-memory SQLite database. Every thread shares its one connection,
+# so queries run on the aio db workers see the same tables as the test
+test_db = SqliteDatabase(":memory:", thread_safe=False, check_same_thread=False)
 
 # Mock config before importing any db modules
 mock_config = MagicMock()
@@ -44,6 +45,10 @@ mock_postgres.PostgresqlExtDatabase = lambda *args, **kwargs: test_db
 mock_postgres.BinaryJSONField = MagicMock()
 sys.modules["playhouse.postgres_ext"] = mock_postgres
 
+mock_pool = MagicMock()
+mock_pool.PooledPostgresqlExtDatabase = lambda *args, **kwargs: test_db
+sys.modules["playhouse.pool"] = mock_pool
+
 # Mock spacy and related imports to avoid dependency issues
 sys.modules["en_core_web_sm"] = MagicMock()
 sys.modules["spacy"] = MagicMock()
@@ -70,3 +75,68 @@ def patched_open(file, *args, **kwargs):
 
 
 builtins.open = patched_open
+
+# Tables are no longer created when src.db is imported - create them once on the
+# main thread's connection and keep it open for the whole run
+import src.db  # noqa: E402
+
+test_db.connect()
+test_db.create_tables(src.db.MODELS)
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def fake_ledger(monkeypatch):
+    """rokda_dao applied to the in-memory balance only, for handler tests that use mock Bakchods."""
+    from src.db import rokda_dao
+
+    def credit(bakchod, amount, reason, counterparty=None):
+        bakchod.rokda = bakchod.rokda + amount
+        return bakchod.rokda
+
+    def debit(bakchod, amount, reason, counterparty=None):
+        if bakchod.rokda <= amount:
+            return None
+        bakchod.rokda = bakchod.rokda - amount
+        return bakchod.rokda
+
+    def debit_upto(bakchod, amount, reason, counterparty=None):
+        taken = min(bakchod.rokda, amount)
+        bakchod.rokda = bakchod.rokda - taken
+        if counterparty is not None:
+            counterparty.rokda = counterparty.rokda + taken
+        return bakchod.rokda
+
+    def reward(bakchod, amount, reason="reward"):
+        return credit(bakchod, amount, reason)
+
+    def set_balance(bakchod, balance, reason):
+        bakchod.rokda = balance
+        return balance
+
+    def debit_all_but(bakchod, keep, reason, counterparty=None):
+        taken = max(bakchod.rokda - keep, 0)
+        bakchod.rokda = bakchod.rokda - taken
+        if counterparty is not None:
+            counterparty.rokda = counterparty.rokda + taken
+        return taken
+
+    def transfer(sender, receiver, amount, reason):
+        if sender.rokda < amount:
+            return None
+        sender.rokda = sender.rokda - amount
+        receiver.rokda = receiver.rokda + amount
+        return sender.rokda, receiver.rokda
+
+    for name, fake in [
+        ("credit", credit),
+        ("debit", debit),
+        ("debit_upto", debit_upto),
+        ("set_balance", set_balance),
+        ("debit_all_but", debit_all_but),
+        ("reward", reward),
+        ("transfer", transfer),
+    ]:
+        monkeypatch.setattr(rokda_dao, name, fake)
@@ -0,0 +1,17 @@
+"""
+Initializers for render workers started by tests.
+
+Workers are started from a forkserver, so they don't inherit the config and
+database conftest mocks. Importing this module sets those up first.
+"""
+
+from PIL import Image
+
+from tests import conftest  # noqa: F401
+
+
+def cache_modi_images():
+    from src.bot.handlers.tynm_assets import assets
+
+    for name in ("a.png", "b.png"):
+        assets.put(("tynm_image", name), Image.new("RGBA", (200, 300), (200, 120, 40, 255)))
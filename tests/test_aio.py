@@ -0,0 +1,98 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from peewee import OperationalError
+
+import src.db
+from src.db import aio, connection_scope
+
+
+class TestRun:
+    @pytest.mark.asyncio
+    async def test_run_returns_result_from_worker_thread(self):
+        """Blocking functions run off the event loop thread."""
+        caller = threading.current_thread().name
+
+        result = await aio.run(lambda a, b=0: (a + b, threading.current_thread().name), 1, b=2)
+
+        assert result[0] == 3
+        assert result[1] != caller
+        assert result[1].startswith("chaddi-db")
+
+    @pytest.mark.asyncio
+    async def test_run_resets_connection_on_db_error(self):
+        """A worker whose query hit a connection error closes its connection."""
+
+        def broken():
+            raise OperationalError("server closed the connection unexpectedly")
+
+        with patch("src.db.reset_connection") as mock_reset:
+            with pytest.raises(OperationalError):
+                await aio.run(broken)
+
+            mock_reset.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_run_leaves_connection_on_other_errors(self):
+        def broken():
+            raise ValueError("bad input")
+
+        with patch("src.db.reset_connection") as mock_reset:
+            with pytest.raises(ValueError):
+                await aio.run(broken)
+
+            mock_reset.assert_not_called()
+
+
+class TestConnectionScope:
+    def test_checks_out_and_returns_connection(self):
+        """A thread without a connection gets one for the block only."""
+        with patch.object(src.db, "db") as mock_db:
+            mock_db.is_closed.return_value = True
+
+            with connection_scope():
+                mock_db.connect.assert_called_once()
+                mock_db.close.assert_not_called()
+
+            mock_db.close.assert_called_once()
+
+    def test_leaves_existing_connection_open(self):
+        """A connection the thread already holds is not closed by the scope."""
+        with patch.object(src.db, "db") as mock_db:
+            mock_db.is_closed.return_value = False
+
+            with connection_scope():
+                pass
+
+            mock_db.connect.assert_not_called()
+            mock_db.close.assert_not_called()
+
+    def test_returns_connection_on_error(self):
+        with patch.object(src.db, "db") as mock_db:
+            mock_db.is_closed.return_value = True
+
+            with pytest.raises(OperationalError), connection_scope():
+                raise OperationalError("terminating connection")
+
+            mock_db.close.assert_called_once()
+
+    def test_resets_existing_connection_on_db_error(self):
+        """A connection the thread already holds is dropped if the block loses it."""
+        with patch.object(src.db, "db") as mock_db, patch("src.db.reset_connection") as mock_reset:
+            mock_db.is_closed.return_value = False
+
+            with pytest.raises(OperationalError), connection_scope():
+                raise OperationalError("server closed the connection unexpectedly")
+
+            mock_reset.assert_called_once()
+            mock_db.close.assert_not_called()
+
+    def test_leaves_existing_connection_on_other_errors(self):
+        with patch.object(src.db, "db") as mock_db, patch("src.db.reset_connection") as mock_reset:
+            mock_db.is_closed.return_value = False
+
+            with pytest.raises(ValueError), connection_scope():
+                raise ValueError("bad input")
+
+            mock_reset.assert_not_called()
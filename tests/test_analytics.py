@@ -0,0 +1,163 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from posthog.request import APIError
+
+from src.domain import analytics
+
+
+@pytest.fixture(autouse=True)
+def reset_analytics(tmp_path):
+    analytics._events.clear()
+    analytics._counts.clear()
+    analytics._dropped = 0
+    with patch.object(analytics, "SPILL_FILE", tmp_path / "spill.jsonl"):
+        yield
+    analytics._events.clear()
+    analytics._counts.clear()
+    analytics._flusher_task = None
+
+
+@pytest.fixture
+def running():
+    """Pretend the flusher is running without scheduling a real task."""
+    task = MagicMock()
+    task.done.return_value = False
+    analytics._flusher_task = task
+    return task
+
+
+class TestSampleRates:
+    def test_parse_sample_rates(self):
+        assert analytics.parse_sample_rates("message_synced=0.01, command_used=1") == {
+            "message_synced": 0.01,
+            "command_used": 1.0,
+        }
+        assert analytics.parse_sample_rates("") == {}
+
+
+class TestCapture:
+    def test_queues_without_sending(self, running):
+        with patch.object(analytics, "posthog") as mock_posthog:
+            analytics.capture("command_used", "123", {"command_name": "hi"})
+
+        mock_posthog.capture.assert_not_called()
+        [event] = analytics._events
+        assert (event["event"], event["distinct_id"]) == ("command_used", "123")
+        assert event["properties"] == {"command_name": "hi"}
+
+    def test_sampling_only_applies_to_listed_events(self, running):
+        with (
+            patch.dict(analytics.SAMPLE_RATES, {"message_synced": 0.01}),
+            patch("src.domain.analytics.random.random", return_value=0.5),
+        ):
+            analytics.capture("message_synced", "123", {})
+            analytics.capture("command_used", "123", {})
+
+        assert [e["event"] for e in analytics._events] == ["command_used"]
+
+    def test_sampled_events_carry_their_rate(self, running):
+        with (
+            patch.dict(analytics.SAMPLE_RATES, {"message_synced": 0.01}),
+            patch("src.domain.analytics.random.random", return_value=0.001),
+        ):
+            analytics.capture("message_synced", "123", {})
+
+        assert analytics._events[0]["properties"] == {"sample_rate": 0.01}
+
+    def test_full_queue_drops_oldest(self, running):
+        with patch.object(analytics, "_events", analytics.collections.deque(maxlen=2)):
+            for i in range(3):
+                analytics.capture("command_used", str(i), {})
+
+            assert [e["distinct_id"] for e in analytics._events] == ["1", "2"]
+        assert analytics._dropped == 1
+
+    def test_sends_directly_when_not_running(self):
+        with patch.object(analytics, "posthog") as mock_posthog:
+            analytics.capture("command_used", "123", {"command_name": "hi"})
+
+        mock_posthog.capture.assert_called_once_with(
+            "command_used", distinct_id="123", properties={"command_name": "hi"}
+        )
+
+
+class TestFlush:
+    @pytest.mark.asyncio
+    async def test_counts_are_sent_as_totals(self, running):
+        for _ in range(3):
+            analytics.count("dc.message.synced", attributes={"chat_type": "group"})
+
+        with (
+            patch.object(analytics, "metrics") as mock_metrics,
+            patch.object(analytics, "export") as mock_export,
+        ):
+            await analytics.flush()
+
+        mock_metrics.count.assert_called_once_with(
+            "dc.message.synced", 3, attributes={"chat_type": "group"}
+        )
+        mock_export.assert_not_called()
+
+    def test_export_sends_in_batches(self):
+        events = [{"event": str(i)} for i in range(5)]
+
+        with (
+            patch.object(analytics, "BATCH_SIZE", 2),
+            patch("src.domain.analytics.batch_post") as mock_post,
+        ):
+            assert analytics.export(events) == 5
+
+        assert [len(c.kwargs["batch"]) for c in mock_post.call_args_list] == [2, 2, 1]
+
+    def test_unsent_events_are_spilled_and_retried(self):
+        events = [{"event": str(i)} for i in range(3)]
+
+        with patch("src.domain.analytics.batch_post", side_effect=OSError("unreachable")):
+            assert analytics.export(events) == 0
+
+        with analytics.SPILL_FILE.open() as f:
+            assert [json.loads(line) for line in f] == events
+
+        with patch("src.domain.analytics.batch_post") as mock_post:
+            assert analytics.export([{"event": "new"}]) == 4
+
+        assert [e["event"] for e in mock_post.call_args.kwargs["batch"]] == ["0", "1", "2", "new"]
+        assert not analytics.SPILL_FILE.exists()
+
+    def test_rejected_events_are_dropped_not_spilled(self):
+        events = [{"event": str(i)} for i in range(4)]
+
+        def post(*args, batch, **kwargs):
+            if {"event": "2"} in batch:
+                raise APIError(400, "invalid event")
+
+        with patch("src.domain.analytics.batch_post", side_effect=post) as mock_post:
+            assert analytics.export(events) == 3
+
+        # [0, 1, 2, 3] -> [0, 1] + [2, 3] -> [2] + [3]
+        assert [len(c.kwargs["batch"]) for c in mock_post.call_args_list] == [4, 2, 2, 1, 1]
+        assert not analytics.SPILL_FILE.exists()
+
+    def test_unauthorized_batch_is_dropped_whole(self):
+        with patch(
+            "src.domain.analytics.batch_post", side_effect=APIError(401, "bad key")
+        ) as mock_post:
+            assert analytics.export([{"event": "0"}, {"event": "1"}]) == 0
+
+        mock_post.assert_called_once()
+        assert not analytics.SPILL_FILE.exists()
+
+    @pytest.mark.parametrize("status", [429, 500, 503])
+    def test_retryable_status_is_spilled(self, status):
+        events = [{"event": str(i)} for i in range(3)]
+
+        with (
+            patch.object(analytics, "BATCH_SIZE", 2),
+            patch("src.domain.analytics.batch_post", side_effect=[None, APIError(status, "")]),
+        ):
+            assert analytics.export(events) == 2
+
+        with analytics.SPILL_FILE.open() as f:
+            assert [json.loads(line) for line in f] == [{"event": "2"}]
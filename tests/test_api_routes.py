@@ -0,0 +1,59 @@
+import datetime
+from unittest.mock import patch
+
+import pytest
+
+import src.bot  # noqa: F401 - the routes can only be imported once the bot is
+from src.db import Bakchod, Group, Quote
+from src.server.routes import api_routes
+
+
+@pytest.fixture
+def quote():
+    now = datetime.datetime.now()
+    author = Bakchod.create(tg_id="api-author", username="author")
+    capturer = Bakchod.create(tg_id="api-capturer", username="capturer")
+    group = Group.create(group_id="api-group", name="Chaddi", created=now, updated=now)
+    q = Quote.create(
+        quote_id="api-quote",
+        message_id="1",
+        created=now,
+        author_bakchod=author,
+        quote_capture_bakchod=capturer,
+        quoted_in_group=group,
+        text="hi",
+        update={},
+    )
+
+    yield q
+
+    Quote.delete().where(Quote.quote_id == q.quote_id).execute()
+    Group.delete().where(Group.group_id == group.group_id).execute()
+    Bakchod.delete().where(Bakchod.tg_id.in_([author.tg_id, capturer.tg_id])).execute()
+
+
+class TestQuotes:
+    def test_quotes_are_read_with_one_query(self, quote):
+        with patch.object(Bakchod, "get", side_effect=AssertionError("lazy load")):
+            response = api_routes._compute_quotes(1, 50)
+
+        assert response["total_quotes"] == 1
+        [q] = response["groups"]
+        assert q["quote_id"] == "api-quote"
+        assert q["author_bakchod"] == "@author"
+        assert q["quote_capture_bakchod"] == "@capturer"
+        assert q["quoted_in_group"] == "Chaddi"
+
+    @pytest.mark.asyncio
+    async def test_quote_details_run_off_the_loop(self, quote):
+        with patch("src.server.routes.api_routes.aio.run", wraps=api_routes.aio.run) as mock_run:
+            response = await api_routes.get_api_quote_details(None, "api-quote")
+
+        mock_run.assert_called_once_with(api_routes._compute_quote_details, "api-quote")
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_missing_quote_is_a_404(self):
+        response = await api_routes.get_api_quote_details(None, "missing")
+
+        assert response.status_code == 404
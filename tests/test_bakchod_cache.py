@@ -0,0 +1,227 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.db import Bakchod, BaseModel, RokdaTransaction, bakchod_cache, bakchod_dao
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    bakchod_cache.clear()
+    bakchod_cache._flusher_task = None
+    yield
+    bakchod_cache.clear()
+    bakchod_cache._flusher_task = None
+
+
+@pytest.fixture
+def running_cache():
+    """Pretend the flusher is running without scheduling a real task."""
+    task = MagicMock()
+    task.done.return_value = False
+    bakchod_cache._flusher_task = task
+    return task
+
+
+def make_bakchod(tg_id="123", rokda=100.0):
+    b = Bakchod(tg_id=tg_id, username="testuser", rokda=rokda)
+    b._dirty.clear()
+    return b
+
+
+class TestBakchodCache:
+    def test_put_returns_existing_instance(self):
+        """The first instance mapped for a tg_id wins."""
+        first = make_bakchod()
+        second = make_bakchod()
+
+        assert bakchod_cache.put(first) is first
+        assert bakchod_cache.put(second) is first
+        assert bakchod_cache.get(123) is first
+
+    def test_collect_dirty_snapshots_and_clears(self):
+        """Only dirty fields are collected, and collecting marks the Bakchod clean."""
+        b = bakchod_cache.put(make_bakchod())
+        b.username = "newname"
+        b.rokda = 150.0
+
+        pending = bakchod_cache.collect_dirty()
+
+        # rokda is only written by rokda_dao
+        assert pending == [("123", {"username": "newname"})]
+        assert not b.is_dirty()
+        assert bakchod_cache.collect_dirty() == []
+
+    def test_collect_dirty_skips_saved_bakchods(self):
+        """A Bakchod that was saved directly has nothing left to flush."""
+        b = bakchod_cache.put(make_bakchod())
+        b.username = "newname"
+        b._dirty.clear()  # what save() does
+
+        assert bakchod_cache.collect_dirty() == []
+
+    def test_eviction_keeps_pending_writes(self):
+        """Evicting a dirty Bakchod queues its changes for the next flush."""
+        with patch.object(bakchod_cache, "_cache", bakchod_cache._IdentityMap(maxsize=1)):
+            b = bakchod_cache.put(make_bakchod("1"))
+            b.username = "evicted"
+
+            bakchod_cache.put(make_bakchod("2"))
+
+            assert bakchod_cache.get("1") is None
+            assert bakchod_cache.collect_dirty() == [("1", {"username": "evicted"})]
+
+    @patch("src.db.bakchod_cache.Bakchod")
+    def test_write_dirty_issues_one_update_per_bakchod(self, mock_bakchod):
+        """Each pending Bakchod is written with a single UPDATE."""
+        bakchod_cache.write_dirty([("1", {"username": "a"}), ("2", {"pretty_name": "b"})])
+
+        assert mock_bakchod.update.call_count == 2
+        mock_bakchod.update.assert_any_call(username="a")
+        mock_bakchod.update.assert_any_call(pretty_name="b")
+
+    @patch("src.db.bakchod_cache.Bakchod")
+    def test_write_dirty_locks_rows_in_tg_id_order(self, mock_bakchod):
+        """Rows are updated once each, in the same order rokda_dao locks them."""
+        bakchod_cache.write_dirty(
+            [("3", {"username": "old"}), ("1", {"username": "a"}), ("3", {"username": "new"})],
+            {"2": 5.0, "3": 1.0},
+        )
+
+        calls = mock_bakchod.update.call_args_list
+        assert [c.kwargs.get("username") for c in calls] == ["a", None, "new"]
+        assert "rokda" in calls[2].kwargs
+
+    @pytest.mark.asyncio
+    async def test_flush_restores_dirty_on_failure(self):
+        """Changes that failed to write are retried on the next flush."""
+        b = bakchod_cache.put(make_bakchod())
+        b.username = "newname"
+
+        with patch("src.db.bakchod_cache.write_dirty", side_effect=Exception("db down")):
+            await bakchod_cache.flush()
+
+        assert b.is_dirty()
+        assert bakchod_cache.collect_dirty() == [("123", {"username": "newname"})]
+
+
+class TestRokdaRewards:
+    def test_add_rokda_shows_reward_without_dirtying(self, running_cache):
+        b = bakchod_cache.put(make_bakchod())
+
+        assert bakchod_cache.add_rokda(b, 5.0)
+        assert bakchod_cache.add_rokda(b, 2.5)
+
+        assert b.rokda == 107.5
+        assert not b.is_dirty()
+        assert bakchod_cache.collect_rokda() == {"123": 7.5}
+
+    def test_add_rokda_needs_mapped_instance(self, running_cache):
+        """Rewards for a Bakchod the map doesn't hold are credited straight away by rokda_dao."""
+        assert not bakchod_cache.add_rokda(make_bakchod(), 5.0)
+        assert bakchod_cache.collect_rokda() == {}
+
+    def test_sync_rokda_keeps_uncredited_rewards(self, running_cache):
+        b = bakchod_cache.put(make_bakchod())
+        bakchod_cache.add_rokda(b, 5.0)
+
+        bakchod_cache.sync_rokda(b, 40.0)
+
+        assert b.rokda == 45.0
+
+    def test_write_dirty_credits_rewards(self):
+        """Rewards are added to the stored balance, not written over it, and logged."""
+        Bakchod.create(tg_id="reward-1", username="rewarded", rokda=100.0)
+        # A debit that lands after the reward was counted isn't lost
+        Bakchod.update(rokda=Bakchod.rokda - 50).where(Bakchod.tg_id == "reward-1").execute()
+
+        balances = bakchod_cache.write_dirty([], {"reward-1": 5.0})
+
+        assert balances == {"reward-1": 55.0}
+        assert Bakchod.get_by_id("reward-1").rokda == 55.0
+        entry = RokdaTransaction.get(RokdaTransaction.bakchod == "reward-1")
+        assert (entry.amount, entry.balance, entry.reason) == (5.0, 55.0, "reward")
+
+        RokdaTransaction.delete().where(RokdaTransaction.bakchod == "reward-1").execute()
+        Bakchod.delete_by_id("reward-1")
+
+    @pytest.mark.asyncio
+    async def test_flush_shows_credited_balance(self, running_cache):
+        b = bakchod_cache.put(make_bakchod())
+        bakchod_cache.add_rokda(b, 5.0)
+
+        with patch("src.db.bakchod_cache.write_dirty", return_value={"123": 55.0}) as write:
+            await bakchod_cache.flush()
+
+        write.assert_called_once_with([], {"123": 5.0})
+        assert b.rokda == 55.0
+
+    @pytest.mark.asyncio
+    async def test_flush_restores_rewards_on_failure(self, running_cache):
+        b = bakchod_cache.put(make_bakchod())
+        bakchod_cache.add_rokda(b, 5.0)
+
+        with patch("src.db.bakchod_cache.write_dirty", side_effect=Exception("db down")):
+            await bakchod_cache.flush()
+
+        assert bakchod_cache.collect_rokda() == {"123": 5.0}
+
+
+class TestBakchodDaoWithCache:
+    @patch("src.db.bakchod_dao.Bakchod")
+    def test_lookups_share_one_instance(self, mock_bakchod, running_cache):
+        """Repeated lookups for the same tg_id only hit the db once."""
+        mock_bakchod.get.return_value = make_bakchod()
+
+        user = MagicMock()
+        user.id = 123
+        user.username = "testuser"
+
+        first = bakchod_dao.get_or_create_bakchod_from_tg_user(user)
+        second = bakchod_dao.get_or_create_bakchod_from_tg_user(user)
+        third = bakchod_dao.get_bakchod_by_id(123)
+
+        assert first is second is third
+        mock_bakchod.get.assert_called_once()
+        mock_bakchod.get_by_id.assert_not_called()
+
+    def test_save_deferred_skips_save_when_cached(self, running_cache):
+        """Cached Bakchods are left dirty for the flusher instead of saved."""
+        b = MagicMock()
+        b.tg_id = "123"
+        bakchod_cache.put(b)
+
+        bakchod_dao.save_deferred(b)
+
+        b.save.assert_not_called()
+
+    def test_save_deferred_saves_when_not_running(self):
+        """Without the flusher, save_deferred saves immediately."""
+        b = MagicMock()
+        b.tg_id = "123"
+
+        bakchod_dao.save_deferred(b)
+
+        b.save.assert_called_once()
+
+    @patch.object(BaseModel, "save", return_value=1)
+    @patch("src.db.bakchod_dao.Bakchod")
+    def test_saving_another_instance_updates_the_mapped_one(
+        self, mock_bakchod, mock_save, running_cache
+    ):
+        """A copy loaded through a foreign key and saved doesn't leave the map stale."""
+        mock_bakchod.get_by_id.return_value = make_bakchod()
+        mapped = bakchod_dao.get_bakchod_by_id(123)
+        mapped.lastseen = "pending"
+
+        victim = make_bakchod(rokda=50.0)
+        victim.pretty_name = "Victim"
+        victim.lastseen = "stale"
+        victim.save()
+
+        mock_save.assert_called_once()
+        assert bakchod_dao.get_bakchod_by_id(123) is mapped
+        assert mapped.pretty_name == "Victim"
+        # Pending deferred writes and the balance aren't overwritten
+        assert mapped.lastseen == "pending"
+        assert mapped.rokda == 100.0
@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock
+
+import pytest
+from telegram import Message, MessageEntity
+
+from src.bot.handlers import classifier
+
+WORDLE = "Wordle 1,234 3/6\n\n⬛🟨⬛⬛⬛\n🟩🟩⬛🟩⬛\n🟩🟩🟩🟩🟩"
+
+
+def make_message(text=None, entities=(), caption_entities=()):
+    message = MagicMock(spec=Message)
+    message.text = text
+    message.entities = entities
+    message.caption_entities = caption_entities
+    return message
+
+
+@pytest.mark.parametrize(
+    ("text", "tags"),
+    [
+        ("just chatting", set()),
+        (None, set()),
+        ("Hi", {classifier.HI}),
+        ("hi bestie", {classifier.BESTIE}),
+        (WORDLE, {classifier.WORDLE}),
+        ("Wordle is dumb", set()),
+        ("listen https://open.spotify.com/track/abc", {classifier.MUSIC_URL}),
+        ("HTTPS://X.com/user/status/1", {classifier.X_URL}),
+        ("https://www.instagram.com/reel/abc_12/", {classifier.INSTAGRAM_URL}),
+        (
+            "https://youtu.be/abc and https://x.com/user",
+            {classifier.MUSIC_URL, classifier.X_URL},
+        ),
+        ("https://example.com/x.com", set()),
+    ],
+)
+def test_classify_text(text, tags):
+    assert classifier.classify(make_message(text)) == tags
+
+
+def test_classify_mentions():
+    mention = MessageEntity(type=MessageEntity.MENTION, offset=0, length=10)
+    bold = MessageEntity(type=MessageEntity.BOLD, offset=0, length=4)
+
+    assert classifier.classify(make_message("@chaddibot hi", [mention])) == {classifier.MENTION}
+    assert classifier.classify(make_message(None, caption_entities=[mention])) == {
+        classifier.MENTION
+    }
+    assert classifier.classify(make_message("bold", [bold])) == set()
@@ -70,6 +70,7 @@ def mock_update_with_reply():
     return update
 
 
+@pytest.mark.usefixtures("fake_ledger")
 class TestDaan:
     @patch("src.bot.handlers.daan.dc")
     @pytest.mark.anyio
@@ -106,8 +107,8 @@ class TestDaan:
 
         mock_dc.log_command_usage.assert_called_once_with("daan", mock_update_with_reply)
         assert mock_get_bakchod.call_count == 2
-        sender.save.assert_called_once()
-        receiver.save.assert_called_once()
+        assert sender.rokda == 400
+        assert receiver.rokda == 300
 
     @patch("src.bot.handlers.daan.dc")
     @patch("src.bot.handlers.daan.bakchod_dao.get_or_create_bakchod_from_tg_user")
@@ -135,8 +136,8 @@ class TestDaan:
         mock_dc.log_command_usage.assert_called_once_with("daan", mock_update)
         mock_get_or_create.assert_called_once()
         mock_get_by_username.assert_called_once_with("otheruser")
-        sender.save.assert_called_once()
-        receiver.save.assert_called_once()
+        assert sender.rokda == 400
+        assert receiver.rokda == 300
 
     @patch("src.bot.handlers.daan.dc")
     @patch("src.bot.handlers.daan.bakchod_dao.get_or_create_bakchod_from_tg_user")
@@ -253,7 +254,6 @@ class TestDaan:
 
             await daan.handle(mock_update, MagicMock())
 
-            sender.save.assert_called_once()
             assert sender.rokda == 0
 
     @patch("src.bot.handlers.daan.dc")
@@ -278,7 +278,6 @@ class TestDaan:
 
             await daan.handle(mock_update, MagicMock())
 
-            sender.save.assert_called_once()
             assert sender.rokda == 0
 
     @patch("src.bot.handlers.daan.dc")
@@ -313,8 +312,6 @@ class TestDaan:
                 # Verify rokda was updated
                 assert sender.rokda == 400
                 assert receiver.rokda == 300
-                sender.save.assert_called_once()
-                receiver.save.assert_called_once()
                 mock_update.message.reply_text.assert_called_once()
                 call_args = mock_update.message.reply_text.call_args
                 if call_args[0]:
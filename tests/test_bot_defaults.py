@@ -1,8 +1,8 @@
+import asyncio
 from contextlib import suppress
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from peewee import DoesNotExist
 from telegram import Chat, Message, Update, User
 from telegram.ext import ContextTypes
 
@@ -72,11 +72,15 @@ async def test_all_syncs_persistence_data(mock_update, mock_context):
         mock_antiwordle.handle = AsyncMock()
         mock_musiclinks.handle = AsyncMock()
         mock_x_links.handle = AsyncMock()
+        mock_update.message.text = "https://x.com/user/status/1"
 
         await defaults.all(mock_update, mock_context)
 
         mock_dc.sync_persistence_data.assert_called_once_with(mock_update)
+        # Only the handlers the classifier tagged are dispatched
         mock_x_links.handle.assert_awaited_once_with(mock_update, mock_context)
+        mock_musiclinks.handle.assert_not_awaited()
+        mock_antiwordle.handle.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -92,7 +96,7 @@ async def test_all_without_from_user(mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-async def test_all_rewards_rokda(mock_update, mock_context):
+async def test_all_rewards_rokda(mock_update, mock_context, fake_ledger):
     """Test that all handler rewards rokda to user."""
     with (
         patch("src.bot.handlers.defaults.dc"),
@@ -116,7 +120,8 @@ async def test_all_rewards_rokda(mock_update, mock_context):
 
         await defaults.all(mock_update, mock_context)
 
-        assert mock_bakchod.save.called
+        assert mock_bakchod.rokda > 100
+        mock_bakchod_dao.save_deferred.assert_called_once_with(mock_bakchod)
 
 
 @pytest.mark.asyncio
@@ -438,7 +443,6 @@ async def test_status_update_new_chat_member(mock_update, mock_context):
     with (
         patch("src.bot.handlers.defaults.group_dao") as mock_group_dao,
         patch("src.bot.handlers.defaults.bakchod_dao") as mock_bakchod_dao,
-        patch("src.bot.handlers.defaults.GroupMember") as mock_group_member,
     ):
         mock_group = MagicMock()
         mock_group.group_id = -1001234567890
@@ -454,11 +458,13 @@ async def test_status_update_new_chat_member(mock_update, mock_context):
         mock_bakchod.tg_id = 789012
         mock_bakchod_dao.get_or_create_bakchod_from_tg_user.return_value = mock_bakchod
 
-        mock_group_member.get.side_effect = DoesNotExist()
+        mock_group_dao.add_bakchod_to_group.return_value = True
 
         await defaults.status_update(mock_update, mock_context)
 
-        mock_group_member.create.assert_called_once()
+        mock_group_dao.add_bakchod_to_group.assert_called_once_with(
+            mock_bakchod, mock_group.group_id
+        )
 
 
 @pytest.mark.asyncio
@@ -467,7 +473,6 @@ async def test_status_update_left_chat_member(mock_update, mock_context):
     with (
         patch("src.bot.handlers.defaults.group_dao") as mock_group_dao,
         patch("src.bot.handlers.defaults.bakchod_dao") as mock_bakchod_dao,
-        patch("src.bot.handlers.defaults.GroupMember") as mock_group_member,
     ):
         mock_group = MagicMock()
         mock_group.group_id = -1001234567890
@@ -483,10 +488,74 @@ async def test_status_update_left_chat_member(mock_update, mock_context):
         mock_bakchod.tg_id = 789012
         mock_bakchod_dao.get_or_create_bakchod_from_tg_user.return_value = mock_bakchod
 
-        mock_delete_query = MagicMock()
-        mock_group_member.delete.return_value = mock_delete_query
-        mock_delete_query.where.return_value.execute.return_value = None
-
         await defaults.status_update(mock_update, mock_context)
 
-        mock_group_member.delete.assert_called_once()
+        mock_group_dao.remove_bakchod_from_group.assert_called_once_with(
+            mock_bakchod, mock_group.group_id
+        )
+
+
+@pytest.mark.asyncio
+async def test_all_runs_passive_handlers_concurrently(mock_update, mock_context):
+    """A slow passive handler doesn't hold up the others."""
+    started = []
+
+    async def slow(update, context):
+        started.append("musiclinks")
+        await asyncio.sleep(0.05)
+        started.append("musiclinks done")
+
+    async def fast(update, context):
+        started.append("x_links")
+
+    with (
+        patch("src.bot.handlers.defaults.dc"),
+        patch("src.bot.handlers.defaults.bakchod_dao") as mock_bakchod_dao,
+        patch("src.bot.handlers.defaults.rokda_dao"),
+        patch("src.bot.handlers.defaults.musiclinks.handle", side_effect=slow),
+        patch("src.bot.handlers.defaults.x_links.handle", side_effect=fast),
+        patch("src.bot.handlers.defaults.handle_bakchod_metadata_effects"),
+        patch("src.bot.handlers.defaults.handle_dice_rolls"),
+        patch("src.bot.handlers.defaults.metrics") as mock_metrics,
+    ):
+        mock_bakchod_dao.get_or_create_bakchod_from_tg_user.return_value = MagicMock(rokda=100)
+        mock_update.message.text = "https://youtu.be/abc https://x.com/user"
+
+        await defaults.all(mock_update, mock_context)
+
+    assert started == ["musiclinks", "x_links", "musiclinks done"]
+    observed = {c.args[0]: c.args[2] for c in mock_metrics.observe_passive_handler.call_args_list}
+    assert observed == {"musiclinks": "ok", "x_links": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_run_passive_handler_cancels_after_timeout():
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with (
+        patch.dict(defaults.PASSIVE_HANDLER_TIMEOUTS, {"instagram": 0.01}),
+        patch("src.bot.handlers.defaults.metrics") as mock_metrics,
+    ):
+        await defaults.run_passive_handler("instagram", hang())
+
+    assert cancelled.is_set()
+    name, _, status = mock_metrics.observe_passive_handler.call_args.args
+    assert (name, status) == ("instagram", "timeout")
+
+
+@pytest.mark.asyncio
+async def test_run_passive_handler_contains_errors():
+    async def boom():
+        raise ValueError("boom")
+
+    with patch("src.bot.handlers.defaults.metrics") as mock_metrics:
+        await defaults.run_passive_handler("x_links", boom())
+
+    assert mock_metrics.observe_passive_handler.call_args.args[2] == "error"
@@ -1,6 +1,7 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from peewee import OperationalError
 from telegram import Update
 
 from src.bot.handlers import errors
@@ -55,3 +56,28 @@ class TestErrors:
             call_args = mock_tg_logger.log.call_args[0][0]
             assert "Test error" in call_args
             assert "Traceback" in call_args
+
+    @pytest.mark.anyio
+    async def test_log_error_resets_db_connection(self, mock_update, mock_context):
+        """A db connection error drops the connection so later updates get a fresh one."""
+        mock_context.error = OperationalError("server closed the connection unexpectedly")
+
+        with (
+            patch("src.bot.handlers.errors.tg_logger") as mock_tg_logger,
+            patch("src.bot.handlers.errors.reset_connection") as mock_reset,
+        ):
+            mock_tg_logger.log = AsyncMock()
+            await errors.log_error(mock_update, mock_context)
+
+            mock_reset.assert_called_once()
+
+    @pytest.mark.anyio
+    async def test_log_error_keeps_db_connection_for_other_errors(self, mock_update, mock_context):
+        with (
+            patch("src.bot.handlers.errors.tg_logger") as mock_tg_logger,
+            patch("src.bot.handlers.errors.reset_connection") as mock_reset,
+        ):
+            mock_tg_logger.log = AsyncMock()
+            await errors.log_error(mock_update, mock_context)
+
+            mock_reset.assert_not_called()
@@ -66,6 +66,7 @@ class TestCanBakchodGamble:
         assert "addiction" in response
 
 
+@pytest.mark.usefixtures("fake_ledger")
 class TestGamble:
     @patch("src.bot.handlers.gamble.util.get_random_bakchod_from_group")
     @patch("src.bot.handlers.gamble.random.random")
@@ -200,6 +201,22 @@ class TestGamble:
         assert mock_bakchod.rokda == 500
         assert random_bakchod.rokda == 1000
 
+    @patch("src.bot.handlers.gamble.util.get_random_bakchod_from_group")
+    @patch("src.bot.handlers.gamble.random.random")
+    def test_gamble_mugger_only_gets_what_was_taken(
+        self, mock_random, mock_get_bakchod, mock_bakchod, mock_update
+    ):
+        mock_random.return_value = 0.20
+        mock_bakchod.rokda = 300
+        random_bakchod = MagicMock()
+        random_bakchod.rokda = 500
+        mock_get_bakchod.return_value = random_bakchod
+
+        gamble.gamble(mock_bakchod, mock_update)
+
+        assert mock_bakchod.rokda == 0
+        assert random_bakchod.rokda == 800
+
     @patch("src.bot.handlers.gamble.util.get_random_bakchod_from_group")
     @patch("src.bot.handlers.gamble.random.random")
     def test_gamble_lose_1000_raid(self, mock_random, mock_get_bakchod, mock_bakchod, mock_update):
@@ -226,7 +243,8 @@ class TestGamble:
         assert result is not None
         assert "fortune" in result
         assert mock_bakchod.rokda == 1
-        assert random_bakchod.rokda == 1000
+        # Gets what the gambler lost
+        assert random_bakchod.rokda == 999
 
     @patch("src.bot.handlers.gamble.util.get_random_bakchod_from_group")
     @patch("src.bot.handlers.gamble.random.random")
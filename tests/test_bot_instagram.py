@@ -1,3 +1,4 @@
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -5,6 +6,32 @@ from telegram import Message, Update
 from telegram.ext import ContextTypes
 
 from src.bot.handlers import instagram
+from src.db.lookup_cache import LookupCache
+
+
+@pytest.fixture(autouse=True)
+def resolver_state():
+    """Fresh strategy stats and media cache per test, with no db tier."""
+    cache = LookupCache(
+        "instagram",
+        ttl=instagram.resolved_cache.ttl,
+        negative_ttl=instagram.resolved_cache.negative_ttl,
+    )
+    stats = {name: instagram.StrategyStats() for name in instagram.STRATEGIES}
+    with (
+        patch.object(instagram, "resolved_cache", cache),
+        patch.object(instagram, "_stats", stats),
+        patch("src.db.lookup_cache.aio.run", side_effect=Exception("no db")),
+    ):
+        yield stats
+
+
+def strategies(**results):
+    """Replace STRATEGIES with AsyncMocks returning the given (media_url, caption)."""
+    return patch.dict(
+        instagram.STRATEGIES,
+        {name: AsyncMock(return_value=result) for name, result in results.items()},
+    )
 
 
 @pytest.fixture
@@ -53,7 +80,7 @@ async def test_handle_reel_url(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -71,9 +98,7 @@ async def test_handle_reel_url(mock_update, mock_context):
             mock_response.raise_for_status = MagicMock()
             mock_response.content = b"fake video content"
 
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.return_value = mock_response
 
             with patch("src.bot.handlers.instagram.Path.unlink"):
                 await instagram.handle(mock_update, mock_context)
@@ -88,7 +113,7 @@ async def test_handle_post_url(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -106,9 +131,7 @@ async def test_handle_post_url(mock_update, mock_context):
             mock_response.raise_for_status = MagicMock()
             mock_response.content = b"fake image content"
 
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.return_value = mock_response
 
             with patch("src.bot.handlers.instagram.Path.unlink"):
                 await instagram.handle(mock_update, mock_context)
@@ -148,7 +171,7 @@ async def test_handle_exception(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -156,9 +179,7 @@ async def test_handle_exception(mock_update, mock_context):
         from instaloader import Post
 
         with patch.object(Post, "from_shortcode", side_effect=Exception("Network error")):
-            mock_client = AsyncMock()
-            mock_client.get.side_effect = Exception("API error")
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.side_effect = Exception("API error")
 
             await instagram.handle(mock_update, mock_context)
 
@@ -175,7 +196,7 @@ async def test_handle_caption_truncation(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -193,9 +214,7 @@ async def test_handle_caption_truncation(mock_update, mock_context):
             mock_response.raise_for_status = MagicMock()
             mock_response.content = b"fake image content"
 
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.return_value = mock_response
 
             with patch("src.bot.handlers.instagram.Path.unlink"):
                 await instagram.handle(mock_update, mock_context)
@@ -212,7 +231,7 @@ async def test_handle_no_caption(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -230,9 +249,7 @@ async def test_handle_no_caption(mock_update, mock_context):
             mock_response.raise_for_status = MagicMock()
             mock_response.content = b"fake image content"
 
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.return_value = mock_response
 
             with patch("src.bot.handlers.instagram.Path.unlink"):
                 await instagram.handle(mock_update, mock_context)
@@ -249,7 +266,7 @@ async def test_handle_short_url(mock_update, mock_context):
 
     with (
         patch("src.bot.handlers.instagram.instaloader.Instaloader") as mock_instaloader_class,
-        patch("src.bot.handlers.instagram.httpx.AsyncClient") as mock_async_client_class,
+        patch("src.bot.handlers.instagram.http_client.get", new_callable=AsyncMock) as mock_get,
     ):
         mock_loader = MagicMock()
         mock_instaloader_class.return_value = mock_loader
@@ -267,11 +284,69 @@ async def test_handle_short_url(mock_update, mock_context):
             mock_response.raise_for_status = MagicMock()
             mock_response.content = b"fake image content"
 
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_async_client_class.return_value.__aenter__.return_value = mock_client
+            mock_get.return_value = mock_response
 
             with patch("src.bot.handlers.instagram.Path.unlink"):
                 await instagram.handle(mock_update, mock_context)
 
     mock_from_shortcode.assert_called_once_with(mock_loader.context, "ABC123")
+
+
+class TestResolveMedia:
+    @pytest.mark.asyncio
+    async def test_falls_back_to_the_next_strategy(self, resolver_state):
+        with strategies(instaloader=(None, None), page=("https://cdn/x.mp4", "hi")):
+            assert await instagram.resolve_media("abc") == ("https://cdn/x.mp4", "hi")
+
+        assert resolver_state["instaloader"].success_rate < 1.0
+        assert resolver_state["page"].success_rate == 1.0
+
+    @pytest.mark.asyncio
+    async def test_caches_resolved_media(self):
+        with strategies(instaloader=("https://cdn/x.jpg", None), page=(None, None)):
+            await instagram.resolve_media("abc")
+            await instagram.resolve_media("abc")
+
+            instagram.STRATEGIES["instaloader"].assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_caches_failures_briefly(self):
+        with strategies(instaloader=(None, None), page=(None, None)):
+            assert await instagram.resolve_media("abc") == (None, None)
+            assert await instagram.resolve_media("abc") == (None, None)
+
+            instagram.STRATEGIES["page"].assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_skips_a_strategy_that_keeps_failing(self, resolver_state):
+        for _ in range(10):
+            resolver_state["instaloader"].record(False, 1.0)
+
+        assert instagram.choose_strategies() == ["page"]
+
+        with strategies(instaloader=("https://cdn/x.jpg", None), page=("https://cdn/y.jpg", None)):
+            assert await instagram.resolve_media("abc") == ("https://cdn/y.jpg", None)
+
+            instagram.STRATEGIES["instaloader"].assert_not_awaited()
+
+    def test_failing_strategy_is_probed_after_the_interval(self, resolver_state):
+        resolver_state["instaloader"].success_rate = 0.0
+        resolver_state["instaloader"].last_attempt = time.monotonic()
+
+        assert instagram.choose_strategies() == ["page"]
+
+        resolver_state["instaloader"].last_attempt -= instagram.STRATEGY_PROBE_INTERVAL_SECONDS
+        assert "instaloader" in instagram.choose_strategies()
+
+    def test_prefers_the_cheaper_strategy(self, resolver_state):
+        resolver_state["instaloader"].record(True, 5.0)
+        resolver_state["page"].record(True, 0.5)
+
+        assert instagram.choose_strategies() == ["page", "instaloader"]
+
+    def test_tries_everything_when_all_strategies_fail(self, resolver_state):
+        for stats in resolver_state.values():
+            stats.success_rate = 0.0
+            stats.last_attempt = time.monotonic()
+
+        assert sorted(instagram.choose_strategies()) == ["instaloader", "page"]
@@ -0,0 +1,131 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram.error import BadRequest
+
+from src.bot.handlers import media_cache, webm, ytdl
+from src.db.lookup_cache import LookupCache
+
+
+@pytest.fixture(autouse=True)
+def file_ids():
+    """A fresh in-memory cache per test."""
+    cache = LookupCache("tg_media", ttl=datetime.timedelta(days=1))
+    with (
+        patch.object(media_cache, "file_ids", cache),
+        patch("src.db.lookup_cache.aio.run", side_effect=Exception("no db")),
+    ):
+        yield cache
+
+
+def sent_message(kind, file_id="file-1", caption="a caption"):
+    message = MagicMock()
+    for other in media_cache.KINDS:
+        setattr(message, other, None)
+
+    media = MagicMock(file_id=file_id)
+    setattr(message, kind, [MagicMock(file_id="small"), media] if kind == "photo" else media)
+    message.caption = caption
+    return message
+
+
+class TestMediaOf:
+    @pytest.mark.parametrize("kind", media_cache.KINDS)
+    def test_finds_each_kind(self, kind):
+        assert media_cache.media_of(sent_message(kind)) == (kind, "file-1")
+
+    def test_largest_photo_size(self):
+        assert media_cache.media_of(sent_message("photo", "big")) == ("photo", "big")
+
+    def test_no_media(self):
+        message = MagicMock()
+        for kind in media_cache.KINDS:
+            setattr(message, kind, None)
+
+        assert media_cache.media_of(message) is None
+
+
+class TestReplyCached:
+    @pytest.mark.asyncio
+    async def test_miss(self):
+        message = MagicMock()
+
+        assert await media_cache.reply_cached("k", message) is False
+
+    @pytest.mark.asyncio
+    async def test_replies_with_remembered_file_id_and_caption(self):
+        await media_cache.remember("k", sent_message("video", "vid-1", "first"))
+        message = MagicMock(reply_video=AsyncMock())
+
+        assert await media_cache.reply_cached("k", message) is True
+
+        message.reply_video.assert_awaited_once_with("vid-1", caption="first")
+
+    @pytest.mark.asyncio
+    async def test_caption_can_be_overridden(self):
+        await media_cache.remember("k", sent_message("photo", "pic-1"))
+        message = MagicMock(reply_photo=AsyncMock())
+
+        await media_cache.reply_cached("k", message, caption="again")
+
+        message.reply_photo.assert_awaited_once_with("pic-1", caption="again")
+
+    @pytest.mark.asyncio
+    async def test_rejected_file_id_is_forgotten(self):
+        await media_cache.remember("k", sent_message("video"))
+        message = MagicMock(reply_video=AsyncMock(side_effect=BadRequest("wrong file id")))
+
+        assert await media_cache.reply_cached("k", message) is False
+        assert await media_cache.get_file_id("k") is None
+
+
+@pytest.mark.asyncio
+async def test_ytdl_reuses_uploaded_video():
+    """A video that was uploaded before is sent by file_id without downloading it."""
+    await media_cache.remember("ytdl:Youtube:abc", sent_message("video", "vid-1", "Title"))
+
+    update = MagicMock()
+    update.message.text = "/ytdl https://youtube.com/watch?v=abc"
+    update.message.reply_video = AsyncMock()
+    status = MagicMock(delete=AsyncMock(), edit_text=AsyncMock())
+    update.message.reply_text = AsyncMock(return_value=status)
+
+    with (
+        patch("src.bot.handlers.ytdl.dc"),
+        patch("src.bot.handlers.ytdl.ydl") as mock_ydl,
+        patch("src.bot.handlers.ytdl.downloads.submit") as mock_submit,
+    ):
+        mock_ydl.extract_info.return_value = {"id": "abc", "extractor_key": "Youtube"}
+        await ytdl.handle(update, MagicMock())
+
+    mock_submit.assert_not_called()
+    update.message.reply_video.assert_awaited_once_with("vid-1", caption="Title")
+    status.delete.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_webm_reuses_converted_video():
+    """The same webm posted again isn't downloaded or converted."""
+    await media_cache.remember("webm:unique-1", sent_message("video", "mp4-1"))
+
+    update = MagicMock()
+    update.message.document.file_name = "clip.webm"
+    update.message.document.file_unique_id = "unique-1"
+    update.message.caption = None
+    update.message.reply_video = AsyncMock()
+    update.message.reply_text = AsyncMock()
+    context = MagicMock()
+    context.bot.get_file = AsyncMock()
+
+    with (
+        patch("src.bot.handlers.webm.dc"),
+        patch("src.bot.handlers.webm.util.extract_pretty_name_from_tg_user", return_value="Bob"),
+    ):
+        await webm.handle(update, context)
+
+    context.bot.get_file.assert_not_awaited()
+    update.message.reply_text.assert_not_awaited()
+    args, kwargs = update.message.reply_video.await_args
+    assert args == ("mp4-1",)
+    assert "Bob uploaded clip.webm" in kwargs["caption"]
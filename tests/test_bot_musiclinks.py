@@ -5,6 +5,18 @@ from telegram import Message, Update
 from telegram.ext import ContextTypes
 
 from src.bot.handlers import musiclinks
+from src.db.lookup_cache import LookupCache
+
+
+@pytest.fixture(autouse=True)
+def songlink_cache():
+    """A fresh cache per test, with no db tier."""
+    cache = LookupCache("songlink", ttl=musiclinks.songlink_cache.ttl)
+    with (
+        patch.object(musiclinks, "songlink_cache", cache),
+        patch("src.db.lookup_cache.aio.run", side_effect=Exception("no db")),
+    ):
+        yield cache
 
 
 @pytest.fixture
@@ -41,8 +53,8 @@ async def test_handle_no_music_url(mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_spotify_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_spotify_url(mock_get, mock_update, mock_context):
     """Test handler with Spotify URL"""
     mock_update.message.text = "Check out this song: https://open.spotify.com/track/123"
 
@@ -56,9 +68,7 @@ async def test_handle_spotify_url(mock_async_client, mock_update, mock_context):
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -69,8 +79,8 @@ async def test_handle_spotify_url(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_youtube_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_youtube_url(mock_get, mock_update, mock_context):
     """Test handler with YouTube URL"""
     mock_update.message.text = "Watch this: https://www.youtube.com/watch?v=dQw4w9WgXcQ"
 
@@ -83,9 +93,7 @@ async def test_handle_youtube_url(mock_async_client, mock_update, mock_context):
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -95,8 +103,8 @@ async def test_handle_youtube_url(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_apple_music_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_apple_music_url(mock_get, mock_update, mock_context):
     """Test handler with Apple Music URL"""
     mock_update.message.text = "Listen here: https://music.apple.com/us/album/test/123"
 
@@ -109,9 +117,7 @@ async def test_handle_apple_music_url(mock_async_client, mock_update, mock_conte
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -122,8 +128,8 @@ async def test_handle_apple_music_url(mock_async_client, mock_update, mock_conte
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_api_error(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_api_error(mock_get, mock_update, mock_context):
     """Test handler when API returns error status"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
@@ -131,9 +137,7 @@ async def test_handle_api_error(mock_async_client, mock_update, mock_context):
     mock_response.status_code = 500
     mock_response.text = "Internal Server Error"
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -141,8 +145,8 @@ async def test_handle_api_error(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_no_links_in_response(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_no_links_in_response(mock_get, mock_update, mock_context):
     """Test handler when API returns no links"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
@@ -150,9 +154,7 @@ async def test_handle_no_links_in_response(mock_async_client, mock_update, mock_
     mock_response.status_code = 200
     mock_response.json.return_value = {"linksByPlatform": {}}
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -160,8 +162,8 @@ async def test_handle_no_links_in_response(mock_async_client, mock_update, mock_
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_no_links_by_platform(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_no_links_by_platform(mock_get, mock_update, mock_context):
     """Test handler when API returns no linksByPlatform key"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
@@ -169,9 +171,7 @@ async def test_handle_no_links_by_platform(mock_async_client, mock_update, mock_
     mock_response.status_code = 200
     mock_response.json.return_value = {}
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -179,8 +179,8 @@ async def test_handle_no_links_by_platform(mock_async_client, mock_update, mock_
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_multiple_urls(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_multiple_urls(mock_get, mock_update, mock_context):
     """Test handler with multiple music URLs - should only process first one"""
     mock_update.message.text = (
         "First: https://open.spotify.com/track/123 and second: https://music.apple.com/album/456"
@@ -194,21 +194,19 @@ async def test_handle_multiple_urls(mock_async_client, mock_update, mock_context
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
-    mock_client.get.assert_called_once()
-    call_args = mock_client.get.call_args
+    mock_get.assert_called_once()
+    call_args = mock_get.call_args
     # Should only call API with the first URL
-    assert "open.spotify.com" in call_args[0][0]
+    assert "open.spotify.com" in call_args[1]["params"]["url"]
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_soundcloud_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_soundcloud_url(mock_get, mock_update, mock_context):
     """Test handler with SoundCloud URL"""
     mock_update.message.text = "Listen: https://www.soundcloud.com/artist/track"
 
@@ -220,9 +218,7 @@ async def test_handle_soundcloud_url(mock_async_client, mock_update, mock_contex
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -231,14 +227,12 @@ async def test_handle_soundcloud_url(mock_async_client, mock_update, mock_contex
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_exception(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_exception(mock_get, mock_update, mock_context):
     """Test handler exception handling"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
-    mock_client = AsyncMock()
-    mock_client.get.side_effect = Exception("Network error")
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.side_effect = Exception("Network error")
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -246,8 +240,8 @@ async def test_handle_exception(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_deezer_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_deezer_url(mock_get, mock_update, mock_context):
     """Test handler with Deezer URL"""
     mock_update.message.text = "https://www.deezer.com/track/123"
 
@@ -259,9 +253,7 @@ async def test_handle_deezer_url(mock_async_client, mock_update, mock_context):
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -270,8 +262,8 @@ async def test_handle_deezer_url(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_tidal_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_tidal_url(mock_get, mock_update, mock_context):
     """Test handler with Tidal URL"""
     mock_update.message.text = "https://listen.tidal.com/track/123"
 
@@ -283,9 +275,7 @@ async def test_handle_tidal_url(mock_async_client, mock_update, mock_context):
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -294,8 +284,8 @@ async def test_handle_tidal_url(mock_async_client, mock_update, mock_context):
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_youtube_music_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_youtube_music_url(mock_get, mock_update, mock_context):
     """Test handler with YouTube Music URL"""
     mock_update.message.text = "https://music.youtube.com/watch?v=abc123"
 
@@ -308,9 +298,7 @@ async def test_handle_youtube_music_url(mock_async_client, mock_update, mock_con
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -320,8 +308,8 @@ async def test_handle_youtube_music_url(mock_async_client, mock_update, mock_con
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_youtu_be_short_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_youtu_be_short_url(mock_get, mock_update, mock_context):
     """Test handler with youtu.be short URL"""
     mock_update.message.text = "https://youtu.be/dQw4w9WgXcQ"
 
@@ -333,9 +321,7 @@ async def test_handle_youtu_be_short_url(mock_async_client, mock_update, mock_co
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -343,8 +329,8 @@ async def test_handle_youtu_be_short_url(mock_async_client, mock_update, mock_co
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_reply_with_correct_format(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_reply_with_correct_format(mock_get, mock_update, mock_context):
     """Test that reply has correct format with Markdown"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
@@ -357,9 +343,7 @@ async def test_handle_reply_with_correct_format(mock_async_client, mock_update,
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -370,11 +354,10 @@ async def test_handle_reply_with_correct_format(mock_async_client, mock_update,
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_sets_explicit_timeout(mock_async_client, mock_update, mock_context):
-    """AsyncClient must be constructed with an explicit timeout so a slow
-    song.link response doesn't fall back to httpx's 5s default and time out."""
-    mock_update.message.text = "https://open.spotify.com/track/123"
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_queries_song_link_with_url_param(mock_get, mock_update, mock_context):
+    """The normalized music URL is sent as an encoded query param through the shared client."""
+    mock_update.message.text = "https://open.spotify.com/track/123?si=abc&x=1"
 
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -382,20 +365,18 @@ async def test_handle_sets_explicit_timeout(mock_async_client, mock_update, mock
         "linksByPlatform": {"spotify": {"url": "https://open.spotify.com/track/123"}}
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
-    _, kwargs = mock_async_client.call_args
-    assert kwargs.get("timeout") is not None
-    assert kwargs["timeout"] > 5.0
+    args, kwargs = mock_get.call_args
+    assert args[0] == "https://api.song.link/v1-alpha.1/links"
+    assert kwargs["params"] == {"url": "https://open.spotify.com/track/123?x=1"}
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.musiclinks.httpx.AsyncClient")
-async def test_handle_platform_with_missing_url(mock_async_client, mock_update, mock_context):
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_platform_with_missing_url(mock_get, mock_update, mock_context):
     """Test handler when platform exists but URL is missing"""
     mock_update.message.text = "https://open.spotify.com/track/123"
 
@@ -408,9 +389,7 @@ async def test_handle_platform_with_missing_url(mock_async_client, mock_update,
         }
     }
 
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_async_client.return_value.__aenter__.return_value = mock_client
+    mock_get.return_value = mock_response
 
     await musiclinks.handle(mock_update, mock_context)
 
@@ -419,3 +398,65 @@ async def test_handle_platform_with_missing_url(mock_async_client, mock_update,
     # Should still reply with available links
     assert "Apple Music" in call_args[0][0]
     assert "Spotify" not in call_args[0][0]
+
+
+@pytest.mark.asyncio
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_reuses_cached_links(mock_get, mock_update, mock_context):
+    """The same track shared again, with different tracking params, doesn't call song.link."""
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "linksByPlatform": {"spotify": {"url": "https://open.spotify.com/track/123"}}
+    }
+    mock_get.return_value = mock_response
+
+    mock_update.message.text = "https://open.spotify.com/track/123?si=abc"
+    await musiclinks.handle(mock_update, mock_context)
+    mock_update.message.text = "https://open.spotify.com/track/123?si=xyz&utm_source=copy"
+    await musiclinks.handle(mock_update, mock_context)
+
+    mock_get.assert_awaited_once()
+    assert mock_update.message.reply_text.call_count == 2
+
+
+@pytest.mark.asyncio
+@patch("src.bot.handlers.musiclinks.http_client.get", new_callable=AsyncMock)
+async def test_handle_does_not_cache_api_errors(mock_get, mock_update, mock_context):
+    error_response = MagicMock()
+    error_response.status_code = 429
+    ok_response = MagicMock()
+    ok_response.status_code = 200
+    ok_response.json.return_value = {
+        "linksByPlatform": {"spotify": {"url": "https://open.spotify.com/track/123"}}
+    }
+    mock_get.side_effect = [error_response, ok_response]
+
+    mock_update.message.text = "https://open.spotify.com/track/123"
+    await musiclinks.handle(mock_update, mock_context)
+    await musiclinks.handle(mock_update, mock_context)
+
+    assert mock_get.await_count == 2
+    mock_update.message.reply_text.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        (
+            "https://open.spotify.com/track/123?si=abc",
+            "https://open.spotify.com/track/123",
+        ),
+        (
+            "https://www.youtube.com/watch?v=abc&feature=share&utm_source=x",
+            "https://www.youtube.com/watch?v=abc",
+        ),
+        (
+            "https://music.apple.com/us/album/x/1?i=2&ls=1#frag",
+            "https://music.apple.com/us/album/x/1?i=2",
+        ),
+        ("HTTPS://Open.Spotify.com/track/123/", "https://open.spotify.com/track/123"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert musiclinks.normalize_url(url) == expected
@@ -73,12 +73,12 @@ async def test_handle_search_from_args(mock_update, mock_context):
         mock_tempfile.mkdtemp.return_value = "/tmp/pic_test"
         mock_os.path.join.side_effect = lambda *args: "/".join(args)
 
-        with patch("src.bot.handlers.pic.requests") as mock_requests:
+        with patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get:
             mock_response = MagicMock()
             mock_response.headers = {"content-type": "image/jpeg"}
             mock_response.content = b"fake image data"
             mock_response.raise_for_status = MagicMock()
-            mock_requests.get.return_value = mock_response
+            mock_get.return_value = mock_response
 
             mock_sent_message = MagicMock()
             mock_sent_message.edit_text = AsyncMock()
@@ -121,14 +121,14 @@ async def test_handle_search_from_reply_text(mock_update, mock_context):
         mock_update.message.text = "/pic"
 
         with (
-            patch("src.bot.handlers.pic.requests") as mock_requests,
+            patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get,
             patch("src.bot.handlers.pic.contextlib") as mock_contextlib,
         ):
             mock_response = MagicMock()
             mock_response.headers = {"content-type": "image/jpeg"}
             mock_response.content = b"fake image data"
             mock_response.raise_for_status = MagicMock()
-            mock_requests.get.return_value = mock_response
+            mock_get.return_value = mock_response
 
             mock_sent_message = MagicMock()
             mock_sent_message.edit_text = AsyncMock()
@@ -163,14 +163,14 @@ async def test_handle_search_from_caption(mock_update, mock_context):
         mock_update.message.caption = "/pic mountains"
 
         with (
-            patch("src.bot.handlers.pic.requests") as mock_requests,
+            patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get,
             patch("src.bot.handlers.pic.contextlib") as mock_contextlib,
         ):
             mock_response = MagicMock()
             mock_response.headers = {"content-type": "image/jpeg"}
             mock_response.content = b"fake image data"
             mock_response.raise_for_status = MagicMock()
-            mock_requests.get.return_value = mock_response
+            mock_get.return_value = mock_response
 
             mock_sent_message = MagicMock()
             mock_sent_message.edit_text = AsyncMock()
@@ -243,12 +243,12 @@ async def test_handle_no_images_found(mock_update, mock_context):
 #         mock_file.__exit__ = MagicMock(return_value=False)
 #         mock_open.return_value = mock_file
 
-#         with patch("src.bot.handlers.pic.requests") as mock_requests:
+#         with patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get:
 #             mock_response = MagicMock()
 #             mock_response.headers = {"content-type": "image/jpeg"}
 #             mock_response.content = b"fake image data"
 #             mock_response.raise_for_status = MagicMock()
-#             mock_requests.get.return_value = mock_response
+#             mock_get.return_value = mock_response
 
 #             mock_sent_message = MagicMock()
 #             mock_sent_message.edit_text = AsyncMock()
@@ -290,7 +290,7 @@ async def test_handle_download_error_continues(mock_update, mock_context):
         mock_os.listdir.return_value = ["image1.jpg"]
 
         with (
-            patch("src.bot.handlers.pic.requests") as mock_requests,
+            patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get,
             patch("builtins.open", create=True) as mock_open,
         ):
             mock_response_success = MagicMock()
@@ -301,7 +301,7 @@ async def test_handle_download_error_continues(mock_update, mock_context):
             mock_response_failure = MagicMock()
             mock_response_failure.raise_for_status.side_effect = Exception("Download failed")
 
-            mock_requests.get.side_effect = [mock_response_success, mock_response_failure]
+            mock_get.side_effect = [mock_response_success, mock_response_failure]
 
             mock_file = MagicMock()
             mock_file.__enter__ = MagicMock(return_value=MagicMock())
@@ -344,7 +344,7 @@ async def test_handles_different_content_types(mock_update, mock_context):
         mock_os.listdir.return_value = ["image1.jpg", "image2.png", "image3.gif"]
 
         with (
-            patch("src.bot.handlers.pic.requests") as mock_requests,
+            patch("src.bot.handlers.pic.http_client.get", new_callable=AsyncMock) as mock_get,
             patch("builtins.open", create=True) as mock_open,
         ):
             responses = []
@@ -355,7 +355,7 @@ async def test_handles_different_content_types(mock_update, mock_context):
                 mock_response.raise_for_status = MagicMock()
                 responses.append(mock_response)
 
-            mock_requests.get.side_effect = responses
+            mock_get.side_effect = responses
 
             mock_file = MagicMock()
             mock_file.__enter__ = MagicMock(return_value=MagicMock())
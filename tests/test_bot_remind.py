@@ -1,4 +1,5 @@
 import json
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -216,6 +217,10 @@ class TestHandle:
             mock_scheduledjob_instance = MagicMock()
             mock_scheduledjob_instance.job_id = 123
             mock_scheduledjob_class.create.return_value = mock_scheduledjob_instance
+            saved_on = []
+            mock_scheduledjob_instance.save.side_effect = lambda: saved_on.append(
+                threading.current_thread().name
+            )
             mock_json_dumps.return_value = "mock_json"
             mock_util.pretty_time_delta.return_value = "5 minutes"
 
@@ -223,6 +228,8 @@ class TestHandle:
 
             mock_scheduledjob_class.create.assert_called_once()
             mock_scheduledjob_instance.save.assert_called_once()
+            # Saved on a db worker, not the event loop
+            assert saved_on[0].startswith("chaddi-db")
             mock_context_remind.job_queue.run_once.assert_called_once()
             mock_update_remind.message.reply_text.assert_called_once()
 
@@ -68,6 +68,7 @@ def mock_update_with_reply():
     return update
 
 
+@pytest.mark.usefixtures("fake_ledger")
 class TestSetter:
     @patch("src.bot.handlers.setter.dc")
     @pytest.mark.anyio
@@ -87,7 +88,7 @@ class TestSetter:
 
     @patch("src.bot.handlers.setter.dc")
     @patch("src.bot.handlers.setter.util.is_admin_tg_user", return_value=True)
-    @patch("src.bot.handlers.setter.Bakchod.get_by_id")
+    @patch("src.bot.handlers.setter.bakchod_dao.get_bakchod_by_id")
     @pytest.mark.anyio
     async def test_handle_set_rokda_admin(
         self, mock_get_bakchod, mock_is_admin, mock_dc, mock_update
@@ -95,13 +96,13 @@ class TestSetter:
         """Test setter handler setting rokda with admin."""
         mock_update.message.text = "/set rokda 1337"
         mock_bakchod = MagicMock(spec=Bakchod)
-        mock_bakchod.rokda = 1337
+        mock_bakchod.rokda = 0
         mock_get_bakchod.return_value = mock_bakchod
 
         await setter.handle(mock_update, MagicMock())
 
         mock_dc.log_command_usage.assert_called_once_with("set", mock_update)
-        mock_bakchod.save.assert_called_once()
+        assert mock_bakchod.rokda == 1337
 
     @patch("src.bot.handlers.setter.dc")
     @patch("src.bot.handlers.setter.util.is_admin_tg_user", return_value=False)
@@ -127,7 +128,7 @@ class TestSetter:
     ):
         """Test setter handler setting rokda with reply."""
         mock_update_with_reply.message.text = "/set rokda 1337"
-        with patch("src.bot.handlers.setter.Bakchod.get_by_id") as mock_get_bakchod:
+        with patch("src.bot.handlers.setter.bakchod_dao.get_bakchod_by_id") as mock_get_bakchod:
             mock_bakchod = MagicMock(spec=Bakchod)
             mock_bakchod.rokda = 1337
             mock_get_bakchod.return_value = mock_bakchod
@@ -295,11 +296,11 @@ class TestSetter:
         mock_user = MagicMock()
         mock_user.id = 123456
         mock_bakchod = MagicMock(spec=Bakchod)
-        mock_bakchod.rokda = 1337
+        mock_bakchod.rokda = 0
 
-        with patch("src.bot.handlers.setter.Bakchod.get_by_id") as mock_get:
+        with patch("src.bot.handlers.setter.bakchod_dao.get_bakchod_by_id") as mock_get:
             mock_get.return_value = mock_bakchod
             result = setter.set_bakchod_rokda(1337, mock_user)
 
             assert "1337" in result
-            mock_bakchod.save.assert_called_once()
+            assert mock_bakchod.rokda == 1337
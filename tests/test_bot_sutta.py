@@ -46,7 +46,7 @@ async def test_handle_insufficient_rokda(mock_paywall, mock_update, mock_context
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.sutta.Bakchod")
+@patch("src.bot.handlers.sutta.bakchod_dao")
 @patch("src.bot.handlers.sutta.util.paywall_user")
 async def test_handle_existing_sutta_job(
     mock_paywall, mock_bakchod_class, mock_update, mock_context
@@ -57,7 +57,7 @@ async def test_handle_existing_sutta_job(
 
     mock_bakchod = MagicMock()
     mock_bakchod.metadata = {"sutta_ittr": 5}
-    mock_bakchod_class.get_by_id.return_value = mock_bakchod
+    mock_bakchod_class.get_bakchod_by_id.return_value = mock_bakchod
 
     await sutta.handle(mock_update, mock_context)
 
@@ -67,15 +67,15 @@ async def test_handle_existing_sutta_job(
 
 
 @pytest.mark.asyncio
-@patch("src.bot.handlers.sutta.Bakchod")
+@patch("src.bot.handlers.sutta.bakchod_dao")
 async def test_update_sutta_in_range(mock_bakchod_class, mock_context):
     """Test update_sutta for iterations 0-8"""
     mock_bakchod = MagicMock()
     mock_bakchod.metadata = {"sutta_ittr": 3}
     mock_bakchod.save = MagicMock()
 
-    with patch("src.bot.handlers.sutta.Bakchod") as mock_bakchod_class:
-        mock_bakchod_class.get_by_id.return_value = mock_bakchod
+    with patch("src.bot.handlers.sutta.bakchod_dao") as mock_bakchod_class:
+        mock_bakchod_class.get_bakchod_by_id.return_value = mock_bakchod
 
         mock_job = MagicMock()
         mock_job.data = {"chat_id": 123, "message_id": 456, "bakchod_id": 789}
@@ -1,9 +1,15 @@
+import io
+import math
+import pickle
+import time
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from PIL import Image, ImageFont
+from PIL import Image, ImageDraw, ImageFont
 from pilmoji import Pilmoji
 
+from src.bot.handlers import tynm, tynm_portraits
 from src.bot.handlers.tynm import (
     FONT_POOL_GREETING,
     POSTER_HEIGHT,
@@ -41,6 +47,16 @@ from src.bot.handlers.tynm import (
     resize_placement_image,
     wrap_text_to_width,
 )
+from src.bot.handlers.tynm_assets import assets
+from src.domain import rendering
+from tests import render_worker
+
+
+@pytest.fixture(autouse=True)
+def fresh_render_assets():
+    assets.clear()
+    yield
+    assets.clear()
 
 
 class TestExtractReplyText:
@@ -630,3 +646,417 @@ class TestHandle:
         mock_update.message.reply_text.assert_called_once_with(
             "Failed to load image. Please try again later."
         )
+
+
+class TestRenderAssets:
+    """Tests for the render assets reused across posters."""
+
+    def test_fonts_are_opened_once(self):
+        with patch("src.bot.handlers.tynm.ImageFont.truetype", wraps=ImageFont.truetype) as mock:
+            first = tynm.load_font("Samarkan.ttf", 40)
+            second = tynm.load_font("Samarkan.ttf", 40)
+            tynm.load_font("Samarkan.ttf", 42)
+
+        assert first is second
+        assert mock.call_count == 2
+
+    def test_poster_background_is_a_fresh_copy(self):
+        first = tynm.poster_background(64, 64)
+        first.paste((0, 0, 0, 255), (0, 0, 64, 64))
+
+        second = tynm.poster_background(64, 64)
+
+        assert second is not first
+        assert second.getpixel((10, 10)) != (0, 0, 0, 255)
+
+    def test_background_matches_drawing_it(self):
+        expected = tynm.add_lotus_watermark(create_saffron_gradient(64, 64))
+
+        assert tynm.poster_background(64, 64).tobytes() == expected.tobytes()
+
+    @patch("src.bot.handlers.tynm.os.listdir")
+    def test_tynm_images_are_listed_once(self, mock_listdir):
+        mock_listdir.return_value = ["a.png", "notes.txt"]
+
+        assert tynm.list_tynm_images() == ["a.png"]
+        assert tynm.list_tynm_images() == ["a.png"]
+        mock_listdir.assert_called_once()
+
+    @patch("src.bot.handlers.tynm.os.listdir")
+    def test_empty_tynm_directory_is_listed_again(self, mock_listdir):
+        mock_listdir.side_effect = [[], ["a.png"]]
+
+        assert tynm.list_tynm_images() == []
+        assert tynm.list_tynm_images() == ["a.png"]
+
+    @patch("src.bot.handlers.tynm.Image.open")
+    def test_tynm_images_are_decoded_once(self, mock_open):
+        mock_open.return_value = Image.new("RGB", (10, 10))
+
+        first = tynm.load_tynm_image("a.png")
+        second = tynm.load_tynm_image("a.png")
+
+        assert first is second
+        assert first.mode == "RGBA"
+        mock_open.assert_called_once()
+
+    def test_decoration_sprites_are_drawn_once_per_variant(self):
+        with patch("src.bot.handlers.tynm.draw_flower", wraps=draw_flower) as mock_draw:
+            sprites = {id(tynm.decoration_sprite("flower", 40)) for _ in range(50)}
+
+        assert mock_draw.call_count == tynm.SPRITE_VARIANTS
+        assert len(sprites) <= tynm.SPRITE_VARIANTS
+
+    def test_preload_render_assets(self):
+        tynm.preload_render_assets()
+
+        assert ("background", POSTER_WIDTH, POSTER_HEIGHT) in assets
+        assert ("font", "Samarkan.ttf", 58) in assets
+        assert ("sprite", "firework", 70) in assets
+        assert assets.size_bytes > 0
+
+
+@pytest.fixture
+def modi_images():
+    render_worker.cache_modi_images()
+
+
+def text_poster_job(**kwargs):
+    return tynm.PosterJob(
+        foreground_modi="a.png",
+        watermark_modi="b.png",
+        layout=POSTER_LAYOUTS[0].name,
+        text="Happy diwali everyone",
+        timestamp=datetime(2024, 11, 1, 18, 30),
+        username="Bakchod",
+        chat_title="Chaddi",
+        **kwargs,
+    )
+
+
+def png_size(data):
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == "PNG"
+        return img.size
+
+
+class TestRenderPoster:
+    """Tests for rendering posters from a PosterJob."""
+
+    def test_job_survives_pickling(self):
+        job = text_poster_job(portrait=b"portrait")
+
+        assert pickle.loads(pickle.dumps(job)) == job
+
+    def test_text_poster(self, modi_images):
+        assert png_size(tynm.render_poster(text_poster_job())) == (POSTER_WIDTH, POSTER_HEIGHT)
+
+    def test_text_poster_with_portrait(self, modi_images):
+        portrait = io.BytesIO()
+        Image.new("RGB", (64, 64), (0, 0, 255)).save(portrait, format="PNG")
+
+        with patch("src.bot.handlers.tynm.paste_framed_portrait") as mock_paste:
+            tynm.render_poster(text_poster_job(portrait=portrait.getvalue()))
+
+        assert mock_paste.call_args.args[1].size == (64, 64)
+
+    def test_unreadable_portrait_is_left_out(self, modi_images):
+        with patch("src.bot.handlers.tynm.paste_framed_portrait") as mock_paste:
+            data = tynm.render_poster(text_poster_job(portrait=b"not an image"))
+
+        assert png_size(data) == (POSTER_WIDTH, POSTER_HEIGHT)
+        mock_paste.assert_not_called()
+
+    def test_photo_poster(self, modi_images, tmp_path):
+        photo_path = tmp_path / "photo.png"
+        Image.new("RGB", (400, 300), (0, 128, 0)).save(photo_path)
+        job = tynm.PosterJob(
+            foreground_modi="a.png",
+            watermark_modi="b.png",
+            layout=POSTER_LAYOUTS[1].name,
+            photo_path=str(photo_path),
+        )
+
+        # The photo plus its fancy border
+        assert png_size(tynm.render_poster(job)) == (440, 340)
+
+    @pytest.mark.asyncio
+    async def test_renders_in_a_worker_process(self, modi_images):
+        with patch("src.domain.rendering.WORKERS", 1):
+            rendering.start(render_worker.cache_modi_images)
+
+        try:
+            data = await rendering.run(tynm.render_poster, text_poster_job())
+        finally:
+            rendering.stop()
+
+        assert png_size(data) == (POSTER_WIDTH, POSTER_HEIGHT)
+
+
+class TestHandleRendering:
+    """Tests for handle sending the rendered poster."""
+
+    @pytest.fixture
+    def mock_update(self):
+        update = MagicMock()
+        update.message.reply_text = AsyncMock()
+        update.message.reply_photo = AsyncMock()
+        update.message.set_reaction = AsyncMock()
+        reply_message = update.message.reply_to_message
+        reply_message.photo = None
+        reply_message.text = "Happy diwali everyone"
+        reply_message.date = datetime(2024, 11, 1, 18, 30)
+        reply_message.chat.title = "Chaddi"
+        return update
+
+    @pytest.fixture(autouse=True)
+    def tynm_images(self, modi_images):
+        with (
+            patch("src.bot.handlers.tynm.os.path.exists", return_value=True),
+            patch("src.bot.handlers.tynm.list_tynm_images", return_value=["a.png", "b.png"]),
+        ):
+            yield
+
+    @pytest.mark.asyncio
+    @patch("src.bot.handlers.tynm.textures.take")
+    @patch("src.bot.handlers.tynm.fetch_user_profile_portrait", new_callable=AsyncMock)
+    @patch("src.bot.handlers.tynm.util.delete_file")
+    async def test_text_reply_poster(self, mock_delete, mock_portrait, mock_texture, mock_update):
+        mock_texture.return_value = "/tmp/unsplash.jpg"
+        mock_portrait.return_value = b"portrait"
+
+        with (
+            patch(
+                "src.bot.handlers.tynm.util.extract_pretty_name_from_tg_user",
+                return_value="Bakchod",
+            ),
+            patch("src.bot.handlers.tynm.rendering.run", new_callable=AsyncMock) as mock_run,
+        ):
+            mock_run.return_value = b"png"
+            await handle(mock_update, MagicMock())
+
+        fn, job = mock_run.call_args.args
+        assert fn is tynm.render_poster
+        assert job.text == "Happy diwali everyone"
+        assert job.texture_path == "/tmp/unsplash.jpg"
+        assert job.portrait == b"portrait"
+        assert job.username == "Bakchod"
+        assert job.chat_title == "Chaddi"
+        assert {job.foreground_modi, job.watermark_modi} == {"a.png", "b.png"}
+        mock_update.message.reply_photo.assert_awaited_once_with(photo=b"png")
+        # The texture taken from the pool is deleted once it's been drawn
+        mock_delete.assert_called_once_with("/tmp/unsplash.jpg")
+
+    @pytest.mark.asyncio
+    @patch("src.bot.handlers.tynm.acquire_file", new_callable=AsyncMock)
+    @patch("src.bot.handlers.tynm.util.delete_file")
+    async def test_photo_reply_poster(self, mock_delete, mock_acquire, mock_update):
+        mock_update.message.reply_to_message.photo = [MagicMock()]
+        mock_acquire.return_value = {"file_id": "photo", "extension": ".png"}
+
+        with patch("src.bot.handlers.tynm.rendering.run", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = b"png"
+            await handle(mock_update, MagicMock())
+
+        job = mock_run.call_args.args[1]
+        assert job.photo_path == build_file_path(mock_acquire.return_value)
+        mock_update.message.reply_photo.assert_awaited_once_with(photo=b"png")
+        mock_delete.assert_called_once_with(job.photo_path)
+
+    @pytest.mark.asyncio
+    @patch("src.bot.handlers.tynm.textures.take")
+    @patch("src.bot.handlers.tynm.fetch_user_profile_portrait", new_callable=AsyncMock)
+    async def test_busy_render_pool(self, mock_portrait, mock_texture, mock_update):
+        mock_texture.return_value = None
+        mock_portrait.return_value = None
+
+        with patch(
+            "src.bot.handlers.tynm.rendering.run",
+            new_callable=AsyncMock,
+            side_effect=rendering.QueueFullError("10 renders pending"),
+        ):
+            await handle(mock_update, MagicMock())
+
+        mock_update.message.reply_text.assert_awaited_once_with(tynm.RENDER_BUSY_REPLY)
+        mock_update.message.reply_photo.assert_not_called()
+
+
+class TestFetchUserProfilePortrait:
+    @pytest.fixture
+    def portraits(self, tmp_path):
+        tynm_portraits.clear()
+        with patch("src.bot.handlers.tynm_portraits.PORTRAIT_DIR", str(tmp_path)):
+            yield tmp_path
+        tynm_portraits.clear()
+
+    @staticmethod
+    def mock_user_and_context(file_unique_id="AQADabc"):
+        photo = io.BytesIO()
+        Image.new("RGB", (320, 240), (10, 20, 30)).save(photo, format="JPEG")
+
+        user = MagicMock()
+        user.get_profile_photos = AsyncMock(
+            return_value=MagicMock(
+                photos=[[MagicMock(file_id="small"), MagicMock(file_unique_id=file_unique_id)]]
+            )
+        )
+        context = MagicMock()
+        context.bot.get_file = AsyncMock()
+        context.bot.get_file.return_value.download_as_bytearray = AsyncMock(
+            return_value=bytearray(photo.getvalue())
+        )
+        return user, context
+
+    @pytest.mark.asyncio
+    async def test_returns_circular_portrait(self, portraits):
+        user, context = self.mock_user_and_context()
+
+        portrait = await tynm.fetch_user_profile_portrait(context, user)
+
+        with Image.open(io.BytesIO(portrait)) as img:
+            size = tynm_portraits.PORTRAIT_SIZE
+            assert img.size == (size, size)
+            assert img.mode == "RGBA"
+            assert img.getpixel((0, 0))[3] == 0
+            assert img.getpixel((size // 2, size // 2)) != (0, 0, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_repeat_portraits_skip_the_download(self, portraits):
+        user, context = self.mock_user_and_context()
+
+        first = await tynm.fetch_user_profile_portrait(context, user)
+        second = await tynm.fetch_user_profile_portrait(context, user)
+
+        assert first == second
+        context.bot.get_file.assert_awaited_once()
+        assert user.get_profile_photos.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_changed_profile_photo_is_downloaded(self, portraits):
+        user, context = self.mock_user_and_context("AQADabc")
+        await tynm.fetch_user_profile_portrait(context, user)
+
+        changed_user, _ = self.mock_user_and_context("AQADxyz")
+        await tynm.fetch_user_profile_portrait(context, changed_user)
+
+        assert context.bot.get_file.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_no_profile_photo(self):
+        user = MagicMock()
+        user.get_profile_photos = AsyncMock(return_value=MagicMock(photos=[]))
+
+        assert await tynm.fetch_user_profile_portrait(MagicMock(), user) is None
+
+    @pytest.mark.asyncio
+    async def test_undecodable_photo(self, portraits):
+        user, context = self.mock_user_and_context()
+        context.bot.get_file.return_value.download_as_bytearray.return_value = bytearray(b"jpeg")
+
+        assert await tynm.fetch_user_profile_portrait(context, user) is None
+
+
+def reference_saffron_gradient(width, height):
+    """create_saffron_gradient as it was drawn, one row at a time."""
+    gradient = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(gradient)
+    top_color = (255, 153, 51)
+    mid_color = (120, 145, 35)
+    bottom_color = tynm.BJP_GREEN
+
+    for y in range(height):
+        ratio = y / max(height - 1, 1)
+        if ratio < 0.5:
+            blend = ratio / 0.5
+            color = tuple(int(top_color[i] * (1 - blend) + mid_color[i] * blend) for i in range(3))
+        else:
+            blend = (ratio - 0.5) / 0.5
+            color = tuple(
+                int(mid_color[i] * (1 - blend) + bottom_color[i] * blend) for i in range(3)
+            )
+        draw.line([(0, y), (width, y)], fill=color)
+
+    return gradient.convert("RGBA")
+
+
+def reference_lotus_overlay(size):
+    """The lotus layer of add_lotus_watermark as it was drawn, one ellipse at a time."""
+    overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    spacing_x = 110
+    spacing_y = 95
+
+    for x in range(-20, size[0] + spacing_x, spacing_x):
+        for y in range(-20, size[1] + spacing_y, spacing_y):
+            cx = x + ((y // spacing_y) % 2) * (spacing_x // 2)
+            cy = y
+            draw.ellipse([cx - 18, cy - 18, cx + 18, cy + 18], fill=(255, 255, 255, 18))
+            for angle in range(0, 360, 60):
+                rad = math.radians(angle)
+                px = cx + int(24 * math.cos(rad))
+                py = cy + int(24 * math.sin(rad))
+                draw.ellipse([px - 8, py - 8, px + 8, py + 8], fill=(255, 255, 255, 12))
+
+    return overlay
+
+
+def best_of(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class TestVectorisedBackgrounds:
+    """The array based background builders against the ones they replaced."""
+
+    @pytest.mark.parametrize(
+        ("width", "height"), [(POSTER_WIDTH, POSTER_HEIGHT), (333, 71), (1, 1)]
+    )
+    def test_gradient_matches_drawing_it_row_by_row(self, width, height):
+        expected = reference_saffron_gradient(width, height)
+
+        assert create_saffron_gradient(width, height).tobytes() == expected.tobytes()
+
+    @pytest.mark.parametrize(
+        ("width", "height"), [(POSTER_WIDTH, POSTER_HEIGHT), (333, 71), (10, 10)]
+    )
+    def test_lotus_pattern_matches_drawing_it_lotus_by_lotus(self, width, height):
+        base = reference_saffron_gradient(width, height)
+
+        expected = Image.alpha_composite(base, reference_lotus_overlay(base.size))
+
+        assert tynm.add_lotus_watermark(base).tobytes() == expected.tobytes()
+
+    def test_unsplash_texture_is_scaled_to_the_poster(self, tmp_path):
+        photo_path = tmp_path / "unsplash.jpg"
+        Image.new("RGB", (2 * POSTER_WIDTH, 2 * POSTER_HEIGHT), (0, 0, 255)).save(photo_path)
+        base = create_saffron_gradient(POSTER_WIDTH, POSTER_HEIGHT)
+
+        img = tynm.blend_unsplash_texture(base, str(photo_path), POSTER_WIDTH, POSTER_HEIGHT)
+
+        assert img.size == (POSTER_WIDTH, POSTER_HEIGHT)
+        assert img.mode == "RGBA"
+        # 22% of a 35% blue texture shows through the gradient
+        top_left = base.getpixel((0, 0))
+        assert img.getpixel((0, 0))[2] > top_left[2]
+
+    @pytest.mark.benchmark
+    def test_benchmark(self):
+        timings = {
+            "gradient": (
+                best_of(lambda: reference_saffron_gradient(POSTER_WIDTH, POSTER_HEIGHT)),
+                best_of(lambda: create_saffron_gradient(POSTER_WIDTH, POSTER_HEIGHT)),
+            ),
+            # Compositing the layer onto the gradient is the same either way
+            "lotus layer": (
+                best_of(lambda: reference_lotus_overlay((POSTER_WIDTH, POSTER_HEIGHT))),
+                best_of(lambda: tynm.lotus_pattern_alpha(POSTER_WIDTH, POSTER_HEIGHT)),
+            ),
+        }
+
+        for name, (before, after) in timings.items():
+            print(f"{name}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms")
+            assert after * 2 < before
@@ -0,0 +1,82 @@
+from PIL import Image
+
+from src.bot.handlers.tynm_assets import RenderAssetCache, estimate_bytes
+
+
+def image(width, height=1):
+    return Image.new("RGBA", (width, height))
+
+
+class TestEstimateBytes:
+    def test_image(self):
+        assert estimate_bytes(image(10, 10)) == 400
+
+    def test_list_of_images(self):
+        assert estimate_bytes([image(10), image(5)]) == 60
+
+
+class TestRenderAssetCache:
+    def test_builds_once(self):
+        cache = RenderAssetCache(max_bytes=1000)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return image(10)
+
+        assert cache.get("a", build) is cache.get("a", build)
+        assert len(calls) == 1
+        assert cache.size_bytes == 40
+
+    def test_evicts_least_recently_used_over_the_cap(self):
+        cache = RenderAssetCache(max_bytes=100)
+
+        cache.put("a", image(10))
+        cache.put("b", image(10))
+        cache.get("a", image)
+        cache.put("c", image(10))
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.size_bytes == 80
+
+    def test_find_does_not_build(self):
+        cache = RenderAssetCache(max_bytes=100)
+
+        assert cache.find("a") is None
+        assert len(cache) == 0
+
+        cache.put("a", image(10))
+        cache.put("b", image(10))
+        assert cache.find("a") is not None
+        cache.put("c", image(10))
+
+        assert "a" in cache
+        assert "b" not in cache
+
+    def test_keeps_the_newest_entry_even_if_too_big(self):
+        cache = RenderAssetCache(max_bytes=10)
+
+        cache.put("a", image(1))
+        cache.put("big", image(100))
+
+        assert len(cache) == 1
+        assert "big" in cache
+
+    def test_replacing_an_entry_updates_the_size(self):
+        cache = RenderAssetCache(max_bytes=1000)
+
+        cache.put("a", image(10))
+        cache.put("a", image(5))
+
+        assert cache.size_bytes == 20
+
+    def test_clear(self):
+        cache = RenderAssetCache(max_bytes=1000)
+        cache.put("a", image(10))
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.size_bytes == 0
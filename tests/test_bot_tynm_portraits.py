@@ -0,0 +1,106 @@
+import io
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from src.bot.handlers import tynm, tynm_portraits
+
+
+@pytest.fixture
+def portrait_dir(tmp_path):
+    tynm_portraits.clear()
+    with patch("src.bot.handlers.tynm_portraits.PORTRAIT_DIR", str(tmp_path)):
+        yield tmp_path
+    tynm_portraits.clear()
+
+
+def photo_bytes(color=(200, 100, 50), size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_portrait_size_covers_every_layout():
+    assert (
+        max(layout.portrait_size for layout in tynm.POSTER_LAYOUTS) <= tynm_portraits.PORTRAIT_SIZE
+    )
+
+
+def test_prepare_crops_to_circle():
+    portrait = tynm_portraits.prepare(photo_bytes())
+
+    with Image.open(io.BytesIO(portrait)) as img:
+        size = tynm_portraits.PORTRAIT_SIZE
+        assert img.format == "PNG"
+        assert img.size == (size, size)
+        assert img.getpixel((0, 0)) == (0, 0, 0, 0)
+        assert img.getpixel((size // 2, size // 2))[3] == 255
+
+
+@pytest.mark.asyncio
+async def test_miss_downloads_and_saves_to_disk(portrait_dir):
+    download = AsyncMock(return_value=photo_bytes())
+
+    portrait = await tynm_portraits.get("AQADabc", download)
+
+    download.assert_awaited_once()
+    assert (portrait_dir / "AQADabc.png").read_bytes() == portrait
+
+
+@pytest.mark.asyncio
+async def test_memory_hit(portrait_dir):
+    download = AsyncMock(return_value=photo_bytes())
+    first = await tynm_portraits.get("AQADabc", download)
+    os.remove(portrait_dir / "AQADabc.png")
+
+    with patch("src.bot.handlers.tynm_portraits.metrics.inc_lookup_cache") as mock_metric:
+        assert await tynm_portraits.get("AQADabc", download) is first
+
+    download.assert_awaited_once()
+    mock_metric.assert_called_once_with("tynm_portraits", "memory")
+
+
+@pytest.mark.asyncio
+async def test_disk_hit_after_restart(portrait_dir):
+    download = AsyncMock(return_value=photo_bytes())
+    first = await tynm_portraits.get("AQADabc", download)
+    tynm_portraits.clear()
+
+    with patch("src.bot.handlers.tynm_portraits.metrics.inc_lookup_cache") as mock_metric:
+        assert await tynm_portraits.get("AQADabc", download) == first
+
+    download.assert_awaited_once()
+    mock_metric.assert_called_once_with("tynm_portraits", "disk")
+
+
+@pytest.mark.asyncio
+async def test_disk_is_trimmed_least_recently_used_first(portrait_dir):
+    portrait_size = len(tynm_portraits.prepare(photo_bytes()))
+
+    with (
+        patch("src.bot.handlers.tynm_portraits.MB", portrait_size),
+        patch("src.bot.handlers.tynm_portraits.DISK_MAX_MB", 2),
+    ):
+        await tynm_portraits.get("old", AsyncMock(return_value=photo_bytes()))
+        await tynm_portraits.get("used", AsyncMock(return_value=photo_bytes()))
+        for name in ("old.png", "used.png"):
+            mtime = time.time() - 60
+            os.utime(portrait_dir / name, (mtime, mtime))
+
+        # Reading "used" from disk marks it as recently used
+        tynm_portraits.clear()
+        await tynm_portraits.get("used", AsyncMock())
+        await tynm_portraits.get("new", AsyncMock(return_value=photo_bytes()))
+
+    assert sorted(os.listdir(portrait_dir)) == ["new.png", "used.png"]
+
+
+@pytest.mark.asyncio
+async def test_unsafe_ids_stay_off_disk(portrait_dir):
+    await tynm_portraits.get("../escape", AsyncMock(return_value=photo_bytes()))
+
+    assert os.listdir(portrait_dir) == []
+    assert not os.path.exists(portrait_dir.parent / "escape.png")
@@ -1,7 +1,7 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
-import requests
 from telegram import Chat, Message, User
 
 from src.bot.handlers import weather
@@ -37,13 +37,11 @@ def mock_update():
 
 
 class TestWeather:
-    @patch("src.bot.handlers.weather.requests")
+    @patch("src.bot.handlers.weather.http_client.get", new_callable=AsyncMock)
     @patch("src.bot.handlers.weather.bakchod_dao")
     @patch("src.bot.handlers.weather.dc")
     @pytest.mark.anyio
-    async def test_handle_success_with_args(
-        self, mock_dc, mock_bakchod_dao, mock_requests, mock_update
-    ):
+    async def test_handle_success_with_args(self, mock_dc, mock_bakchod_dao, mock_get, mock_update):
         """Test weather handler success case with location in args."""
         update, context = mock_update
 
@@ -63,13 +61,12 @@ class TestWeather:
             "name": "Mumbai",
             "coord": {"lat": 19.0760, "lon": 72.8777},
         }
-        mock_requests.get.return_value = mock_response
-        mock_requests.exceptions.HTTPError = Exception
+        mock_get.return_value = mock_response
 
         mock_aqi_response = MagicMock()
         mock_aqi_response.status_code = 200
         mock_aqi_response.json.return_value = {"list": [{"main": {"aqi": 2}}]}
-        mock_requests.get.side_effect = [mock_response, mock_aqi_response]
+        mock_get.side_effect = [mock_response, mock_aqi_response]
 
         await weather.handle(update, context)
 
@@ -95,13 +92,11 @@ class TestWeather:
         update.message.reply_text.assert_called_once()
         assert "provide a location" in update.message.reply_text.call_args[0][0]
 
-    @patch("src.bot.handlers.weather.requests")
+    @patch("src.bot.handlers.weather.http_client.get", new_callable=AsyncMock)
     @patch("src.bot.handlers.weather.bakchod_dao")
     @patch("src.bot.handlers.weather.dc")
     @pytest.mark.anyio
-    async def test_handle_saved_location(
-        self, mock_dc, mock_bakchod_dao, mock_requests, mock_update
-    ):
+    async def test_handle_saved_location(self, mock_dc, mock_bakchod_dao, mock_get, mock_update):
         """Test weather handler with saved location in metadata."""
         update, context = mock_update
         context.args = None
@@ -124,8 +119,7 @@ class TestWeather:
             "name": "Delhi",
             "coord": {"lat": 28.7041, "lon": 77.1025},
         }
-        mock_requests.get.return_value = mock_response
-        mock_requests.exceptions.HTTPError = Exception
+        mock_get.return_value = mock_response
 
         await weather.handle(update, context)
 
@@ -161,12 +155,12 @@ class TestWeather:
         assert len(result) > 0
         assert "weird weather" in result
 
-    @patch("src.bot.handlers.weather.requests")
+    @patch("src.bot.handlers.weather.http_client.get", new_callable=AsyncMock)
     @patch("src.bot.handlers.weather.bakchod_dao")
     @patch("src.bot.handlers.weather.dc")
     @pytest.mark.anyio
     async def test_handle_location_from_reply_text(
-        self, mock_dc, mock_bakchod_dao, mock_requests, mock_update
+        self, mock_dc, mock_bakchod_dao, mock_get, mock_update
     ):
         """Test weather handler with location from reply message text."""
         update, context = mock_update
@@ -194,19 +188,18 @@ class TestWeather:
             "name": "London",
             "coord": {"lat": 51.5074, "lon": -0.1278},
         }
-        mock_requests.get.return_value = mock_response
-        mock_requests.exceptions.HTTPError = Exception
+        mock_get.return_value = mock_response
 
         await weather.handle(update, context)
 
         mock_dc.log_command_usage.assert_called_once_with("weather", update)
 
-    @patch("src.bot.handlers.weather.requests")
+    @patch("src.bot.handlers.weather.http_client.get", new_callable=AsyncMock)
     @patch("src.bot.handlers.weather.bakchod_dao")
     @patch("src.bot.handlers.weather.dc")
     @pytest.mark.anyio
     async def test_handle_location_from_reply_caption(
-        self, mock_dc, mock_bakchod_dao, mock_requests, mock_update
+        self, mock_dc, mock_bakchod_dao, mock_get, mock_update
     ):
         """Test weather handler with location from reply message caption."""
         update, context = mock_update
@@ -234,19 +227,18 @@ class TestWeather:
             "name": "Paris",
             "coord": {"lat": 48.8566, "lon": 2.3522},
         }
-        mock_requests.get.return_value = mock_response
-        mock_requests.exceptions.HTTPError = Exception
+        mock_get.return_value = mock_response
 
         await weather.handle(update, context)
 
         mock_dc.log_command_usage.assert_called_once_with("weather", update)
 
-    @patch("src.bot.handlers.weather.requests")
+    @patch("src.bot.handlers.weather.http_client.get", new_callable=AsyncMock)
     @patch("src.bot.handlers.weather.bakchod_dao")
     @patch("src.bot.handlers.weather.dc")
     @pytest.mark.anyio
     async def test_handle_location_from_message_caption(
-        self, mock_dc, mock_bakchod_dao, mock_requests, mock_update
+        self, mock_dc, mock_bakchod_dao, mock_get, mock_update
     ):
         """Test weather handler with location from message caption."""
         update, context = mock_update
@@ -271,8 +263,7 @@ class TestWeather:
             "name": "Berlin",
             "coord": {"lat": 52.5200, "lon": 13.4050},
         }
-        mock_requests.get.return_value = mock_response
-        mock_requests.exceptions.HTTPError = Exception
+        mock_get.return_value = mock_response
 
         await weather.handle(update, context)
 
@@ -308,9 +299,9 @@ class TestWeather:
         sent_message = MagicMock()
         update.message.reply_text.return_value = sent_message
 
-        http_error = requests.exceptions.HTTPError()
-        http_error.response = MagicMock()
-        http_error.response.status_code = 404
+        http_error = httpx.HTTPStatusError(
+            "error", request=MagicMock(), response=MagicMock(status_code=404)
+        )
 
         with (
             patch("src.bot.handlers.weather.WEATHER_API_KEY", "test_key"),
@@ -319,7 +310,11 @@ class TestWeather:
                 return_value=mock_bakchod,
             ),
             patch("src.bot.handlers.weather.dc"),
-            patch("src.bot.handlers.weather.requests.get", side_effect=http_error),
+            patch(
+                "src.bot.handlers.weather.http_client.get",
+                new_callable=AsyncMock,
+                side_effect=http_error,
+            ),
         ):
             await weather.handle(update, context)
 
@@ -337,9 +332,9 @@ class TestWeather:
         sent_message = MagicMock()
         update.message.reply_text.return_value = sent_message
 
-        http_error = requests.exceptions.HTTPError()
-        http_error.response = MagicMock()
-        http_error.response.status_code = 500
+        http_error = httpx.HTTPStatusError(
+            "error", request=MagicMock(), response=MagicMock(status_code=500)
+        )
 
         with (
             patch("src.bot.handlers.weather.WEATHER_API_KEY", "test_key"),
@@ -348,7 +343,11 @@ class TestWeather:
                 return_value=mock_bakchod,
             ),
             patch("src.bot.handlers.weather.dc"),
-            patch("src.bot.handlers.weather.requests.get", side_effect=http_error),
+            patch(
+                "src.bot.handlers.weather.http_client.get",
+                new_callable=AsyncMock,
+                side_effect=http_error,
+            ),
         ):
             await weather.handle(update, context)
 
@@ -365,7 +364,7 @@ class TestWeather:
         sent_message = MagicMock()
         update.message.reply_text.return_value = sent_message
 
-        request_exception = requests.exceptions.RequestException("Connection error")
+        request_exception = httpx.ConnectError("Connection error")
 
         with (
             patch("src.bot.handlers.weather.WEATHER_API_KEY", "test_key"),
@@ -374,7 +373,11 @@ class TestWeather:
                 return_value=mock_bakchod,
             ),
             patch("src.bot.handlers.weather.dc"),
-            patch("src.bot.handlers.weather.requests.get", side_effect=request_exception),
+            patch(
+                "src.bot.handlers.weather.http_client.get",
+                new_callable=AsyncMock,
+                side_effect=request_exception,
+            ),
         ):
             await weather.handle(update, context)
 
@@ -407,7 +410,11 @@ class TestWeather:
                 return_value=mock_bakchod,
             ),
             patch("src.bot.handlers.weather.dc"),
-            patch("src.bot.handlers.weather.requests.get", return_value=mock_response),
+            patch(
+                "src.bot.handlers.weather.http_client.get",
+                new_callable=AsyncMock,
+                return_value=mock_response,
+            ),
         ):
             await weather.handle(update, context)
 
@@ -434,7 +441,11 @@ class TestWeather:
                 return_value=mock_bakchod,
             ),
             patch("src.bot.handlers.weather.dc"),
-            patch("src.bot.handlers.weather.requests.get", return_value=mock_response),
+            patch(
+                "src.bot.handlers.weather.http_client.get",
+                new_callable=AsyncMock,
+                return_value=mock_response,
+            ),
         ):
             await weather.handle(update, context)
 
@@ -245,3 +245,77 @@ async def test_handle_webm_file_with_reply_to_text(mock_update, mock_context):
         await webm.handle(mock_update, mock_context)
 
     assert mock_update.message.reply_text.called
+
+
+@pytest.mark.asyncio
+async def test_handle_webm_converts_in_memory_and_sends(mock_update, mock_context, tmp_path):
+    """The webm is piped to the transcoder and the converted file is sent and removed"""
+    mock_document = MagicMock(spec=Document)
+    mock_document.file_name = "clip.webm"
+    mock_document.file_id = "file123"
+    mock_document.file_unique_id = "unique123"
+    mock_update.message.document = mock_document
+    mock_update.message.chat_id = 456
+    mock_update.message.caption = None
+
+    mock_message = MagicMock()
+    mock_message.delete = AsyncMock()
+    mock_update.message.reply_text = AsyncMock(return_value=mock_message)
+
+    webm_file = MagicMock()
+    webm_file.download_as_bytearray = AsyncMock(return_value=bytearray(b"webm"))
+    mock_context.bot.get_file = AsyncMock(return_value=webm_file)
+    mock_context.bot.send_video = AsyncMock()
+
+    mp4_path = tmp_path / "converted.mp4"
+    mp4_path.write_bytes(b"mp4")
+
+    with (
+        patch("src.bot.handlers.webm.dc"),
+        patch("src.bot.handlers.webm.util.extract_pretty_name_from_tg_user", return_value="Bob"),
+        patch(
+            "src.bot.handlers.webm.transcode.to_mp4",
+            new_callable=AsyncMock,
+            return_value=str(mp4_path),
+        ) as mock_to_mp4,
+    ):
+        await webm.handle(mock_update, mock_context)
+
+    mock_to_mp4.assert_awaited_once_with(b"webm")
+    assert mock_context.bot.send_video.call_args.kwargs["chat_id"] == 456
+    assert not mp4_path.exists()
+    mock_message.delete.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_handle_webm_conversion_failure(mock_update, mock_context):
+    """A failed conversion is reported on the status message"""
+    mock_document = MagicMock(spec=Document)
+    mock_document.file_name = "clip.webm"
+    mock_document.file_id = "file123"
+    mock_document.file_unique_id = "unique123"
+    mock_update.message.document = mock_document
+    mock_update.message.caption = None
+
+    mock_message = MagicMock()
+    mock_message.edit_text = AsyncMock()
+    mock_update.message.reply_text = AsyncMock(return_value=mock_message)
+
+    webm_file = MagicMock()
+    webm_file.download_as_bytearray = AsyncMock(return_value=bytearray(b"webm"))
+    mock_context.bot.get_file = AsyncMock(return_value=webm_file)
+    mock_context.bot.send_video = AsyncMock()
+
+    with (
+        patch("src.bot.handlers.webm.dc"),
+        patch("src.bot.handlers.webm.util.extract_pretty_name_from_tg_user", return_value="Bob"),
+        patch(
+            "src.bot.handlers.webm.transcode.to_mp4",
+            new_callable=AsyncMock,
+            side_effect=webm.transcode.TranscodeError("Invalid data"),
+        ),
+    ):
+        await webm.handle(mock_update, mock_context)
+
+    assert "conversion failed" in mock_message.edit_text.call_args.kwargs["text"]
+    mock_context.bot.send_video.assert_not_called()
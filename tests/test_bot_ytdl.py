@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
 import pytest
@@ -5,12 +6,15 @@ from telegram import Message, Update
 from telegram.ext import ContextTypes
 
 from src.bot.handlers import ytdl
+from src.domain import downloads
 
 
 @pytest.fixture
 def mock_update():
     update = MagicMock(spec=Update)
     update.message = MagicMock(spec=Message)
+    update.message.text = "/ytdl https://youtube.com/watch?v=test123"
+    update.message.from_user.id = 1
     return update
 
 
@@ -20,70 +24,134 @@ def mock_context():
     return context
 
 
-@pytest.mark.asyncio
-async def test_handle_success(mock_update, mock_context):
-    """Test handler successful download and upload"""
-    mock_update.message.text = "/ytdl https://youtube.com/watch?v=test123"
-
-    mock_message = MagicMock()
-    mock_message.edit_text = AsyncMock()
-    mock_update.message.reply_text = AsyncMock(return_value=mock_message)
-    mock_update.message.chat_id = 12345
-
-    # Mock yt-dlp
-    with patch("src.bot.handlers.ytdl.ydl") as mock_ydl:
-        mock_ydl.extract_info.return_value = {
+@pytest.fixture
+def mock_message(mock_update):
+    message = MagicMock()
+    message.edit_text = AsyncMock()
+    message.delete = AsyncMock()
+    mock_update.message.reply_text = AsyncMock(return_value=message)
+    return message
+
+
+@pytest.fixture(autouse=True)
+def mock_ydl():
+    with patch("src.bot.handlers.ytdl.ydl") as ydl:
+        ydl.extract_info.return_value = {
             "id": "test123",
+            "extractor_key": "Youtube",
             "title": "Test Video Title",
         }
+        yield ydl
 
-        # Mock multiprocess
-        with patch("src.bot.handlers.ytdl.multiprocessing.Process") as mock_process:
-            mock_p = MagicMock()
-            mock_p.is_alive.return_value = False
-            mock_p.join.return_value = None
-            mock_process.return_value = mock_p
 
-            # Mock os.listdir
-            with patch("src.bot.handlers.ytdl.os.listdir") as mock_listdir:
-                mock_listdir.return_value = ["test123.mp4"]
+def finished_job(result=None, exception=None):
+    future = asyncio.get_running_loop().create_future()
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
 
-                with patch("src.bot.handlers.ytdl.os.path.join") as mock_join:
-                    mock_join.return_value = "/path/to/test123.mp4"
+    job = downloads.Job(
+        key="ytdl:Youtube:test123",
+        url="https://youtube.com/watch?v=test123",
+        video_id="test123",
+        user_id=1,
+        future=future,
+    )
+    job.release = MagicMock()
+    return job
 
-                    with (
-                        patch("builtins.open", mock_open(read_data=b"fake video")),
-                        patch("src.bot.handlers.ytdl.util.delete_file"),
-                    ):
-                        await ytdl.handle(mock_update, mock_context)
 
+@pytest.mark.asyncio
+async def test_handle_success(mock_update, mock_context, mock_message):
+    """Test handler successful download and upload"""
+    job = finished_job("/path/to/test123.mp4")
+
+    with (
+        patch("src.bot.handlers.ytdl.downloads.submit", return_value=job) as mock_submit,
+        patch("src.bot.handlers.ytdl.transcode.needs_transcode", return_value=False),
+        patch("builtins.open", mock_open(read_data=b"fake video")),
+    ):
+        await ytdl.handle(mock_update, mock_context)
+
+    args = mock_submit.call_args.args
+    assert args == (
+        "https://youtube.com/watch?v=test123",
+        "test123",
+        "ytdl:Youtube:test123",
+        1,
+    )
     mock_update.message.reply_video.assert_called_once()
+    assert "Test Video Title" in mock_update.message.reply_video.call_args.kwargs["caption"]
+    mock_message.delete.assert_awaited_once()
+    job.release.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_handle_timeout(mock_update, mock_context):
-    """Test handler when download times out"""
-    mock_update.message.text = "/ytdl https://youtube.com/watch?v=test123"
+async def test_handle_converts_unplayable_download(mock_update, mock_context, mock_message):
+    job = finished_job("/path/to/test123.mkv")
+
+    with (
+        patch("src.bot.handlers.ytdl.downloads.submit", return_value=job),
+        patch(
+            "src.bot.handlers.ytdl.transcode.to_mp4",
+            new_callable=AsyncMock,
+            return_value="/tmp/converted.mp4",
+        ) as mock_to_mp4,
+        patch("src.bot.handlers.ytdl.util.delete_file") as mock_delete,
+        patch("builtins.open", mock_open(read_data=b"fake video")) as mock_file,
+    ):
+        await ytdl.handle(mock_update, mock_context)
+
+    mock_to_mp4.assert_awaited_once_with("/path/to/test123.mkv")
+    mock_file.assert_any_call("/tmp/converted.mp4", "rb")
+    mock_delete.assert_called_once_with("/tmp/converted.mp4")
+    mock_update.message.reply_video.assert_called_once()
 
-    mock_message = MagicMock()
-    mock_message.edit_text = AsyncMock()
-    mock_update.message.reply_text = AsyncMock(return_value=mock_message)
 
-    with patch("src.bot.handlers.ytdl.ydl") as mock_ydl:
-        mock_ydl.extract_info.return_value = {
-            "id": "test123",
-            "title": "Test Video",
-        }
-
-        with patch("src.bot.handlers.ytdl.multiprocessing.Process") as mock_process:
-            mock_p = MagicMock()
-            mock_p.is_alive.return_value = True  # Process still running
-            mock_p.terminate.return_value = None
-            mock_p.join.return_value = None
-            mock_process.return_value = mock_p
+@pytest.mark.asyncio
+async def test_handle_timeout(mock_update, mock_context, mock_message):
+    """Test handler when download times out"""
+    job = finished_job(exception=downloads.DownloadTimeoutError("too slow"))
 
-            await ytdl.handle(mock_update, mock_context)
+    with patch("src.bot.handlers.ytdl.downloads.submit", return_value=job):
+        await ytdl.handle(mock_update, mock_context)
 
-    mock_message.edit_text.assert_called()
     call_args = mock_message.edit_text.call_args
     assert "cancelled" in call_args.args[0].lower()
+    mock_update.message.reply_video.assert_not_called()
+    job.release.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_handle_failed_download(mock_update, mock_context, mock_message):
+    job = finished_job(exception=downloads.DownloadError("boom"))
+
+    with patch("src.bot.handlers.ytdl.downloads.submit", return_value=job):
+        await ytdl.handle(mock_update, mock_context)
+
+    assert "Error downloading the video" in mock_message.edit_text.call_args.args[0]
+    job.release.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("error", "reply"),
+    [
+        (downloads.UserLimitError("2 downloads in flight"), "already have downloads"),
+        (downloads.QueueFullError("10 downloads queued"), "Too many downloads"),
+    ],
+)
+async def test_handle_over_limits(mock_update, mock_context, mock_message, error, reply):
+    with patch("src.bot.handlers.ytdl.downloads.submit", side_effect=error):
+        await ytdl.handle(mock_update, mock_context)
+
+    assert reply in mock_message.edit_text.call_args.args[0]
+    mock_update.message.reply_video.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_progress_is_reported_on_the_status_message(mock_message):
+    await ytdl.progress_reporter(mock_message)(0.42)
+
+    mock_message.edit_text.assert_awaited_once_with("Downloading video via yt-dlp (^◡^) 42%")
@@ -1,8 +1,10 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from telegram import Chat, Message, Update, User
 
+from src import db
 from src.domain import dc
 
 
@@ -56,20 +58,16 @@ def test_log_command_usage_with_valid_update(mock_update):
     """Test logging command usage with valid update."""
     with (
         patch("src.domain.dc.analytics") as _mock_analytics,
-        patch("src.domain.dc.metrics") as _mock_sentry_metrics,
-        patch("src.domain.dc.Bakchod") as mock_bakchod_model,
-        patch("src.domain.dc.Group") as _mock_group_model,
-        patch("src.domain.dc.CommandUsage") as _mock_command_usage,
+        patch("src.domain.dc.CommandUsage") as mock_command_usage,
         patch("src.domain.dc.prom_metrics") as _mock_prom_metrics,
         patch("src.domain.dc.sync_persistence_data") as mock_sync,
     ):
-        mock_bakchod_model.get.return_value = MagicMock()
-        _mock_group_model.get.return_value = MagicMock()
-        _mock_command_usage.create.return_value = MagicMock()
-
         dc.log_command_usage("test_command", mock_update)
 
         assert mock_sync.called
+        assert mock_command_usage.insert.call_args.kwargs["from_bakchod"] == 123456
+        assert mock_command_usage.insert.call_args.kwargs["group"] == -1001234567890
+        mock_command_usage.insert.return_value.execute.assert_called_once()
 
 
 def test_log_command_usage_without_message():
@@ -85,19 +83,36 @@ def test_log_command_usage_without_message():
 def test_log_command_usage_with_database_error(mock_update):
     """Test logging command usage when database operations fail."""
     with (
-        patch("src.domain.dc.analytics") as _mock_analytics,
-        patch("src.domain.dc.metrics") as _mock_sentry_metrics,
-        patch("src.domain.dc.Bakchod") as mock_bakchod_model,
-        patch("src.domain.dc.Group") as _mock_group_model,
-        patch("src.domain.dc.CommandUsage") as _mock_command_usage,
+        patch("src.domain.dc.analytics") as mock_analytics,
+        patch("src.domain.dc.CommandUsage") as mock_command_usage,
         patch("src.domain.dc.prom_metrics") as _mock_prom_metrics,
         patch("src.domain.dc.sync_persistence_data") as mock_sync,
     ):
-        mock_bakchod_model.get.side_effect = Exception("Database error")
+        mock_command_usage.insert.return_value.execute.side_effect = Exception("Database error")
 
         dc.log_command_usage("test_command", mock_update)
 
         assert mock_sync.called
+        mock_analytics.count.assert_any_call(
+            "dc.command.db_error", attributes={"command": "test_command"}
+        )
+
+
+@pytest.mark.asyncio
+async def test_log_command_usage_writes_off_the_event_loop(mock_update):
+    """On the event loop, the CommandUsage row is written on a db worker."""
+    with (
+        patch("src.domain.dc.analytics"),
+        patch("src.domain.dc.CommandUsage") as mock_command_usage,
+        patch("src.domain.dc.prom_metrics"),
+        patch("src.domain.dc.sync_persistence_data"),
+        patch("src.domain.dc.aio.run", new_callable=AsyncMock) as mock_run,
+    ):
+        dc.log_command_usage("test_command", mock_update)
+        await asyncio.gather(*dc._background_tasks)
+
+    mock_run.assert_awaited_once_with(dc._save_command_usage, "test_command", mock_update)
+    mock_command_usage.insert.assert_not_called()
 
 
 def test_sync_persistence_data_with_valid_update(mock_update):
@@ -108,7 +123,6 @@ def test_sync_persistence_data_with_valid_update(mock_update):
         patch("src.domain.dc.message_dao") as mock_message_dao,
         patch("src.domain.dc.group_dao") as mock_group_dao,
         patch("src.domain.dc.analytics") as _mock_analytics,
-        patch("src.domain.dc.metrics") as _mock_sentry_metrics,
         patch("src.domain.dc.sio") as _mock_sio,
         patch("src.domain.dc.asyncio.create_task") as _mock_create_task,
     ):
@@ -124,7 +138,7 @@ def test_sync_persistence_data_with_valid_update(mock_update):
 
         assert mock_bakchod.username == mock_update.message.from_user.username
         assert mock_bakchod.lastseen is not None
-        assert mock_bakchod.save.called
+        mock_bakchod_dao.save_deferred.assert_called_once_with(mock_bakchod)
 
 
 def test_sync_persistence_data_without_from_user():
@@ -147,7 +161,6 @@ def test_sync_persistence_data_with_exception(mock_update):
     with (
         patch("src.domain.dc.bakchod_dao") as mock_bakchod_dao,
         patch("src.domain.dc.analytics") as _mock_analytics,
-        patch("src.domain.dc.metrics") as _mock_sentry_metrics,
     ):
         mock_bakchod_dao.get_or_create_bakchod_from_tg_user.side_effect = Exception(
             "Database error"
@@ -155,3 +168,25 @@ def test_sync_persistence_data_with_exception(mock_update):
 
         with pytest.raises(Exception):  # noqa: B017
             dc.sync_persistence_data(mock_update)
+
+
+def test_sync_persistence_data_emits_message_without_id(mock_update):
+    """Queued messages have no id yet, so none is sent to socket.io listeners."""
+    queued = db.Message(message_id="1", to_id="-100", text="hi", from_bakchod=db.Bakchod(tg_id="3"))
+
+    with (
+        patch("src.domain.dc.bakchod_dao"),
+        patch("src.domain.dc.message_dao") as mock_message_dao,
+        patch("src.domain.dc.group_dao"),
+        patch("src.domain.dc.analytics"),
+        patch("src.domain.dc.sio") as mock_sio,
+        patch("src.domain.dc.asyncio.create_task"),
+    ):
+        mock_message_dao.log_message_from_update.return_value = queued
+
+        dc.sync_persistence_data(mock_update)
+
+    event, payload = mock_sio.emit.call_args[0]
+    assert event == "message"
+    assert "id" not in payload["message"]
+    assert payload["message"]["text"] == "hi"
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.domain import downloads
+
+# Stands in for yt-dlp: "<video id>:<action>" urls, the action being how long
+# to take between progress lines, or "fail"
+FAKE_YTDL = """
+import os, sys, time
+out, url = sys.argv[1], sys.argv[2]
+video_id, _, action = url.partition(":")
+if action == "fail":
+    print("ERROR: boom", file=sys.stderr)
+    sys.exit(1)
+for done in (50, 100):
+    print(f"chaddi-progress {done} NA 100", flush=True)
+    time.sleep(float(action or 0))
+with open(os.path.join(out, video_id + ".mp4"), "w") as f:
+    f.write("video")
+"""
+
+COMMAND = downloads._command
+
+
+@pytest.fixture(autouse=True)
+def fake_ytdl(tmp_path):
+    with (
+        patch("src.domain.downloads.DOWNLOAD_DIR", str(tmp_path)),
+        patch(
+            "src.domain.downloads._command",
+            side_effect=lambda url: [sys.executable, "-c", FAKE_YTDL, str(tmp_path), url],
+        ),
+        patch("src.domain.downloads.PROGRESS_INTERVAL_SECONDS", 0),
+    ):
+        yield tmp_path
+
+    downloads._jobs.clear()
+    downloads._user_jobs.clear()
+
+
+def submit(video_id, action="", user_id=1, **kwargs):
+    return downloads.submit(f"{video_id}:{action}", video_id, f"yt:{video_id}", user_id, **kwargs)
+
+
+class TestParseProgress:
+    def test_uses_total_bytes(self):
+        assert downloads.parse_progress("chaddi-progress 25 100 NA") == 0.25
+
+    def test_falls_back_to_estimate(self):
+        assert downloads.parse_progress("chaddi-progress 25 NA 50.0\n") == 0.5
+
+    def test_unknown_total(self):
+        assert downloads.parse_progress("chaddi-progress 25 NA NA") is None
+
+    def test_other_output(self):
+        assert downloads.parse_progress("[youtube] abc: Downloading webpage") is None
+
+
+def test_url_is_never_read_as_an_option():
+    assert COMMAND("--exec=touch pwned")[-2:] == ["--", "--exec=touch pwned"]
+
+
+class TestSubmit:
+    @pytest.mark.asyncio
+    async def test_downloads_and_reports_progress(self, fake_ytdl):
+        on_progress = AsyncMock()
+        job = submit("abc", on_progress=on_progress)
+
+        path = await job
+
+        assert path == os.path.join(fake_ytdl, "abc.mp4")
+        assert job.status == "done"
+        assert [call.args[0] for call in on_progress.await_args_list] == [0.5, 1.0]
+
+        job.release()
+        assert downloads.get_job("yt:abc") is None
+
+    @pytest.mark.asyncio
+    async def test_file_is_deleted_when_released(self):
+        job = submit("abc")
+        path = await job
+
+        job.release()
+
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_same_video_joins_in_flight_job(self):
+        first = submit("abc", "0.05", user_id=1)
+        second = submit("abc", "0.05", user_id=2)
+
+        assert second is first
+        path = await first
+
+        first.release()
+        assert os.path.exists(path)
+        second.release()
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_same_video_joins_finished_job_until_released(self):
+        """A finished download is shared, not downloaded again over the file being sent."""
+        first = submit("abc")
+        path = await first
+
+        second = submit("abc", user_id=2)
+        assert second is first
+        assert await second == path
+
+        first.release()
+        assert os.path.exists(path)
+        second.release()
+        assert not os.path.exists(path)
+        assert downloads.get_job("yt:abc") is None
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_not_joined(self):
+        failed = submit("abc", "fail")
+        with pytest.raises(downloads.DownloadError):
+            await failed
+
+        retry = submit("abc")
+
+        assert retry is not failed
+        assert os.path.exists(await retry)
+        failed.release()
+        assert downloads.get_job("yt:abc") is retry
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit(self):
+        with patch("src.domain.downloads.MAX_JOBS_PER_USER", 1):
+            job = submit("abc", "0.05")
+            with pytest.raises(downloads.UserLimitError):
+                submit("def")
+            other_user = submit("def", user_id=2)
+
+            await asyncio.gather(job, other_user)
+            # Finished jobs don't count
+            await submit("ghi")
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_download(self, fake_ytdl):
+        with patch("src.domain.downloads.MAX_DOWNLOAD_SECONDS", 0.2):
+            job = submit("abc", "5")
+
+            with pytest.raises(downloads.DownloadTimeoutError):
+                await job
+
+        assert job.status == "failed"
+        assert not os.path.exists(os.path.join(fake_ytdl, "abc.mp4"))
+
+    @pytest.mark.asyncio
+    async def test_failed_download(self):
+        job = submit("abc", "fail")
+
+        with pytest.raises(downloads.DownloadError, match="boom"):
+            await job
+
+
+class TestWorkers:
+    @pytest.mark.asyncio
+    async def test_downloads_run_concurrently(self):
+        downloads.start()
+        start = time.perf_counter()
+
+        try:
+            await asyncio.gather(submit("a", "0.3", user_id=1), submit("b", "0.3", user_id=2))
+        finally:
+            await downloads.stop()
+
+        # Each takes 0.6s, one after the other would be 1.2s
+        assert time.perf_counter() - start < 1.1
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        with (
+            patch("src.domain.downloads.WORKERS", 1),
+            patch("src.domain.downloads.MAX_QUEUED_JOBS", 1),
+        ):
+            downloads.start()
+            try:
+                running = submit("a", "0.1", user_id=1)
+                await asyncio.sleep(0)  # the worker takes it off the queue
+                queued = submit("b", user_id=2)
+
+                with pytest.raises(downloads.QueueFullError):
+                    submit("c", user_id=3)
+
+                await asyncio.gather(running, queued)
+            finally:
+                await downloads.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_queued_jobs(self):
+        with patch("src.domain.downloads.WORKERS", 1):
+            downloads.start()
+            submit("a", "5", user_id=1)
+            await asyncio.sleep(0)
+            queued = submit("b", user_id=2)
+
+            await downloads.stop()
+
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert downloads.get_job("yt:b") is None
@@ -0,0 +1,158 @@
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageFont
+from pilmoji import Pilmoji
+
+from src.domain import emoji_glyphs
+from src.domain.emoji_glyphs import LocalEmojiSource, build
+
+FONT = "src/resources/fonts/Merriweather-Regular.ttf"
+RED = (255, 0, 0, 255)
+
+
+@pytest.fixture
+def store(tmp_path):
+    emoji_glyphs.read_glyph.cache_clear()
+    with patch("src.domain.emoji_glyphs.STORE_DIR", str(tmp_path)):
+        yield tmp_path
+    emoji_glyphs.read_glyph.cache_clear()
+
+
+def add_glyph(store, name, color=RED):
+    Image.new("RGBA", (32, 32), color).save(store / f"{name}.png")
+
+
+class TestGlyphName:
+    @pytest.mark.parametrize(
+        ("emoji", "name"),
+        [
+            ("🙏", "1f64f"),
+            ("🇮🇳", "1f1ee-1f1f3"),
+            # The variation selector is left out
+            ("❤️", "2764"),
+            ("❤", "2764"),
+            ("👨‍👩‍👧", "1f468-200d-1f469-200d-1f467"),
+        ],
+    )
+    def test_codepoint_sequence(self, emoji, name):
+        assert emoji_glyphs.glyph_name(emoji) == name
+
+
+class TestGetGlyph:
+    def test_reads_glyph_from_store(self, store):
+        add_glyph(store, "1f64f")
+
+        glyph = emoji_glyphs.get_glyph("🙏")
+
+        assert Image.open(io.BytesIO(glyph)).getpixel((0, 0)) == RED
+
+    def test_missing_glyph(self, store):
+        assert emoji_glyphs.get_glyph("🙏") is None
+
+    def test_glyphs_are_read_once(self, store):
+        add_glyph(store, "1f64f")
+
+        first = emoji_glyphs.get_glyph("🙏")
+        os.remove(store / "1f64f.png")
+
+        assert emoji_glyphs.get_glyph("🙏") is first
+
+    def test_cache_is_bounded(self, store):
+        assert emoji_glyphs.read_glyph.cache_info().maxsize == emoji_glyphs.CACHE_SIZE
+
+
+class TestLocalEmojiSource:
+    def test_get_emoji(self, store):
+        add_glyph(store, "1f64f")
+        source = LocalEmojiSource()
+
+        assert isinstance(source.get_emoji("🙏"), io.BytesIO)
+        assert source.get_emoji("🎉") is None
+        assert source.get_discord_emoji(1234) is None
+
+    def test_pilmoji_draws_emojis_from_the_store(self, store):
+        add_glyph(store, "1f64f")
+        img = Image.new("RGBA", (200, 60), (255, 255, 255, 255))
+        font = ImageFont.truetype(FONT, 40)
+
+        with (
+            patch("pilmoji.source.HTTPBasedSource.request") as mock_request,
+            Pilmoji(img, source=LocalEmojiSource) as pilmoji,
+        ):
+            pilmoji.text((0, 0), "hi 🙏", (0, 0, 0), font)
+
+        assert RED in {color for _, color in img.getcolors(200 * 60)}
+        mock_request.assert_not_called()
+
+
+class TestBuild:
+    @pytest.mark.parametrize(
+        ("file_name", "name"),
+        [
+            ("1f64f.png", "1f64f"),
+            ("1F1EE-1F1F3.png", "1f1ee-1f1f3"),
+            ("emoji_u1f1ee_1f1f3.png", "1f1ee-1f1f3"),
+            ("2764-fe0f.png", "2764"),
+            ("1f64f.svg", None),
+            ("LICENSE.png", None),
+            ("110000.png", None),
+        ],
+    )
+    def test_parse_glyph_name(self, file_name, name):
+        assert build.parse_glyph_name(file_name) == name
+
+    def test_build_from_directory(self, tmp_path):
+        source = tmp_path / "twemoji"
+        source.mkdir()
+        Image.new("RGBA", (72, 72), RED).save(source / "1f64f.png")
+        Image.new("RGB", (136, 128), (0, 0, 255)).save(source / "emoji_u2764_fe0f.png")
+        (source / "README.md").write_text("not a glyph")
+        out = tmp_path / "store"
+
+        assert build.build_from_directory(str(source), str(out), size=64) == 2
+
+        assert sorted(os.listdir(out)) == ["1f64f.png", "2764.png"]
+        for name in os.listdir(out):
+            with Image.open(out / name) as glyph:
+                assert glyph.size == (64, 64)
+                assert glyph.mode == "RGBA"
+
+    def test_build_from_font_skips_emojis_it_doesnt_have(self, tmp_path):
+        out = tmp_path / "store"
+
+        emojis = {"\u00a9": {}, "\u00a9\ufe0f": {}, "🙏": {}}
+
+        with patch.dict("src.domain.emoji_glyphs.build.emoji_data.EMOJI_DATA", emojis, clear=True):
+            count = build.build_from_font(FONT, str(out), size=32, font_size=24)
+
+        # Merriweather has a copyright sign, but no praying hands
+        assert count == 1
+        assert os.listdir(out) == ["a9.png"]
+
+
+class TestWarnIfEmpty:
+    def test_warns_without_glyphs(self, store):
+        with patch("src.domain.emoji_glyphs.logger") as mock_logger:
+            assert emoji_glyphs.warn_if_empty() == 0
+
+        mock_logger.warning.assert_called_once()
+
+    def test_missing_store(self, tmp_path):
+        with (
+            patch("src.domain.emoji_glyphs.STORE_DIR", str(tmp_path / "missing")),
+            patch("src.domain.emoji_glyphs.logger") as mock_logger,
+        ):
+            assert emoji_glyphs.warn_if_empty() == 0
+
+        mock_logger.warning.assert_called_once()
+
+    def test_quiet_with_glyphs(self, store):
+        add_glyph(store, "1f64f")
+
+        with patch("src.domain.emoji_glyphs.logger") as mock_logger:
+            assert emoji_glyphs.warn_if_empty() == 1
+
+        mock_logger.warning.assert_not_called()
@@ -0,0 +1,132 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from peewee import DoesNotExist
+
+from src.db import group_cache, group_dao
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    group_cache.clear()
+    yield
+    group_cache.clear()
+
+
+@pytest.fixture
+def warm_cache():
+    with (
+        patch("src.db.group_cache.Group") as mock_group,
+        patch("src.db.group_cache.GroupMember") as mock_groupmember,
+    ):
+        mock_group.select.return_value.tuples.return_value = [
+            ("-100", "Test Group", datetime.datetime.now()),
+        ]
+        mock_groupmember.select.return_value.tuples.return_value = [
+            ("-100", "1"),
+            ("-100", "2"),
+        ]
+        group_cache.warm()
+
+
+def make_update(chat_id=-100, title="Test Group", user_id=1):
+    update = MagicMock()
+    update.message.chat.id = chat_id
+    update.message.chat.title = title
+    update.message.from_user.id = user_id
+    return update
+
+
+class TestGroupCache:
+    def test_cold_cache_ignores_writes(self):
+        """Nothing is remembered until the cache has been warmed."""
+        group_cache.add_member("-100", "1")
+        group_cache.set_group("-100", "Test Group", datetime.datetime.now())
+
+        assert not group_cache.is_member("-100", "1")
+        assert group_cache.get_group("-100") is None
+
+    def test_warm_loads_groups_and_members(self, warm_cache):
+        """Warming loads every Group and GroupMember, normalising ids to str."""
+        assert group_cache.is_warm()
+        assert group_cache.get_group(-100)[0] == "Test Group"
+        assert group_cache.is_member(-100, 1)
+        assert group_cache.is_member("-100", "2")
+        assert not group_cache.is_member("-100", "3")
+
+    def test_remove_member(self, warm_cache):
+        group_cache.remove_member(-100, 1)
+
+        assert not group_cache.is_member(-100, 1)
+
+
+class TestLogGroupFromUpdateWithCache:
+    @patch("src.db.group_dao.GroupMember")
+    @patch("src.db.group_dao.Group")
+    def test_known_group_and_member_skip_db(self, mock_group, mock_groupmember, warm_cache):
+        """A known member posting in a known Group with the same title costs no queries."""
+        group_dao.log_group_from_update(make_update())
+
+        mock_group.get.assert_not_called()
+        mock_group.update.assert_not_called()
+        mock_groupmember.get.assert_not_called()
+        mock_groupmember.create.assert_not_called()
+
+    @patch("src.db.group_dao.GroupMember")
+    @patch("src.db.group_dao.Group")
+    def test_title_change_is_written(self, mock_group, _mock_groupmember, warm_cache):
+        """Renaming the Group writes the new title once."""
+        group_dao.log_group_from_update(make_update(title="Renamed"))
+        group_dao.log_group_from_update(make_update(title="Renamed"))
+
+        mock_group.update.assert_called_once()
+        assert mock_group.update.call_args[1]["name"] == "Renamed"
+        assert group_cache.get_group(-100)[0] == "Renamed"
+
+    @patch("src.db.group_dao.GroupMember")
+    @patch("src.db.group_dao.Group")
+    def test_stale_updated_is_refreshed(self, mock_group, _mock_groupmember, warm_cache):
+        """Group.updated is rewritten once GROUP_TOUCH_INTERVAL has passed."""
+        stale = datetime.datetime.now() - group_cache.GROUP_TOUCH_INTERVAL * 2
+        group_cache.set_group(-100, "Test Group", stale)
+
+        group_dao.log_group_from_update(make_update())
+
+        mock_group.update.assert_called_once()
+
+    @patch("src.db.group_dao.GroupMember")
+    @patch("src.db.group_dao.Group")
+    def test_new_member_is_created_once(self, _mock_group, mock_groupmember, warm_cache):
+        """An unknown member is looked up and created, then remembered."""
+        mock_groupmember.get.side_effect = DoesNotExist()
+
+        group_dao.log_group_from_update(make_update(user_id=3))
+        group_dao.log_group_from_update(make_update(user_id=3))
+
+        mock_groupmember.get.assert_called_once()
+        mock_groupmember.create.assert_called_once_with(group=-100, bakchod=3)
+        assert group_cache.is_member(-100, 3)
+
+    @patch("src.db.group_dao.GroupMember")
+    @patch("src.db.group_dao.Group")
+    def test_cold_cache_falls_back_to_db(self, mock_group, mock_groupmember):
+        """Without a warm cache every message goes to the db, as before."""
+        mock_group_instance = MagicMock()
+        mock_group.get.return_value = mock_group_instance
+
+        group_dao.log_group_from_update(make_update())
+        group_dao.log_group_from_update(make_update())
+
+        assert mock_group.get.call_count == 2
+        assert mock_group_instance.save.call_count == 2
+        assert mock_groupmember.get.call_count == 2
+
+    @patch("src.db.group_dao.GroupMember")
+    def test_remove_bakchod_from_group_updates_cache(self, _mock_groupmember, warm_cache):
+        bakchod = MagicMock()
+        bakchod.tg_id = "1"
+
+        group_dao.remove_bakchod_from_group(bakchod, "-100")
+
+        assert not group_cache.is_member("-100", "1")
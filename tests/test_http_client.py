@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+from cachetools import LRUCache
+
+from src.domain import http_client
+
+
+@pytest.fixture
+def transport():
+    """Route the shared client through a MockTransport recording in-flight requests per host."""
+    state = {"in_flight": {}, "peak": {}, "seen": []}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        state["seen"].append(request)
+        state["in_flight"][host] = state["in_flight"].get(host, 0) + 1
+        state["peak"][host] = max(state["peak"].get(host, 0), state["in_flight"][host])
+        await asyncio.sleep(0.01)
+        state["in_flight"][host] -= 1
+        return httpx.Response(200, json={"host": host})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("src.domain.http_client.get_client", return_value=client):
+        yield state
+
+    http_client._host_limits.clear()
+
+
+class TestGetClient:
+    @pytest.mark.asyncio
+    async def test_client_is_shared_and_configured(self):
+        client = http_client.get_client()
+
+        try:
+            assert http_client.get_client() is client
+            assert client.follow_redirects is True
+            assert client.timeout.read == http_client.TIMEOUT_SECONDS
+            assert client.timeout.connect == http_client.CONNECT_TIMEOUT_SECONDS
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    async def test_close_lets_the_next_request_create_a_new_client(self):
+        client = http_client.get_client()
+
+        await http_client.close()
+
+        assert client.is_closed
+        new_client = http_client.get_client()
+        assert new_client is not client
+        await http_client.close()
+
+    @pytest.mark.asyncio
+    async def test_close_without_client_is_a_no_op(self):
+        await http_client.close()
+        await http_client.close()
+
+
+class TestRequest:
+    @pytest.mark.asyncio
+    async def test_get_passes_arguments_through(self, transport):
+        response = await http_client.get(
+            "https://api.example.com/links", params={"url": "a b"}, headers={"X-Test": "1"}
+        )
+
+        assert response.json() == {"host": "api.example.com"}
+        request = transport["seen"][0]
+        assert request.method == "GET"
+        assert request.url.params["url"] == "a b"
+        assert request.headers["X-Test"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_limited_per_host(self, transport):
+        with patch("src.domain.http_client.MAX_CONNECTIONS_PER_HOST", 2):
+            await asyncio.gather(
+                *(http_client.get("https://slow.example.com/") for _ in range(6)),
+                *(http_client.get("https://other.example.com/") for _ in range(3)),
+            )
+
+        assert transport["peak"]["slow.example.com"] == 2
+        assert transport["peak"]["other.example.com"] == 2
+        assert len(transport["seen"]) == 9
+
+    @pytest.mark.asyncio
+    async def test_only_recent_hosts_keep_a_limit(self, transport):
+        with patch("src.domain.http_client._host_limits", LRUCache(maxsize=2)) as limits:
+            for host in ("a", "b", "c", "b"):
+                await http_client.get(f"https://{host}.example.com/")
+
+        assert set(limits) == {"b.example.com", "c.example.com"}
@@ -0,0 +1,145 @@
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.db import CachedLookup, lookup_cache
+from src.db.lookup_cache import LookupCache
+
+
+@pytest.fixture(autouse=True)
+def db_on_main_thread():
+    """Run the db tier on the main thread, where the test tables are."""
+
+    async def run(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    with patch("src.db.lookup_cache.aio.run", side_effect=run):
+        yield
+
+    CachedLookup.delete().execute()
+
+
+def fetcher(value):
+    return AsyncMock(return_value=value)
+
+
+class TestStore:
+    def test_store_and_load(self):
+        expires = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+        lookup_cache.store("t:a", {"x": 1}, expires)
+        lookup_cache.store("t:a", {"x": 2}, expires)
+
+        assert lookup_cache.load("t:a") == ({"x": 2}, expires)
+
+    def test_load_ignores_expired(self):
+        lookup_cache.store("t:a", {"x": 1}, datetime.datetime.now() - datetime.timedelta(seconds=1))
+
+        assert lookup_cache.load("t:a") is None
+
+    def test_prune_expired(self):
+        now = datetime.datetime.now()
+        lookup_cache.store("t:old", 1, now - datetime.timedelta(seconds=1))
+        lookup_cache.store("t:new", 2, now + datetime.timedelta(hours=1))
+
+        assert lookup_cache.prune_expired() == 1
+        assert [row.key for row in CachedLookup.select()] == ["t:new"]
+
+
+class TestLookupCache:
+    @pytest.mark.asyncio
+    async def test_fetches_once_then_serves_from_memory(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(hours=1))
+        fetch = fetcher({"links": 1})
+
+        assert await cache.get_or_fetch("a", fetch) == {"links": 1}
+        assert await cache.get_or_fetch("a", fetch) == {"links": 1}
+
+        fetch.assert_awaited_once()
+        assert lookup_cache.load("t:a")[0] == {"links": 1}
+
+    @pytest.mark.asyncio
+    async def test_survives_restart_through_db(self):
+        await LookupCache("t", ttl=datetime.timedelta(hours=1)).get_or_fetch("a", fetcher(1))
+
+        fetch = fetcher(2)
+        assert await LookupCache("t", ttl=datetime.timedelta(hours=1)).get_or_fetch("a", fetch) == 1
+        fetch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_none_is_not_cached(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(hours=1))
+
+        assert await cache.get_or_fetch("a", fetcher(None)) is None
+        assert await cache.get_or_fetch("a", fetcher(1)) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_fetched_again(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(seconds=-1))
+        fetch = fetcher(1)
+
+        await cache.get_or_fetch("a", fetch)
+        await cache.get_or_fetch("a", fetch)
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_fetch(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(hours=1))
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(cache.get_or_fetch("a", fetch) for _ in range(5)))
+
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert cache._fetches == {}
+
+    @pytest.mark.asyncio
+    async def test_memory_is_bounded_lru(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(hours=1), max_entries=2)
+
+        for key in ("a", "b"):
+            await cache.get_or_fetch(key, fetcher(key))
+        cache.get("a")
+        await cache.get_or_fetch("c", fetcher("c"))
+
+        assert list(cache._entries) == ["a", "c"]
+
+    @pytest.mark.asyncio
+    async def test_db_errors_fall_through_to_fetch(self):
+        cache = LookupCache("t", ttl=datetime.timedelta(hours=1))
+
+        with patch("src.db.lookup_cache.aio.run", side_effect=Exception("db down")):
+            assert await cache.get_or_fetch("a", fetcher(1)) == 1
+
+        assert cache.get("a") == 1
+
+    @pytest.mark.asyncio
+    async def test_negative_ttl_remembers_misses(self):
+        cache = LookupCache(
+            "t", ttl=datetime.timedelta(hours=1), negative_ttl=datetime.timedelta(minutes=1)
+        )
+        fetch = fetcher(None)
+
+        assert await cache.get_or_fetch("a", fetch) is None
+        assert await cache.get_or_fetch("a", fetch) is None
+
+        fetch.assert_awaited_once()
+        assert lookup_cache.load("t:a") is None
+
+    @pytest.mark.asyncio
+    async def test_misses_are_fetched_again_after_negative_ttl(self):
+        cache = LookupCache(
+            "t", ttl=datetime.timedelta(hours=1), negative_ttl=datetime.timedelta(seconds=-1)
+        )
+
+        assert await cache.get_or_fetch("a", fetcher(None)) is None
+        assert await cache.get_or_fetch("a", fetcher(1)) == 1
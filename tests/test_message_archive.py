@@ -0,0 +1,121 @@
+import datetime
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from src.db import Bakchod, Message, MessageUpdate, message_archive
+
+NOW = datetime.datetime.now()
+
+
+def remaining():
+    """Texts of this module's messages still in the db."""
+    return sorted(m.text for m in Message.select().where(Message.from_bakchod == "archive-1"))
+
+
+@pytest.fixture
+def messages():
+    """Two old messages in one group, one in another, and one recent message."""
+    bakchod = Bakchod.create(tg_id="archive-1", username="archivist")
+
+    def create(to_id, days_ago, text, update=None):
+        m = Message.create(
+            message_id=text,
+            time_sent=NOW - datetime.timedelta(days=days_ago),
+            from_bakchod=bakchod,
+            to_id=to_id,
+            text=text,
+        )
+        if update is not None:
+            MessageUpdate.create(message=m, payload=update)
+        return m
+
+    created = [
+        create("-1", 400, "old-1", {"update_id": 1}),
+        create("-1", 399, "old-2"),
+        create("-2", 500, "old-3"),
+        create("-1", 1, "new"),
+    ]
+
+    # The sqlite test db has no server-side cursors. Read eagerly so an export that
+    # fails part way doesn't leave a statement open on the shared connection.
+    with patch("src.db.message_archive.ServerSide", lambda query, **kwargs: iter(list(query))):
+        yield created
+
+    MessageUpdate.delete().where(MessageUpdate.message.in_([m.id for m in created])).execute()
+    Message.delete().where(Message.from_bakchod == bakchod).execute()
+    bakchod.delete_instance()
+
+
+class TestArchiveOldMessages:
+    def test_disabled_when_after_days_is_zero(self, messages, tmp_path):
+        assert message_archive.archive_old_messages(after_days=0, archive_dir=tmp_path) == 0
+        assert remaining() == ["new", "old-1", "old-2", "old-3"]
+
+    def test_moves_old_messages_to_archive(self, messages, tmp_path):
+        """Old messages are written per group and month, then deleted with their updates."""
+        moved = message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path)
+
+        assert moved == 3
+        assert remaining() == ["new"]
+        assert MessageUpdate.select().where(MessageUpdate.message == messages[0].id).count() == 0
+
+        files = sorted(tmp_path.glob("group=*/month=*/*.jsonl.gz"))
+        assert {f.parent.parent.name for f in files} == {"group=-1", "group=-2"}
+        assert not list(tmp_path.rglob("*.part"))
+
+        archived = list(message_archive.iter_archived_messages(archive_dir=tmp_path))
+        assert sorted(m["text"] for m in archived) == ["old-1", "old-2", "old-3"]
+        assert next(m for m in archived if m["text"] == "old-1")["update"] == {"update_id": 1}
+
+    def test_iter_archived_messages_filters_by_group(self, messages, tmp_path):
+        message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path)
+
+        archived = list(message_archive.iter_archived_messages("-2", archive_dir=tmp_path))
+
+        assert [m["text"] for m in archived] == ["old-3"]
+
+    def test_failed_export_deletes_nothing(self, messages, tmp_path):
+        """If the export fails nothing is deleted and no finished files are left."""
+        with (
+            patch("src.db.message_archive._serialise", side_effect=OSError("disk full")),
+            pytest.raises(OSError),
+        ):
+            message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path)
+
+        assert remaining() == ["new", "old-1", "old-2", "old-3"]
+        assert not list(tmp_path.rglob("*.jsonl.gz"))
+
+    def test_failed_file_keeps_its_rows_for_the_next_run(self, messages, tmp_path):
+        """Files finished before a failure stay archived; the rest are redone, once."""
+        delete_messages = message_archive.delete_messages
+
+        def fail_second_file(ids):
+            if remaining() != ["new", "old-3"]:
+                return delete_messages(ids)
+            raise OSError("connection lost")
+
+        with (
+            patch("src.db.message_archive.delete_messages", side_effect=fail_second_file),
+            pytest.raises(OSError),
+        ):
+            message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path)
+
+        assert remaining() == ["new", "old-3"]
+        assert len(list(tmp_path.rglob("*.part"))) == 1
+
+        assert message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path) == 1
+
+        archived = list(message_archive.iter_archived_messages(archive_dir=tmp_path))
+        assert sorted(m["text"] for m in archived) == ["old-1", "old-2", "old-3"]
+
+    def test_archive_files_are_gzipped_json_lines(self, messages, tmp_path):
+        message_archive.archive_old_messages(after_days=365, archive_dir=tmp_path)
+
+        path = next(tmp_path.glob("group=-2/month=*/*.jsonl.gz"))
+        with gzip.open(path, "rt") as f:
+            lines = f.read().splitlines()
+
+        assert len(lines) == 1
+        assert '"text":"old-3"' in lines[0]
@@ -1,20 +1,24 @@
+import datetime
 from unittest.mock import MagicMock, patch
 
-from src.db import message_dao
+from src.db import Bakchod, Message, MessageUpdate, message_dao
 
 
 class TestMessageDao:
-    @patch("src.db.message_dao.Bakchod")
+    @patch("src.db.message_dao.message_queue")
+    @patch("src.db.message_dao.bakchod_dao")
     @patch("src.db.message_dao.Message")
     @patch("src.db.message_dao.metrics")
-    def test_log_message_from_update_success(self, mock_metrics, mock_message, mock_bakchod):
+    def test_log_message_from_update_success(
+        self, mock_metrics, mock_message, mock_bakchod, mock_message_queue
+    ):
         """Test successfully logging a message from update."""
         mock_bakchod_instance = MagicMock()
-        mock_bakchod.get_by_id.return_value = mock_bakchod_instance
+        mock_bakchod.get_bakchod_by_id.return_value = mock_bakchod_instance
 
         mock_message_instance = MagicMock()
         mock_message_instance.message_id = 123
-        mock_message.create.return_value = mock_message_instance
+        mock_message.return_value = mock_message_instance
 
         mock_user = MagicMock()
         mock_user.id = "user_id"
@@ -35,20 +39,24 @@ class TestMessageDao:
         result = message_dao.log_message_from_update(mock_update)
 
         assert result == mock_message_instance
-        mock_bakchod.get_by_id.assert_called_once_with("user_id")
-        mock_message.create.assert_called_once()
+        mock_bakchod.get_bakchod_by_id.assert_called_once_with("user_id")
+        mock_message.create.assert_not_called()
+        mock_message_queue.enqueue.assert_called_once_with(
+            mock_message_instance, mock_update.to_dict.return_value
+        )
         mock_metrics.inc_message_count.assert_called_once()
 
-    @patch("src.db.message_dao.Bakchod")
+    @patch("src.db.message_dao.message_queue")
+    @patch("src.db.message_dao.bakchod_dao")
     @patch("src.db.message_dao.Message")
-    def test_log_message_from_update_fields(self, mock_message, mock_bakchod):
+    def test_log_message_from_update_fields(self, mock_message, mock_bakchod, _mock_message_queue):
         """Test that message fields are correctly set."""
         mock_bakchod_instance = MagicMock()
         mock_bakchod_instance.username = "testuser"
-        mock_bakchod.get_by_id.return_value = mock_bakchod_instance
+        mock_bakchod.get_bakchod_by_id.return_value = mock_bakchod_instance
 
         mock_message_instance = MagicMock()
-        mock_message.create.return_value = mock_message_instance
+        mock_message.return_value = mock_message_instance
 
         mock_user = MagicMock()
         mock_user.id = "user_id"
@@ -68,8 +76,31 @@ class TestMessageDao:
 
         message_dao.log_message_from_update(mock_update)
 
-        call_args = mock_message.create.call_args
+        call_args = mock_message.call_args
         assert call_args[1]["message_id"] == 123
         assert call_args[1]["text"] == "Test message"
         assert call_args[1]["from_bakchod"] == mock_bakchod_instance
         assert call_args[1]["to_id"] == "chat_id"
+
+
+class TestMessageUpdates:
+    def test_updates_are_fetched_by_message_id(self):
+        """Raw updates round trip through the compressed archive table."""
+        bakchod = Bakchod.create(tg_id="mu-1", username="archived")
+        with_update = Message.create(
+            message_id="1", time_sent=datetime.datetime.now(), from_bakchod=bakchod, to_id="-1"
+        )
+        without_update = Message.create(
+            message_id="2", time_sent=datetime.datetime.now(), from_bakchod=bakchod, to_id="-1"
+        )
+        MessageUpdate.create(message=with_update, payload={"message": {"text": "hi"}})
+
+        try:
+            updates = message_dao.get_updates_by_message_ids([with_update.id, without_update.id])
+
+            assert updates == {with_update.id: {"message": {"text": "hi"}}}
+            assert message_dao.get_updates_by_message_ids([]) == {}
+        finally:
+            MessageUpdate.delete().execute()
+            Message.delete().where(Message.from_bakchod == bakchod).execute()
+            bakchod.delete_instance()
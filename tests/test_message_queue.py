@@ -0,0 +1,190 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from peewee import IntegrityError
+
+from src.db import message_queue
+
+
+@pytest.fixture(autouse=True)
+def reset_queue():
+    message_queue._pending.clear()
+    message_queue._flusher_task = None
+    message_queue._flush_requested = None
+    yield
+    message_queue._pending.clear()
+    message_queue._flusher_task = None
+    message_queue._flush_requested = None
+
+
+def make_message(message_id):
+    m = MagicMock()
+    m.__data__ = {"message_id": message_id, "to_id": "chat_id", "text": "hi"}
+    return m
+
+
+class TestMessageQueue:
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_enqueue_writes_immediately_when_not_running(self, mock_message, _mock_metrics):
+        """Without a running flusher, rows are inserted straight away."""
+        message_queue.enqueue(make_message(1))
+
+        mock_message.insert_many.assert_called_once()
+        assert message_queue.get_depth() == 0
+
+    @pytest.mark.asyncio
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    async def test_enqueue_buffers_when_running(self, mock_message, mock_metrics):
+        """With a running flusher, rows are buffered until the next flush."""
+        message_queue.start()
+
+        try:
+            message_queue.enqueue(make_message(1))
+            message_queue.enqueue(make_message(2))
+
+            assert message_queue.get_depth() == 2
+            mock_message.insert_many.assert_not_called()
+            mock_metrics.set_message_queue_depth.assert_called_with(2)
+        finally:
+            await message_queue.stop()
+
+        # stop() flushes whatever is left
+        mock_message.insert_many.assert_called_once()
+        rows = mock_message.insert_many.call_args[0][0]
+        assert [r["message_id"] for r in rows] == [1, 2]
+        assert message_queue.get_depth() == 0
+
+    @pytest.mark.asyncio
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    async def test_enqueue_triggers_flush_at_max_rows(self, mock_message, _mock_metrics):
+        """Reaching FLUSH_MAX_ROWS wakes the flusher before the interval elapses."""
+        with (
+            patch("src.db.message_queue.FLUSH_MAX_ROWS", 2),
+            patch("src.db.message_queue.FLUSH_INTERVAL_MS", 60_000),
+        ):
+            message_queue.start()
+
+            try:
+                message_queue.enqueue(make_message(1))
+                message_queue.enqueue(make_message(2))
+
+                for _ in range(50):
+                    if mock_message.insert_many.called:
+                        break
+                    await asyncio.sleep(0.01)
+
+                mock_message.insert_many.assert_called_once()
+            finally:
+                await message_queue.stop()
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_flush_chunks_rows(self, mock_message, _mock_metrics):
+        """Large flushes are split into FLUSH_MAX_ROWS sized inserts."""
+        message_queue._pending.extend(({"message_id": i}, None) for i in range(5))
+
+        with patch("src.db.message_queue.FLUSH_MAX_ROWS", 2):
+            flushed = message_queue.flush()
+
+        assert flushed == 5
+        assert mock_message.insert_many.call_count == 3
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_flush_requeues_on_failure(self, mock_message, mock_metrics):
+        """Rows are kept for the next flush when the insert fails."""
+        mock_message.insert_many.return_value.execute.side_effect = Exception("db down")
+        message_queue._pending.extend(({"message_id": i}, None) for i in range(3))
+
+        flushed = message_queue.flush()
+
+        assert flushed == 0
+        assert message_queue.get_depth() == 3
+        mock_metrics.observe_message_queue_flush.assert_called_once()
+        assert mock_metrics.observe_message_queue_flush.call_args[0][2] == "error"
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_flush_drops_only_rejected_rows(self, mock_message, mock_metrics):
+        """A row the db rejects is dropped on its own, and the rest of the batch is written."""
+        written = []
+
+        def insert_many(rows):
+            insert = MagicMock()
+            if any(r["message_id"] == 2 for r in rows):
+                insert.execute.side_effect = IntegrityError("no partition of relation")
+            else:
+                insert.execute.side_effect = lambda: written.extend(rows)
+            return insert
+
+        mock_message.insert_many.side_effect = insert_many
+        message_queue._pending.extend(({"message_id": i}, None) for i in range(5))
+
+        assert message_queue.flush() == 4
+
+        assert sorted(r["message_id"] for r in written) == [0, 1, 3, 4]
+        assert message_queue.get_depth() == 0
+        mock_metrics.observe_message_queue_flush.assert_any_call(0, 1, "dropped")
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_flush_requeues_what_is_left_when_the_db_fails_while_splitting(
+        self, mock_message, _mock_metrics
+    ):
+        """Rows not yet written when the db goes away are kept, in order."""
+        mock_message.insert_many.return_value.execute.side_effect = [
+            IntegrityError("rejected"),
+            None,
+            Exception("db down"),
+        ]
+        message_queue._pending.extend(({"message_id": i}, None) for i in range(4))
+
+        assert message_queue.flush() == 2
+
+        assert [r["message_id"] for r, _ in message_queue._pending] == [2, 3]
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.Message")
+    def test_flush_drops_oldest_rows_when_full(self, mock_message, _mock_metrics):
+        """The queue never grows past MAX_PENDING_ROWS."""
+        mock_message.insert_many.return_value.execute.side_effect = Exception("db down")
+        message_queue._pending.extend(({"message_id": i}, None) for i in range(5))
+
+        with patch("src.db.message_queue.MAX_PENDING_ROWS", 3):
+            message_queue.flush()
+
+        assert [r["message_id"] for r, _ in message_queue._pending] == [2, 3, 4]
+
+    @patch("src.db.message_queue.metrics")
+    @patch("src.db.message_queue.MessageUpdate")
+    @patch("src.db.message_queue.Message")
+    def test_flush_writes_updates_to_archive(
+        self, mock_message, mock_message_update, _mock_metrics
+    ):
+        """Raw updates are written to MessageUpdate against the ids the insert returned."""
+        insert = mock_message.insert_many.return_value.returning.return_value.tuples.return_value
+        insert.execute.return_value = [(10,), (11,), (12,)]
+        message_queue._pending.extend(
+            [
+                ({"message_id": 1}, {"update_id": 1}),
+                ({"message_id": 2}, None),
+                ({"message_id": 3}, {"update_id": 3}),
+            ]
+        )
+
+        assert message_queue.flush() == 3
+
+        mock_message_update.insert_many.assert_called_once_with(
+            [
+                {"message": 10, "payload": {"update_id": 1}},
+                {"message": 12, "payload": {"update_id": 3}},
+            ]
+        )
+
+    def test_flush_with_nothing_pending(self):
+        """Flushing an empty queue is a no-op."""
+        assert message_queue.flush() == 0
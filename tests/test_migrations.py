@@ -0,0 +1,170 @@
+import types
+from unittest.mock import MagicMock
+
+import pytest
+from peewee import SqliteDatabase
+
+from src.db import CachedLookup, Message, MessageUpdate, RokdaTransaction, db, migrations
+from src.db.migrations import (
+    Migration,
+    SchemaMigration,
+    m0001_initial,
+    m0003_message_update_archive,
+    m0005_rokda_ledger,
+    m0006_cached_lookup,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_schema_migration():
+    db.drop_tables([SchemaMigration], safe=True)
+    yield
+    db.drop_tables([SchemaMigration], safe=True)
+
+
+def make_migration(version, name="test", atomic=True, up=None):
+    module = types.ModuleType(f"m{version:04d}_{name}")
+    module.up = up or MagicMock()
+    module.down = MagicMock()
+    if not atomic:
+        module.ATOMIC = False
+    return Migration(version, name, module)
+
+
+class TestDiscover:
+    def test_discovers_package_migrations_in_order(self):
+        found = migrations.discover()
+
+        versions = [m.version for m in found]
+        assert versions == sorted(versions)
+        assert versions[:2] == [1, 2]
+        assert found[0].atomic
+        # Concurrent index builds can't run in a transaction
+        assert not found[1].atomic
+
+
+class TestMigrate:
+    def test_applies_pending_and_records_versions(self):
+        m1, m2 = make_migration(1), make_migration(2)
+
+        assert migrations.migrate(migrations=[m1, m2]) == [1, 2]
+
+        m1.module.up.assert_called_once_with(db)
+        m2.module.up.assert_called_once_with(db)
+        assert migrations.applied_versions() == {1, 2}
+        assert migrations.current_version() == 2
+
+    def test_skips_applied_migrations(self):
+        m1, m2 = make_migration(1), make_migration(2)
+        migrations.migrate(migrations=[m1])
+
+        assert migrations.migrate(migrations=[m1, m2]) == [2]
+        m1.module.up.assert_called_once()
+
+    def test_stops_at_target(self):
+        m1, m2 = make_migration(1), make_migration(2)
+
+        assert migrations.migrate(target=1, migrations=[m1, m2]) == [1]
+        m2.module.up.assert_not_called()
+
+    def test_failed_atomic_migration_is_not_recorded(self):
+        m1 = make_migration(1, up=MagicMock(side_effect=RuntimeError("boom")))
+
+        with pytest.raises(RuntimeError):
+            migrations.migrate(migrations=[m1])
+
+        assert migrations.applied_versions() == set()
+
+    def test_non_atomic_migration_runs_outside_transaction(self):
+        in_transaction = []
+        m1 = make_migration(
+            1, atomic=False, up=lambda db: in_transaction.append(db.in_transaction())
+        )
+
+        migrations.migrate(migrations=[m1])
+
+        assert in_transaction == [False]
+        assert migrations.applied_versions() == {1}
+
+
+class TestRollback:
+    def test_undoes_newest_first(self):
+        m1, m2 = make_migration(1), make_migration(2)
+        migrations.migrate(migrations=[m1, m2])
+
+        assert migrations.rollback(steps=1, migrations=[m1, m2]) == [2]
+
+        m2.module.down.assert_called_once_with(db)
+        m1.module.down.assert_not_called()
+        assert migrations.current_version() == 1
+
+    def test_pending_without_table(self):
+        """A database that never ran migrations has everything pending."""
+        m1 = make_migration(1)
+
+        assert migrations.pending([m1]) == [m1]
+        assert migrations.current_version() == 0
+
+
+class TestInitialMigration:
+    def test_creates_the_frozen_schema_on_the_given_database(self):
+        fresh = SqliteDatabase(":memory:")
+
+        m0001_initial.up(fresh)
+
+        assert "commandusage" in fresh.get_tables()
+        columns = {c.name for c in fresh.get_columns("message")}
+        assert {"id", "message_id", "time_sent", "from_bakchod_id", "to_id", "text"} <= columns
+        # The live models stay bound to the app database
+        assert Message._meta.database is db
+        assert m0001_initial.Message is not Message
+
+        m0001_initial.down(fresh)
+        assert fresh.get_tables() == []
+
+
+class TestMessageUpdateArchiveMigration:
+    def test_uses_frozen_models_on_the_given_database(self):
+        fresh = SqliteDatabase(":memory:")
+        fresh.execute_sql("CREATE TABLE message (id INTEGER PRIMARY KEY)")
+
+        m0003_message_update_archive.up(fresh)
+
+        assert "messageupdate" in fresh.get_tables()
+        assert MessageUpdate._meta.database is db
+        assert m0003_message_update_archive.MessageUpdate is not MessageUpdate
+
+        m0003_message_update_archive.down(fresh)
+        assert fresh.get_tables() == ["message"]
+        assert "update" in {c.name for c in fresh.get_columns("message")}
+
+
+class TestRokdaLedgerMigration:
+    def test_opens_the_ledger_with_current_balances(self):
+        fresh = SqliteDatabase(":memory:")
+        m0001_initial.up(fresh)
+        fresh.execute_sql("INSERT INTO bakchod (tg_id, rokda) VALUES ('1', 250), ('2', 0)")
+
+        m0005_rokda_ledger.up(fresh)
+
+        rows = fresh.execute_sql(
+            "SELECT bakchod_id, amount, balance, reason FROM rokdatransaction ORDER BY bakchod_id"
+        ).fetchall()
+        assert rows == [("1", 250, 250, "opening_balance"), ("2", 0, 0, "opening_balance")]
+        assert RokdaTransaction._meta.database is db
+
+        m0005_rokda_ledger.down(fresh)
+        assert "rokdatransaction" not in fresh.get_tables()
+
+
+class TestCachedLookupMigration:
+    def test_creates_the_frozen_table_on_the_given_database(self):
+        fresh = SqliteDatabase(":memory:")
+
+        m0006_cached_lookup.up(fresh)
+
+        assert {c.name for c in fresh.get_columns("cachedlookup")} == {"key", "value", "expires"}
+        assert CachedLookup._meta.database is db
+
+        m0006_cached_lookup.down(fresh)
+        assert fresh.get_tables() == []
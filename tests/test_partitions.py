@@ -0,0 +1,126 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.db import partitions
+
+TODAY = datetime.date(2026, 11, 15)
+
+
+def month(year, m):
+    return datetime.datetime(year, m, 1)
+
+
+@pytest.fixture
+def mock_db():
+    with patch("src.db.partitions.db") as mock_db:
+        yield mock_db
+
+
+def executed(mock_db):
+    return [c[0][0] for c in mock_db.execute_sql.call_args_list]
+
+
+class TestMonths:
+    def test_add_months_wraps_years(self):
+        assert partitions.add_months(datetime.date(2026, 11, 1), 2) == datetime.date(2027, 1, 1)
+        assert partitions.add_months(datetime.date(2026, 1, 1), -1) == datetime.date(2025, 12, 1)
+
+    def test_partition_name(self):
+        assert partitions.partition_name("message", datetime.date(2027, 1, 1)) == "message_p2027_01"
+
+
+class TestListPartitions:
+    def test_parses_bounds(self, mock_db):
+        mock_db.execute_sql.return_value.fetchall.return_value = [
+            (
+                "message_p2026_12",
+                "FOR VALUES FROM ('2026-12-01 00:00:00') TO ('2027-01-01 00:00:00')",
+            ),
+            ("message_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-12-01 00:00:00')"),
+        ]
+
+        assert partitions.list_partitions("message") == [
+            ("message_legacy", None, month(2026, 12)),
+            ("message_p2026_12", month(2026, 12), month(2027, 1)),
+        ]
+
+
+class TestEnsurePartitions:
+    def test_creates_missing_months(self, mock_db):
+        """Months already covered, including by the legacy partition, are skipped."""
+        existing = [
+            ("legacy", None, month(2026, 12)),
+            ("p2026_12", month(2026, 12), month(2027, 1)),
+        ]
+
+        with (
+            patch("src.db.partitions.is_partitioned", return_value=True),
+            patch("src.db.partitions.list_partitions", return_value=existing),
+            patch("src.db.partitions.PARTITIONED_TABLES", {"message": "time_sent"}),
+        ):
+            created = partitions.ensure_partitions(months_ahead=3, today=TODAY)
+
+        assert created == ["message_p2027_01", "message_p2027_02"]
+        assert mock_db.execute_sql.call_args_list[0][0][1] == ("2027-01-01", "2027-02-01")
+
+    def test_skips_tables_that_are_not_partitioned(self, mock_db):
+        with patch("src.db.partitions.is_partitioned", return_value=False):
+            assert partitions.ensure_partitions(today=TODAY) == []
+
+        mock_db.execute_sql.assert_not_called()
+
+
+class TestDetachOldPartitions:
+    def test_disabled_by_default(self, mock_db):
+        assert partitions.detach_old_partitions(retention_months=0, today=TODAY) == []
+        mock_db.execute_sql.assert_not_called()
+
+    @pytest.mark.parametrize("drop", [False, True])
+    def test_detaches_partitions_older_than_retention(self, mock_db, drop):
+        existing = [
+            ("message_legacy", None, month(2026, 8)),
+            ("message_p2026_08", month(2026, 8), month(2026, 9)),
+            ("message_p2026_09", month(2026, 9), month(2026, 10)),
+        ]
+
+        mock_db.execute_sql.return_value.rowcount = 0
+
+        with (
+            patch("src.db.partitions.list_partitions", return_value=existing),
+            patch("src.db.partitions.PARTITIONED_TABLES", {"message": "time_sent"}),
+        ):
+            detached = partitions.detach_old_partitions(retention_months=2, drop=drop, today=TODAY)
+
+        # Retention of 2 months from November keeps September onwards
+        assert detached == ["message_legacy", "message_p2026_08"]
+        statements = executed(mock_db)
+        assert statements[0].startswith('DELETE FROM "messageupdate"')
+        assert 'JOIN "message_legacy"' in statements[0]
+        assert statements[1] == 'ALTER TABLE "message" DETACH PARTITION "message_legacy"'
+        assert ('DROP TABLE "message_legacy"' in statements) is drop
+
+    def test_deletes_dependent_rows_in_batches(self, mock_db):
+        full, partial = MagicMock(rowcount=3), MagicMock(rowcount=1)
+        mock_db.execute_sql.side_effect = [full, partial]
+
+        with patch("src.db.partitions.DELETE_BATCH_SIZE", 3):
+            assert partitions.delete_dependent_rows("message", "message_p2026_08") == 4
+
+        assert mock_db.execute_sql.call_count == 2
+
+    def test_tables_without_dependents(self, mock_db):
+        assert partitions.delete_dependent_rows("commandusage", "commandusage_p2026_08") == 0
+        mock_db.execute_sql.assert_not_called()
+
+    def test_maintain_runs_both(self):
+        with (
+            patch("src.db.partitions.connection_scope", MagicMock()),
+            patch("src.db.partitions.ensure_partitions") as mock_ensure,
+            patch("src.db.partitions.detach_old_partitions") as mock_detach,
+        ):
+            partitions.maintain()
+
+        mock_ensure.assert_called_once()
+        mock_detach.assert_called_once()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from src.domain import rendering
+
+
+@pytest.fixture(autouse=True)
+def stopped_pool():
+    yield
+    rendering.stop()
+
+
+def slow_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def import_this_module():
+    # Unpickling the initializer imports this module in each worker while the
+    # pool starts, rather than in the middle of a timed render
+    pass
+
+
+def crash():
+    os._exit(1)
+
+
+class TestRun:
+    @pytest.mark.asyncio
+    async def test_runs_in_a_thread_until_started(self):
+        assert await rendering.run(threading.get_ident) != threading.get_ident()
+        assert await rendering.run(os.getpid) == os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_processes_once_started(self):
+        with patch("src.domain.rendering.WORKERS", 2):
+            rendering.start()
+
+        assert rendering.is_running()
+        assert await rendering.run(os.getpid) != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_renders_run_in_parallel_up_to_workers(self):
+        with patch("src.domain.rendering.WORKERS", 2):
+            rendering.start(import_this_module)
+
+        start = time.perf_counter()
+        pids = await asyncio.gather(*(rendering.run(slow_pid, 0.5) for _ in range(2)))
+
+        assert time.perf_counter() - start < 0.9
+        assert len(set(pids)) == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        with (
+            patch("src.domain.rendering.WORKERS", 1),
+            patch("src.domain.rendering.MAX_QUEUED_JOBS", 1),
+        ):
+            running = asyncio.gather(*(rendering.run(time.sleep, 0.1) for _ in range(2)))
+            await asyncio.sleep(0)
+
+            with pytest.raises(rendering.QueueFullError):
+                await rendering.run(time.sleep, 0)
+
+            await running
+
+        assert rendering._pending == 0
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_is_replaced(self):
+        with patch("src.domain.rendering.WORKERS", 1):
+            rendering.start()
+
+            with pytest.raises(BrokenProcessPool):
+                await rendering.run(crash)
+
+        assert rendering.is_running()
+        assert await rendering.run(os.getpid) != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_is_replaced_once(self):
+        """Every render in flight sees the pool break, but only one replaces it."""
+        with patch("src.domain.rendering.WORKERS", 2):
+            rendering.start()
+
+            with patch(
+                "src.domain.rendering._new_executor", wraps=rendering._new_executor
+            ) as mock_new_executor:
+                results = await asyncio.gather(
+                    rendering.run(crash),
+                    *(rendering.run(slow_pid, 0.5) for _ in range(3)),
+                    return_exceptions=True,
+                )
+
+        assert all(isinstance(result, BrokenProcessPool) for result in results)
+        mock_new_executor.assert_called_once()
+        assert await rendering.run(os.getpid) != os.getpid()
+
+
+def test_stop_is_idempotent():
+    rendering.start()
+    rendering.stop()
+    rendering.stop()
+
+    assert not rendering.is_running()
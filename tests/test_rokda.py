@@ -1,4 +1,4 @@
-from src.domain.rokda import reward_rokda
+from src.domain.rokda import reward_amount, reward_rokda
 
 
 def test_reward_rokda_positive_value():
@@ -29,3 +29,8 @@ def test_reward_rokda_large_value():
     result = reward_rokda(1000)
     assert result >= 1000
     assert isinstance(result, float)
+
+
+def test_reward_amount_matches_reward_rokda():
+    for r in (None, -5, 0, 10, 1000):
+        assert reward_rokda(r) == round(max(r or 0, 0) + reward_amount(r), 2)
@@ -0,0 +1,143 @@
+import pytest
+
+from src.db import Bakchod, RokdaTransaction, rokda_dao
+
+
+@pytest.fixture
+def bakchods():
+    """Two Bakchods with 100 ₹okda each."""
+    created = [
+        Bakchod.create(tg_id=tg_id, username=tg_id, rokda=100.0)
+        for tg_id in ("ledger-1", "ledger-2")
+    ]
+
+    yield created
+
+    ids = [b.tg_id for b in created]
+    RokdaTransaction.delete().where(RokdaTransaction.bakchod.in_(ids)).execute()
+    Bakchod.delete().where(Bakchod.tg_id.in_(ids)).execute()
+
+
+def stored(bakchod):
+    return Bakchod.get_by_id(bakchod.tg_id).rokda
+
+
+def ledger(bakchod):
+    return [
+        (t.amount, t.balance, t.reason)
+        for t in RokdaTransaction.select()
+        .where(RokdaTransaction.bakchod == bakchod.tg_id)
+        .order_by(RokdaTransaction.id)
+    ]
+
+
+class TestRokdaDao:
+    def test_credit_applies_to_stored_balance(self, bakchods):
+        """Credits add to what's in the db, not to a stale in-memory balance."""
+        b, _ = bakchods
+        Bakchod.update(rokda=250.0).where(Bakchod.tg_id == b.tg_id).execute()
+
+        assert rokda_dao.credit(b, 10, "test") == 260.0
+
+        assert b.rokda == 260.0
+        assert not b.is_dirty()
+        assert ledger(b) == [(10, 260.0, "test")]
+
+    def test_debit_needs_more_than_amount(self, bakchods):
+        b, _ = bakchods
+
+        assert rokda_dao.debit(b, 100, "paywall") is None
+        assert rokda_dao.debit(b, 40, "paywall") == 60.0
+
+        assert stored(b) == 60.0
+        assert ledger(b) == [(-40, 60.0, "paywall")]
+
+    def test_debit_upto_bottoms_out_at_zero(self, bakchods):
+        b, _ = bakchods
+
+        assert rokda_dao.debit_upto(b, 375, "gamble") == 0
+
+        assert stored(b) == 0
+        # Only what the balance had is recorded, so the ledger adds up
+        assert ledger(b) == [(-100, 0, "gamble")]
+
+    def test_set_balance(self, bakchods):
+        b, _ = bakchods
+
+        assert rokda_dao.set_balance(b, 1337, "admin") == 1337
+
+        assert stored(b) == 1337
+        assert ledger(b) == [(1237, 1337, "admin")]
+
+    def test_set_balance_records_the_change_from_the_stored_balance(self, bakchods):
+        b, _ = bakchods
+        stale = Bakchod.get_by_id(b.tg_id)
+        rokda_dao.credit(b, 50, "test")
+
+        assert rokda_dao.set_balance(stale, 100, "admin") == 100
+
+        assert ledger(b)[-1] == (-50, 100, "admin")
+
+    def test_debit_all_but_goes_by_the_stored_balance(self, bakchods):
+        b, _ = bakchods
+        stale = Bakchod.get_by_id(b.tg_id)
+        rokda_dao.credit(b, 50, "test")
+
+        assert rokda_dao.debit_all_but(stale, 1, "gamble") == 149
+
+        assert stored(b) == 1
+        assert ledger(b)[-1] == (-149, 1, "gamble")
+
+    def test_debit_upto_gives_the_counterparty_only_what_was_taken(self, bakchods):
+        b, other = bakchods
+
+        assert rokda_dao.debit_upto(b, 500, "gamble", counterparty=other) == 0
+
+        assert (stored(b), stored(other)) == (0, 200.0)
+        assert ledger(other) == [(100, 200.0, "gamble")]
+
+    def test_lock_returns_balances_in_tg_id_order(self, bakchods):
+        first, second = bakchods
+
+        assert list(rokda_dao._lock(second, first).items()) == [
+            (first.tg_id, 100.0),
+            (second.tg_id, 100.0),
+        ]
+
+    def test_transfer_moves_rokda_both_ways(self, bakchods):
+        sender, receiver = bakchods
+
+        assert rokda_dao.transfer(sender, receiver, 100, "daan") == (0, 200.0)
+
+        assert (stored(sender), stored(receiver)) == (0, 200.0)
+        assert ledger(sender) == [(-100, 0, "daan")]
+        assert ledger(receiver) == [(100, 200.0, "daan")]
+        assert RokdaTransaction.get(RokdaTransaction.bakchod == sender.tg_id).counterparty_id == (
+            receiver.tg_id
+        )
+
+    def test_transfer_without_enough_rokda_moves_nothing(self, bakchods):
+        sender, receiver = bakchods
+
+        assert rokda_dao.transfer(sender, receiver, 100.01, "daan") is None
+
+        assert (stored(sender), stored(receiver)) == (100.0, 100.0)
+        assert ledger(sender) == ledger(receiver) == []
+
+    def test_reward_without_cache_credits_immediately(self, bakchods):
+        b, _ = bakchods
+
+        assert rokda_dao.reward(b, 5.5) == 105.5
+        assert ledger(b) == [(5.5, 105.5, "reward")]
+
+    def test_save_leaves_rokda_alone(self, bakchods):
+        """Saving an instance with a stale balance doesn't undo someone else's credit."""
+        b, _ = bakchods
+        stale = Bakchod.get_by_id(b.tg_id)
+
+        rokda_dao.credit(b, 50, "test")
+        stale.username = "renamed"
+        stale.save()
+
+        assert stored(b) == 150.0
+        assert Bakchod.get_by_id(b.tg_id).username == "renamed"
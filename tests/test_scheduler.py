@@ -253,3 +253,34 @@ class TestScheduler:
         assert call_args[1]["name"] == "daily_good_morning"
         assert call_args[1]["time"].hour == 8
         assert call_args[1]["time"].minute == 0
+
+    def test_schedule_partition_maintenance(self, mock_job_queue):
+        scheduler.schedule_partition_maintenance(mock_job_queue)
+
+        call_args = mock_job_queue.run_repeating.call_args
+        assert call_args[0][0] == scheduler.partition_maintenance_callback
+        assert call_args[1]["name"] == "db_partition_maintenance"
+
+    @pytest.mark.asyncio
+    async def test_partition_maintenance_callback_logs_failures(self):
+        """A failed maintenance run is logged rather than raised into the job queue."""
+        with patch("src.domain.scheduler.partitions") as mock_partitions:
+            mock_partitions.maintain.side_effect = Exception("db down")
+
+            await scheduler.partition_maintenance_callback(MagicMock())
+
+            mock_partitions.maintain.assert_called_once()
+
+    def test_schedule_message_archive_disabled(self, mock_job_queue):
+        with patch("src.domain.scheduler.message_archive.ARCHIVE_AFTER_DAYS", 0):
+            scheduler.schedule_message_archive(mock_job_queue)
+
+        mock_job_queue.run_daily.assert_not_called()
+
+    def test_schedule_message_archive(self, mock_job_queue):
+        with patch("src.domain.scheduler.message_archive.ARCHIVE_AFTER_DAYS", 1095):
+            scheduler.schedule_message_archive(mock_job_queue)
+
+        call_args = mock_job_queue.run_daily.call_args
+        assert call_args[0][0] == scheduler.message_archive_callback
+        assert call_args[1]["name"] == "db_message_archive"
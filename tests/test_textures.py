@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from src.domain import textures
+
+
+@pytest.fixture
+def texture_dir(tmp_path):
+    directory = tmp_path / "textures"
+    with (
+        patch("src.domain.textures.TEXTURE_DIR", str(directory)),
+        patch("src.domain.textures.POOL_SIZE", 2),
+        patch("src.domain.textures.util.is_unsplash_configured", return_value=True),
+    ):
+        yield directory
+
+    textures._pool.clear()
+
+
+@pytest.fixture
+def mock_fetch(tmp_path):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+
+    async def fetch(width, height):
+        path = downloads / f"{len(os.listdir(downloads))}-{time.time_ns()}.jpg"
+        Image.new("RGB", (width * 2, height * 3), (0, 128, 255)).save(path)
+        return str(path)
+
+    with patch(
+        "src.domain.textures.util.fetch_random_unsplash_photo_path", side_effect=fetch
+    ) as mock:
+        mock.downloads = downloads
+        yield mock
+
+
+async def wait_until(condition, timeout=5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def add_texture(texture_dir, name, age_seconds=0):
+    texture_dir.mkdir(exist_ok=True)
+    path = texture_dir / name
+    Image.new("RGB", (8, 8)).save(path)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_take_without_textures():
+    assert textures.take() is None
+
+
+def test_not_started_without_unsplash_key():
+    with patch("src.domain.textures.util.is_unsplash_configured", return_value=False):
+        textures.start(64, 48)
+
+    assert not textures.is_running()
+
+
+@pytest.mark.asyncio
+async def test_fills_pool_with_cropped_textures(texture_dir, mock_fetch):
+    textures.start(64, 48)
+    try:
+        await wait_until(lambda: len(textures._pool) == 2)
+    finally:
+        await textures.stop()
+
+    assert len(os.listdir(texture_dir)) == 2
+    for name in os.listdir(texture_dir):
+        with Image.open(texture_dir / name) as texture:
+            assert texture.size == (64, 48)
+    # The downloads are deleted once cropped
+    assert os.listdir(mock_fetch.downloads) == []
+    mock_fetch.assert_called_with(64, 48)
+
+
+@pytest.mark.asyncio
+async def test_taken_textures_are_replaced(texture_dir, mock_fetch):
+    textures.start(64, 48)
+    try:
+        await wait_until(lambda: len(textures._pool) == 2)
+
+        taken = textures.take()
+        assert taken not in textures._pool
+        assert os.path.exists(taken)
+
+        await wait_until(lambda: len(textures._pool) == 2)
+    finally:
+        await textures.stop()
+
+    assert mock_fetch.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_picks_up_textures_from_last_run(texture_dir, mock_fetch):
+    fresh = add_texture(texture_dir, "fresh.jpg", age_seconds=60)
+    stale = add_texture(texture_dir, "stale.jpg", age_seconds=textures.MAX_AGE_SECONDS + 60)
+
+    textures.start(64, 48)
+    try:
+        await wait_until(lambda: len(textures._pool) == 2)
+        assert textures._pool[0] == fresh
+    finally:
+        await textures.stop()
+
+    # Still on disk for the next run
+    assert os.path.exists(fresh)
+    assert not os.path.exists(stale)
+    # Only one had to be fetched
+    assert mock_fetch.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_textures_are_rotated_out(texture_dir, mock_fetch):
+    textures.start(64, 48)
+    try:
+        await wait_until(lambda: len(textures._pool) == 2)
+        oldest = textures._pool[0]
+        mtime = time.time() - textures.MAX_AGE_SECONDS - 60
+        os.utime(oldest, (mtime, mtime))
+
+        # The refiller would wake up when it goes stale; wake it now instead
+        textures._wanted.set()
+        await wait_until(lambda: mock_fetch.call_count == 3)
+        await wait_until(lambda: len(textures._pool) == 2)
+
+        assert oldest not in textures._pool
+    finally:
+        await textures.stop()
+
+    assert not os.path.exists(oldest)
+
+
+def test_take_skips_stale_textures(texture_dir):
+    stale = add_texture(texture_dir, "stale.jpg", age_seconds=textures.MAX_AGE_SECONDS + 60)
+    fresh = add_texture(texture_dir, "fresh.jpg")
+    textures._pool.extend([stale, fresh])
+
+    assert textures.take() == fresh
+    assert not os.path.exists(stale)
+
+
+@pytest.mark.asyncio
+async def test_failed_fetches_back_off(texture_dir):
+    with patch(
+        "src.domain.textures.util.fetch_random_unsplash_photo_path",
+        new_callable=AsyncMock,
+        side_effect=Exception("rate limited"),
+    ) as mock_fetch:
+        textures.start(64, 48)
+        try:
+            await wait_until(lambda: mock_fetch.call_count == 1)
+            await asyncio.sleep(0.1)
+        finally:
+            await textures.stop()
+
+    assert mock_fetch.call_count == 1
+    assert textures.take() is None
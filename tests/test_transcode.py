@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.domain import transcode
+
+# Stands in for ffmpeg: copies its input, read from the path or stdin, to the
+# output upper-cased. Inputs starting with "sleep" take that long, "fail" fails.
+FAKE_FFMPEG = """
+import sys, time
+source, output = sys.argv[1], sys.argv[2]
+data = sys.stdin.buffer.read() if source == "pipe:0" else open(source, "rb").read()
+if data.startswith(b"fail"):
+    print("Invalid data found when processing input", file=sys.stderr)
+    sys.exit(1)
+if data.startswith(b"sleep"):
+    time.sleep(float(data.split()[1]))
+with open(output, "wb") as f:
+    f.write(data.upper())
+"""
+
+COMMAND = transcode._command
+
+
+@pytest.fixture(autouse=True)
+def fake_ffmpeg():
+    commands = []
+
+    def command(source, preset, output):
+        commands.append((source, preset))
+        return [sys.executable, "-c", FAKE_FFMPEG, source or "pipe:0", output]
+
+    with patch("src.domain.transcode._command", side_effect=command):
+        yield commands
+
+    transcode._slots = None
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestChoosePreset:
+    @pytest.mark.parametrize(
+        ("size", "preset"),
+        [
+            (0, "small"),
+            (8 * transcode.MB, "small"),
+            (20 * transcode.MB, "medium"),
+            (10**10, "large"),
+        ],
+    )
+    def test_by_input_size(self, size, preset):
+        assert transcode.choose_preset(size).name == preset
+
+
+class TestNeedsTranscode:
+    def test_mp4_within_upload_limit(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"video")
+
+        assert transcode.needs_transcode(str(path)) is False
+
+    def test_other_containers(self, tmp_path):
+        path = tmp_path / "video.mkv"
+        path.write_bytes(b"video")
+
+        assert transcode.needs_transcode(str(path)) is True
+
+    def test_too_big_to_upload(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"video")
+
+        with patch("src.domain.transcode.MAX_UPLOAD_BYTES", 4):
+            assert transcode.needs_transcode(str(path)) is True
+
+
+def test_command():
+    command = COMMAND(None, transcode.PRESETS[1], "out.mp4")
+
+    assert command[command.index("-i") + 1] == "pipe:0"
+    assert command[command.index("-preset") + 1] == "veryfast"
+    assert command[command.index("-crf") + 1] == "28"
+    assert command[-1] == "out.mp4"
+
+
+class TestToMp4:
+    @pytest.mark.asyncio
+    async def test_pipes_bytes_to_ffmpeg(self, fake_ffmpeg):
+        output = await transcode.to_mp4(b"webm bytes")
+
+        try:
+            assert output.endswith(".mp4")
+            assert read(output) == b"WEBM BYTES"
+            assert fake_ffmpeg[0] == (None, transcode.PRESETS[0])
+        finally:
+            os.remove(output)
+
+    @pytest.mark.asyncio
+    async def test_reads_paths(self, tmp_path, fake_ffmpeg):
+        source = tmp_path / "video.mkv"
+        source.write_bytes(b"mkv")
+
+        output = await transcode.to_mp4(str(source), transcode.PRESETS[2])
+
+        try:
+            assert read(output) == b"MKV"
+            assert fake_ffmpeg[0] == (str(source), transcode.PRESETS[2])
+        finally:
+            os.remove(output)
+
+    @pytest.mark.asyncio
+    async def test_failure_removes_output(self, tmp_path):
+        with (
+            patch("src.domain.transcode.tempfile.tempdir", str(tmp_path)),
+            pytest.raises(transcode.TranscodeError, match="Invalid data"),
+        ):
+            await transcode.to_mp4(b"fail")
+
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_ffmpeg(self, tmp_path):
+        start = time.perf_counter()
+
+        with (
+            patch("src.domain.transcode.TIMEOUT_SECONDS", 0.2),
+            patch("src.domain.transcode.tempfile.tempdir", str(tmp_path)),
+            pytest.raises(transcode.TranscodeTimeoutError),
+        ):
+            await transcode.to_mp4(b"sleep 5")
+
+        assert time.perf_counter() - start < 2
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_conversions_run_in_parallel_up_to_workers(self):
+        start = time.perf_counter()
+
+        with patch("src.domain.transcode.WORKERS", 2):
+            outputs = await asyncio.gather(*(transcode.to_mp4(b"sleep 0.5") for _ in range(3)))
+
+        # Two at once, then the third - one at a time would take 1.5s
+        elapsed = time.perf_counter() - start
+        assert 1.0 <= elapsed < 1.45
+        for output in outputs:
+            os.remove(output)
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        with (
+            patch("src.domain.transcode.WORKERS", 1),
+            patch("src.domain.transcode.MAX_QUEUED_JOBS", 1),
+        ):
+            running = asyncio.gather(*(transcode.to_mp4(b"sleep 0.1") for _ in range(2)))
+            await asyncio.sleep(0)
+
+            with pytest.raises(transcode.QueueFullError):
+                await transcode.to_mp4(b"one too many")
+
+            for output in await running:
+                os.remove(output)
@@ -1,6 +1,7 @@
 from datetime import UTC, datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
 from telegram import Chat, Message, Update, User
 
 from src.domain.util import (
@@ -242,16 +243,18 @@ def test_build_unsplash_image_url_without_query():
     assert result == "https://images.unsplash.com/photo-123?w=1280&h=720&fit=crop&fm=jpg"
 
 
-def test_fetch_random_unsplash_photo_path_missing_access_key():
+@pytest.mark.asyncio
+async def test_fetch_random_unsplash_photo_path_missing_access_key():
     with patch("src.domain.util.UNSPLASH_ACCESS_KEY", None):
-        result = fetch_random_unsplash_photo_path(1280, 720)
+        result = await fetch_random_unsplash_photo_path(1280, 720)
 
     assert result is None
 
 
-@patch("src.domain.util.acquire_external_resource")
-@patch("src.domain.util.requests.get")
-def test_fetch_random_unsplash_photo_path_success(mock_get, mock_acquire):
+@pytest.mark.asyncio
+@patch("src.domain.util.acquire_external_resource", new_callable=AsyncMock)
+@patch("src.domain.util.http_client.get", new_callable=AsyncMock)
+async def test_fetch_random_unsplash_photo_path_success(mock_get, mock_acquire):
     photo_response = MagicMock()
     photo_response.json.return_value = {
         "urls": {"raw": "https://images.unsplash.com/photo-123?ixid=abc"},
@@ -265,7 +268,7 @@ def test_fetch_random_unsplash_photo_path_success(mock_get, mock_acquire):
     mock_acquire.return_value = "resources/external/test.jpg"
 
     with patch("src.domain.util.UNSPLASH_ACCESS_KEY", "test-access-key"):
-        result = fetch_random_unsplash_photo_path(1280, 1280, query="nature,water,india")
+        result = await fetch_random_unsplash_photo_path(1280, 1280, query="nature,water,india")
 
     assert result == "resources/external/test.jpg"
     assert mock_get.call_count == 2
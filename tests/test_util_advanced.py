@@ -1,9 +1,8 @@
 import contextlib
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from peewee import DoesNotExist
 
 from src.db import Bakchod
 from src.domain.util import (
@@ -79,49 +78,52 @@ class TestUtilAdvanced:
 
             mock_logger.warning.assert_called()
 
-    @patch("src.domain.util.requests")
+    @pytest.mark.asyncio
+    @patch("src.domain.util.http_client.get", new_callable=AsyncMock)
     @patch("src.domain.util.os.path.exists")
-    def test_acquire_external_resource_already_exists(self, mock_exists, mock_requests):
+    async def test_acquire_external_resource_already_exists(self, mock_exists, mock_get):
         """Test acquiring resource that already exists locally."""
         mock_exists.return_value = True
 
-        result = acquire_external_resource("http://example.com/file.txt", "file.txt")
+        result = await acquire_external_resource("http://example.com/file.txt", "file.txt")
 
         assert result == os.path.join("resources", "external", "file.txt")
-        mock_requests.get.assert_not_called()
+        mock_get.assert_not_called()
 
-    @patch("src.domain.util.requests")
+    @pytest.mark.asyncio
+    @patch("src.domain.util.http_client.get", new_callable=AsyncMock)
     @patch("src.domain.util.os.path.exists")
     @patch("src.domain.util.open")
-    def test_acquire_external_resource_download(
-        self, mock_open, mock_exists, mock_requests, tmp_path
+    async def test_acquire_external_resource_download(
+        self, mock_open, mock_exists, mock_get, tmp_path
     ):
         """Test acquiring and downloading a resource."""
         mock_exists.return_value = False
         mock_response = MagicMock()
         mock_response.content = b"test content"
         mock_response.raise_for_status = MagicMock()
-        mock_requests.get.return_value = mock_response
+        mock_get.return_value = mock_response
 
-        result = acquire_external_resource("http://example.com/file.txt", "file.txt")
+        result = await acquire_external_resource("http://example.com/file.txt", "file.txt")
 
         expected_path = os.path.join("resources", "external", "file.txt")
         assert result == expected_path
-        mock_requests.get.assert_called_once()
+        mock_get.assert_called_once()
         mock_open.assert_called_once()
 
-    @patch("src.domain.util.requests")
+    @pytest.mark.asyncio
+    @patch("src.domain.util.http_client.get", new_callable=AsyncMock)
     @patch("src.domain.util.os.path.exists")
     @patch("src.domain.util.open")
-    def test_acquire_external_resource_http_error(self, mock_open, mock_exists, mock_requests):
+    async def test_acquire_external_resource_http_error(self, mock_open, mock_exists, mock_get):
         """Test acquiring resource when HTTP error occurs."""
         mock_exists.return_value = False
         mock_response = MagicMock()
         mock_response.raise_for_status.side_effect = Exception("HTTP 404")
-        mock_requests.get.return_value = mock_response
+        mock_get.return_value = mock_response
 
         with patch("src.domain.util.logger"), contextlib.suppress(Exception):
-            acquire_external_resource("http://example.com/file.txt", "file.txt")
+            await acquire_external_resource("http://example.com/file.txt", "file.txt")
 
     @patch("src.domain.util.ADMIN_IDS", ["123456", "789012"])
     def test_is_admin_tg_user_admin(self):
@@ -143,25 +145,24 @@ class TestUtilAdvanced:
 
         assert result is False
 
-    @patch("src.domain.util.Bakchod")
-    def test_paywall_user_sufficient_rokda(self, mock_bakchod_model):
+    @patch("src.domain.util.bakchod_dao")
+    def test_paywall_user_sufficient_rokda(self, mock_bakchod_model, fake_ledger):
         """Test paywall when user has sufficient rokda."""
         mock_bakchod = MagicMock()
         mock_bakchod.rokda = 100.0
-        mock_bakchod_model.get_by_id.return_value = mock_bakchod
+        mock_bakchod_model.get_bakchod_by_id.return_value = mock_bakchod
 
         result = paywall_user("user123", 50.0)
 
         assert result is True
         assert mock_bakchod.rokda == 50.0
-        assert mock_bakchod.save.called
 
-    @patch("src.domain.util.Bakchod")
-    def test_paywall_user_insufficient_rokda(self, mock_bakchod_model):
+    @patch("src.domain.util.bakchod_dao")
+    def test_paywall_user_insufficient_rokda(self, mock_bakchod_model, fake_ledger):
         """Test paywall when user has insufficient rokda."""
         mock_bakchod = MagicMock()
         mock_bakchod.rokda = 30.0
-        mock_bakchod_model.get_by_id.return_value = mock_bakchod
+        mock_bakchod_model.get_bakchod_by_id.return_value = mock_bakchod
 
         result = paywall_user("user123", 50.0)
 
@@ -169,12 +170,12 @@ class TestUtilAdvanced:
         assert mock_bakchod.rokda == 30.0
         assert not mock_bakchod.save.called
 
-    @patch("src.domain.util.Bakchod")
-    def test_paywall_user_exact_rokda(self, mock_bakchod_model):
+    @patch("src.domain.util.bakchod_dao")
+    def test_paywall_user_exact_rokda(self, mock_bakchod_model, fake_ledger):
         """Test paywall when user has exactly the required rokda."""
         mock_bakchod = MagicMock()
         mock_bakchod.rokda = 50.0
-        mock_bakchod_model.get_by_id.return_value = mock_bakchod
+        mock_bakchod_model.get_bakchod_by_id.return_value = mock_bakchod
 
         result = paywall_user("user123", 50.0)
 
@@ -182,19 +183,18 @@ class TestUtilAdvanced:
         assert mock_bakchod.rokda == 50.0
         assert not mock_bakchod.save.called
 
-    @patch("src.domain.util.Bakchod")
-    def test_paywall_user_not_found(self, mock_bakchod_model):
-        """Test paywall when bakchod is not found - raises DoesNotExist."""
-        mock_bakchod_model.get_by_id.side_effect = DoesNotExist()
+    @patch("src.domain.util.bakchod_dao")
+    def test_paywall_user_not_found(self, mock_bakchod_dao):
+        """Test paywall when bakchod is not found."""
+        mock_bakchod_dao.get_bakchod_by_id.return_value = None
 
-        from peewee import DoesNotExist as PeeweeDoesNotExist
+        result = paywall_user("nonexistent", 50.0)
 
-        with pytest.raises(PeeweeDoesNotExist):
-            paywall_user("nonexistent", 50.0)
+        assert result is False
 
     @patch("src.domain.util.GroupMember")
     @patch("src.domain.util.choose_random_element_from_list")
-    @patch("src.domain.util.Bakchod")
+    @patch("src.domain.util.bakchod_dao")
     def test_get_random_bakchod_from_group_success(
         self, mock_bakchod, mock_random_choose, mock_groupmember
     ):
@@ -208,12 +208,12 @@ class TestUtilAdvanced:
 
         mock_bakchod_instance = MagicMock()
         mock_bakchod_instance.username = "testuser"
-        mock_bakchod.get_by_id.return_value = mock_bakchod_instance
+        mock_bakchod.get_bakchod_by_id.return_value = mock_bakchod_instance
 
         result = get_random_bakchod_from_group("group123", "avoid_me")
 
         assert result == mock_bakchod_instance
-        mock_bakchod.get_by_id.assert_called_with("user123")
+        mock_bakchod.get_bakchod_by_id.assert_called_with("user123")
 
     @patch("src.domain.util.GroupMember")
     @patch("src.domain.util.choose_random_element_from_list")